@@ -107,7 +107,8 @@ CREATE TABLE test.Order_contents (
     order_id INTEGER,
     orderable_id INTEGER,
     orderable_quantity INTEGER,
-    -- item_price FLOAT(24) CHECK (item_price >= 0),
+    -- unit price of the orderable when the order was paid, NULL while the order is pending
+    orderable_unit_price FLOAT(53) DEFAULT NULL CHECK (orderable_unit_price >= 0),
     PRIMARY KEY (order_id, orderable_id),
     FOREIGN KEY (order_id) REFERENCES test.Orders(order_id),
     FOREIGN KEY (orderable_id) REFERENCES test.Orderables(orderable_id)
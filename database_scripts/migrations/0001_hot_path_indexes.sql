@@ -0,0 +1,45 @@
+-- Indexes and unique constraints for the columns looked up on the hot paths
+-- (login, order polling, order hydration, driver deliveries).
+-- Tables are not schema-qualified: the migration runs in the schema of the connection.
+
+-- Login: one account per mail / phone number, the constraint also indexes the lookup
+ALTER TABLE Customers ADD CONSTRAINT customers_mail_key UNIQUE (customer_mail);
+ALTER TABLE Customers ADD CONSTRAINT customers_phone_key UNIQUE (customer_phone);
+ALTER TABLE Drivers ADD CONSTRAINT drivers_phone_key UNIQUE (driver_phone);
+
+-- Hydration: an orderable is a single item or a single bundle
+ALTER TABLE Items ADD CONSTRAINT items_orderable_id_key UNIQUE (orderable_id);
+ALTER TABLE Bundles ADD CONSTRAINT bundles_orderable_id_key UNIQUE (orderable_id);
+
+-- Items of the bundles, and bundles containing an item
+CREATE INDEX IF NOT EXISTS bundle_items_item_id_idx ON Bundle_Items (item_id);
+
+-- Orders containing an orderable (Order_contents is indexed by order_id through its key)
+CREATE INDEX IF NOT EXISTS order_contents_orderable_id_idx ON Order_contents (orderable_id);
+
+-- Order history of a customer, newest first
+CREATE INDEX IF NOT EXISTS orders_customer_created_at_idx
+    ON Orders (order_customer_id, order_created_at DESC);
+
+-- Current order of a customer: only the orders that are neither delivered nor cancelled
+CREATE INDEX IF NOT EXISTS orders_customer_active_idx
+    ON Orders (order_customer_id, order_paid_at DESC)
+    WHERE order_state NOT IN (4, 5);
+
+-- Polling by state (kitchen, drivers, admin): delivered and cancelled orders make most of
+-- the table but are never polled, they are left out of the index
+CREATE INDEX IF NOT EXISTS orders_active_state_idx
+    ON Orders (order_state, order_created_at)
+    WHERE order_state IN (0, 1, 2, 3);
+
+-- Revenue by period
+CREATE INDEX IF NOT EXISTS orders_paid_at_idx
+    ON Orders (order_paid_at)
+    WHERE order_paid_at IS NOT NULL;
+
+-- Deliveries of a driver, newest first, and the one in progress
+CREATE INDEX IF NOT EXISTS deliveries_driver_created_at_idx
+    ON Deliveries (delivery_driver_id, delivery_created_at DESC);
+CREATE INDEX IF NOT EXISTS deliveries_driver_in_progress_idx
+    ON Deliveries (delivery_driver_id)
+    WHERE delivery_state = 1;
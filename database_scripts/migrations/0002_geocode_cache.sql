@@ -0,0 +1,12 @@
+-- Persistent cache of the geocoding results, shared by every worker and kept across restarts.
+-- The key is the normalized address (lower case, single spaces), the result is the raw
+-- response of the geocoding API.
+
+CREATE TABLE IF NOT EXISTS Geocode_cache (
+    address_key VARCHAR(512) PRIMARY KEY,
+    geocode_result JSONB NOT NULL,
+    geocoded_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Purge of the expired entries
+CREATE INDEX IF NOT EXISTS geocode_cache_geocoded_at_idx ON Geocode_cache (geocoded_at);
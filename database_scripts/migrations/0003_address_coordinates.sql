@@ -0,0 +1,15 @@
+-- Coordinates of the addresses, stored when they are geocoded so that the delivery zone,
+-- the route of a delivery and the distance to the restaurant need no call to the maps API.
+-- Existing rows are filled by `pdm backfillcoords`.
+
+ALTER TABLE Addresses ADD COLUMN IF NOT EXISTS address_latitude DOUBLE PRECISION;
+ALTER TABLE Addresses ADD COLUMN IF NOT EXISTS address_longitude DOUBLE PRECISION;
+ALTER TABLE Addresses ADD COLUMN IF NOT EXISTS address_geohash VARCHAR(12);
+
+-- Addresses close to a point share a geohash prefix: `address_geohash LIKE 'gbwcr%'`
+CREATE INDEX IF NOT EXISTS addresses_geohash_idx
+    ON Addresses (address_geohash text_pattern_ops);
+
+-- Rows left to backfill
+CREATE INDEX IF NOT EXISTS addresses_missing_coordinates_idx
+    ON Addresses (address_id) WHERE address_latitude IS NULL;
@@ -0,0 +1,12 @@
+-- Keyset pagination of the order listings: the id breaks the ties between orders created
+-- at the same time, so the sort key is unique and a page starts right after the cursor.
+
+-- Admin listing of all the orders, newest first
+CREATE INDEX IF NOT EXISTS orders_created_at_id_idx
+    ON Orders (order_created_at DESC, order_id DESC);
+
+-- Order history of a customer, newest first (replaces the index without the id)
+CREATE INDEX IF NOT EXISTS orders_customer_created_at_id_idx
+    ON Orders (order_customer_id, order_created_at DESC, order_id DESC);
+
+DROP INDEX IF EXISTS orders_customer_created_at_idx;
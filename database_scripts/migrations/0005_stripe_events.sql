@@ -0,0 +1,10 @@
+-- Stripe events already processed by the webhook. Stripe delivers an event at least once,
+-- so an event is only applied if its id can be inserted here, in the same transaction as
+-- its effects.
+
+CREATE TABLE IF NOT EXISTS Stripe_events (
+    event_id VARCHAR(255) PRIMARY KEY,
+    event_type VARCHAR(255) NOT NULL,
+    event_order_id INTEGER,
+    event_processed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,12 @@
+-- Stripe Price of each version (unit amount, in cents) of the orderables, so a checkout
+-- session only sends price ids. Stripe prices can't change: a new price of an orderable is
+-- a new row, with a new Stripe Price of the same Stripe Product.
+
+CREATE TABLE IF NOT EXISTS Stripe_prices (
+    orderable_id INTEGER NOT NULL REFERENCES Orderables(orderable_id) ON DELETE CASCADE,
+    unit_amount INTEGER NOT NULL CHECK (unit_amount >= 0),
+    stripe_product_id VARCHAR(255) NOT NULL,
+    stripe_price_id VARCHAR(255) NOT NULL,
+    synced_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (orderable_id, unit_amount)
+);
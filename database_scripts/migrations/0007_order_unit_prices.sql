@@ -0,0 +1,5 @@
+-- Unit price of the orderables of an order, frozen when the order is paid so repricing the
+-- menu doesn't change it. NULL while the order is pending: the current price applies.
+
+ALTER TABLE Order_contents ADD COLUMN IF NOT EXISTS orderable_unit_price FLOAT(53)
+    CHECK (orderable_unit_price >= 0);
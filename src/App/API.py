@@ -4,6 +4,7 @@ from fastapi.responses import RedirectResponse
 from fastapi.staticfiles import StaticFiles
 
 from src.utils.log_init import initialiser_logs
+from src.utils.query_stats import QueryStatsMiddleware
 
 from .AdminController.AdminController import admin_router
 from .AdminController.AdminOrderablesController import admin_orderables_router
@@ -12,6 +13,8 @@ from .AdminController.AdminUsersController import admin_users_router
 from .AuthentificationController import auth_router
 from .CustomerController import customer_router
 from .DriverController import driver_router
+from .init_app import query_metrics
+from .StripeController import stripe_router
 from .WebController import web_router
 
 
@@ -24,6 +27,8 @@ def run_app():
     )
 
     initialiser_logs("Projet Ub'EJR Eats")
+    # Also wraps the admin app mounted below
+    app.add_middleware(QueryStatsMiddleware, metrics=query_metrics)
     app.mount("/static", StaticFiles(directory="static"), name="static")
 
     admin_app = FastAPI(
@@ -44,6 +49,7 @@ def run_app():
     app.include_router(auth_router)
     app.include_router(customer_router)
     app.include_router(driver_router)
+    app.include_router(stripe_router)
 
     @app.get("/", include_in_schema=False)
     async def redirect_to_login():
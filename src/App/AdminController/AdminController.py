@@ -1,4 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from datetime import date, datetime, time, timedelta
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 
@@ -7,6 +10,7 @@ from src.App.init_app import (
     driver_service,
     menu_service,
     order_service,
+    query_metrics,
 )
 from src.App.JWTBearer import AdminBearer
 
@@ -50,6 +54,55 @@ def get_overview():
         raise HTTPException(status_code=500, detail=f"Error fetching datas: {e}") from e
 
 
+query_start = Query(None, description="First day of the period (included)")
+query_end = Query(None, description="Last day of the period (included)")
+
+
+@admin_router.get("/revenue", status_code=status.HTTP_200_OK, dependencies=[Depends(AdminBearer())])
+def get_revenue(
+    bucket: Literal["day", "week"] = Query("day", description="Detail the revenue by day/week"),
+    start: Optional[date] = query_start,
+    end: Optional[date] = query_end,
+):
+    """
+    Get the earnings of Ub'EJR over a period, detailed by day or by week
+
+    Parameters
+    ----------
+    bucket: Literal["day", "week"]
+        Granularity of the detail, the weeks start on monday
+    start: Optional[date]
+        First day of the period, the beginning of the history by default
+    end: Optional[date]
+        Last day of the period, today by default
+    """
+    start_datetime = datetime.combine(start, time.min) if start else None
+    end_datetime = datetime.combine(end + timedelta(days=1), time.min) if end else None
+    try:
+        return order_service.get_revenue(bucket, start_datetime, end_datetime)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching datas: {e}") from e
+
+
+@admin_router.get("/cache", status_code=status.HTTP_200_OK, dependencies=[Depends(AdminBearer())])
+def get_cache_stats():
+    """
+    Get the usage statistics (hits, misses, invalidations...) of the in-memory caches
+    """
+    return {"menu": menu_service.get_menu_cache_stats()}
+
+
+@admin_router.get("/queries", status_code=status.HTTP_200_OK, dependencies=[Depends(AdminBearer())])
+def get_query_stats():
+    """
+    Get the histograms of the number of SQL queries and of the database time (in ms)
+    of the requests, by route, the most expensive routes first
+    """
+    return query_metrics.snapshot()
+
+
 @admin_router.get("/logout", response_class=HTMLResponse)
 async def logout(request: Request):
     """
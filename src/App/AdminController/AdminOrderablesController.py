@@ -136,7 +136,7 @@ def get_item_by_id(item_id: int = Path(description="The id of the item you want"
 @admin_orderables_router.post(
     "/items", status_code=status.HTTP_201_CREATED, dependencies=[Depends(AdminBearer())]
 )
-async def create_item(
+def create_item(
     item_name: str = Query(description="The name of the item"),
     item_price: float = Query(description="The price of the item", gt=0),
     item_type: Literal["Starter", "Main course", "Dessert", "Side dish", "Drink"] = Query(
@@ -182,7 +182,7 @@ async def create_item(
 @admin_orderables_router.put(
     "/items/{item_id}", status_code=status.HTTP_200_OK, dependencies=[Depends(AdminBearer())]
 )
-async def update_item(
+def update_item(
     item_id: int = Path(description="The id of the item you want to update"),
     item_name: str = Query(None, description="The name of the item"),
     item_price: float = Query(None, description="The price of the item", gt=0),
@@ -283,7 +283,7 @@ query_item_quantities = Query(None, description="Quantités correspondantes")
 @admin_orderables_router.post(
     "/bundles", status_code=status.HTTP_201_CREATED, dependencies=[Depends(AdminBearer())]
 )
-async def create_bundle(
+def create_bundle(
     bundle_name: str = Query(description="The name of the bundle"),
     bundle_reduction: int = Query(
         description="The reduction percentage of the bundle", ge=0, le=100
@@ -361,7 +361,7 @@ async def create_bundle(
 @admin_orderables_router.put(
     "/bundles/{bundle_id}", status_code=status.HTTP_200_OK, dependencies=[Depends(AdminBearer())]
 )
-async def update_bundle(
+def update_bundle(
     bundle_id: int = Path(description="The id of the bundle you want to update"),
     bundle_name: Optional[str] = Query(description="The name of the bundle"),
     bundle_reduction: Optional[int] = Query(
@@ -1,8 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, Path, Query, status
+from typing import Dict, Optional, Tuple
 
-from src.App.init_app import order_service
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Response, status
+from fastapi.responses import StreamingResponse
+
+from src.App.init_app import order_event_hub, order_service
 from src.App.JWTBearer import AdminBearer
 from src.Model.APIOrder import APIOrder
+from src.Model.Order import OrderState
+from src.utils.order_events import SSE_HEADERS, event_stream
+from src.utils.pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
 
 admin_orders_router = APIRouter(tags=["Orders"], dependencies=[Depends(AdminBearer())])
 
@@ -11,26 +17,65 @@ admin_orders_router = APIRouter(tags=["Orders"], dependencies=[Depends(AdminBear
 @admin_orders_router.get(
     "/orders", status_code=status.HTTP_200_OK, dependencies=[Depends(AdminBearer())]
 )
-def get_all_orders(limit: int = Query(15, description="How many orders do you wanna show", gt=0)):
+def get_all_orders(
+    response: Response,
+    limit: int = Query(15, description="How many orders do you wanna show", gt=0, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="The X-Next-Cursor of the previous page"),
+):
     """
-    Fetch the most recents orders
+    Fetch the most recents orders, a page at a time.
+    The cursor of the next page is sent in the X-Next-Cursor header, absent on the last page
 
     Parameters
     ----------
+    response: Response
+        The response, carrying the cursor of the next page
     limit: int
         The number of orders you want to display
+    cursor: Optional[str]
+        The cursor of the page, None for the first page
     """
     try:
         if limit < 0:
             raise HTTPException(
                 status_code=403, detail="You should choose a positive number of orders to see."
             )
-        orders = order_service.get_all_orders(limit)
+        orders = order_service.get_all_orders(limit, cursor)
+        page_cursor = order_service.orders_cursor(orders, limit)
+        if page_cursor is not None:
+            response.headers[NEXT_CURSOR_HEADER] = page_cursor
         return [APIOrder.from_order(order) for order in orders]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching orders: {e}") from e
 
 
+def kitchen_snapshot() -> Tuple[str, list]:
+    orders = order_service.get_orders_by_state(OrderState.PAID)
+    return "snapshot", [APIOrder.from_order(order).model_dump(mode="json") for order in orders]
+
+
+def kitchen_delta(event: Dict) -> Tuple[str, Dict]:
+    if event["order_state"] == OrderState.PAID.name:
+        order = order_service.get_order_by_id(event["order_id"])
+        return "added", APIOrder.from_order(order).model_dump(mode="json")
+    return "updated", event
+
+
+@admin_orders_router.get(
+    "/orders/events", status_code=status.HTTP_200_OK, dependencies=[Depends(AdminBearer())]
+)
+async def stream_orders() -> StreamingResponse:
+    """
+    Stream the orders as server-sent events (`EventSource`): a "snapshot" of the orders to
+    prepare (the paid orders), then each order "added" once paid and every other state
+    change as "updated" (its id, customer, state and previous state)
+    """
+    stream = event_stream(order_event_hub, kitchen_snapshot, kitchen_delta)
+    return StreamingResponse(stream, media_type="text/event-stream", headers=SSE_HEADERS)
+
+
 @admin_orders_router.get(
     "/orders/{order_id}", status_code=status.HTTP_200_OK, dependencies=[Depends(AdminBearer())]
 )
@@ -1,6 +1,6 @@
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Path, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Response, status
 
 from src.App.init_app import (
     customer_service,
@@ -9,6 +9,7 @@ from src.App.init_app import (
 from src.App.JWTBearer import AdminBearer
 from src.Model.APICustomer import APICustomer
 from src.Model.APIDriver import APIDriver
+from src.utils.pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
 
 admin_users_router = APIRouter(tags=["Customers / Drivers"], dependencies=[Depends(AdminBearer())])
 
@@ -17,21 +18,33 @@ admin_users_router = APIRouter(tags=["Customers / Drivers"], dependencies=[Depen
 @admin_users_router.get(
     "/customers", status_code=status.HTTP_200_OK, dependencies=[Depends(AdminBearer())]
 )
-def get_all_customers(limit: int = Query(15, description="The number of customers you want")):
+def get_all_customers(
+    response: Response,
+    limit: int = Query(15, description="The number of customers you want", gt=0, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="The X-Next-Cursor of the previous page"),
+):
     """
-    Fetch a certain number of customers
+    Fetch a certain number of customers, ordered by id.
+    The cursor of the next page is sent in the X-Next-Cursor header, absent on the last page
 
     Parameters
     ----------
+    response: Response
+        The response, carrying the cursor of the next page
     limit: int
         The number of customers you want to display
+    cursor: Optional[str]
+        The cursor of the page, None for the first page
     """
     try:
         if limit < 0:
             raise HTTPException(
                 status_code=403, detail="You should choose a positive number of orders to see."
             )
-        customers = customer_service.get_all_customers(limit)
+        customers = customer_service.get_all_customers(limit, cursor)
+        page_cursor = customer_service.customers_cursor(customers, limit)
+        if page_cursor is not None:
+            response.headers[NEXT_CURSOR_HEADER] = page_cursor
         return [APICustomer.from_customer(customer) for customer in customers]
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Invalid request: {e}") from e
@@ -179,17 +192,29 @@ def create_driver(
 @admin_users_router.get(
     "/drivers", status_code=status.HTTP_200_OK, dependencies=[Depends(AdminBearer())]
 )
-def get_all_drivers(limit: int = Query(15, description="The number of drivers you want")):
+def get_all_drivers(
+    response: Response,
+    limit: int = Query(15, description="The number of drivers you want", gt=0, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="The X-Next-Cursor of the previous page"),
+):
     """
-    Fetch a certain number of drivers
+    Fetch a certain number of drivers, ordered by id.
+    The cursor of the next page is sent in the X-Next-Cursor header, absent on the last page
 
     Parameters
     ----------
+    response: Response
+        The response, carrying the cursor of the next page
     limit: int
         The number of drivers you want to display
+    cursor: Optional[str]
+        The cursor of the page, None for the first page
     """
     try:
-        drivers = driver_service.get_all_drivers()
+        drivers = driver_service.get_all_drivers(limit, cursor)
+        page_cursor = driver_service.drivers_cursor(drivers, limit)
+        if page_cursor is not None:
+            response.headers[NEXT_CURSOR_HEADER] = page_cursor
         return [APIDriver.from_driver(driver) for driver in drivers]
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Invalid request: {e}") from e
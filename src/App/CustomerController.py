@@ -1,6 +1,6 @@
-from typing import Annotated, Dict, List
+from typing import Annotated, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from fastapi.security import HTTPAuthorizationCredentials
 from pydantic import BaseModel
 
@@ -8,15 +8,15 @@ from src.Model.Address import Address
 from src.Model.APICustomer import APICustomer
 from src.Model.Bundle import Bundle
 from src.Model.Item import Item
+from src.utils.pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
 
 from .init_app import (
     address_service,
     customer_service,
-    jwt_service,
     order_service,
     stripe_service,
 )
-from .JWTBearer import CustomerBearer
+from .JWTBearer import CustomerBearer, get_jwt_claims
 
 customer_router = APIRouter(
     prefix="/customer", tags=["Customers"], dependencies=[Depends(CustomerBearer())]
@@ -30,6 +30,7 @@ class AddRemoveOrderable(BaseModel):
 
 # PROFILE
 def get_customer_id_from_token(
+    request: Request,
     credentials: Annotated[HTTPAuthorizationCredentials, Depends(CustomerBearer())],
 ) -> int:
     """
@@ -37,6 +38,8 @@ def get_customer_id_from_token(
 
     Parameters
     ----------
+    request : Request
+        The current request, its token is verified once by the bearer
     credentials : Annotated[HTTPAuthorizationCredentials, Depends
         The user's credentials
 
@@ -45,8 +48,7 @@ def get_customer_id_from_token(
     int
         The id of the connected user
     """
-    token = credentials.credentials
-    customer_id = int(jwt_service.validate_user_jwt(token)["user_id"])
+    customer_id = int(get_jwt_claims(request)["user_id"])
     return customer_id
 
 
@@ -71,11 +73,11 @@ def get_current_order_id(
     HTTPException
         If no order was created
     """
-    order = order_service.get_customer_current_order(customer_id)
-    if order is None:
+    order_id = order_service.get_customer_current_order_id(customer_id)
+    if order_id is None:
         raise HTTPException(status_code=404, detail="The order wasn't created")
 
-    return order.order_id
+    return order_id
 
 
 @customer_router.get(
@@ -386,19 +388,31 @@ def remove_orderable_from_order(
 @customer_router.get(
     "/me/order_history", status_code=status.HTTP_200_OK, dependencies=[Depends(CustomerBearer())]
 )
-def view_order_history(customer_id: int = Depends(get_customer_id_from_token)) -> List:
+def view_order_history(
+    response: Response,
+    customer_id: int = Depends(get_customer_id_from_token),
+    limit: int = Query(20, description="How many orders you want", gt=0, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="The X-Next-Cursor of the previous page"),
+) -> List:
     """
-    Get all the past and current orders of the customer
+    Get a page of the past and current orders of the customer, latests orders first.
+    The cursor of the next page is sent in the X-Next-Cursor header, absent on the last page
 
     Parameters
     ----------
+    response : Response
+        The response, carrying the cursor of the next page
     customer_id : int
         The id of the current customer
+    limit : int
+        The number of orders of the page
+    cursor : Optional[str]
+        The cursor of the page, None for the first page
 
     Returns
     -------
     List:
-        A list containing all the orders
+        A list containing the orders of the page
 
     Raises
     ------
@@ -408,7 +422,10 @@ def view_order_history(customer_id: int = Depends(get_customer_id_from_token)) -
         Catch any other Exception that could be raised
     """
     try:
-        orders = order_service.get_all_orders_by_customer(customer_id)
+        orders = order_service.get_all_orders_by_customer(customer_id, limit, cursor)
+        page_cursor = order_service.orders_cursor(orders, limit)
+        if page_cursor is not None:
+            response.headers[NEXT_CURSOR_HEADER] = page_cursor
         history = []
 
         for order in orders:
@@ -419,7 +436,7 @@ def view_order_history(customer_id: int = Depends(get_customer_id_from_token)) -
                     orderables_list.append(
                         {
                             "item_name": orderable.item_name,
-                            "item_price": orderable.price,
+                            "item_price": order.unit_price(orderable),
                             "quantity": qty,
                             "type": "item",
                         }
@@ -429,7 +446,7 @@ def view_order_history(customer_id: int = Depends(get_customer_id_from_token)) -
                     orderables_list.append(
                         {
                             "bundle_name": orderable.bundle_name,
-                            "bundle_price": orderable.price,
+                            "bundle_price": order.unit_price(orderable),
                             "quantity": qty,
                             "type": "bundle",
                         }
@@ -520,21 +537,14 @@ def create_checkout_session(
     Raises
     ------
     HTTPException
-        If the order is already paid
-    HTTPException
-        If a ValueError is raised beforehand
+        If the order is empty or already paid, or if Stripe refused the session
     HTTPException
         Catch any other Exception that could be raised
     """
     try:
-        order = order_service.get_order_by_id(order_id)
-
-        if order.is_paid:
-            raise HTTPException(status_code=400, detail="Order is already paid.")
-
         customer = customer_service.get_customer_by_id(customer_id)
 
-        return stripe_service.create_checkout_session(order, customer.customer_mail)
+        return stripe_service.create_checkout_session(order_id, customer_id, customer.customer_mail)
 
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
@@ -550,19 +560,21 @@ def create_checkout_session(
     dependencies=[Depends(CustomerBearer())],
 )
 def verify_payment(
-    session_id: str,
+    order_id: int,
+    response: Response,
     customer_id: int = Depends(get_customer_id_from_token),
-    order_id: int = Depends(get_current_order_id),
 ) -> Dict:
     """
-    Verify that the payment was successful
+    Tell whether an order was paid. The payment is confirmed by Stripe through the
+    webhook, so this only reads the order: while the confirmation hasn't arrived, the
+    status is 202 and the page asks again.
 
     Parameters
     ----------
-    session_id : str
-        An unique id of the checkout session
     order_id : int
-        The id of the current order
+        The id of the order paid in the checkout session
+    response : Response
+        HTTP response, whose status is 202 while the payment isn't confirmed
     customer_id : int
         The id of the current customer
 
@@ -574,30 +586,26 @@ def verify_payment(
     Raises
     ------
     HTTPException
-        If the orde wansn't paid
-    HTTPException
-        If a ValueError is raised beforehand
+        If the order doesn't exist or isn't an order of the customer
     HTTPException
         Catch any other Exception that could be raised
     """
     try:
-        payment_info = stripe_service.verify_payment(session_id)
-
-        if not payment_info["paid"]:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Payment not completed. Status: {payment_info['payment_status']}",
-            )
+        order = order_service.get_order_by_id(order_id)
+        if order.order_customer_id != customer_id:
+            raise ValueError(f"[Order Service] Cannot find: order with ID {order_id} not found.")
 
-        paid_order = order_service.mark_as_paid(order_id)
+        if not order.is_paid:
+            response.status_code = status.HTTP_202_ACCEPTED
+            return {"order_id": order.order_id, "paid": False}
 
         orderables_list = []
-        for orderable, qty in paid_order.order_orderables.items():
+        for orderable, qty in order.order_orderables.items():
             if isinstance(orderable, Item):
                 orderables_list.append(
                     {
                         "item_name": orderable.item_name,
-                        "item_price": orderable.price,
+                        "item_price": order.unit_price(orderable),
                         "item_type": orderable.item_type,
                         "image_url": orderable.orderable_image_url,
                         "quantity": qty,
@@ -608,21 +616,21 @@ def verify_payment(
                 orderables_list.append(
                     {
                         "bundle_name": orderable.bundle_name,
-                        "bundle_price": orderable.price,
+                        "bundle_price": order.unit_price(orderable),
                         "image_url": orderable.orderable_image_url,
                         "quantity": qty,
                         "type": "bundle",
                     }
                 )
-        order_service.create_order(customer_id)
 
         return {
-            "order_id": paid_order.order_id,
-            "order_price": paid_order.order_price,
+            "order_id": order.order_id,
+            "paid": True,
+            "order_price": order.order_price,
             "orderables": orderables_list,
         }
 
     except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e)) from e
+        raise HTTPException(status_code=404, detail=str(e)) from e
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error processing payment: {e}") from e
+        raise HTTPException(status_code=500, detail=f"Error verifying payment: {e}") from e
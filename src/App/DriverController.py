@@ -1,17 +1,23 @@
 from typing import Annotated, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPAuthorizationCredentials
 from pydantic import BaseModel
 
 from src.Model.APIDriver import APIDriver
 from src.Model.APIOrder import APIOrder
-from src.Model.Bundle import Bundle
-from src.Model.Item import Item
 from src.Model.Order import OrderState
-
-from .init_app import customer_service, driver_service, gm_service, jwt_service, order_service
-from .JWTBearer import DriverBearer
+from src.utils.order_events import SSE_HEADERS, event_stream
+
+from .init_app import (
+    customer_service,
+    driver_service,
+    gm_service,
+    order_event_hub,
+    order_service,
+)
+from .JWTBearer import DriverBearer, get_jwt_claims
 
 driver_router = APIRouter(
     prefix="/drivers", tags=["Drivers"], dependencies=[Depends(DriverBearer())]
@@ -19,6 +25,7 @@ driver_router = APIRouter(
 
 
 def get_driver_id_from_token(
+    request: Request,
     credentials: Annotated[HTTPAuthorizationCredentials, Depends(DriverBearer())],
 ) -> int:
     """
@@ -26,6 +33,8 @@ def get_driver_id_from_token(
 
     Parameters
     ----------
+    request : Request
+        The current request, its token is verified once by the bearer
     credentials : Annotated[HTTPAuthorizationCredentials, Depends
         The driver's credentials
 
@@ -34,8 +43,7 @@ def get_driver_id_from_token(
     int
         The id of the connected user
     """
-    token = credentials.credentials
-    driver_id = int(jwt_service.validate_user_jwt(token)["user_id"])
+    driver_id = int(get_jwt_claims(request)["user_id"])
     return driver_id
 
 
@@ -137,10 +145,16 @@ def update_profile(
 @driver_router.get(
     "/orders", status_code=status.HTTP_200_OK, dependencies=[Depends(DriverBearer())]
 )
-def get_available_orders() -> List:
+def get_available_orders(sort_by_distance: bool = False) -> List:
     """
     Fetch all the orders a driver can choose from
 
+    Parameters
+    ----------
+    sort_by_distance : bool
+        Sort the orders by distance from the restaurant instead of by date, the orders
+        whose address isn't geocoded yet come last. By default False
+
     Returns
     -------
     List
@@ -154,53 +168,40 @@ def get_available_orders() -> List:
         Catch any other Exception that could be raised
     """
     try:
-        orders = order_service.get_available_orders_for_drivers()
-        orders_infos = []
-
-        for order in orders:
-            orderables_list = []
-            address = customer_service.get_address_by_customer_id(order.order_customer_id)
-
-            for orderable, qty in order.order_orderables.items():
-                if isinstance(orderable, Item):
-                    orderables_list.append(
-                        {
-                            "item_name": orderable.item_name,
-                            "item_price": orderable.price,
-                            "item_type": orderable.item_type,
-                            "image_url": orderable.orderable_image_url,
-                            "quantity": qty,
-                            "type": "item",
-                        }
-                    )
-
-                elif isinstance(orderable, Bundle):
-                    orderables_list.append(
-                        {
-                            "bundle_name": orderable.bundle_name,
-                            "bundle_price": orderable.price,
-                            "image_url": orderable.orderable_image_url,
-                            "quantity": qty,
-                            "type": "bundle",
-                        }
-                    )
-
-            formatted_order = {
-                "order_id": order.order_id,
-                "order_timestamp": str(order.order_created_at),
-                "order_price": round(order.order_price, 2),
-                "items": orderables_list,
-                "address": str(address),
-            }
-            orders_infos.append(formatted_order)
-
-        return orders_infos
+        return driver_service.get_available_orders_feed(sort_by_distance)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e)) from e
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching orders: {e}") from e
 
 
+@driver_router.get(
+    "/orders/events", status_code=status.HTTP_200_OK, dependencies=[Depends(DriverBearer())]
+)
+async def stream_available_orders(sort_by_distance: bool = False) -> StreamingResponse:
+    """
+    Stream the orders a driver can choose from, as server-sent events (`EventSource`):
+    a "snapshot" of the available orders, then each order "added" (newly prepared) or
+    "removed" (taken by a driver or cancelled), pushed as soon as its state changes
+
+    Parameters
+    ----------
+    sort_by_distance : bool
+        Sort the orders of the snapshots by distance from the restaurant, by default False
+
+    Returns
+    -------
+    StreamingResponse
+        The `text/event-stream`, open until the driver leaves
+    """
+    stream = event_stream(
+        order_event_hub,
+        lambda: ("snapshot", driver_service.get_available_orders_feed(sort_by_distance)),
+        driver_service.get_feed_delta,
+    )
+    return StreamingResponse(stream, media_type="text/event-stream", headers=SSE_HEADERS)
+
+
 @driver_router.get(
     "/orders/{order_id}", status_code=status.HTTP_200_OK, dependencies=[Depends(DriverBearer())]
 )
@@ -282,6 +283,44 @@ def start_delivery(order_id: int, driver_id: int = Depends(get_driver_id_from_to
         raise HTTPException(status_code=500, detail=f"Error starting delivery: {e}") from e
 
 
+@driver_router.post(
+    "/orders/claim-next",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(DriverBearer())],
+)
+def claim_next_order(driver_id: int = Depends(get_driver_id_from_token)) -> Optional[int]:
+    """
+    Start the delivery of the oldest available order, whichever order the other drivers
+    are starting at the same time
+
+    Parameters
+    ----------
+    driver_id : int
+        The id of the current driver
+
+    Returns
+    -------
+    Optional[int]
+        The id of the order to deliver, None if no order is available
+
+    Raises
+    ------
+    HTTPException
+        If the driver is already delivering
+    HTTPException
+        Catch any other Exception that could be raised
+    """
+    try:
+        delivery = driver_service.claim_next_available(driver_id)
+        if delivery is None:
+            return None
+        return delivery.delivery_order_id
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error starting delivery: {e}") from e
+
+
 @driver_router.get(
     "/orders/{order_id}/path",
     status_code=status.HTTP_200_OK,
@@ -318,7 +357,11 @@ def get_path(order_id: int) -> Dict:
                 detail=f"This order isn't in delivery, current state : {order.order_state}",
             )
         address = customer_service.get_address_by_customer_id(order.order_customer_id)
-        return {"url": gm_service.get_path(str(address)), "address": str(address)}
+        if address.has_coordinates:
+            url = gm_service.get_route_url(address.address_latitude, address.address_longitude)
+        else:
+            url = gm_service.get_path(str(address))
+        return {"url": url, "address": str(address)}
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e)) from e
     except Exception as e:
@@ -1,18 +1,58 @@
+from typing import Optional
+
 from fastapi import HTTPException, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jwt import DecodeError, ExpiredSignatureError
 
-from .init_app import jwt_service
+from src.Service.JWTService import JwtService
+
+
+def get_jwt_claims(request: Request) -> dict:
+    """
+    Claims of the token of the current request, verified once by the first bearer
+
+    Parameters
+    ----------
+    request : Request
+        The current request, already authenticated by a JWTBearer
+
+    Returns
+    -------
+    dict
+        The id and role of the authenticated user
+    """
+    claims = getattr(request.state, "jwt_claims", None)
+    if claims is None:
+        raise HTTPException(status_code=400, detail="Please login")
+    return claims
 
 
 class JWTBearer(HTTPBearer):
     def __init__(
         self,
         # auto_error: bool = False
+        jwt_service: Optional[JwtService] = None,
     ):
+        """`jwt_service` verifies the tokens, by default the one of the app"""
         super(JWTBearer, self).__init__(auto_error=False)
+        self._jwt_service = jwt_service
+
+    @property
+    def jwt_service(self) -> JwtService:
+        if self._jwt_service is None:
+            # imported on first use, so the bearers don't build the whole app on import
+            from .init_app import jwt_service
+
+            self._jwt_service = jwt_service
+        return self._jwt_service
 
     async def __call__(self, request: Request) -> HTTPAuthorizationCredentials:
+        # The router, the route and the id dependencies all run a bearer: only the first
+        # one reads and verifies the token
+        credentials = getattr(request.state, "jwt_credentials", None)
+        if credentials is not None:
+            return credentials
+
         credentials: HTTPAuthorizationCredentials | None = await super(JWTBearer, self).__call__(
             request
         )
@@ -26,7 +66,7 @@ class JWTBearer(HTTPBearer):
         if not credentials.scheme == "Bearer":
             raise HTTPException(status_code=403, detail="Invalid authentication scheme.")
         try:
-            jwt_service.validate_user_jwt(credentials.credentials)
+            claims = self.jwt_service.validate_user_jwt(credentials.credentials)
         except ExpiredSignatureError as e:
             raise HTTPException(status_code=403, detail="Expired token") from e
         except DecodeError as e:
@@ -34,15 +74,16 @@ class JWTBearer(HTTPBearer):
         except Exception as e:
             raise HTTPException(status_code=403, detail="Unknown error") from e
 
+        request.state.jwt_claims = claims
+        request.state.jwt_credentials = credentials
         return credentials
 
 
 class AdminBearer(JWTBearer):
     async def __call__(self, request: Request):
         credentials = await super().__call__(request)
-        payload = jwt_service.validate_user_jwt(credentials.credentials)
 
-        if payload["user_role"] != "admin":
+        if get_jwt_claims(request)["user_role"] != "admin":
             raise HTTPException(403, "You need to be an admin to access this page.")
 
         return credentials
@@ -51,9 +92,8 @@ class AdminBearer(JWTBearer):
 class CustomerBearer(JWTBearer):
     async def __call__(self, request: Request):
         credentials = await super().__call__(request)
-        payload = jwt_service.validate_user_jwt(credentials.credentials)
 
-        if payload["user_role"] != "customer":
+        if get_jwt_claims(request)["user_role"] != "customer":
             raise HTTPException(403, "You need to be a customer to access this page.")
 
         return credentials
@@ -62,9 +102,8 @@ class CustomerBearer(JWTBearer):
 class DriverBearer(JWTBearer):
     async def __call__(self, request: Request):
         credentials = await super().__call__(request)
-        payload = jwt_service.validate_user_jwt(credentials.credentials)
 
-        if payload["user_role"] != "driver":
+        if get_jwt_claims(request)["user_role"] != "driver":
             raise HTTPException(403, "You need to be a driver to access this page.")
 
         return credentials
@@ -0,0 +1,50 @@
+from typing import Dict
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+
+from src.App.init_app import payment_service, stripe_service
+
+stripe_router = APIRouter(prefix="/stripe", tags=["Stripe"])
+
+
+async def get_raw_body(request: Request) -> bytes:
+    """The body of the request as sent, since the signature of Stripe is computed on it"""
+    return await request.body()
+
+
+@stripe_router.post("/webhook", status_code=status.HTTP_200_OK, include_in_schema=False)
+def stripe_webhook(
+    payload: bytes = Depends(get_raw_body),
+    stripe_signature: str = Header(...),
+) -> Dict:
+    """
+    Receive the events of Stripe. A paid checkout session marks its order as paid and
+    opens the next order of the customer, whatever the number of times it's sent.
+
+    Parameters
+    ----------
+    payload : bytes
+        The raw body of the request
+    stripe_signature : str
+        The `Stripe-Signature` header, checked with the `STRIPE_WEBHOOK_SECRET`
+
+    Returns
+    -------
+    Dict
+        Whether the event was applied
+
+    Raises
+    ------
+    HTTPException
+        If the signature is invalid or the event malformed (Stripe doesn't retry)
+    HTTPException
+        Catch any other Exception, so that Stripe sends the event again later
+    """
+    try:
+        event = stripe_service.construct_event(payload, stripe_signature)
+        return {"received": True, "applied": payment_service.handle_event(event)}
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing event: {e}") from e
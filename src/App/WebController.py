@@ -19,8 +19,8 @@ async def login_page(request: Request):
 @web_router.get("/menu", response_class=HTMLResponse)
 async def menu_page(request: Request, user_id: int = Depends(get_customer_id_from_token)):
     try:
-        user = customer_service.get_customer_by_id(user_id)
-        orderables = menu_service.get_all_orderables()
+        user = await customer_service.get_customer_by_id_async(user_id)
+        orderables = await menu_service.get_all_orderables_async()
         items = []
         bundles = []
         item_types = []
@@ -51,7 +51,7 @@ async def menu_page(request: Request, user_id: int = Depends(get_customer_id_fro
 
 
 @web_router.get("/profile", response_class=HTMLResponse)
-async def get_profile_page(
+def get_profile_page(
     request: Request,
 ):
     try:
@@ -101,10 +101,7 @@ async def payment_success_page(
     token = jwt_service.decode_jwt(cookie.encode("utf-8"))
 
     user_id = int(token["user_id"])
-    user = customer_service.get_customer_by_id(user_id)
-
-    user_id = int(token["user_id"])
-    user = customer_service.get_customer_by_id(user_id)
+    user = await customer_service.get_customer_by_id_async(user_id)
     return templates.TemplateResponse(
         "customer/success.html",
         {"request": request, "session_id": session_id, "user": user},
@@ -112,9 +109,7 @@ async def payment_success_page(
 
 
 @web_router.get("/deliveries", response_class=HTMLResponse)
-async def driver_deliveries_page(
-    request: Request, user_id: int = Depends(get_driver_id_from_token)
-):
+def driver_deliveries_page(request: Request, user_id: int = Depends(get_driver_id_from_token)):
     driver = driver_service.get_driver_by_id(user_id)
     return templates.TemplateResponse(
         "driver/deliveries.html", {"request": request, "user": driver}
@@ -122,7 +117,7 @@ async def driver_deliveries_page(
 
 
 @web_router.get("/delivery/{order_id}", response_class=HTMLResponse)
-async def driver_active_delivery_page(
+def driver_active_delivery_page(
     request: Request, order_id: int, user_id: int = Depends(get_driver_id_from_token)
 ):
     user = driver_service.get_driver_by_id(user_id)
@@ -1,15 +1,20 @@
+import os
+
 from dotenv import load_dotenv
 
 from src.DAO.AddressDAO import AddressDAO
 from src.DAO.AdminDAO import AdminDAO
+from src.DAO.AsyncDBConnector import AsyncDBConnector
 from src.DAO.BundleDAO import BundleDAO
 from src.DAO.CustomerDAO import CustomerDAO
-from src.DAO.DBConnector import DBConnector
 from src.DAO.DeliveryDAO import DeliveryDAO
 from src.DAO.DriverDAO import DriverDAO
+from src.DAO.GeocodeDAO import GeocodeDAO
 from src.DAO.ItemDAO import ItemDAO
 from src.DAO.OrderableDAO import OrderableDAO
 from src.DAO.OrderDAO import OrderDAO
+from src.DAO.StripeEventDAO import StripeEventDAO
+from src.DAO.StripePriceDAO import StripePriceDAO
 from src.Service.AddressService import AddressService
 from src.Service.BundleService import BundleService
 from src.Service.CustomerService import CustomerService
@@ -19,11 +24,15 @@ from src.Service.ItemService import ItemService
 from src.Service.JWTService import JwtService
 from src.Service.MenuService import MenuService
 from src.Service.OrderService import OrderService
+from src.Service.PaymentService import PaymentService
 from src.Service.StripeService import StripeService
 from src.Service.UserService import UserService
+from src.utils.cache import TTLCache
+from src.utils.order_events import OrderEventHub
+from src.utils.query_stats import QueryMetrics
 
 load_dotenv()
-db_connector = DBConnector()
+db_connector = AsyncDBConnector()
 
 # DAOs
 address_dao = AddressDAO(db_connector)
@@ -34,19 +43,50 @@ orderable_dao = OrderableDAO(db_connector)
 item_dao = ItemDAO(db_connector, orderable_dao)
 bundle_dao = BundleDAO(db_connector, orderable_dao, item_dao)
 delivery_dao = DeliveryDAO(db_connector)
+geocode_dao = GeocodeDAO(db_connector)
+stripe_event_dao = StripeEventDAO(db_connector)
+stripe_price_dao = StripePriceDAO(db_connector)
+
+# Caches
+menu_cache = TTLCache(ttl=float(os.environ.get("MENU_CACHE_TTL") or 300))
+current_order_cache = TTLCache(
+    ttl=float(os.environ.get("CURRENT_ORDER_CACHE_TTL") or 300), maxsize=4096
+)
+email_domain_cache = TTLCache(
+    ttl=float(os.environ.get("EMAIL_DOMAIN_CACHE_TTL") or 3600), maxsize=1024
+)
+driver_feed_cache = TTLCache(ttl=float(os.environ.get("DRIVER_FEED_CACHE_TTL") or 3), maxsize=1)
+
+# Histograms of the queries of each route, filled by the QueryStatsMiddleware
+query_metrics = QueryMetrics()
 
 # Services
 order_dao = OrderDAO(db_connector, orderable_dao, item_dao, bundle_dao)
-gm_service = GoogleMapService()
-user_service = UserService(customer_dao, driver_dao, admin_dao)
+gm_service = GoogleMapService(geocode_dao)
+user_service = UserService(customer_dao, driver_dao, admin_dao, email_domain_cache)
 address_service = AddressService(address_dao, gm_service)
 customer_service = CustomerService(customer_dao, address_service, user_service)
-driver_service = DriverService(delivery_dao, driver_dao, order_dao, user_service)
-order_service = OrderService(order_dao, orderable_dao, item_dao, bundle_dao)
-item_service = ItemService(item_dao, order_dao)
-bundle_service = BundleService(bundle_dao)
-menu_service = MenuService(orderable_dao, item_dao, bundle_dao)
+driver_service = DriverService(
+    delivery_dao,
+    driver_dao,
+    order_dao,
+    user_service,
+    current_order_cache,
+    driver_feed_cache,
+    gm_service,
+)
+order_service = OrderService(
+    order_dao, orderable_dao, item_dao, bundle_dao, menu_cache, current_order_cache
+)
+stripe_service = StripeService(stripe_price_dao)
+item_service = ItemService(item_dao, order_dao, menu_cache, stripe_service)
+bundle_service = BundleService(bundle_dao, menu_cache, stripe_service)
+menu_service = MenuService(orderable_dao, item_dao, bundle_dao, menu_cache)
+payment_service = PaymentService(stripe_event_dao, order_service)
+
+# State transitions of the orders, pushed to the event streams of the drivers and the kitchen
+order_event_hub = OrderEventHub(db_connector)
+order_event_hub.add_listener(driver_service.refresh_driver_feed)
 
 
 jwt_service = JwtService()
-stripe_service = StripeService()
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional, Tuple
 
 from src.Model.Address import Address
 from src.utils.log_decorator import log
@@ -22,12 +22,17 @@ class AddressDAO(metaclass=Singleton):
         address_city: str,
         address_postal_code: int,
         address_country: str,
+        address_latitude: Optional[float] = None,
+        address_longitude: Optional[float] = None,
+        address_geohash: Optional[str] = None,
     ) -> Address:
         raw_created_address = self.db_connector.sql_query(
             """
             INSERT INTO Addresses (address_id, address_number, address_street, address_city,
-            address_postal_code, address_country)
-            VALUES (DEFAULT, %(number)s, %(street)s, %(city)s, %(postal_code)s, %(country)s)
+            address_postal_code, address_country, address_latitude, address_longitude,
+            address_geohash)
+            VALUES (DEFAULT, %(number)s, %(street)s, %(city)s, %(postal_code)s, %(country)s,
+            %(latitude)s, %(longitude)s, %(geohash)s)
             RETURNING *;
             """,
             {
@@ -36,6 +41,9 @@ class AddressDAO(metaclass=Singleton):
                 "city": address_city,
                 "postal_code": address_postal_code,
                 "country": address_country,
+                "latitude": address_latitude,
+                "longitude": address_longitude,
+                "geohash": address_geohash,
             },
             "one",
         )
@@ -62,6 +70,21 @@ class AddressDAO(metaclass=Singleton):
 
         return [Address(**raw_address) for raw_address in raw_addresses] if raw_addresses else []
 
+    @log
+    def get_addresses_without_coordinates(self, limit: int, after_id: int = 0) -> List[Address]:
+        raw_addresses = self.db_connector.sql_query(
+            """
+            SELECT *
+            FROM Addresses
+            WHERE address_latitude IS NULL AND address_id > %s
+            ORDER BY address_id
+            LIMIT %s;
+            """,
+            [after_id, limit],
+            "all",
+        )
+        return [Address(**raw_address) for raw_address in raw_addresses]
+
     # UPDATE
     @log
     def update_address(self, address_id: int, update: dict):
@@ -74,6 +97,9 @@ class AddressDAO(metaclass=Singleton):
             "address_city",
             "address_postal_code",
             "address_country",
+            "address_latitude",
+            "address_longitude",
+            "address_geohash",
         ]
         for key in update.keys():
             if key not in parameters_update:
@@ -95,6 +121,28 @@ class AddressDAO(metaclass=Singleton):
 
         return self.get_address_by_customer_id(address_id)
 
+    @log
+    def set_coordinates(self, coordinates: List[Tuple[int, float, float, str]]) -> None:
+        """Store the (address_id, latitude, longitude, geohash) of several addresses at once"""
+        if not coordinates:
+            return
+        address_ids, latitudes, longitudes, geohashes = (
+            list(column) for column in zip(*coordinates, strict=True)
+        )
+        self.db_connector.sql_query(
+            """
+            UPDATE Addresses AS a
+            SET address_latitude = c.latitude,
+                address_longitude = c.longitude,
+                address_geohash = c.geohash
+            FROM unnest(%s::int[], %s::float8[], %s::float8[], %s::varchar[])
+                 AS c(address_id, latitude, longitude, geohash)
+            WHERE a.address_id = c.address_id;
+            """,
+            [address_ids, latitudes, longitudes, geohashes],
+            "none",
+        )
+
     # DELETE
     @log
     def delete_address_by_id(self, address_id: int) -> None:
@@ -0,0 +1,137 @@
+import asyncio
+import time
+from typing import Dict, Literal, Optional, Union
+
+from psycopg import AsyncClientCursor, AsyncConnection, sql
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
+
+from src.utils.query_stats import record_query
+
+from .DBConnector import DBConnector
+
+
+class AsyncDBConnector(DBConnector):
+    """
+    DBConnector which can also run queries without blocking the event loop.
+
+    The synchronous API (`sql_query`) is unchanged, so the DAOs built on this connector keep
+    working from scripts and threads. `async_sql_query` checks a connection out of a pool of
+    psycopg 3 async connections configured like the synchronous pool. Parameters are bound
+    client side, as psycopg2 does, so the same SQL is used by both APIs.
+    Async queries are autocommitted, they don't join the `transaction` of the sync API.
+    """
+
+    def __init__(self, config=None, test=False):
+        super().__init__(config, test)
+        # An async pool is bound to the event loop which opened it
+        self._async_pools: Dict[asyncio.AbstractEventLoop, asyncio.Task] = {}
+
+    def _async_connection_kwargs(self) -> Dict:
+        return {
+            "host": self.host,
+            "port": self.port,
+            "dbname": self.database,
+            "user": self.user,
+            "password": self.password,
+            "options": f"-c search_path={self.schema}",
+            "row_factory": dict_row,
+            "cursor_factory": AsyncClientCursor,
+        }
+
+    async def _open_async_pool(self) -> AsyncConnectionPool:
+        pool = AsyncConnectionPool(
+            kwargs=self._async_connection_kwargs(),
+            min_size=self.pool_min_size,
+            max_size=self.pool_max_size,
+            timeout=self.pool_timeout,
+            max_lifetime=self.pool_recycle,
+            check=AsyncConnectionPool.check_connection,
+            open=False,
+        )
+        await pool.open()
+        return pool
+
+    async def get_async_pool(self) -> AsyncConnectionPool:
+        """
+        The async connection pool of the running event loop, opened on first use
+        """
+        loop = asyncio.get_running_loop()
+        opening = self._async_pools.get(loop)
+        if opening is None:
+            # Concurrent first calls wait for the same pool instead of opening one each
+            opening = loop.create_task(self._open_async_pool())
+            self._async_pools[loop] = opening
+        try:
+            return await asyncio.shield(opening)
+        except Exception:
+            if self._async_pools.get(loop) is opening:
+                del self._async_pools[loop]
+            raise
+
+    async def async_pool_stats(self) -> Dict[str, int]:
+        """
+        Usage statistics of the async connection pool of the running event loop
+        """
+        pool = await self.get_async_pool()
+        return pool.get_stats()
+
+    async def close_async(self) -> None:
+        """Close the async connection pool of the running event loop"""
+        opening = self._async_pools.pop(asyncio.get_running_loop(), None)
+        if opening is not None:
+            pool = await opening
+            await pool.close()
+
+    async def listen(self, channel: str) -> AsyncConnection:
+        """
+        Open a connection listening to a channel of notifications (`LISTEN`)
+
+        The connection is dedicated and autocommitted: a connection of the pool would stop
+        listening once given back. Iterate over its `notifies()` to receive the
+        notifications and close it to stop listening.
+
+        Parameters
+        ----------
+        channel : str
+            Name of the channel, as given to `pg_notify`
+
+        Returns
+        -------
+        AsyncConnection
+            The listening connection
+        """
+        kwargs = self._async_connection_kwargs()
+        connection = await AsyncConnection.connect(autocommit=True, **kwargs)
+        try:
+            await connection.execute(sql.SQL("LISTEN {}").format(sql.Identifier(channel)))
+        except Exception:
+            await connection.close()
+            raise
+        return connection
+
+    async def async_sql_query(
+        self,
+        query: str,
+        data: Optional[Union[tuple, list, dict]] = None,
+        return_type: Union[Literal["one"], Literal["all"], Literal["none"]] = "one",
+    ):
+        try:
+            pool = await self.get_async_pool()
+            # the transaction is committed when leaving the block, rolled back on error
+            async with pool.connection() as connection:
+                async with connection.cursor() as cursor:
+                    start = time.perf_counter()
+                    await cursor.execute(query, data)
+                    result = None
+                    if return_type == "one":
+                        result = await cursor.fetchone()
+                    if return_type == "all":
+                        result = await cursor.fetchall()
+                    rows = cursor.rowcount if cursor.description is not None else 0
+                    record_query(query, time.perf_counter() - start, max(rows, 0))
+                return result
+        except Exception as e:
+            print("ERROR")
+            print(e)
+            raise e
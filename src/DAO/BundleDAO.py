@@ -6,17 +6,36 @@ from src.Model.Item import Item
 from src.utils.log_decorator import log
 from src.utils.singleton import Singleton
 
-from .DBConnector import DBConnector
+from .AsyncDBConnector import AsyncDBConnector
 from .ItemDAO import ItemDAO
 from .OrderableDAO import OrderableDAO
 
+# Bundles along with the columns of their orderable, shared by the sync and async readers
+SELECT_BUNDLES = """
+SELECT b.*, o.orderable_image_name, o.orderable_image_url, o.is_in_menu
+FROM Bundles AS b
+JOIN Orderables AS o ON o.orderable_id = b.orderable_id
+"""
+
+# Items (with the columns of their orderable) of a list of bundles
+SELECT_ITEMS_OF_BUNDLES = """
+SELECT bi.bundle_id, bi.item_quantity, i.*,
+       o.orderable_image_name, o.orderable_image_url, o.is_in_menu
+FROM Bundle_Items AS bi
+INNER JOIN Items AS i ON bi.item_id=i.item_id
+INNER JOIN Orderables AS o ON i.orderable_id=o.orderable_id
+WHERE bi.bundle_id = ANY(%s);
+"""
+
 
 class BundleDAO(metaclass=Singleton):
-    db_connector: DBConnector
+    db_connector: AsyncDBConnector
     orderable_dao: OrderableDAO
     item_dao: ItemDAO
 
-    def __init__(self, db_connector: DBConnector, orderable_dao: OrderableDAO, item_dao: ItemDAO):
+    def __init__(
+        self, db_connector: AsyncDBConnector, orderable_dao: OrderableDAO, item_dao: ItemDAO
+    ):
         self.db_connector = db_connector
         self.orderable_dao = orderable_dao
         self.item_dao = item_dao
@@ -34,45 +53,39 @@ class BundleDAO(metaclass=Singleton):
         bundle_image: Optional[str] = None,
         is_in_menu: bool = False,
     ):
-        orderable_id = self.orderable_dao.create_orderable(
-            "bundle", bundle_name, bundle_image, is_in_menu
-        )
-        raw_bundle = self.db_connector.sql_query(
-            """
-            INSERT INTO Bundles (bundle_id, orderable_id, bundle_name,
-                                bundle_reduction, bundle_description,
-                                bundle_availability_start_date,
-                                bundle_availability_end_date)
-            VALUES
-            (DEFAULT, %(orderable_id)s, %(bundle_name)s, %(bundle_reduction)s,
-             %(bundle_description)s, %(bundle_availability_start_date)s,
-             %(bundle_availability_end_date)s)
-            RETURNING *;
-            """,
-            {
-                "orderable_id": orderable_id,
-                "bundle_name": bundle_name,
-                "bundle_reduction": bundle_reduction,
-                "bundle_description": bundle_description,
-                "bundle_availability_start_date": bundle_availability_start_date,
-                "bundle_availability_end_date": bundle_availability_end_date,
-            },
-            "one",
-        )
-
-        bundle_id = raw_bundle["bundle_id"]
-        for item, qty in bundle_items.items():
-            self.db_connector.sql_query(
-                """INSERT INTO Bundle_Items (bundle_id, item_id, item_quantity)
-                   VALUES (%(bundle_id)s, %(item_id)s, %(item_quantity)s);
+        with self.db_connector.transaction():
+            orderable_id = self.orderable_dao.create_orderable(
+                "bundle", bundle_name, bundle_image, is_in_menu
+            )
+            raw_bundle = self.db_connector.sql_query(
+                """
+                INSERT INTO Bundles (bundle_id, orderable_id, bundle_name,
+                                    bundle_reduction, bundle_description,
+                                    bundle_availability_start_date,
+                                    bundle_availability_end_date)
+                VALUES
+                (DEFAULT, %(orderable_id)s, %(bundle_name)s, %(bundle_reduction)s,
+                 %(bundle_description)s, %(bundle_availability_start_date)s,
+                 %(bundle_availability_end_date)s)
+                RETURNING *;
                 """,
-                {"bundle_id": bundle_id, "item_id": item.item_id, "item_quantity": qty},
-                "none",
+                {
+                    "orderable_id": orderable_id,
+                    "bundle_name": bundle_name,
+                    "bundle_reduction": bundle_reduction,
+                    "bundle_description": bundle_description,
+                    "bundle_availability_start_date": bundle_availability_start_date,
+                    "bundle_availability_end_date": bundle_availability_end_date,
+                },
+                "one",
             )
 
-        raw_bundle["bundle_items"] = self._get_items_from_bundle(bundle_id)
-        orderable_infos = self.orderable_dao.get_info_from_orderable(orderable_id)
-        raw_bundle_full = {**raw_bundle, **orderable_infos}
+            bundle_id = raw_bundle["bundle_id"]
+            self._insert_bundle_items(bundle_id, bundle_items)
+
+            raw_bundle["bundle_items"] = self._get_items_from_bundle(bundle_id)
+            orderable_infos = self.orderable_dao.get_info_from_orderable(orderable_id)
+            raw_bundle_full = {**raw_bundle, **orderable_infos}
 
         return Bundle(**raw_bundle_full)
 
@@ -95,17 +108,16 @@ class BundleDAO(metaclass=Singleton):
         """
 
         raw_bundle = self.db_connector.sql_query(
-            "SELECT * FROM Bundles WHERE bundle_id = %s",
-            [bundle_id],
-            "one",
+            f"{SELECT_BUNDLES} WHERE b.bundle_id = %s", [bundle_id], "one"
         )
-        if raw_bundle is None:
-            return None
+        return self._build_bundles([raw_bundle])[0] if raw_bundle else None
 
-        raw_bundle["bundle_items"] = self._get_items_from_bundle(bundle_id)
-        orderable_infos = self.orderable_dao.get_info_from_orderable(raw_bundle["orderable_id"])
-        raw_bundle_full = {**raw_bundle, **orderable_infos}
-        return Bundle(**raw_bundle_full)
+    @log
+    async def get_bundle_by_id_async(self, bundle_id: int) -> Optional[Bundle]:
+        raw_bundle = await self.db_connector.async_sql_query(
+            f"{SELECT_BUNDLES} WHERE b.bundle_id = %s", [bundle_id], "one"
+        )
+        return (await self._build_bundles_async([raw_bundle]))[0] if raw_bundle else None
 
     @log
     def get_bundle_by_orderable_id(self, orderable_id: int) -> Optional[Bundle]:
@@ -123,29 +135,30 @@ class BundleDAO(metaclass=Singleton):
             An Bundle object or None if not found
         """
         raw_bundle = self.db_connector.sql_query(
-            "SELECT * FROM Bundles WHERE orderable_id = %s",
-            [orderable_id],
-            "one",
+            f"{SELECT_BUNDLES} WHERE b.orderable_id = %s", [orderable_id], "one"
         )
+        return self._build_bundles([raw_bundle])[0] if raw_bundle else None
 
-        if raw_bundle is None:
-            return None
-
-        raw_bundle["bundle_items"] = self._get_items_from_bundle(raw_bundle["bundle_id"])
-        orderable_infos = self.orderable_dao.get_info_from_orderable(raw_bundle["orderable_id"])
-        raw_bundle_full = {**raw_bundle, **orderable_infos}
-        return Bundle(**raw_bundle_full)
+    @log
+    async def get_bundle_by_orderable_id_async(self, orderable_id: int) -> Optional[Bundle]:
+        raw_bundle = await self.db_connector.async_sql_query(
+            f"{SELECT_BUNDLES} WHERE b.orderable_id = %s", [orderable_id], "one"
+        )
+        return (await self._build_bundles_async([raw_bundle]))[0] if raw_bundle else None
 
     @log
     def get_all_bundle(self) -> Optional[List[Bundle]]:
         raw_bundles = self.db_connector.sql_query(
-            "SELECT bundle_id FROM Bundles", return_type="all"
+            f"{SELECT_BUNDLES} ORDER BY b.bundle_id", return_type="all"
         )
+        return self._build_bundles(raw_bundles) if raw_bundles else []
 
-        if not raw_bundles:
-            return []
-
-        return [self.get_bundle_by_id(raw_bundle["bundle_id"]) for raw_bundle in raw_bundles]
+    @log
+    async def get_all_bundle_async(self) -> List[Bundle]:
+        raw_bundles = await self.db_connector.async_sql_query(
+            f"{SELECT_BUNDLES} ORDER BY b.bundle_id", return_type="all"
+        )
+        return await self._build_bundles_async(raw_bundles) if raw_bundles else []
 
     @log
     def update_bundle(self, bundle_id: int, update: dict):
@@ -165,53 +178,47 @@ class BundleDAO(metaclass=Singleton):
             if key not in parameters_update:
                 raise ValueError(f"{key} is not a parameter of Bundle.")
 
-        if update.get("bundle_image"):
-            bundle = self.get_bundle_by_id(bundle_id)
-            orderable_id = bundle.orderable_id
-            bundle_name = (
-                update.get("bundle_name") if update.get("bundle_name") else bundle.bundle_name
-            )
-            self.orderable_dao.update_image(
-                orderable_id, "bundle", bundle_name, update["bundle_image"]
-            )
-            update.pop("bundle_image")
+        with self.db_connector.transaction():
+            if update.get("bundle_image"):
+                bundle = self.get_bundle_by_id(bundle_id)
+                orderable_id = bundle.orderable_id
+                bundle_name = (
+                    update.get("bundle_name") if update.get("bundle_name") else bundle.bundle_name
+                )
+                self.orderable_dao.update_image(
+                    orderable_id, "bundle", bundle_name, update["bundle_image"]
+                )
+                update.pop("bundle_image")
 
-        if update.get("bundle_items"):
-            bundle_items = update["bundle_items"]
-            self.db_connector.sql_query(
-                """DELETE FROM Bundle_Items WHERE bundle_id=%s;
-                """,
-                [bundle_id],
-                "none",
-            )
-            for item, qty in bundle_items.items():
+            if update.get("bundle_items"):
+                bundle_items = update["bundle_items"]
                 self.db_connector.sql_query(
-                    """INSERT INTO Bundle_Items
-                       VALUES(%(bundle_id)s, %(item_id)s, %(item_quantity)s);
+                    """DELETE FROM Bundle_Items WHERE bundle_id=%s;
                     """,
-                    {"bundle_id": bundle_id, "item_id": item.item_id, "item_quantity": qty},
+                    [bundle_id],
                     "none",
                 )
-            update.pop("bundle_items")
+                self._insert_bundle_items(bundle_id, bundle_items)
+                update.pop("bundle_items")
 
-        if len(update) == 0:
-            return self.get_bundle_by_id(bundle_id)
+            if len(update) == 0:
+                return self.get_bundle_by_id(bundle_id)
 
-        updated_fields = [f"{field} = %({field})s" for field in update.keys()]
-        set_field = ", ".join(updated_fields)
-        params = {**update, "bundle_id": bundle_id}
+            updated_fields = [f"{field} = %({field})s" for field in update.keys()]
+            set_field = ", ".join(updated_fields)
+            params = {**update, "bundle_id": bundle_id}
 
-        self.db_connector.sql_query(
-            f"""
-            UPDATE Bundles
-            SET {set_field}
-            WHERE bundle_id = %(bundle_id)s;
-            """,
-            params,
-            "none",
-        )
+            self.db_connector.sql_query(
+                f"""
+                UPDATE Bundles
+                SET {set_field}
+                WHERE bundle_id = %(bundle_id)s;
+                """,
+                params,
+                "none",
+            )
 
-        return self.get_bundle_by_id(bundle_id)
+            return self.get_bundle_by_id(bundle_id)
 
     @log
     def delete_bundle(self, bundle_id: int):
@@ -219,44 +226,103 @@ class BundleDAO(metaclass=Singleton):
         if bundle:
             orderable_id = bundle.orderable_id
 
-            self.db_connector.sql_query(
-                """DELETE FROM Bundle_Items WHERE bundle_id=%s;
-                """,
-                [bundle_id],
-                "none",
-            )
-            self.orderable_dao.delete_orderable(orderable_id)
-            self.db_connector.sql_query(
-                """ DELETE FROM Bundles WHERE bundle_id=%s
-                    RETURNING *;""",
-                [bundle_id],
-                "one",
-            )
+            with self.db_connector.transaction():
+                self.db_connector.sql_query(
+                    """DELETE FROM Bundle_Items WHERE bundle_id=%s;
+                    """,
+                    [bundle_id],
+                    "none",
+                )
+                self.orderable_dao.delete_orderable(orderable_id)
+                self.db_connector.sql_query(
+                    """ DELETE FROM Bundles WHERE bundle_id=%s
+                        RETURNING *;""",
+                    [bundle_id],
+                    "one",
+                )
 
         return None
 
-    def _get_items_from_bundle(self, bundle_id: int) -> Dict[Item, int]:
-        raw_items = self.db_connector.sql_query(
-            """
-            SELECT i.*, bi.item_id, bi.item_quantity
-            FROM Bundle_Items AS bi
-            INNER JOIN Items AS i ON bi.item_id=i.item_id
-            WHERE bi.bundle_id=%s;
+    def _insert_bundle_items(self, bundle_id: int, bundle_items: Dict[Item, int]) -> None:
+        """Insert all the items of a bundle with a single statement"""
+        if not bundle_items:
+            return
+
+        self.db_connector.sql_query(
+            """INSERT INTO Bundle_Items (bundle_id, item_id, item_quantity)
+               SELECT %(bundle_id)s, item_id, item_quantity
+               FROM unnest(%(item_ids)s::int[], %(item_quantities)s::int[])
+                    AS bi(item_id, item_quantity);
             """,
-            [bundle_id],
-            "all",
+            {
+                "bundle_id": bundle_id,
+                "item_ids": [item.item_id for item in bundle_items],
+                "item_quantities": list(bundle_items.values()),
+            },
+            "none",
         )
 
-        if not raw_items:
+    def _get_items_from_bundle(self, bundle_id: int) -> Dict[Item, int]:
+        return self._get_items_from_bundles([bundle_id])[bundle_id]
+
+    def _get_items_from_bundles(self, bundle_ids: List[int]) -> Dict[int, Dict[Item, int]]:
+        """
+        Retrieve the items of several bundles in a single query
+
+        Parameters
+        ----------
+        bundle_ids : List[int]
+            Unique identifiers of the bundles
+
+        Returns
+        -------
+        Dict[int, Dict[Item, int]]
+            For each bundle id, the items of the bundle and their quantity
+        """
+        if not bundle_ids:
             return {}
 
-        items_dict = {}
-        for raw_item in raw_items:
-            quantity = raw_item["item_quantity"]
+        raw_items = self.db_connector.sql_query(SELECT_ITEMS_OF_BUNDLES, [list(bundle_ids)], "all")
+        return self._assemble_items_of_bundles(bundle_ids, raw_items)
 
-            item = self.item_dao.get_item_by_id(raw_item["item_id"])
+    async def _get_items_from_bundles_async(
+        self, bundle_ids: List[int]
+    ) -> Dict[int, Dict[Item, int]]:
+        if not bundle_ids:
+            return {}
 
-            if item:
-                items_dict[item] = quantity
+        raw_items = await self.db_connector.async_sql_query(
+            SELECT_ITEMS_OF_BUNDLES, [list(bundle_ids)], "all"
+        )
+        return self._assemble_items_of_bundles(bundle_ids, raw_items)
+
+    def _build_bundles(self, raw_bundles: List[Dict]) -> List[Bundle]:
+        items_by_bundle = self._get_items_from_bundles([raw["bundle_id"] for raw in raw_bundles])
+        return self._assemble_bundles(raw_bundles, items_by_bundle)
 
-        return items_dict
+    async def _build_bundles_async(self, raw_bundles: List[Dict]) -> List[Bundle]:
+        items_by_bundle = await self._get_items_from_bundles_async(
+            [raw["bundle_id"] for raw in raw_bundles]
+        )
+        return self._assemble_bundles(raw_bundles, items_by_bundle)
+
+    @staticmethod
+    def _assemble_items_of_bundles(
+        bundle_ids: List[int], raw_items: Optional[List[Dict]]
+    ) -> Dict[int, Dict[Item, int]]:
+        items_by_bundle = {bundle_id: {} for bundle_id in bundle_ids}
+        for raw_item in raw_items or []:
+            bundle_id = raw_item.pop("bundle_id")
+            quantity = raw_item.pop("item_quantity")
+            items_by_bundle[bundle_id][Item(**raw_item)] = quantity
+
+        return items_by_bundle
+
+    @staticmethod
+    def _assemble_bundles(
+        raw_bundles: List[Dict], items_by_bundle: Dict[int, Dict[Item, int]]
+    ) -> List[Bundle]:
+        return [
+            Bundle(**raw_bundle, bundle_items=items_by_bundle[raw_bundle["bundle_id"]])
+            for raw_bundle in raw_bundles
+        ]
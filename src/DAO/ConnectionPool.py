@@ -0,0 +1,280 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, Iterator, Union
+
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, connection
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection could be checked out before the timeout"""
+
+
+class PooledConnection:
+    """
+    A psycopg2 connection along with the bookkeeping needed by the pool
+
+    Attributes
+    ----------
+    connection : connection
+        The underlying psycopg2 connection
+    created_at : float
+        Monotonic timestamp of the opening of the connection
+    last_used_at : float
+        Monotonic timestamp of the last time the connection was given back to the pool
+    """
+
+    def __init__(self, raw_connection: connection) -> None:
+        self.connection = raw_connection
+        self.created_at = time.monotonic()
+        self.last_used_at = self.created_at
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.created_at
+
+    @property
+    def idle_time(self) -> float:
+        return time.monotonic() - self.last_used_at
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of psycopg2 connections.
+
+    Connections are opened lazily up to `max_size`. A caller asking for a connection while
+    all of them are in use waits (at most `timeout` seconds) for one to be given back.
+
+    Parameters
+    ----------
+    connect : Callable[[], connection]
+        Function opening a new psycopg2 connection
+    min_size : int
+        Number of connections opened by `open` and kept alive, by default 1
+    max_size : int
+        Maximum number of connections opened at the same time, by default 10
+    timeout : float
+        Maximum time (in seconds) to wait for a connection, by default 30
+    recycle : float
+        Age (in seconds) after which a connection is closed and replaced, by default 1800
+    health_check_after : float
+        A connection idle for longer than this (in seconds) is pinged before being
+        checked out, by default 30. Use 0 to ping on every checkout.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], connection],
+        min_size: int = 1,
+        max_size: int = 10,
+        timeout: float = 30.0,
+        recycle: float = 1800.0,
+        health_check_after: float = 30.0,
+    ) -> None:
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError(
+                "[ConnectionPool] Invalid pool size: expected 0 <= min_size <= max_size "
+                "and max_size >= 1"
+            )
+
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.recycle = recycle
+        self.health_check_after = health_check_after
+
+        self._condition = threading.Condition()
+        self._idle: Deque[PooledConnection] = deque()
+        self._size = 0
+        self._in_use = 0
+        self._closed = False
+
+        self._checkouts = 0
+        self._waits = 0
+        self._total_wait_time = 0.0
+        self._max_wait_time = 0.0
+        self._recycled = 0
+        self._discarded = 0
+
+    def open(self) -> None:
+        """Open `min_size` connections so the first requests don't pay the handshake"""
+        while True:
+            with self._condition:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                pooled = PooledConnection(self._connect())
+            except Exception:
+                with self._condition:
+                    self._size -= 1
+                raise
+            with self._condition:
+                self._idle.append(pooled)
+                self._condition.notify()
+
+    def getconn(self) -> PooledConnection:
+        """
+        Check out a healthy connection, opening one if the pool isn't full
+
+        Raises
+        ------
+        PoolTimeout
+            If no connection was available before the timeout
+        """
+        start = time.monotonic()
+        deadline = start + self.timeout
+        waited = False
+        pooled = None
+
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise PoolTimeout("[ConnectionPool] The pool is closed.")
+                if self._idle:
+                    pooled = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._record_wait(time.monotonic() - start, waited=True)
+                    raise PoolTimeout(
+                        f"[ConnectionPool] No connection available after {self.timeout}s "
+                        f"({self._in_use} in use, max {self.max_size})."
+                    )
+                waited = True
+                self._condition.wait(remaining)
+            self._in_use += 1
+            self._checkouts += 1
+            self._record_wait(time.monotonic() - start, waited)
+
+        try:
+            if pooled is not None and not self._is_usable(pooled):
+                self._close_quietly(pooled)
+                pooled = None
+            if pooled is None:
+                pooled = PooledConnection(self._connect())
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._in_use -= 1
+                self._condition.notify()
+            raise
+
+        return pooled
+
+    def putconn(self, pooled: PooledConnection, discard: bool = False) -> None:
+        """
+        Give a connection back to the pool.
+        Broken, too old or explicitly discarded connections are closed instead.
+        """
+        raw_connection = pooled.connection
+        if not discard and not raw_connection.closed:
+            try:
+                if raw_connection.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                    raw_connection.rollback()
+            except Exception:
+                discard = True
+
+        expired = self.recycle >= 0 and pooled.age >= self.recycle
+        keep = not (discard or raw_connection.closed or expired or self._closed)
+
+        if not keep:
+            self._close_quietly(pooled)
+
+        with self._condition:
+            self._in_use -= 1
+            if keep:
+                pooled.last_used_at = time.monotonic()
+                self._idle.append(pooled)
+            else:
+                self._size -= 1
+                if expired:
+                    self._recycled += 1
+                else:
+                    self._discarded += 1
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self) -> Iterator[connection]:
+        """Check out a connection for the duration of the `with` block"""
+        pooled = self.getconn()
+        try:
+            yield pooled.connection
+        except Exception:
+            self.putconn(pooled, discard=bool(pooled.connection.closed))
+            raise
+        else:
+            self.putconn(pooled)
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """
+        Snapshot of the pool usage
+
+        Returns
+        -------
+        Dict[str, Union[int, float]]
+            size, in_use, idle, the number of checkouts, how many of them had to wait,
+            the total/max wait time (seconds) and the number of recycled/discarded connections
+        """
+        with self._condition:
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "total_wait_time": round(self._total_wait_time, 6),
+                "max_wait_time": round(self._max_wait_time, 6),
+                "recycled": self._recycled,
+                "discarded": self._discarded,
+            }
+
+    def close(self) -> None:
+        """Close all the idle connections, connections in use are closed when given back"""
+        with self._condition:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._condition.notify_all()
+        for pooled in idle:
+            self._close_quietly(pooled)
+
+    def _record_wait(self, wait_time: float, waited: bool) -> None:
+        """Must be called while holding the condition"""
+        if waited:
+            self._waits += 1
+        self._total_wait_time += wait_time
+        self._max_wait_time = max(self._max_wait_time, wait_time)
+
+    def _is_usable(self, pooled: PooledConnection) -> bool:
+        if pooled.connection.closed:
+            return False
+        if self.recycle >= 0 and pooled.age >= self.recycle:
+            with self._condition:
+                self._recycled += 1
+            return False
+        if pooled.idle_time >= self.health_check_after:
+            try:
+                with pooled.connection.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                pooled.connection.rollback()
+            except Exception:
+                with self._condition:
+                    self._discarded += 1
+                return False
+        return True
+
+    @staticmethod
+    def _close_quietly(pooled: PooledConnection) -> None:
+        try:
+            pooled.connection.close()
+        except Exception:
+            pass
@@ -1,19 +1,56 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
+from src.Model.Address import Address
 from src.Model.Customer import Customer
 from src.utils.log_decorator import log
 from src.utils.singleton import Singleton
 
 from .AddressDAO import AddressDAO
-from .DBConnector import DBConnector
+from .AsyncDBConnector import AsyncDBConnector
+
+# A customer along with its address, in a single round trip
+SELECT_CUSTOMER_WITH_ADDRESS = """
+SELECT c.*,
+       a.address_id, a.address_number, a.address_street,
+       a.address_city, a.address_postal_code, a.address_country,
+       a.address_latitude, a.address_longitude, a.address_geohash
+FROM Customers AS c
+LEFT JOIN Addresses AS a ON a.address_id = c.customer_address_id
+WHERE c.customer_id = %s
+"""
+
+# Keyset pagination by id: a page starts right after the last customer of the previous page
+SELECT_CUSTOMERS_PAGE = """
+SELECT c.*,
+       a.address_id, a.address_number, a.address_street,
+       a.address_city, a.address_postal_code, a.address_country,
+       a.address_latitude, a.address_longitude, a.address_geohash
+FROM Customers AS c
+LEFT JOIN Addresses AS a ON a.address_id = c.customer_address_id
+WHERE c.customer_id > %s
+ORDER BY c.customer_id
+LIMIT %s
+"""
+
+ADDRESS_COLUMNS = (
+    "address_id",
+    "address_number",
+    "address_street",
+    "address_city",
+    "address_postal_code",
+    "address_country",
+    "address_latitude",
+    "address_longitude",
+    "address_geohash",
+)
 
 
 class CustomerDAO(metaclass=Singleton):
-    db_connector: DBConnector
+    db_connector: AsyncDBConnector
     address_dao: AddressDAO
 
-    def __init__(self, db_connector: DBConnector, address_dao: AddressDAO):
+    def __init__(self, db_connector: AsyncDBConnector, address_dao: AddressDAO):
         self.db_connector = db_connector
         self.address_dao = address_dao
 
@@ -80,6 +117,15 @@ class CustomerDAO(metaclass=Singleton):
         mapped_args = self._map_db_to_model(raw_customer)
         return Customer(**mapped_args)
 
+    @log
+    async def get_customer_by_id_async(self, customer_id: int) -> Optional[Customer]:
+        raw_customer = await self.db_connector.async_sql_query(
+            SELECT_CUSTOMER_WITH_ADDRESS, [customer_id], "one"
+        )
+        if raw_customer is None:
+            return None
+        return self._build_customer_with_address(raw_customer)
+
     @log
     def get_customer_by_email(self, mail: str) -> Optional[Customer]:
         raw_customer = self.db_connector.sql_query(
@@ -105,20 +151,16 @@ class CustomerDAO(metaclass=Singleton):
         return Customer(**mapped_args)
 
     @log
-    def get_all_customers(self, limit: int = 15) -> Optional[List[Customer]]:
-        raw_customers = self.db_connector.sql_query(
-            "SELECT * from Customers LIMIT %s;", [limit], "all"
-        )
+    def get_all_customers(
+        self, limit: int = 15, after: Optional[Tuple[int]] = None
+    ) -> Optional[List[Customer]]:
+        last_id = after[0] if after else 0
+        raw_customers = self.db_connector.sql_query(SELECT_CUSTOMERS_PAGE, [last_id, limit], "all")
 
         if not raw_customers:
             return []
 
-        for raw_customer in raw_customers:
-            raw_customer["customer_address"] = self.address_dao.get_address_by_customer_id(
-                raw_customer["customer_id"]
-            )
-            print(raw_customer["customer_address"])
-        return [Customer(**self._map_db_to_model(customer)) for customer in raw_customers]
+        return [self._build_customer_with_address(customer) for customer in raw_customers]
 
     # UPDATE
     @log
@@ -171,6 +213,13 @@ class CustomerDAO(metaclass=Singleton):
         )
         return number["count"]
 
+    def _build_customer_with_address(self, raw_customer: dict) -> Customer:
+        raw_address = {column: raw_customer.pop(column) for column in ADDRESS_COLUMNS}
+        raw_customer["customer_address"] = (
+            Address(**raw_address) if raw_address["address_id"] is not None else None
+        )
+        return Customer(**self._map_db_to_model(raw_customer))
+
     @staticmethod
     def _map_db_to_model(raw_customer: dict) -> dict:
         """
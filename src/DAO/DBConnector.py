@@ -1,9 +1,33 @@
 import os
-from typing import Literal, Optional, Union
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Literal, Optional, Union
 
 import psycopg2
+from psycopg2.extensions import connection as Connection
 from psycopg2.extras import RealDictCursor
 
+from src.utils.query_stats import record_query
+
+from .ConnectionPool import ConnectionPool
+
+
+class InstrumentedCursor(RealDictCursor):
+    """
+    Cursor recording each query (duration, rows returned) in the stats of the current
+    request, see `src.utils.query_stats`
+    """
+
+    def execute(self, query, vars=None):  # noqa: A002
+        start = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            rows = self.rowcount if self.description is not None else 0
+            record_query(query, time.perf_counter() - start, max(rows, 0))
+
 
 class DBConnector:
     def __init__(self, config=None, test=False):
@@ -14,6 +38,7 @@ class DBConnector:
             self.user = config["user"]
             self.password = config["password"]
             self.schema = config["schema"]
+            pool_config = config.get("pool", {})
         else:
             self.host = os.environ["POSTGRES_HOST"]
             self.port = os.environ["POSTGRES_PORT"]
@@ -24,6 +49,116 @@ class DBConnector:
                 self.schema = os.environ["POSTGRES_SCHEMA_TEST"]
             else:
                 self.schema = os.environ["POSTGRES_SCHEMA"]
+            pool_config = {}
+
+        self.pool_min_size = int(
+            pool_config.get("min_size", os.environ.get("POSTGRES_POOL_MIN_SIZE") or 1)
+        )
+        self.pool_max_size = int(
+            pool_config.get("max_size", os.environ.get("POSTGRES_POOL_MAX_SIZE") or 10)
+        )
+        self.pool_timeout = float(
+            pool_config.get("timeout", os.environ.get("POSTGRES_POOL_TIMEOUT") or 30)
+        )
+        self.pool_recycle = float(
+            pool_config.get("recycle", os.environ.get("POSTGRES_POOL_RECYCLE") or 1800)
+        )
+        self.pool_health_check_after = float(
+            pool_config.get(
+                "health_check_after", os.environ.get("POSTGRES_POOL_HEALTH_CHECK_AFTER") or 30
+            )
+        )
+
+        self._pool: Optional[ConnectionPool] = None
+        self._pool_lock = threading.Lock()
+        # Connection of the transaction opened by the current thread or task, if any
+        self._transaction: ContextVar[Optional[Connection]] = ContextVar(
+            f"transaction_{id(self)}", default=None
+        )
+
+    def _connect(self):
+        return psycopg2.connect(
+            host=self.host,
+            port=self.port,
+            database=self.database,
+            user=self.user,
+            password=self.password,
+            options=f"-c search_path={self.schema}",
+            cursor_factory=InstrumentedCursor,
+        )
+
+    @property
+    def pool(self) -> ConnectionPool:
+        """
+        The connection pool shared by every DAO using this connector.
+        It is created (and filled with `min_size` connections) on first use.
+        """
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    pool = ConnectionPool(
+                        self._connect,
+                        min_size=self.pool_min_size,
+                        max_size=self.pool_max_size,
+                        timeout=self.pool_timeout,
+                        recycle=self.pool_recycle,
+                        health_check_after=self.pool_health_check_after,
+                    )
+                    pool.open()
+                    self._pool = pool
+        return self._pool
+
+    def pool_stats(self) -> Dict[str, Union[int, float]]:
+        """
+        Usage statistics of the connection pool (in use, idle, wait time...)
+        """
+        return self.pool.stats()
+
+    def close(self) -> None:
+        """Close every pooled connection"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool = None
+
+    @contextmanager
+    def transaction(self) -> Iterator[RealDictCursor]:
+        """
+        Unit of work: every `sql_query` made in the `with` block, by any DAO using this
+        connector, runs on the same connection. The statements are committed once when
+        leaving the block, or rolled back together if an exception is raised.
+
+        A transaction opened inside another one joins it, so DAO methods can open
+        their own transaction and still be grouped by a service.
+        The transaction is bound to the current thread (or asyncio task).
+
+        Yields
+        ------
+        RealDictCursor
+            A cursor on the connection of the transaction
+        """
+        connection = self._transaction.get()
+        if connection is not None:
+            with connection.cursor() as cursor:
+                yield cursor
+            return
+
+        with self.pool.connection() as connection:
+            token = self._transaction.set(connection)
+            try:
+                with connection.cursor() as cursor:
+                    yield cursor
+                connection.commit()
+            except Exception:
+                if not connection.closed:
+                    connection.rollback()
+                raise
+            finally:
+                self._transaction.reset(token)
+
+    def in_transaction(self) -> bool:
+        """Whether a transaction is opened in the current thread or task"""
+        return self._transaction.get() is not None
 
     def sql_query(
         self,
@@ -32,22 +167,31 @@ class DBConnector:
         return_type: Union[Literal["one"], Literal["all"], Literal["none"]] = "one",
     ):
         try:
-            with psycopg2.connect(
-                host=self.host,
-                port=self.port,
-                database=self.database,
-                user=self.user,
-                password=self.password,
-                options=f"-c search_path={self.schema}",
-                cursor_factory=RealDictCursor,
-            ) as connection:
-                with connection.cursor() as cursor:
-                    cursor.execute(query, data)
-                    if return_type == "one":
-                        return cursor.fetchone()
-                    if return_type == "all":
-                        return cursor.fetchall()
+            connection = self._transaction.get()
+            if connection is not None:
+                # committed (or rolled back) by the transaction
+                return self._execute(connection, query, data, return_type)
+
+            with self.pool.connection() as connection:
+                try:
+                    result = self._execute(connection, query, data, return_type)
+                    connection.commit()
+                    return result
+                except Exception:
+                    if not connection.closed:
+                        connection.rollback()
+                    raise
         except Exception as e:
             print("ERROR")
             print(e)
             raise e
+
+    @staticmethod
+    def _execute(connection: Connection, query: str, data, return_type: str):
+        with connection.cursor() as cursor:
+            cursor.execute(query, data)
+            if return_type == "one":
+                return cursor.fetchone()
+            if return_type == "all":
+                return cursor.fetchall()
+            return None
@@ -1,16 +1,30 @@
-from typing import Optional
+from typing import List, Optional
 
 from src.Model.Delivery import Delivery
 from src.utils.log_decorator import log
 from src.utils.singleton import Singleton
 
-from .DBConnector import DBConnector
+from .AsyncDBConnector import AsyncDBConnector
+
+SELECT_DELIVERIES_OF_DRIVER = """
+SELECT *
+FROM Deliveries
+WHERE delivery_driver_id=%s
+ORDER BY delivery_created_at DESC
+"""
+
+SELECT_CURRENT_DELIVERY_OF_DRIVER = """
+SELECT *
+FROM Deliveries
+WHERE delivery_driver_id=%s
+AND delivery_state=1;
+"""
 
 
 class DeliveryDAO(metaclass=Singleton):
-    db_connector: DBConnector
+    db_connector: AsyncDBConnector
 
-    def __init__(self, db_connector: DBConnector) -> None:
+    def __init__(self, db_connector: AsyncDBConnector) -> None:
         self.db_connector = db_connector
 
     @log
@@ -29,13 +43,16 @@ class DeliveryDAO(metaclass=Singleton):
     @log
     def get_deliveries_by_driver(self, delivery_id_driver: int) -> Optional[Delivery]:
         raw_deliveries = self.db_connector.sql_query(
-            """SELECT *
-               FROM Deliveries
-               WHERE delivery_driver_id=%s
-               ORDER BY delivery_created_at DESC
-            """,
-            [delivery_id_driver],
-            "all",
+            SELECT_DELIVERIES_OF_DRIVER, [delivery_id_driver], "all"
+        )
+        if raw_deliveries is None:
+            return []
+        return [Delivery(**raw_delivery) for raw_delivery in raw_deliveries]
+
+    @log
+    async def get_deliveries_by_driver_async(self, delivery_id_driver: int) -> List[Delivery]:
+        raw_deliveries = await self.db_connector.async_sql_query(
+            SELECT_DELIVERIES_OF_DRIVER, [delivery_id_driver], "all"
         )
         if raw_deliveries is None:
             return []
@@ -44,13 +61,18 @@ class DeliveryDAO(metaclass=Singleton):
     @log
     def get_driver_current_delivery(self, delivery_id_driver: int) -> Optional[Delivery]:
         raw_delivery = self.db_connector.sql_query(
-            """SELECT *
-               FROM Deliveries
-                WHERE delivery_driver_id=%s
-                AND delivery_state=1;
-            """,
-            [delivery_id_driver],
-            "one",
+            SELECT_CURRENT_DELIVERY_OF_DRIVER, [delivery_id_driver], "one"
+        )
+        if raw_delivery is None:
+            return None
+        return Delivery(**raw_delivery)
+
+    @log
+    async def get_driver_current_delivery_async(
+        self, delivery_id_driver: int
+    ) -> Optional[Delivery]:
+        raw_delivery = await self.db_connector.async_sql_query(
+            SELECT_CURRENT_DELIVERY_OF_DRIVER, [delivery_id_driver], "one"
         )
         if raw_delivery is None:
             return None
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Optional, Tuple
 
 from src.Model.Driver import Driver
 from src.utils.log_decorator import log
@@ -65,8 +65,16 @@ class DriverDAO(metaclass=Singleton):
         return Driver(**map_driver)
 
     @log
-    def get_all_drivers(self, limit: int = 15) -> Optional[list[Driver]]:
-        raw_drivers = self.db_connector.sql_query("SELECT * FROM Drivers LIMIT %s;", [limit], "all")
+    def get_all_drivers(
+        self, limit: int = 15, after: Optional[Tuple[int]] = None
+    ) -> Optional[list[Driver]]:
+        # Keyset pagination by id: a page starts right after the last driver of the previous one
+        last_id = after[0] if after else 0
+        raw_drivers = self.db_connector.sql_query(
+            "SELECT * FROM Drivers WHERE driver_id > %s ORDER BY driver_id LIMIT %s;",
+            [last_id, limit],
+            "all",
+        )
         if raw_drivers is None:
             return None
         return [Driver(**self._map_db_to_model(driver)) for driver in raw_drivers]
@@ -100,6 +108,33 @@ class DriverDAO(metaclass=Singleton):
         )
         return self.get_driver_by_id(driver_id)
 
+    @log
+    def start_delivering(self, driver_id: int) -> bool:
+        """
+        Flag a driver as delivering, unless he already is (checked atomically)
+
+        Parameters
+        ----------
+        driver_id : int
+            Unique identifier of the driver
+
+        Returns
+        -------
+        bool
+            True if the driver is now delivering, False if he already was or doesn't exist
+        """
+        raw_driver = self.db_connector.sql_query(
+            """
+            UPDATE Drivers
+            SET driver_is_delivering = TRUE
+            WHERE driver_id = %s AND NOT driver_is_delivering
+            RETURNING driver_id;
+            """,
+            [driver_id],
+            "one",
+        )
+        return raw_driver is not None
+
     # DELETE
     @log
     def delete_driver(self, driver_id: int) -> None:
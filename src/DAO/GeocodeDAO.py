@@ -0,0 +1,62 @@
+from typing import List, Optional
+
+from psycopg2.extras import Json
+
+from src.utils.log_decorator import log
+from src.utils.singleton import Singleton
+
+from .DBConnector import DBConnector
+
+
+class GeocodeDAO(metaclass=Singleton):
+    db_connector: DBConnector
+
+    def __init__(self, db_connector: DBConnector):
+        self.db_connector = db_connector
+
+    # CREATE
+    @log
+    def save_geocode(self, address_key: str, geocode_result: List[dict]) -> None:
+        self.db_connector.sql_query(
+            """
+            INSERT INTO Geocode_cache (address_key, geocode_result, geocoded_at)
+            VALUES (%s, %s, CURRENT_TIMESTAMP)
+            ON CONFLICT (address_key) DO UPDATE
+            SET geocode_result = EXCLUDED.geocode_result,
+                geocoded_at = EXCLUDED.geocoded_at;
+            """,
+            [address_key, Json(geocode_result)],
+            "none",
+        )
+
+    # READ
+    @log
+    def get_geocode(self, address_key: str, max_age: float) -> Optional[List[dict]]:
+        raw_geocode = self.db_connector.sql_query(
+            """
+            SELECT geocode_result
+            FROM Geocode_cache
+            WHERE address_key = %s
+              AND geocoded_at > CURRENT_TIMESTAMP - make_interval(secs => %s);
+            """,
+            [address_key, max_age],
+            "one",
+        )
+        return raw_geocode["geocode_result"] if raw_geocode else None
+
+    # DELETE
+    @log
+    def delete_expired_geocodes(self, max_age: float) -> int:
+        deleted = self.db_connector.sql_query(
+            """
+            WITH deleted AS (
+                DELETE FROM Geocode_cache
+                WHERE geocoded_at <= CURRENT_TIMESTAMP - make_interval(secs => %s)
+                RETURNING 1
+            )
+            SELECT COUNT(*) AS count FROM deleted;
+            """,
+            [max_age],
+            "one",
+        )
+        return deleted["count"]
@@ -4,15 +4,22 @@ from src.Model.Item import Item
 from src.utils.log_decorator import log
 from src.utils.singleton import Singleton
 
-from .DBConnector import DBConnector
+from .AsyncDBConnector import AsyncDBConnector
 from .OrderableDAO import OrderableDAO
 
+# Items along with the columns of their orderable, shared by the sync and async readers
+SELECT_ITEMS = """
+SELECT i.*, o.orderable_image_name, o.orderable_image_url, o.is_in_menu
+FROM Items AS i
+JOIN Orderables AS o ON o.orderable_id = i.orderable_id
+"""
+
 
 class ItemDAO(metaclass=Singleton):
-    db_connector: DBConnector
+    db_connector: AsyncDBConnector
     orderable_dao: OrderableDAO
 
-    def __init__(self, db_connector: DBConnector, orderable_dao: OrderableDAO):
+    def __init__(self, db_connector: AsyncDBConnector, orderable_dao: OrderableDAO):
         self.db_connector = db_connector
         self.orderable_dao = orderable_dao
 
@@ -28,64 +35,74 @@ class ItemDAO(metaclass=Singleton):
         item_image: Optional[str] = None,
         is_in_menu: bool = False,
     ) -> Item:
-        orderable_id = self.orderable_dao.create_orderable(
-            "item", item_name, item_image, is_in_menu
-        )
-        raw_item = self.db_connector.sql_query(
-            """
-            INSERT INTO Items (orderable_id, item_name, item_price, item_type,
-            item_description, item_stock)
-            VALUES (%(orderable_id)s, %(item_name)s, %(item_price)s, %(item_type)s,
-            %(item_description)s, %(item_stock)s)
-            RETURNING *;
-            """,
-            {
-                "orderable_id": orderable_id,
-                "item_name": item_name,
-                "item_price": item_price,
-                "item_type": item_type,
-                "item_description": item_description,
-                "item_stock": item_stock,
-            },
-            "one",
-        )
-        orderable_infos = self.orderable_dao.get_info_from_orderable(orderable_id)
-        raw_item_full = {**raw_item, **orderable_infos}
+        with self.db_connector.transaction():
+            orderable_id = self.orderable_dao.create_orderable(
+                "item", item_name, item_image, is_in_menu
+            )
+            raw_item = self.db_connector.sql_query(
+                """
+                INSERT INTO Items (orderable_id, item_name, item_price, item_type,
+                item_description, item_stock)
+                VALUES (%(orderable_id)s, %(item_name)s, %(item_price)s, %(item_type)s,
+                %(item_description)s, %(item_stock)s)
+                RETURNING *;
+                """,
+                {
+                    "orderable_id": orderable_id,
+                    "item_name": item_name,
+                    "item_price": item_price,
+                    "item_type": item_type,
+                    "item_description": item_description,
+                    "item_stock": item_stock,
+                },
+                "one",
+            )
+            orderable_infos = self.orderable_dao.get_info_from_orderable(orderable_id)
+            raw_item_full = {**raw_item, **orderable_infos}
         return Item(**raw_item_full)
 
     # READ
     @log
     def get_item_by_id(self, item_id: int) -> Optional[Item]:
         raw_item = self.db_connector.sql_query(
-            "SELECT * from Items WHERE item_id=%s", [item_id], "one"
+            f"{SELECT_ITEMS} WHERE i.item_id=%s", [item_id], "one"
         )
-        if raw_item is None:
-            return None
+        return Item(**raw_item) if raw_item else None
 
-        orderable_infos = self.orderable_dao.get_info_from_orderable(raw_item["orderable_id"])
-        raw_item_full = {**raw_item, **orderable_infos}
-        return Item(**raw_item_full)
+    @log
+    async def get_item_by_id_async(self, item_id: int) -> Optional[Item]:
+        raw_item = await self.db_connector.async_sql_query(
+            f"{SELECT_ITEMS} WHERE i.item_id=%s", [item_id], "one"
+        )
+        return Item(**raw_item) if raw_item else None
 
     @log
     def get_item_by_orderable_id(self, orderable_id: int) -> Optional[Item]:
         raw_item = self.db_connector.sql_query(
-            "SELECT * FROM Items WHERE orderable_id=%s", [orderable_id], "one"
+            f"{SELECT_ITEMS} WHERE i.orderable_id=%s", [orderable_id], "one"
         )
-        if raw_item is None:
-            return None
+        return Item(**raw_item) if raw_item else None
 
-        orderable_infos = self.orderable_dao.get_info_from_orderable(orderable_id)
-        raw_item_full = {**raw_item, **orderable_infos}
-        return Item(**raw_item_full)
+    @log
+    async def get_item_by_orderable_id_async(self, orderable_id: int) -> Optional[Item]:
+        raw_item = await self.db_connector.async_sql_query(
+            f"{SELECT_ITEMS} WHERE i.orderable_id=%s", [orderable_id], "one"
+        )
+        return Item(**raw_item) if raw_item else None
 
     @log
     def get_all_items(self) -> List[Item]:
-        raw_items = self.db_connector.sql_query("SELECT item_id from Items", return_type="all")
-
-        if not raw_items:
-            return []
+        raw_items = self.db_connector.sql_query(
+            f"{SELECT_ITEMS} ORDER BY i.item_id", return_type="all"
+        )
+        return [Item(**raw_item) for raw_item in raw_items] if raw_items else []
 
-        return [self.get_item_by_id(raw_item["item_id"]) for raw_item in raw_items]
+    @log
+    async def get_all_items_async(self) -> List[Item]:
+        raw_items = await self.db_connector.async_sql_query(
+            f"{SELECT_ITEMS} ORDER BY i.item_id", return_type="all"
+        )
+        return [Item(**raw_item) for raw_item in raw_items] if raw_items else []
 
     # UPDATE
     @log
@@ -137,10 +154,11 @@ class ItemDAO(metaclass=Singleton):
         if self._item_is_in_bundle(item_id):
             raise ValueError("The item is in a bundle and cannot be deleted.")
         item = self.get_item_by_id(item_id)
-        self.orderable_dao.delete_orderable(item.orderable_id)
-        self.db_connector.sql_query(
-            "DELETE FROM Items WHERE item_id = %(item_id)s", {"item_id": item_id}, None
-        )
+        with self.db_connector.transaction():
+            self.orderable_dao.delete_orderable(item.orderable_id)
+            self.db_connector.sql_query(
+                "DELETE FROM Items WHERE item_id = %(item_id)s", {"item_id": item_id}, None
+            )
 
     def _item_is_in_bundle(self, item_id: int) -> bool:
         result = self.db_connector.sql_query(
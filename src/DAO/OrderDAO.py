@@ -1,27 +1,334 @@
+import json
 from datetime import datetime
-from typing import Dict, List, Literal, Optional, Union
+from typing import Dict, List, Literal, Optional, Tuple, Union
 
 from src.Model.Bundle import Bundle
 from src.Model.Item import Item
 from src.Model.Order import Order, OrderState
 from src.utils.log_decorator import log
+from src.utils.order_events import order_events_channel
 from src.utils.singleton import Singleton
 
+from .AsyncDBConnector import AsyncDBConnector
 from .BundleDAO import BundleDAO
-from .DBConnector import DBConnector
 from .ItemDAO import ItemDAO
 from .OrderableDAO import OrderableDAO
 
+SELECT_ORDER_BY_ID = """
+SELECT *
+FROM Orders
+WHERE order_id=%s
+"""
+
+# Moves the order selected by {previous} (its id and state, locked) to a new state. The
+# previous state is read under the lock of the row, so that concurrent transitions notify
+# their actual previous state
+UPDATE_ORDER_STATE = """
+UPDATE Orders AS o
+SET order_state = %(new_state)s,
+    order_paid_at = CASE WHEN %(paid)s THEN %(timestamp)s
+                         ELSE o.order_paid_at END
+FROM ({previous}) AS previous
+WHERE o.order_id = previous.order_id
+RETURNING o.*, previous.order_state AS previous_state;
+"""
+
+# The order %(order_id)s, if it is in the %(expected_state)s (any state if NULL). A
+# concurrent transition of the order is waited for, and the state checked again afterwards
+SELECT_ORDER_TO_UPDATE = """
+SELECT order_id, order_state
+FROM Orders
+WHERE order_id = %(order_id)s
+  AND (%(expected_state)s::int IS NULL OR order_state = %(expected_state)s)
+FOR UPDATE
+"""
+
+# The oldest order in the %(expected_state)s, skipping the orders locked by concurrent
+# claims instead of waiting for them
+SELECT_NEXT_ORDER_TO_CLAIM = """
+SELECT order_id, order_state
+FROM Orders
+WHERE order_state = %(expected_state)s
+ORDER BY order_created_at, order_id
+LIMIT 1
+FOR UPDATE SKIP LOCKED
+"""
+
+SELECT_ORDERS_OF_CUSTOMER = """
+SELECT *
+FROM Orders
+WHERE order_customer_id=%s
+ORDER BY order_created_at DESC, order_id DESC
+"""
+
+# Keyset pagination, newest first: a page starts right after the (created_at, id) of the
+# last order of the previous page, whatever its depth
+SELECT_ORDERS_PAGE = {
+    after: f"""
+    SELECT *
+    FROM Orders
+    {"WHERE (order_created_at, order_id) < (%s, %s)" if after else ""}
+    ORDER BY order_created_at DESC, order_id DESC
+    LIMIT %s;
+    """
+    for after in (False, True)
+}
+
+SELECT_ORDERS_OF_CUSTOMER_PAGE = {
+    after: f"""
+    SELECT *
+    FROM Orders
+    WHERE order_customer_id=%s
+    {"AND (order_created_at, order_id) < (%s, %s)" if after else ""}
+    ORDER BY order_created_at DESC, order_id DESC
+    LIMIT %s;
+    """
+    for after in (False, True)
+}
+
+# The order a customer is currently filling (or the last one paid but not delivered yet)
+CURRENT_ORDER = """
+FROM Orders
+WHERE order_customer_id=%s
+AND order_state NOT IN (4, 5)
+ORDER BY order_paid_at DESC
+LIMIT 1;
+"""
+
+SELECT_CURRENT_ORDER = f"SELECT *{CURRENT_ORDER}"
+
+SELECT_CURRENT_ORDER_ID = f"SELECT order_id{CURRENT_ORDER}"
+
+SELECT_ORDERS_BY_STATE = {
+    order_by: f"""
+    SELECT *
+    FROM Orders
+    WHERE order_state = %s
+    ORDER BY order_created_at {order_by};
+    """
+    for order_by in ("DESC", "ASC")
+}
+
+# Content of a list of orders: the orderables with the columns of their item or bundle
+SELECT_CONTENTS_OF_ORDERS = """
+SELECT oc.order_id, oc.orderable_quantity, oc.orderable_unit_price,
+       o.orderable_id, o.orderable_type, o.orderable_image_name,
+       o.orderable_image_url, o.is_in_menu,
+       i.item_id, i.item_name, i.item_price, i.item_type,
+       i.item_description, i.item_stock,
+       b.bundle_id, b.bundle_name, b.bundle_reduction, b.bundle_description,
+       b.bundle_availability_start_date, b.bundle_availability_end_date
+FROM Order_contents AS oc
+JOIN Orderables AS o ON oc.orderable_id = o.orderable_id
+LEFT JOIN Items AS i ON o.orderable_type = 'item'
+                    AND i.orderable_id = o.orderable_id
+LEFT JOIN Bundles AS b ON o.orderable_type = 'bundle'
+                      AND b.orderable_id = o.orderable_id
+WHERE oc.order_id = ANY(%s)
+"""
+
+# Items needed by %(quantity)s units of the orderable %(orderable_id)s, locked in a fixed order
+# so that two orders sharing items can't deadlock
+ITEM_NEEDS = """
+item_needs AS (
+    SELECT i.item_id, %(quantity)s * 1 AS need
+    FROM Items AS i
+    WHERE i.orderable_id = %(orderable_id)s
+    UNION ALL
+    SELECT bi.item_id, %(quantity)s * bi.item_quantity AS need
+    FROM Bundles AS b
+    JOIN Bundle_Items AS bi ON bi.bundle_id = b.bundle_id
+    WHERE b.orderable_id = %(orderable_id)s
+),
+locked_items AS (
+    SELECT item_id, item_stock
+    FROM Items
+    WHERE item_id IN (SELECT item_id FROM item_needs)
+    ORDER BY item_id
+    FOR UPDATE
+)
+"""
+
+# Take the stock of every needed item and add the orderable to the order, only if the
+# orderable is on the menu (and in its period, for a bundle), the order is still pending
+# (a paid order is frozen) and none of the items lacks stock. The stock is the one read
+# once the items are locked, and the order is locked against its payment, so the
+# statement is all-or-nothing and doesn't need to be rolled back.
+RESERVE_ORDERABLE = f"""
+WITH {ITEM_NEEDS},
+menu_orderable AS (
+    SELECT o.orderable_id
+    FROM Orderables AS o
+    LEFT JOIN Bundles AS b ON b.orderable_id = o.orderable_id
+    WHERE o.orderable_id = %(orderable_id)s AND o.is_in_menu
+      AND (b.bundle_id IS NULL
+           OR %(now)s BETWEEN b.bundle_availability_start_date
+                          AND b.bundle_availability_end_date)
+),
+pending_order AS (
+    SELECT order_id
+    FROM Orders
+    WHERE order_id = %(order_id)s AND order_state = {OrderState.PENDING.value}
+    FOR SHARE
+),
+shortages AS (
+    SELECT n.item_id
+    FROM item_needs AS n
+    JOIN locked_items AS l USING (item_id)
+    WHERE l.item_stock < n.need
+),
+refusals AS (
+    SELECT 1 WHERE NOT EXISTS (SELECT 1 FROM menu_orderable)
+    UNION ALL
+    SELECT 1 WHERE NOT EXISTS (SELECT 1 FROM pending_order)
+    UNION ALL
+    SELECT 1 FROM shortages
+),
+reserved AS (
+    UPDATE Items AS i
+    SET item_stock = i.item_stock - n.need
+    FROM item_needs AS n
+    JOIN locked_items USING (item_id)
+    WHERE i.item_id = n.item_id
+    AND NOT EXISTS (SELECT 1 FROM refusals)
+),
+added AS (
+    INSERT INTO Order_contents (order_id, orderable_id, orderable_quantity)
+    SELECT %(order_id)s, %(orderable_id)s, %(quantity)s
+    WHERE NOT EXISTS (SELECT 1 FROM refusals)
+    ON CONFLICT (order_id, orderable_id) DO UPDATE
+    SET orderable_quantity = Order_contents.orderable_quantity + EXCLUDED.orderable_quantity
+)
+SELECT NOT EXISTS (SELECT 1 FROM refusals) AS reserved
+"""
+
+# Remove units of an orderable from an order only if it holds enough of them, and give
+# their items back to the stock in the same statement
+RELEASE_ORDERABLE = f"""
+WITH {ITEM_NEEDS},
+removed AS (
+    UPDATE Order_contents
+    SET orderable_quantity = orderable_quantity - %(quantity)s
+    WHERE order_id = %(order_id)s
+    AND orderable_id = %(orderable_id)s
+    AND orderable_quantity >= %(quantity)s
+    RETURNING orderable_quantity
+),
+released AS (
+    UPDATE Items AS i
+    SET item_stock = i.item_stock + n.need
+    FROM item_needs AS n
+    JOIN locked_items USING (item_id)
+    WHERE i.item_id = n.item_id
+    AND EXISTS (SELECT 1 FROM removed)
+)
+SELECT orderable_quantity FROM removed
+"""
+
+# Current price of every orderable: bundles are priced as the sum of their items
+# minus the reduction, like Bundle.price does
+ORDERABLE_PRICES = """
+orderable_prices AS (
+    SELECT i.orderable_id, i.item_price::float8 AS orderable_price
+    FROM Items AS i
+    UNION ALL
+    SELECT b.orderable_id,
+           SUM(i.item_price::float8 * bi.item_quantity)
+           * (1 - b.bundle_reduction / 100.0) AS orderable_price
+    FROM Bundles AS b
+    JOIN Bundle_Items AS bi ON bi.bundle_id = b.bundle_id
+    JOIN Items AS i ON i.item_id = bi.item_id
+    GROUP BY b.orderable_id, b.bundle_reduction
+)
+"""
+
+# Price of every order line: the unit price frozen when the order was paid,
+# or the current price of the orderable if there is none
+ORDER_LINES = f"""
+WITH {ORDERABLE_PRICES},
+order_lines AS (
+    SELECT o.order_id, o.order_paid_at,
+           oc.orderable_quantity
+           * COALESCE(oc.orderable_unit_price, op.orderable_price, 0) AS line_price
+    FROM Orders AS o
+    JOIN Order_contents AS oc ON oc.order_id = o.order_id
+    LEFT JOIN orderable_prices AS op ON op.orderable_id = oc.orderable_id
+)
+"""
+
+# Freeze the current unit price of the orderables of the order %(order_id)s, keeping the
+# prices already frozen
+FREEZE_UNIT_PRICES = f"""
+WITH {ORDERABLE_PRICES}
+UPDATE Order_contents AS oc
+SET orderable_unit_price = op.orderable_price
+FROM orderable_prices AS op
+WHERE oc.order_id = %(order_id)s
+  AND op.orderable_id = oc.orderable_id
+  AND oc.orderable_unit_price IS NULL
+"""
+
+# Order lines of the orders paid between %(start)s and %(end)s
+PAID_ORDER_LINES = f"""
+{ORDER_LINES},
+paid_order_lines AS (
+    SELECT *
+    FROM order_lines
+    WHERE order_paid_at IS NOT NULL
+      AND (%(start)s IS NULL OR order_paid_at >= %(start)s)
+      AND (%(end)s IS NULL OR order_paid_at < %(end)s)
+)
+"""
+
+# Feed of the drivers: the orders in the state %(state)s, oldest first, with their price,
+# their lines (as JSON) and the address of their customer, whatever their number
+SELECT_DRIVER_FEED = f"""
+WITH {ORDERABLE_PRICES},
+feed_lines AS (
+    SELECT oc.order_id,
+           SUM(oc.orderable_quantity
+               * COALESCE(oc.orderable_unit_price, op.orderable_price, 0)) AS order_price,
+           json_agg(json_build_object(
+               'type', ob.orderable_type,
+               'name', COALESCE(i.item_name, b.bundle_name),
+               'item_type', i.item_type,
+               'image_url', ob.orderable_image_url,
+               'unit_price', COALESCE(oc.orderable_unit_price, op.orderable_price, 0),
+               'quantity', oc.orderable_quantity
+           ) ORDER BY oc.orderable_id) AS order_lines
+    FROM Orders AS o
+    JOIN Order_contents AS oc ON oc.order_id = o.order_id
+    JOIN Orderables AS ob ON ob.orderable_id = oc.orderable_id
+    LEFT JOIN orderable_prices AS op ON op.orderable_id = oc.orderable_id
+    LEFT JOIN Items AS i ON ob.orderable_type = 'item' AND i.orderable_id = ob.orderable_id
+    LEFT JOIN Bundles AS b ON ob.orderable_type = 'bundle' AND b.orderable_id = ob.orderable_id
+    WHERE o.order_state = %(state)s
+    GROUP BY oc.order_id
+)
+SELECT o.order_id, o.order_created_at,
+       COALESCE(fl.order_price, 0) AS order_price,
+       COALESCE(fl.order_lines, '[]'::json) AS order_lines,
+       a.address_id, a.address_number, a.address_street, a.address_city,
+       a.address_postal_code, a.address_country, a.address_latitude,
+       a.address_longitude, a.address_geohash
+FROM Orders AS o
+LEFT JOIN feed_lines AS fl ON fl.order_id = o.order_id
+LEFT JOIN Customers AS c ON c.customer_id = o.order_customer_id
+LEFT JOIN Addresses AS a ON a.address_id = c.customer_address_id
+WHERE o.order_state = %(state)s
+ORDER BY o.order_created_at ASC, o.order_id ASC
+"""
+
 
 class OrderDAO(metaclass=Singleton):
-    db_connector: DBConnector
+    db_connector: AsyncDBConnector
     orderable_dao: OrderableDAO
     item_dao: ItemDAO
     bundle_dao: BundleDAO
 
     def __init__(
         self,
-        db_connector: DBConnector,
+        db_connector: AsyncDBConnector,
         orderable_dao: OrderableDAO,
         item_dao: ItemDAO,
         bundle_dao: BundleDAO,
@@ -61,104 +368,115 @@ class OrderDAO(metaclass=Singleton):
     # READ
     @log
     def get_order_by_id(self, order_id: int) -> Optional[Order]:
-        raw_order = self.db_connector.sql_query(
-            """SELECT *
-               FROM Orders
-               WHERE order_id=%s""",
-            [order_id],
-            "one",
-        )
+        raw_order = self.db_connector.sql_query(SELECT_ORDER_BY_ID, [order_id], "one")
 
         if raw_order is None:
             return None
 
-        raw_order["order_orderables"] = self._get_orderables_in_order(order_id)
-        return Order(**raw_order)
+        return self._build_orders([raw_order])[0]
 
     @log
-    def get_all_orders(self, limit: int) -> Optional[List[Order]]:
+    async def get_order_by_id_async(self, order_id: int) -> Optional[Order]:
+        raw_order = await self.db_connector.async_sql_query(SELECT_ORDER_BY_ID, [order_id], "one")
+
+        if raw_order is None:
+            return None
+
+        return (await self._build_orders_async([raw_order]))[0]
+
+    @log
+    def get_all_orders(
+        self, limit: int, after: Optional[Tuple[datetime, int]] = None
+    ) -> Optional[List[Order]]:
         raw_orders = self.db_connector.sql_query(
-            "SELECT * from Orders ORDER BY order_created_at DESC LIMIT %s ;", [limit], "all"
+            SELECT_ORDERS_PAGE[after is not None], [*(after or ()), limit], "all"
         )
 
         if not raw_orders:
             return []
 
-        Orders = []
-        for raw_order in raw_orders:
-            raw_order["order_orderables"] = self._get_orderables_in_order(raw_order["order_id"])
-            Orders.append(Order(**raw_order))
+        return self._build_orders(raw_orders)
 
-        return Orders
+    @log
+    def get_all_orders_by_customer(
+        self,
+        customer_id: int,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[datetime, int]] = None,
+    ) -> Optional[List[Order]]:
+        if limit is None:
+            raw_orders = self.db_connector.sql_query(
+                SELECT_ORDERS_OF_CUSTOMER, [customer_id], "all"
+            )
+        else:
+            raw_orders = self.db_connector.sql_query(
+                SELECT_ORDERS_OF_CUSTOMER_PAGE[after is not None],
+                [customer_id, *(after or ()), limit],
+                "all",
+            )
+
+        if not raw_orders:
+            return []
+
+        return self._build_orders(raw_orders)
 
     @log
-    def get_all_orders_by_customer(self, customer_id: int) -> Optional[List[Order]]:
-        raw_orders = self.db_connector.sql_query(
-            "SELECT * FROM Orders WHERE order_customer_id=%s  ORDER BY order_created_at DESC",
-            [customer_id],
-            "all",
+    async def get_all_orders_by_customer_async(self, customer_id: int) -> List[Order]:
+        raw_orders = await self.db_connector.async_sql_query(
+            SELECT_ORDERS_OF_CUSTOMER, [customer_id], "all"
         )
 
         if not raw_orders:
             return []
 
-        Orders = []
-        for raw_order in raw_orders:
-            raw_order["order_orderables"] = self._get_orderables_in_order(raw_order["order_id"])
-            Orders.append(Order(**raw_order))
-
-        return Orders
+        return await self._build_orders_async(raw_orders)
 
     @log
     def get_customer_current_order(self, customer_id: int) -> Optional[Order]:
-        raw_order = self.db_connector.sql_query(
-            """SELECT * from Orders
-               WHERE order_customer_id=%s
-               AND order_state NOT IN (4, 5)
-               ORDER BY order_paid_at DESC
-               LIMIT 1;
-            """,
-            [customer_id],
-            "one",
+        raw_order = self.db_connector.sql_query(SELECT_CURRENT_ORDER, [customer_id], "one")
+        if raw_order is None:
+            return None
+
+        return self._build_orders([raw_order])[0]
+
+    @log
+    def get_customer_current_order_id(self, customer_id: int) -> Optional[int]:
+        raw_order = self.db_connector.sql_query(SELECT_CURRENT_ORDER_ID, [customer_id], "one")
+        return raw_order["order_id"] if raw_order else None
+
+    @log
+    async def get_customer_current_order_async(self, customer_id: int) -> Optional[Order]:
+        raw_order = await self.db_connector.async_sql_query(
+            SELECT_CURRENT_ORDER, [customer_id], "one"
         )
         if raw_order is None:
             return None
 
-        raw_order["order_orderables"] = self._get_orderables_in_order(raw_order["order_id"])
-        return Order(**raw_order)
+        return (await self._build_orders_async([raw_order]))[0]
 
     @log
     def get_orders_by_state(
         self, state: int, order_by: Literal["DESC", "ASC"] = "DESC"
     ) -> List[Order]:
-        if order_by == "DESC":
-            raw_orders = self.db_connector.sql_query(
-                """SELECT * FROM Orders
-                    WHERE order_state = %s
-                    ORDER BY order_created_at DESC;
-                """,
-                [state],
-                "all",
-            )
-        if order_by == "ASC":
-            raw_orders = self.db_connector.sql_query(
-                """SELECT * FROM Orders
-                    WHERE order_state = %s
-                    ORDER BY order_created_at ASC;
-                """,
-                [state],
-                "all",
-            )
+        raw_orders = self.db_connector.sql_query(SELECT_ORDERS_BY_STATE[order_by], [state], "all")
 
         if not raw_orders:
             return []
 
-        Orders = []
-        for raw_order in raw_orders:
-            raw_order["order_orderables"] = self._get_orderables_in_order(raw_order["order_id"])
-            Orders.append(Order(**raw_order))
+        return self._build_orders(raw_orders)
+
+    @log
+    async def get_orders_by_state_async(
+        self, state: int, order_by: Literal["DESC", "ASC"] = "DESC"
+    ) -> List[Order]:
+        raw_orders = await self.db_connector.async_sql_query(
+            SELECT_ORDERS_BY_STATE[order_by], [state], "all"
+        )
 
-        return Orders
+        if not raw_orders:
+            return []
+
+        return await self._build_orders_async(raw_orders)
 
     @log
     def get_actives_orders(self) -> List[Order]:
@@ -173,55 +491,137 @@ class OrderDAO(metaclass=Singleton):
         if not raw_orders:
             return []
 
-        Orders = []
-        for raw_order in raw_orders:
-            raw_order["order_orderables"] = self._get_orderables_in_order(raw_order["order_id"])
-            Orders.append(Order(**raw_order))
+        return self._build_orders(raw_orders)
+
+    @log
+    def get_driver_feed(self, state: int) -> List[Dict]:
+        """
+        Retrieve, in a single query, what the drivers see of the orders of a state, without
+        building the orders
+
+        Parameters
+        ----------
+        state : int
+            The state of the orders
 
-        return Orders
+        Returns
+        -------
+        List[Dict]
+            For each order, oldest first: its id, creation date and price, its lines
+            ("order_lines": type, name, item type, image url, unit price and quantity of
+            each orderable) and the columns of the address of its customer (None if unknown)
+        """
+        return self.db_connector.sql_query(SELECT_DRIVER_FEED, {"state": state}, "all") or []
 
     # UPDATE
     @log
-    def update_order_state(self, order_id: int, new_state: int) -> Order:
+    def update_order_state(
+        self, order_id: int, new_state: int, expected_state: Optional[int] = None
+    ) -> Optional[Order]:
+        """
+        Move an order to a new state, notifying the transition (see `OrderEventHub`)
+
+        Parameters
+        ----------
+        order_id : int
+            Unique identifier of the order
+        new_state : int
+            The value of the new state
+        expected_state : Optional[int]
+            Only move the order if it is in this state, checked atomically with the
+            update. By default None (any state)
+
+        Returns
+        -------
+        Optional[Order]
+            The updated order, None if it doesn't exist or isn't in the expected state
+        """
+        paid = new_state == OrderState.PAID.value
+        with self.db_connector.transaction():
+            # the prices are frozen with the content of the order as it is being paid
+            if paid:
+                self._freeze_unit_prices(order_id)
+
+            return self._update_state(
+                SELECT_ORDER_TO_UPDATE,
+                {"order_id": order_id, "expected_state": expected_state},
+                new_state,
+            )
+
+    @log
+    def claim_next_order(self, state: int, new_state: int) -> Optional[Order]:
+        """
+        Move the oldest order of a state to a new state. Concurrent claims get different
+        orders: an order being claimed is skipped, not waited for.
+
+        Parameters
+        ----------
+        state : int
+            The value of the state of the orders to claim from
+        new_state : int
+            The value of the state of the claimed order
+
+        Returns
+        -------
+        Optional[Order]
+            The claimed order, None if no order of the state is left
+        """
+        with self.db_connector.transaction():
+            return self._update_state(
+                SELECT_NEXT_ORDER_TO_CLAIM, {"expected_state": state}, new_state
+            )
+
+    def _update_state(self, previous: str, params: Dict, new_state: int) -> Optional[Order]:
+        raw_order = self.db_connector.sql_query(
+            UPDATE_ORDER_STATE.format(previous=previous),
+            {
+                **params,
+                "new_state": new_state,
+                "paid": new_state == OrderState.PAID.value,
+                "timestamp": datetime.now(),
+            },
+            "one",
+        )
+
+        if raw_order is None:
+            return None
+        previous_state = raw_order.pop("previous_state")
+        # delivered to the listeners of every worker when the transaction commits
         self.db_connector.sql_query(
-            """
-            UPDATE Orders
-            SET order_state = %(new_state)s
-            WHERE order_id = %(order_id)s;
-            """,
-            {"new_state": new_state, "order_id": order_id},
+            "SELECT pg_notify(%s, %s);",
+            [
+                order_events_channel(self.db_connector.schema),
+                json.dumps(
+                    {
+                        "order_id": raw_order["order_id"],
+                        "order_customer_id": raw_order["order_customer_id"],
+                        "order_state": OrderState(new_state).name,
+                        "previous_state": OrderState(previous_state).name,
+                    }
+                ),
+            ],
             "none",
         )
-        if new_state == OrderState.PAID.value:
+        return self._build_orders([raw_order])[0]
+
+    # DELETE
+    @log
+    def delete_order(self, order_id) -> None:
+        with self.db_connector.transaction():
             self.db_connector.sql_query(
                 """
-                UPDATE Orders
-                SET order_paid_at = %(timestamp)s
-                WHERE order_id = %(order_id)s;
+                DELETE FROM Order_contents WHERE order_id=%s;
                 """,
-                {"timestamp": datetime.now(), "order_id": order_id},
+                [order_id],
+                "none",
+            )
+            self.db_connector.sql_query(
+                """
+                DELETE FROM Orders WHERE order_id=%s;
+                """,
+                [order_id],
                 "none",
             )
-
-        return self.get_order_by_id(order_id)
-
-    # DELETE
-    @log
-    def delete_order(self, order_id) -> None:
-        self.db_connector.sql_query(
-            """
-            DELETE FROM Order_contents WHERE order_id=%s;
-            """,
-            [order_id],
-            "none",
-        )
-        self.db_connector.sql_query(
-            """
-            DELETE FROM Orders WHERE order_id=%s;
-            """,
-            [order_id],
-            "none",
-        )
         return None
 
     @log
@@ -238,7 +638,7 @@ class OrderDAO(metaclass=Singleton):
 
         else:
             self.db_connector.sql_query(
-                """INSERT INTO Order_contents
+                """INSERT INTO Order_contents (order_id, orderable_id, orderable_quantity)
                    VALUES (%(order_id)s, %(orderable_id)s, %(quantity)s);
                 """,
                 {"order_id": order_id, "orderable_id": orderable_id, "quantity": quantity},
@@ -272,6 +672,77 @@ class OrderDAO(metaclass=Singleton):
 
         return self.get_order_by_id(order_id)
 
+    @log
+    def reserve_orderable(self, order_id: int, orderable_id: int, quantity: int = 1) -> bool:
+        """
+        Take the items needed by an orderable out of the stock and add it to a pending
+        order, in a single statement. Nothing is changed if the orderable isn't on the menu,
+        if one of the items lacks stock or if the order isn't pending anymore, even when
+        several customers order the same items at the same time or the order is being paid.
+
+        Parameters
+        ----------
+        order_id : int
+            Unique identifier of the order
+        orderable_id : int
+            Unique identifier of the item or bundle to add
+        quantity : int
+            Number of units to add, by default 1
+
+        Returns
+        -------
+        bool
+            True if the orderable has been added, False if it isn't on the menu (or doesn't
+            exist), if the stock was insufficient or if the order isn't pending
+        """
+        result = self.db_connector.sql_query(
+            RESERVE_ORDERABLE,
+            {
+                "order_id": order_id,
+                "orderable_id": orderable_id,
+                "quantity": quantity,
+                "now": datetime.now(),
+            },
+            "one",
+        )
+        return result["reserved"]
+
+    @log
+    def release_orderable(self, order_id: int, orderable_id: int, quantity: int = 1) -> bool:
+        """
+        Remove units of an orderable from an order and put its items back in the stock,
+        in a single transaction
+
+        Parameters
+        ----------
+        order_id : int
+            Unique identifier of the order
+        orderable_id : int
+            Unique identifier of the item or bundle to remove
+        quantity : int
+            Number of units to remove, by default 1
+
+        Returns
+        -------
+        bool
+            True if the units have been removed, False if the order holds less than `quantity`
+            of them
+        """
+        params = {"order_id": order_id, "orderable_id": orderable_id, "quantity": quantity}
+        with self.db_connector.transaction():
+            result = self.db_connector.sql_query(RELEASE_ORDERABLE, params, "one")
+            if result is None:
+                return False
+            if result["orderable_quantity"] == 0:
+                self.db_connector.sql_query(
+                    """DELETE FROM Order_contents
+                       WHERE order_id=%(order_id)s AND orderable_id=%(orderable_id)s;
+                    """,
+                    params,
+                    "none",
+                )
+        return True
+
     def get_quantity_of_orderables(self, order_id: int, orderable_id: int) -> int:
         result = self.db_connector.sql_query(
             """SELECT orderable_quantity
@@ -286,52 +757,257 @@ class OrderDAO(metaclass=Singleton):
 
         return result["orderable_quantity"]
 
-    def _get_orderables_in_order(self, order_id: int) -> Dict[Union[Item, Bundle], int]:
+    def _build_orders(self, raw_orders: List[Dict]) -> List[Order]:
+        """
+        Build Order objects from rows of the Orders table, fetching the content
+        of all the orders at once
+
+        Parameters
+        ----------
+        raw_orders : List[Dict]
+            Rows of the Orders table
+
+        Returns
+        -------
+        List[Order]
+            The orders, in the same order as the rows
+        """
+        contents_by_order = self._get_contents_of_orders(
+            [raw_order["order_id"] for raw_order in raw_orders]
+        )
+        return self._assemble_orders(raw_orders, contents_by_order)
+
+    async def _build_orders_async(self, raw_orders: List[Dict]) -> List[Order]:
+        contents_by_order = await self._get_contents_of_orders_async(
+            [raw_order["order_id"] for raw_order in raw_orders]
+        )
+        return self._assemble_orders(raw_orders, contents_by_order)
+
+    def _get_contents_of_orders(self, order_ids: List[int]) -> Dict[int, Dict]:
+        """
+        Retrieve the items and bundles of several orders, with their frozen unit prices.
+        Only two queries are made whatever the number of orders: one for the content of
+        the orders and one for the items of the bundles they contain.
+
+        Parameters
+        ----------
+        order_ids : List[int]
+            Unique identifiers of the orders
+
+        Returns
+        -------
+        Dict[int, Dict]
+            For each order id, the orderables of the order with their quantity
+            ("order_orderables") and their unit price by orderable id ("order_unit_prices")
+        """
+        if not order_ids:
+            return {}
+
         raw_orderables = self.db_connector.sql_query(
-            """
-            SELECT oc.orderable_id, oc.orderable_quantity, o.orderable_type
-            FROM Order_contents AS oc
-            JOIN Orderables AS o ON oc.orderable_id = o.orderable_id
-            WHERE oc.order_id = %s
-            """,
-            [order_id],
-            "all",
+            SELECT_CONTENTS_OF_ORDERS, [list(order_ids)], "all"
         )
-        if not raw_orderables:
+        items_by_bundle = self.bundle_dao._get_items_from_bundles(self._bundle_ids(raw_orderables))
+        return self._assemble_contents(order_ids, raw_orderables, items_by_bundle)
+
+    async def _get_contents_of_orders_async(self, order_ids: List[int]) -> Dict[int, Dict]:
+        if not order_ids:
             return {}
 
-        products_dict = {}
-        for raw in raw_orderables:
-            orderable_id = raw["orderable_id"]
-            quantity = raw["orderable_quantity"]
-            orderable_type = raw["orderable_type"]
+        raw_orderables = await self.db_connector.async_sql_query(
+            SELECT_CONTENTS_OF_ORDERS, [list(order_ids)], "all"
+        )
+        items_by_bundle = await self.bundle_dao._get_items_from_bundles_async(
+            self._bundle_ids(raw_orderables)
+        )
+        return self._assemble_contents(order_ids, raw_orderables, items_by_bundle)
 
-            if orderable_type == "item":
-                product = self.item_dao.get_item_by_orderable_id(orderable_id)
-            elif orderable_type == "bundle":
-                product = self.bundle_dao.get_bundle_by_orderable_id(orderable_id)
+    @staticmethod
+    def _bundle_ids(raw_orderables: Optional[List[Dict]]) -> List[int]:
+        return list(
+            {raw["bundle_id"] for raw in raw_orderables or [] if raw["bundle_id"] is not None}
+        )
+
+    @staticmethod
+    def _assemble_orders(raw_orders: List[Dict], contents_by_order: Dict[int, Dict]) -> List[Order]:
+        return [
+            Order(**raw_order, **contents_by_order[raw_order["order_id"]])
+            for raw_order in raw_orders
+        ]
 
+    def _assemble_contents(
+        self,
+        order_ids: List[int],
+        raw_orderables: Optional[List[Dict]],
+        items_by_bundle: Dict[int, Dict[Item, int]],
+    ) -> Dict[int, Dict]:
+        contents_by_order = {
+            order_id: {"order_orderables": {}, "order_unit_prices": {}} for order_id in order_ids
+        }
+
+        # the same orderable can be in several orders, it is only built once
+        products = {}
+        for raw in raw_orderables or []:
+            orderable_id = raw["orderable_id"]
+            if orderable_id not in products:
+                products[orderable_id] = self._build_orderable(raw, items_by_bundle)
+
+            product = products[orderable_id]
             if product:
-                products_dict[product] = quantity
+                contents = contents_by_order[raw["order_id"]]
+                contents["order_orderables"][product] = raw["orderable_quantity"]
+                if raw["orderable_unit_price"] is not None:
+                    contents["order_unit_prices"][orderable_id] = raw["orderable_unit_price"]
+
+        return contents_by_order
+
+    def _freeze_unit_prices(self, order_id: int) -> None:
+        """
+        Store the current unit price of the orderables of an order in Order_contents,
+        computed by the database, so the price of the order doesn't change when the menu is
+        repriced. The prices already frozen are kept.
+
+        Parameters
+        ----------
+        order_id : int
+            Unique identifier of the order
+        """
+        self.db_connector.sql_query(FREEZE_UNIT_PRICES, {"order_id": order_id}, "none")
+
+    @staticmethod
+    def _build_orderable(
+        raw: Dict, items_by_bundle: Dict[int, Dict[Item, int]]
+    ) -> Optional[Union[Item, Bundle]]:
+        orderable_infos = {
+            "orderable_id": raw["orderable_id"],
+            "orderable_image_name": raw["orderable_image_name"],
+            "orderable_image_url": raw["orderable_image_url"],
+            "is_in_menu": raw["is_in_menu"],
+        }
+
+        if raw["item_id"] is not None:
+            return Item(
+                **orderable_infos,
+                item_id=raw["item_id"],
+                item_name=raw["item_name"],
+                item_price=raw["item_price"],
+                item_type=raw["item_type"],
+                item_description=raw["item_description"],
+                item_stock=raw["item_stock"],
+            )
+
+        if raw["bundle_id"] is not None:
+            return Bundle(
+                **orderable_infos,
+                bundle_id=raw["bundle_id"],
+                bundle_name=raw["bundle_name"],
+                bundle_reduction=raw["bundle_reduction"],
+                bundle_description=raw["bundle_description"],
+                bundle_availability_start_date=raw["bundle_availability_start_date"],
+                bundle_availability_end_date=raw["bundle_availability_end_date"],
+                bundle_items=items_by_bundle[raw["bundle_id"]],
+            )
 
-        return products_dict
+        return None
 
     @log
-    def get_benef(self) -> float:
-        raw_orders = self.db_connector.sql_query(
-            """
-            SELECT o.order_id
-            FROM Orders AS o
-            WHERE o.order_paid_at IS NOT NULL;
+    def get_benef(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> float:
+        """
+        Compute the earnings of the paid orders in a single aggregate query
+
+        Parameters
+        ----------
+        start : Optional[datetime]
+            Only count the orders paid at or after this date, by default None
+        end : Optional[datetime]
+            Only count the orders paid before this date, by default None
+
+        Returns
+        -------
+        float
+            The sum of the price of the paid orders
+        """
+        raw_benef = self.db_connector.sql_query(
+            f"""
+            {PAID_ORDER_LINES}
+            SELECT COALESCE(SUM(line_price), 0) AS benef
+            FROM paid_order_lines;
             """,
-            return_type="all",
+            {"start": start, "end": end},
+            "one",
         )
-        benef = 0
-        for raw_order in raw_orders:
-            order = self.get_order_by_id(raw_order["order_id"])
-            benef += order.order_price
+        return round(raw_benef["benef"], 2)
+
+    @log
+    def get_revenue_by_period(
+        self,
+        bucket: Literal["day", "week"] = "day",
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> List[Dict]:
+        """
+        Compute the earnings of the paid orders for each day or week
+
+        Parameters
+        ----------
+        bucket : Literal["day", "week"]
+            Length of the periods, weeks start on monday, by default "day"
+        start : Optional[datetime]
+            Only count the orders paid at or after this date, by default None
+        end : Optional[datetime]
+            Only count the orders paid before this date, by default None
 
-        return round(benef, 2)
+        Returns
+        -------
+        List[Dict]
+            For each period with at least one paid order (oldest first), the first day of
+            the period, the revenue and the number of orders
+        """
+        raw_revenues = self.db_connector.sql_query(
+            f"""
+            {PAID_ORDER_LINES}
+            SELECT date_trunc(%(bucket)s, order_paid_at)::date AS period,
+                   SUM(line_price) AS revenue,
+                   COUNT(DISTINCT order_id) AS nb_orders
+            FROM paid_order_lines
+            GROUP BY period
+            ORDER BY period;
+            """,
+            {"bucket": bucket, "start": start, "end": end},
+            "all",
+        )
+        for raw_revenue in raw_revenues:
+            raw_revenue["revenue"] = round(raw_revenue["revenue"], 2)
+
+        return raw_revenues
+
+    @log
+    def get_driver_stats(self, driver_id: int) -> Dict[str, Union[int, float]]:
+        """
+        Count the orders delivered by a driver and sum their price in a single query
+
+        Parameters
+        ----------
+        driver_id : int
+            Unique identifier of the driver
+
+        Returns
+        -------
+        Dict[str, Union[int, float]]
+            The number of orders ("nb_orders") and their cumulated price ("earnings")
+        """
+        raw_stats = self.db_connector.sql_query(
+            f"""
+            {ORDER_LINES}
+            SELECT COUNT(DISTINCT d.delivery_order_id) AS nb_orders,
+                   COALESCE(SUM(ol.line_price), 0) AS earnings
+            FROM Deliveries AS d
+            LEFT JOIN order_lines AS ol ON ol.order_id = d.delivery_order_id
+            WHERE d.delivery_driver_id = %(driver_id)s;
+            """,
+            {"driver_id": driver_id},
+            "one",
+        )
+        return {"nb_orders": raw_stats["nb_orders"], "earnings": round(raw_stats["earnings"], 2)}
 
     @log
     def get_number_orders_by_state(self) -> Dict[str, int]:
@@ -3,13 +3,19 @@ from typing import Dict, List, Optional
 from src.utils.log_decorator import log
 from src.utils.singleton import Singleton
 
-from .DBConnector import DBConnector
+from .AsyncDBConnector import AsyncDBConnector
+
+SELECT_ALL_ORDERABLES = """
+SELECT *
+FROM Orderables
+ORDER BY (is_in_menu is True) DESC
+"""
 
 
 class OrderableDAO(metaclass=Singleton):
-    db_connector: DBConnector
+    db_connector: AsyncDBConnector
 
-    def __init__(self, db_connector: DBConnector):
+    def __init__(self, db_connector: AsyncDBConnector):
         self.db_connector = db_connector
 
     # CREATE
@@ -63,12 +69,16 @@ class OrderableDAO(metaclass=Singleton):
 
     @log
     def get_all_orderables(self) -> List[Dict]:
-        raw_orderables = self.db_connector.sql_query(
-            """SELECT *
-            FROM Orderables
-            ORDER BY (is_in_menu is True) DESC
-            """,
-            return_type="all",
+        raw_orderables = self.db_connector.sql_query(SELECT_ALL_ORDERABLES, return_type="all")
+        if not raw_orderables:
+            return []
+
+        return raw_orderables
+
+    @log
+    async def get_all_orderables_async(self) -> List[Dict]:
+        raw_orderables = await self.db_connector.async_sql_query(
+            SELECT_ALL_ORDERABLES, return_type="all"
         )
         if not raw_orderables:
             return []
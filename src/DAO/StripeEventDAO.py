@@ -0,0 +1,53 @@
+from typing import Optional
+
+from src.utils.log_decorator import log
+from src.utils.singleton import Singleton
+
+from .DBConnector import DBConnector
+
+
+class StripeEventDAO(metaclass=Singleton):
+    db_connector: DBConnector
+
+    def __init__(self, db_connector: DBConnector):
+        self.db_connector = db_connector
+
+    # CREATE
+    @log
+    def record_event(self, event_id: str, event_type: str, order_id: Optional[int]) -> bool:
+        """
+        Record a Stripe event as processed
+
+        Parameters
+        ----------
+        event_id : str
+            The unique id of the event, given by Stripe
+        event_type : str
+            The type of the event (checkout.session.completed...)
+        order_id : Optional[int]
+            The id of the order the event is about
+
+        Returns
+        -------
+        bool
+            True if the event is new, False if it was already recorded
+        """
+        raw_event = self.db_connector.sql_query(
+            """
+            INSERT INTO Stripe_events (event_id, event_type, event_order_id)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (event_id) DO NOTHING
+            RETURNING event_id;
+            """,
+            [event_id, event_type, order_id],
+            "one",
+        )
+        return raw_event is not None
+
+    # READ
+    @log
+    def is_event_recorded(self, event_id: str) -> bool:
+        raw_event = self.db_connector.sql_query(
+            "SELECT 1 AS recorded FROM Stripe_events WHERE event_id = %s;", [event_id], "one"
+        )
+        return raw_event is not None
@@ -0,0 +1,137 @@
+from typing import Dict, List
+
+from src.utils.log_decorator import log
+from src.utils.singleton import Singleton
+
+from .DBConnector import DBConnector
+from .OrderDAO import ORDERABLE_PRICES
+
+# Name, description and current price of the orderables `o`
+ORDERABLE_VERSION_JOINS = """
+LEFT JOIN orderable_prices AS op ON op.orderable_id = o.orderable_id
+LEFT JOIN Items AS i ON o.orderable_type = 'item' AND i.orderable_id = o.orderable_id
+LEFT JOIN Bundles AS b ON o.orderable_type = 'bundle' AND b.orderable_id = o.orderable_id
+"""
+
+ORDERABLE_VERSION_COLUMNS = """
+o.orderable_id,
+COALESCE(i.item_name, b.bundle_name) AS orderable_name,
+COALESCE(i.item_description, b.bundle_description) AS orderable_description
+"""
+
+# Stripe ids of the `versions` (orderable id, unit amount in cents), NULL if the version
+# isn't synchronized
+VERSIONS_WITH_STRIPE_IDS = """
+SELECT v.*, sp.stripe_price_id,
+       (SELECT product.stripe_product_id
+        FROM Stripe_prices AS product
+        WHERE product.orderable_id = v.orderable_id
+        LIMIT 1) AS stripe_product_id
+FROM versions AS v
+LEFT JOIN Stripe_prices AS sp ON sp.orderable_id = v.orderable_id
+                             AND sp.unit_amount = v.unit_amount
+ORDER BY v.orderable_id
+"""
+
+# Lines of the checkout session of the order %s: its orderables at the price they are sold
+SELECT_CHECKOUT_LINES = f"""
+WITH {ORDERABLE_PRICES},
+versions AS (
+    SELECT {ORDERABLE_VERSION_COLUMNS}, oc.orderable_quantity, ord.order_state,
+           ROUND(COALESCE(oc.orderable_unit_price, op.orderable_price, 0)::numeric * 100)::int
+               AS unit_amount
+    FROM Order_contents AS oc
+    JOIN Orders AS ord ON ord.order_id = oc.order_id
+    JOIN Orderables AS o ON o.orderable_id = oc.orderable_id
+    {ORDERABLE_VERSION_JOINS}
+    WHERE oc.order_id = %s AND oc.orderable_quantity > 0
+)
+{VERSIONS_WITH_STRIPE_IDS}
+"""
+
+# Current version of the orderables of the list %s and of the bundles containing them
+SELECT_CURRENT_VERSIONS = f"""
+WITH {ORDERABLE_PRICES},
+versions AS (
+    SELECT {ORDERABLE_VERSION_COLUMNS},
+           ROUND(COALESCE(op.orderable_price, 0)::numeric * 100)::int AS unit_amount
+    FROM Orderables AS o
+    {ORDERABLE_VERSION_JOINS}
+    WHERE o.orderable_id = ANY(%s)
+       OR b.bundle_id IN (
+           SELECT bi.bundle_id
+           FROM Bundle_Items AS bi
+           JOIN Items AS bundle_item ON bundle_item.item_id = bi.item_id
+           WHERE bundle_item.orderable_id = ANY(%s)
+       )
+)
+{VERSIONS_WITH_STRIPE_IDS}
+"""
+
+
+class StripePriceDAO(metaclass=Singleton):
+    db_connector: DBConnector
+
+    def __init__(self, db_connector: DBConnector):
+        self.db_connector = db_connector
+
+    # CREATE
+    @log
+    def save_price(
+        self, orderable_id: int, unit_amount: int, stripe_product_id: str, stripe_price_id: str
+    ) -> None:
+        self.db_connector.sql_query(
+            """
+            INSERT INTO Stripe_prices (orderable_id, unit_amount, stripe_product_id,
+                                       stripe_price_id)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (orderable_id, unit_amount) DO NOTHING;
+            """,
+            [orderable_id, unit_amount, stripe_product_id, stripe_price_id],
+            "none",
+        )
+
+    # READ
+    @log
+    def get_checkout_lines(self, order_id: int) -> List[Dict]:
+        """
+        Retrieve, in a single query, what a checkout session needs to know about the
+        orderables of an order
+
+        Parameters
+        ----------
+        order_id : int
+            Unique identifier of the order
+
+        Returns
+        -------
+        List[Dict]
+            For each orderable of the order: its id, name and description, its quantity,
+            its unit amount in cents, its Stripe product and price ids (None if the price
+            isn't synchronized) and the state of the order
+        """
+        return self.db_connector.sql_query(SELECT_CHECKOUT_LINES, [order_id], "all") or []
+
+    @log
+    def get_current_versions(self, orderable_ids: List[int]) -> List[Dict]:
+        """
+        Retrieve the current version of some orderables and of the bundles containing
+        them (whose price depends on the price of their items)
+
+        Parameters
+        ----------
+        orderable_ids : List[int]
+            Unique identifiers of the orderables
+
+        Returns
+        -------
+        List[Dict]
+            For each orderable: its id, name and description, its unit amount in cents and
+            its Stripe product and price ids (None if the price isn't synchronized)
+        """
+        return (
+            self.db_connector.sql_query(
+                SELECT_CURRENT_VERSIONS, [list(orderable_ids), list(orderable_ids)], "all"
+            )
+            or []
+        )
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import BaseModel
 
 
@@ -13,6 +15,9 @@ class Address(BaseModel):
         address_city (str): City name.
         address_postal_code (int): Postal or ZIP code.
         address_country (str): Country name.
+        address_latitude (Optional[float]): Latitude, None until the address is geocoded.
+        address_longitude (Optional[float]): Longitude, None until the address is geocoded.
+        address_geohash (Optional[str]): Geohash of the coordinates.
     """
 
     address_id: int
@@ -21,9 +26,17 @@ class Address(BaseModel):
     address_city: str
     address_postal_code: int
     address_country: str
+    address_latitude: Optional[float] = None
+    address_longitude: Optional[float] = None
+    address_geohash: Optional[str] = None
+
+    @property
+    def has_coordinates(self) -> bool:
+        return self.address_latitude is not None and self.address_longitude is not None
 
     def get_attributes(self) -> dict:
-        return {attribute: value for attribute, value in self.__dict__.items()}
+        # coordinates are left out until the address is geocoded
+        return {attribute: value for attribute, value in self.__dict__.items() if value is not None}
 
     def __str__(self) -> str:
         return (
@@ -28,6 +28,8 @@ class Order(BaseModel):
         state (int, optional): Order status (0 = pending, 1 = paid, 2 = prepared,
                                 3 = delivery, 4 = delivered, 5 = cancelled).
         items (Dict[Bundle | Item, int]): List of items and bundles in the order.
+        unit_prices (Dict[int, float]): Unit price of each orderable (by orderable id),
+                                        frozen when the order was paid.
         date (date): Date of the order.
         time (time): Time of the order.
     """
@@ -38,6 +40,25 @@ class Order(BaseModel):
     order_created_at: datetime
     order_paid_at: Optional[datetime] = None
     order_orderables: Dict[Union[Bundle, Item], int]
+    order_unit_prices: Dict[int, float] = {}
+
+    def unit_price(self, orderable: Union[Bundle, Item]) -> float:
+        """
+        Get the price of one unit of an orderable of the order
+
+        Parameters
+        ----------
+        orderable : Union[Bundle, Item]
+            An orderable of the order
+
+        Returns
+        -------
+        float
+            The price frozen when the order was paid, or the current price of the orderable
+            if the order is not paid yet
+        """
+        unit_price = self.order_unit_prices.get(orderable.orderable_id)
+        return orderable.price if unit_price is None else unit_price
 
     @property
     def order_price(self) -> float:
@@ -50,7 +71,7 @@ class Order(BaseModel):
         """
         total_price = 0.0
         for orderable, qty in self.order_orderables.items():
-            total_price += orderable.price * qty
+            total_price += self.unit_price(orderable) * qty
 
         return total_price
 
@@ -4,14 +4,26 @@ from typing import Dict, List, Optional
 from src.DAO.BundleDAO import BundleDAO
 from src.Model.Bundle import Bundle
 from src.Model.Item import Item
+from src.Service.MenuService import invalidate_menu
+from src.Service.StripeService import StripeService
+from src.utils.cache import TTLCache
 from src.utils.log_decorator import log
 
 
 class BundleService:
     bundle_dao: BundleDAO
+    menu_cache: Optional[TTLCache]
+    stripe_service: Optional[StripeService]
 
-    def __init__(self, bundle_dao: BundleDAO):
+    def __init__(
+        self,
+        bundle_dao: BundleDAO,
+        menu_cache: Optional[TTLCache] = None,
+        stripe_service: Optional[StripeService] = None,
+    ):
         self.bundle_dao = bundle_dao
+        self.menu_cache = menu_cache
+        self.stripe_service = stripe_service
 
     @log
     def get_bundle_by_id(self, bundle_id: int) -> Bundle:
@@ -158,6 +170,9 @@ class BundleService:
             bundle_image=bundle_image,
             is_in_menu=is_in_menu,
         )
+        invalidate_menu(self.menu_cache)
+        if self.stripe_service is not None:
+            self.stripe_service.sync_orderable(create_bundle.orderable_id)
         return create_bundle
 
     @log
@@ -254,6 +269,13 @@ class BundleService:
 
         update = {key: value for key, value in update.items() if update[key]}
         updated_bundle = self.bundle_dao.update_bundle(bundle_id=bundle_id, update=update)
+        invalidate_menu(self.menu_cache)
+        if self.stripe_service is not None:
+            self.stripe_service.sync_orderable(
+                updated_bundle.orderable_id,
+                prices="bundle_reduction" in update or "bundle_items" in update,
+                products="bundle_name" in update or "bundle_description" in update,
+            )
         return updated_bundle
 
     @log
@@ -268,3 +290,4 @@ class BundleService:
         """
         self.get_bundle_by_id(bundle_id)
         self.bundle_dao.delete_bundle(bundle_id)
+        invalidate_menu(self.menu_cache)
@@ -1,6 +1,6 @@
 import logging
 import re
-from typing import List
+from typing import List, Optional
 
 from src.DAO.CustomerDAO import CustomerDAO
 from src.Model.Address import Address
@@ -9,6 +9,7 @@ from src.Service.AddressService import AddressService
 from src.Service.PasswordService import check_password_strength, create_salt, hash_password
 from src.Service.UserService import UserService
 from src.utils.log_decorator import log
+from src.utils.pagination import decode_cursor, next_cursor
 
 
 class CustomerService:
@@ -54,6 +55,23 @@ class CustomerService:
             )
         return customer
 
+    @log
+    async def get_customer_by_id_async(self, customer_id: int) -> Customer:
+        """
+        Same as `get_customer_by_id`, without blocking the event loop
+
+        Raises
+        ------
+        ValueError
+           Raised if the customer isn't found in the database
+        """
+        customer = await self.customer_dao.get_customer_by_id_async(customer_id)
+        if customer is None:
+            raise ValueError(
+                f"[CustomerService] Cannot find: customer with ID {customer_id} not found."
+            )
+        return customer
+
     @log
     def get_address_by_customer_id(self, customer_id: int) -> Address:
         """
@@ -128,18 +146,49 @@ class CustomerService:
         return customer
 
     @log
-    def get_all_customers(self, limit: int = 15) -> List[Customer]:
+    def get_all_customers(self, limit: int = 15, cursor: Optional[str] = None) -> List[Customer]:
         """
-        Fetch all customers of the database
+        Fetch a page of customers of the database, ordered by id
+
+        Parameters
+        ----------
+        limit : int
+            The number of customers you want to fetch, by default 15
+        cursor : Optional[str]
+            The cursor of the page, as given by `customers_cursor`, None for the first page
 
         Returns
         -------
         List[Customer]
             A list of Customer object, an empty list if there is none
+
+        Raises
+        ------
+        ValueError
+            If the cursor is malformed
         """
-        customers = self.customer_dao.get_all_customers(limit)
+        customers = self.customer_dao.get_all_customers(limit, decode_cursor(cursor, (int,)))
         return customers
 
+    @staticmethod
+    def customers_cursor(customers: List[Customer], limit: int) -> Optional[str]:
+        """
+        Cursor of the page of customers following `customers`
+
+        Parameters
+        ----------
+        customers : List[Customer]
+            A page of customers, as returned by `get_all_customers`
+        limit : int
+            The size of the page
+
+        Returns
+        -------
+        Optional[str]
+            The cursor of the next page, None if `customers` is the last page
+        """
+        return next_cursor(customers, limit, lambda customer: (customer.id,))
+
     @log
     def create_customer(
         self,
@@ -1,24 +1,33 @@
 import logging
 import re
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
 
 from src.DAO.DeliveryDAO import DeliveryDAO
 from src.DAO.DriverDAO import DriverDAO
 from src.DAO.OrderDAO import OrderDAO
+from src.Model.Address import Address
 from src.Model.Delivery import Delivery
 from src.Model.Driver import Driver
 from src.Model.Order import OrderState
+from src.Service.GoogleMapService import GoogleMapService
 from src.Service.UserService import UserService
+from src.utils.cache import TTLCache
 from src.utils.log_decorator import log
+from src.utils.pagination import decode_cursor, next_cursor
 
 from .PasswordService import check_password_strength, create_salt, hash_password
 
+DRIVER_FEED_CACHE_KEY = "available_orders"
+
 
 class DriverService:
     driver_dao: DriverDAO
     order_dao: OrderDAO
     delivery_dao: DeliveryDAO
     user_service: UserService
+    current_order_cache: Optional[TTLCache]
+    driver_feed_cache: Optional[TTLCache]
+    gm_service: Optional[GoogleMapService]
 
     def __init__(
         self,
@@ -26,11 +35,22 @@ class DriverService:
         driver_dao: DriverDAO,
         order_dao: OrderDAO,
         user_service: UserService,
+        current_order_cache: Optional[TTLCache] = None,
+        driver_feed_cache: Optional[TTLCache] = None,
+        gm_service: Optional[GoogleMapService] = None,
     ):
+        """
+        The orders available to the drivers are kept a few seconds in `driver_feed_cache`,
+        shared by every driver polling them. `gm_service` gives their distance from the
+        restaurant.
+        """
         self.driver_dao = driver_dao
         self.delivery_dao = delivery_dao
         self.user_service = user_service
         self.order_dao = order_dao
+        self.current_order_cache = current_order_cache
+        self.driver_feed_cache = driver_feed_cache
+        self.gm_service = gm_service
         self.pattern = r"^(?=.*[A-Za-zÀ-ÖØ-öø-ÿ])[-A-Za-zÀ-ÖØ-öø-ÿ ]+$"
 
     @log
@@ -90,21 +110,47 @@ class DriverService:
         return driver
 
     @log
-    def get_all_drivers(self, limit: int = 15) -> List[Driver]:
+    def get_all_drivers(self, limit: int = 15, cursor: Optional[str] = None) -> List[Driver]:
         """
-        Fetch a certain amount of drivers in the database
+        Fetch a certain amount of drivers in the database, ordered by id
 
         Parameters
         ----------
         limit : int
             The number of driver you want to fetch, by default 15
+        cursor : Optional[str]
+            The cursor of the page, as given by `drivers_cursor`, None for the first page
 
         Returns
         -------
         List[Driver]
             A list of Driver objects
+
+        Raises
+        ------
+        ValueError
+            If the cursor is malformed
+        """
+        return self.driver_dao.get_all_drivers(limit, decode_cursor(cursor, (int,)))
+
+    @staticmethod
+    def drivers_cursor(drivers: List[Driver], limit: int) -> Optional[str]:
+        """
+        Cursor of the page of drivers following `drivers`
+
+        Parameters
+        ----------
+        drivers : List[Driver]
+            A page of drivers, as returned by `get_all_drivers`
+        limit : int
+            The size of the page
+
+        Returns
+        -------
+        Optional[str]
+            The cursor of the next page, None if `drivers` is the last page
         """
-        return self.driver_dao.get_all_drivers(limit)
+        return next_cursor(drivers, limit, lambda driver: (driver.id,))
 
     @log
     def login(self, identifier: str, password: str) -> Driver:
@@ -330,30 +376,81 @@ class DriverService:
             If the driver is already delivering an order
         """
         driver = self.get_driver_by_id(driver_id)
-        order = self.order_dao.get_order_by_id(order_id)
-
-        if order.order_state != OrderState.PREPARED:
-            logging.error(
-                "[DriverService] Cannot start delivery: "
-                f"Order isn't prepared, current state: {order.order_state.name}"
-            )
-            raise ValueError(
-                "Cannot start delivery: "
-                f"Order isn't prepared, current state: {order.order_state.name}"
+        if driver.driver_is_delivering:
+            raise self._already_delivering(driver_id)
+
+        # the order is claimed (if it's still prepared), the driver flagged and the delivery
+        # created together or not at all: of two drivers starting the same order, the
+        # second one gets an error
+        with self.delivery_dao.db_connector.transaction():
+            order = self.order_dao.update_order_state(
+                order_id, OrderState.DELIVERING.value, expected_state=OrderState.PREPARED.value
             )
+            if order is None:
+                current = self.order_dao.get_order_by_id(order_id)
+                state = current.order_state.name if current is not None else None
+                logging.error(
+                    "[DriverService] Cannot start delivery: "
+                    f"Order isn't prepared, current state: {state}"
+                )
+                raise ValueError(
+                    f"Cannot start delivery: Order isn't prepared, current state: {state}"
+                )
+            delivery = self._assign_delivery(order_id, driver_id)
+        # the order is no longer available to the other drivers
+        if self.driver_feed_cache is not None:
+            self.driver_feed_cache.invalidate()
+        return delivery
+
+    @log
+    def claim_next_available(self, driver_id: int) -> Optional[Delivery]:
+        """
+        Start the delivery of the oldest prepared order, so that a driver doesn't pick an
+        order from a list which may be outdated. Concurrent claims get different orders.
+
+        Parameters
+        ----------
+        driver_id : int
+            The id of the driver
+
+        Returns
+        -------
+        Optional[Delivery]
+            The started delivery, None if no order is available
 
+        Raises
+        ------
+        ValueError
+            If the driver is already delivering an order
+        """
+        driver = self.get_driver_by_id(driver_id)
         if driver.driver_is_delivering:
-            logging.error(
-                f"[DriverService] Cannot start delivery: Driver {driver_id} "
-                "already has an active delivery"
+            raise self._already_delivering(driver_id)
+
+        with self.delivery_dao.db_connector.transaction():
+            order = self.order_dao.claim_next_order(
+                OrderState.PREPARED.value, OrderState.DELIVERING.value
             )
-            raise ValueError(f"Driver {driver_id} already has an active delivery")
+            if order is None:
+                return None
+            delivery = self._assign_delivery(order.order_id, driver_id)
+        if self.driver_feed_cache is not None:
+            self.driver_feed_cache.invalidate()
+        return delivery
 
+    def _already_delivering(self, driver_id: int) -> ValueError:
+        logging.error(
+            f"[DriverService] Cannot start delivery: Driver {driver_id} "
+            "already has an active delivery"
+        )
+        return ValueError(f"Driver {driver_id} already has an active delivery")
+
+    def _assign_delivery(self, order_id: int, driver_id: int) -> Delivery:
+        # checked again with the update, against a concurrent start by the same driver
+        if not self.driver_dao.start_delivering(driver_id):
+            raise self._already_delivering(driver_id)
         self.delivery_dao.create_delivery(order_id, driver_id)
-        self.driver_dao.update_driver(driver_id, update={"driver_is_delivering": True})
-        self.order_dao.update_order_state(order_id, OrderState.DELIVERING.value)
-        delivery = self.delivery_dao.update_delivery_state(order_id, 1)
-        return delivery
+        return self.delivery_dao.update_delivery_state(order_id, 1)
 
     @log
     def end_delivery(self, order_id: int, driver_id: int) -> Delivery:
@@ -394,9 +491,13 @@ class DriverService:
                 f"current state: {order.order_state.name}"
             )
 
-        self.driver_dao.update_driver(driver_id, update={"driver_is_delivering": False})
-        self.order_dao.update_order_state(order_id, OrderState.DELIVERED.value)
-        delivery = self.delivery_dao.update_delivery_state(order_id, 2)
+        with self.delivery_dao.db_connector.transaction():
+            self.driver_dao.update_driver(driver_id, update={"driver_is_delivering": False})
+            self.order_dao.update_order_state(order_id, OrderState.DELIVERED.value)
+            delivery = self.delivery_dao.update_delivery_state(order_id, 2)
+        # a delivered order is no longer the current order of its customer
+        if self.current_order_cache is not None:
+            self.current_order_cache.invalidate(order.order_customer_id)
         return delivery
 
     @log
@@ -447,13 +548,130 @@ class DriverService:
         Dict[str, Union[int, float]]
             A dictionnary with the statistics
         """
-        deliveries = self.delivery_dao.get_deliveries_by_driver(driver_id)
+        return self.order_dao.get_driver_stats(driver_id)
+
+    @log
+    def get_available_orders_feed(self, sort_by_distance: bool = False) -> List[Dict]:
+        """
+        Fetch the orders a driver can choose from (the prepared orders), as shown to the
+        drivers. The feed is read in a single query and shared by the drivers for the
+        lifetime of the `driver_feed_cache`.
 
-        nb_orders = len(deliveries)
-        earnings = 0.0
+        Parameters
+        ----------
+        sort_by_distance : bool
+            Sort the orders by distance from the restaurant instead of by date, the orders
+            whose address isn't geocoded yet come last. By default False
 
-        for delivery in deliveries:
-            order = self.order_dao.get_order_by_id(delivery.delivery_order_id)
-            earnings += order.order_price
+        Returns
+        -------
+        List[Dict]
+            For each order: its id, creation date, price, lines ("items"), address and
+            distance from the restaurant
+        """
+        if self.driver_feed_cache is None:
+            feed = self._load_driver_feed()
+        else:
+            feed = self.driver_feed_cache.get_or_set(DRIVER_FEED_CACHE_KEY, self._load_driver_feed)
+
+        if sort_by_distance:
+            return sorted(
+                feed, key=lambda order: (order["distance_km"] is None, order["distance_km"] or 0)
+            )
+        return list(feed)
+
+    def refresh_driver_feed(self, event: Dict) -> None:
+        """
+        Keep the feed of the drivers in step with an order event, whichever worker made
+        the transition. Called once per event by the `OrderEventHub`, so a newly prepared
+        order is read once and not by every stream of the drivers.
+
+        Parameters
+        ----------
+        event : Dict
+            The order event: the `order_id`, `order_state` and `previous_state` of the order
+        """
+        prepared = OrderState.PREPARED.name
+        if self.driver_feed_cache is None or prepared not in (
+            event["order_state"],
+            event["previous_state"],
+        ):
+            return
+
+        self.driver_feed_cache.invalidate()
+        if event["order_state"] == prepared:
+            self.get_available_orders_feed()
+
+    def get_feed_delta(self, event: Dict) -> Optional[Tuple[str, Dict]]:
+        """
+        The change of the orders available to the drivers made by an order event
+
+        Parameters
+        ----------
+        event : Dict
+            The order event: the `order_id`, `order_state` and `previous_state` of the order
+
+        Returns
+        -------
+        Optional[Tuple[str, Dict]]
+            ("added", the order as in the feed) for an order just prepared,
+            ("removed", {"order_id": ...}) for an order no longer available,
+            None if the event doesn't change the feed
+        """
+        prepared = OrderState.PREPARED.name
+        if event["order_state"] == prepared:
+            for order in self.get_available_orders_feed():
+                if order["order_id"] == event["order_id"]:
+                    return "added", order
+            # already taken by a driver, its own event follows
+            return None
+        if event["previous_state"] == prepared:
+            return "removed", {"order_id": event["order_id"]}
+        return None
+
+    def _load_driver_feed(self) -> List[Dict]:
+        raw_feed = self.order_dao.get_driver_feed(OrderState.PREPARED.value)
+        return [self._format_feed_order(raw_order) for raw_order in raw_feed]
+
+    def _format_feed_order(self, raw_order: Dict) -> Dict:
+        address = None
+        if raw_order["address_id"] is not None:
+            columns = {key: value for key, value in raw_order.items() if key.startswith("address_")}
+            address = Address(**columns)
+
+        items = []
+        for line in raw_order["order_lines"]:
+            if line["type"] == "item":
+                items.append(
+                    {
+                        "item_name": line["name"],
+                        "item_price": line["unit_price"],
+                        "item_type": line["item_type"],
+                        "image_url": line["image_url"],
+                        "quantity": line["quantity"],
+                        "type": "item",
+                    }
+                )
+            else:
+                items.append(
+                    {
+                        "bundle_name": line["name"],
+                        "bundle_price": line["unit_price"],
+                        "image_url": line["image_url"],
+                        "quantity": line["quantity"],
+                        "type": "bundle",
+                    }
+                )
 
-        return {"nb_orders": nb_orders, "earnings": round(earnings, 2)}
+        distance = None
+        if address is not None and self.gm_service is not None:
+            distance = self.gm_service.distance_from_restaurant(address)
+
+        return {
+            "order_id": raw_order["order_id"],
+            "order_timestamp": str(raw_order["order_created_at"]),
+            "order_price": round(raw_order["order_price"], 2),
+            "items": items,
+            "address": str(address) if address is not None else None,
+            "distance_km": distance,
+        }
@@ -1,10 +1,16 @@
 import math
 import os
+import threading
+from concurrent.futures import Future
 from datetime import datetime
-from typing import Dict, Union
+from typing import Dict, List, Optional, Union
 
 import googlemaps
 
+from src.DAO.GeocodeDAO import GeocodeDAO
+from src.Model.Address import Address
+from src.utils.cache import TTLCache
+from src.utils.geocoding import distance_km, geohash, normalize_address
 from src.utils.log_decorator import log
 
 
@@ -22,13 +28,44 @@ class GoogleMapService:
         Coordinates of the extremity of Rennes
     radius : float
         Maximum delivery distance from ENSAI
+    geocode_cache : TTLCache
+        Geocoding results kept in memory, by normalized address
+
+    Parameters
+    ----------
+    geocode_dao : Optional[GeocodeDAO]
+        Persistent cache of the geocoding results, shared between the workers, by default
+        None (in memory only)
+    client : Optional
+        Client of the maps API, by default a `googlemaps.Client`. A
+        `src.utils.geocoding.LocalMapsClient` runs the service offline
+    cache_ttl : Optional[float]
+        Lifetime (in seconds) of a geocoding result, by default `GEOCODE_CACHE_TTL` or 30 days
+    cache_size : int
+        Maximum number of geocoding results kept in memory, by default 1024
     """
 
-    def __init__(self) -> None:
-        self.__gmaps = googlemaps.Client(key=os.environ["GOOGLE_MAPS_API_KEY"])
+    def __init__(
+        self,
+        geocode_dao: Optional[GeocodeDAO] = None,
+        client=None,
+        cache_ttl: Optional[float] = None,
+        cache_size: int = 1024,
+    ) -> None:
+        if client is None:
+            client = googlemaps.Client(key=os.environ["GOOGLE_MAPS_API_KEY"])
+        self.__gmaps = client
+        self.geocode_dao = geocode_dao
+        if cache_ttl is None:
+            cache_ttl = float(os.environ.get("GEOCODE_CACHE_TTL") or 30 * 24 * 3600)
+        self.geocode_cache = TTLCache(ttl=cache_ttl, maxsize=cache_size)
+        # Lookups in progress by normalized address, awaited by the identical lookups
+        self._pending_geocodes: Dict[str, Future] = {}
+        self._pending_lock = threading.Lock()
+
         self.ensai_address = "51 Rue Blaise Pascal, 35170 Bruz, France"
 
-        ensai_geocode = self.__gmaps.geocode(self.ensai_address)
+        ensai_geocode = self.geocode(self.ensai_address)
         self.coord_ensai = ensai_geocode[0]["geometry"]["location"]
 
         self.coord_rennes = (48.137922, -1.632842)
@@ -37,6 +74,62 @@ class GoogleMapService:
             + (self.coord_rennes[1] - self.coord_ensai["lng"]) ** 2
         )
 
+    def geocode(self, address: str) -> List[dict]:
+        """
+        Geocode an address, from the memory cache, then the persistent cache, then the API.
+        Concurrent lookups of a same address wait for a single call to the API.
+
+        Parameters
+        ----------
+        address : str
+            address to geocode
+
+        Returns
+        -------
+        List[dict]
+            The results of the geocoding API, empty if the address is unknown
+        """
+        key = normalize_address(address)
+        missing = object()
+
+        with self._pending_lock:
+            result = self.geocode_cache.get(key, missing)
+            if result is not missing:
+                return result
+
+            pending = self._pending_geocodes.get(key)
+            if pending is None:
+                pending = self._pending_geocodes[key] = Future()
+                leader = True
+            else:
+                leader = False
+
+        if not leader:
+            return pending.result()
+
+        try:
+            result = self._load_geocode(key, address)
+            self.geocode_cache.set(key, result)
+            pending.set_result(result)
+            return result
+        except Exception as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._pending_lock:
+                del self._pending_geocodes[key]
+
+    def _load_geocode(self, key: str, address: str) -> List[dict]:
+        if self.geocode_dao is not None:
+            result = self.geocode_dao.get_geocode(key, self.geocode_cache.ttl)
+            if result is not None:
+                return result
+
+        result = self.__gmaps.geocode(address)
+        if self.geocode_dao is not None:
+            self.geocode_dao.save_geocode(key, result)
+        return result
+
     @log
     def validate_address(self, address: str) -> bool:
         """
@@ -64,7 +157,7 @@ class GoogleMapService:
             If the address outside the delivery zone
         """
 
-        result = self.__gmaps.geocode(address)
+        result = self.geocode(address)
 
         if len(result) == 0:
             raise ValueError("[GoogleMapService]: Invalid address.")
@@ -80,15 +173,82 @@ class GoogleMapService:
 
         coord_address = result[0]["geometry"]["location"]
 
-        if (coord_address["lat"] - self.coord_ensai["lat"]) ** 2 + (
-            coord_address["lng"] - self.coord_ensai["lng"]
-        ) ** 2 > self.radius**2:
+        if not self.is_in_delivery_zone(coord_address["lat"], coord_address["lng"]):
             raise ValueError("[GoogleMapService]: Destination is too far away.")
 
         return True
 
+    def is_in_delivery_zone(self, latitude: float, longitude: float) -> bool:
+        """
+        Check that a point is in the delivery zone, without any call to the API
+
+        Parameters
+        ----------
+        latitude : float
+            latitude of the point
+        longitude : float
+            longitude of the point
+
+        Returns
+        -------
+        bool
+            True if the point is in the circle centered on ENSAI
+        """
+        return (latitude - self.coord_ensai["lat"]) ** 2 + (
+            longitude - self.coord_ensai["lng"]
+        ) ** 2 <= self.radius**2
+
+    def distance_from_restaurant(self, address: Address) -> Optional[float]:
+        """
+        Distance (in km, as the crow flies) between ENSAI and an address, from its stored
+        coordinates
+
+        Parameters
+        ----------
+        address : Address
+            a geocoded address
+
+        Returns
+        -------
+        Optional[float]
+            The distance, None if the coordinates of the address are unknown
+        """
+        if not address.has_coordinates:
+            return None
+        return distance_km(
+            self.coord_ensai["lat"],
+            self.coord_ensai["lng"],
+            address.address_latitude,
+            address.address_longitude,
+        )
+
+    def get_route_url(self, latitude: float, longitude: float) -> str:
+        """
+        Url of a map showing the driving route from ENSAI to a point, without any call
+        to the API
+
+        Parameters
+        ----------
+        latitude : float
+            latitude of the destination
+        longitude : float
+            longitude of the destination
+
+        Returns
+        -------
+        str
+            An url leading to a map showing the route
+        """
+        return (
+            "https://www.google.com/maps/embed/v1/directions"
+            f"?key={os.environ['GOOGLE_MAPS_API_KEY']}"
+            f"&origin={self.coord_ensai['lat']}, {self.coord_ensai['lng']}"
+            f"&destination={latitude}, {longitude}"
+            "&mode=driving&zoom=15"
+        )
+
     @log
-    def extract_components(self, address: str) -> Dict[str, Union[str, int]]:
+    def extract_components(self, address: str) -> Dict[str, Union[str, int, float]]:
         """
         Extract the components needed to create an Address object
 
@@ -99,10 +259,11 @@ class GoogleMapService:
 
         Returns
         -------
-        Dict[str, Union[str, int]]
-            A dictionnary with all the attributes of an Address class
+        Dict[str, Union[str, int, float]]
+            A dictionnary with all the attributes of an Address class, coordinates included
         """
-        result = self.__gmaps.geocode(address)
+        result = self.geocode(address)
+        location = result[0]["geometry"]["location"]
 
         number = street = city = postal_code = country = None
 
@@ -128,6 +289,9 @@ class GoogleMapService:
             "address_city": city,
             "address_postal_code": int(postal_code),
             "address_country": country,
+            "address_latitude": location["lat"],
+            "address_longitude": location["lng"],
+            "address_geohash": geohash(location["lat"], location["lng"]),
         }
 
     @log
@@ -160,16 +324,10 @@ class GoogleMapService:
             if not directions_result:
                 raise ValueError("No route found.")
 
-            destination_geocode = self.__gmaps.geocode(destination)
+            destination_geocode = self.geocode(destination)
             coord_destination = destination_geocode[0]["geometry"]["location"]
 
-            url = (
-                "https://www.google.com/maps/embed/v1/directions"
-                f"?key={os.environ['GOOGLE_MAPS_API_KEY']}"
-                f"&origin={self.coord_ensai['lat']}, {self.coord_ensai['lng']}"
-                f"&destination={coord_destination['lat']}, {coord_destination['lng']}"
-                "&mode=driving&zoom=15"
-            )
+            url = self.get_route_url(coord_destination["lat"], coord_destination["lng"])
 
         except Exception as e:
             raise Exception(f"Error while computing path: {e}") from e
@@ -3,16 +3,29 @@ from typing import List, Optional
 from src.DAO.ItemDAO import ItemDAO
 from src.DAO.OrderDAO import OrderDAO
 from src.Model.Item import Item
+from src.Service.MenuService import invalidate_menu
+from src.Service.StripeService import StripeService
+from src.utils.cache import TTLCache
 from src.utils.log_decorator import log
 
 
 class ItemService:
     item_dao: ItemDAO
     order_dao: OrderDAO
+    menu_cache: Optional[TTLCache]
+    stripe_service: Optional[StripeService]
 
-    def __init__(self, item_dao: ItemDAO, order_dao: OrderDAO):
+    def __init__(
+        self,
+        item_dao: ItemDAO,
+        order_dao: OrderDAO,
+        menu_cache: Optional[TTLCache] = None,
+        stripe_service: Optional[StripeService] = None,
+    ):
         self.item_dao = item_dao
         self.order_dao = order_dao
+        self.menu_cache = menu_cache
+        self.stripe_service = stripe_service
 
     @log
     def get_item_by_id(self, item_id: int) -> Optional[Item]:
@@ -78,6 +91,9 @@ class ItemService:
             item_image=item_image,
             is_in_menu=is_in_menu,
         )
+        invalidate_menu(self.menu_cache)
+        if self.stripe_service is not None:
+            self.stripe_service.sync_orderable(created_item.orderable_id)
         return created_item
 
     @log
@@ -116,6 +132,13 @@ class ItemService:
 
         update = {key: value for key, value in update.items() if value is not None}
         item = self.item_dao.update_item(item_id, update=update)
+        invalidate_menu(self.menu_cache)
+        if self.stripe_service is not None:
+            self.stripe_service.sync_orderable(
+                item.orderable_id,
+                prices="item_price" in update,
+                products="item_name" in update or "item_description" in update,
+            )
         return item
 
     @log
@@ -130,3 +153,4 @@ class ItemService:
         """
         self.get_item_by_id(item_id)
         self.item_dao.delete_item_by_id(item_id)
+        invalidate_menu(self.menu_cache)
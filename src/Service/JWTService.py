@@ -1,3 +1,4 @@
+import hashlib
 import os
 import time
 from typing import Literal
@@ -6,19 +7,28 @@ import jwt
 from jwt import ExpiredSignatureError
 
 from src.Model.JWTResponse import JWTResponse
+from src.utils.cache import TTLCache
+
+# Lifetime of a token created by `encode_jwt`, in seconds
+TOKEN_LIFETIME = 3600
 
 
 class JwtService:
     """
     Handler for JWT encryption and validation
+
+    The claims of the tokens already verified are kept in a small LRU cache, keyed by
+    the digest of the token, so a token is verified once and not on every request.
+    The expiry of a cached token is still checked on every validation.
     """
 
-    def __init__(self, secret: str = "", algorithm: str = "HS256"):
+    def __init__(self, secret: str = "", algorithm: str = "HS256", cache_size: int = 1024):
         if secret == "":
             self.secret = os.environ["JWT_SECRET"]
         else:
             self.secret = secret
         self.algorithm = algorithm
+        self.verified_tokens = TTLCache(ttl=TOKEN_LIFETIME, maxsize=cache_size)
 
     def encode_jwt(
         self, user_id: int, user_role: Literal["admin", "customer", "driver"]
@@ -29,7 +39,7 @@ class JwtService:
         payload = {
             "user_id": user_id,
             "user_role": user_role,
-            "expiry_timestamp": time.time() + 3600,
+            "expiry_timestamp": time.time() + TOKEN_LIFETIME,
         }
         token = jwt.encode(payload, self.secret, algorithm=self.algorithm)
 
@@ -41,13 +51,27 @@ class JwtService:
         """
         return jwt.decode(token, self.secret, algorithms=[self.algorithm])
 
-    def validate_user_jwt(self, token: str) -> str:
+    def validate_user_jwt(self, token: str) -> dict:
         """
-        Returns the id of the user authenticated by the JWT
+        Returns the id and role of the user authenticated by the JWT
         Throws in case of invalid or expired JWT
         """
-        decoded_jwt = self.decode_jwt(token)
-        if decoded_jwt["expiry_timestamp"] < time.time():
+        if isinstance(token, str):
+            token = token.encode("utf-8")
+        digest = hashlib.sha256(token).digest()
+
+        verified = self.verified_tokens.get(digest)
+        if verified is None:
+            decoded_jwt = self.decode_jwt(token)
+            verified = (
+                {"user_id": decoded_jwt["user_id"], "user_role": decoded_jwt["user_role"]},
+                decoded_jwt["expiry_timestamp"],
+            )
+            self.verified_tokens.set(digest, verified)
+
+        claims, expiry_timestamp = verified
+        if expiry_timestamp < time.time():
+            self.verified_tokens.invalidate(digest)
             raise ExpiredSignatureError("Expired JWT")
 
-        return {"user_id": decoded_jwt["user_id"], "user_role": decoded_jwt["user_role"]}
+        return dict(claims)
@@ -1,22 +1,51 @@
-from typing import List, Optional, Union
+from typing import Dict, List, Optional, Union
 
 from src.DAO.BundleDAO import BundleDAO
 from src.DAO.ItemDAO import ItemDAO
 from src.DAO.OrderableDAO import OrderableDAO
 from src.Model.Bundle import Bundle
 from src.Model.Item import Item
+from src.utils.cache import TTLCache
 from src.utils.log_decorator import log
 
+MENU_CACHE_KEY = "orderables"
+
+
+def invalidate_menu(menu_cache: Optional[TTLCache]) -> None:
+    """
+    Drop the cached menu, must be called after any change of the orderables or stocks
+
+    Parameters
+    ----------
+    menu_cache : Optional[TTLCache]
+        The cache of the menu shared with the MenuService, None if there is none
+    """
+    if menu_cache is not None:
+        menu_cache.invalidate()
+
 
 class MenuService:
     orderable_dao: OrderableDAO
     item_dao: ItemDAO
     bundle_dao: BundleDAO
-
-    def __init__(self, orderable_dao: OrderableDAO, item_dao: ItemDAO, bundle_dao: BundleDAO):
+    menu_cache: TTLCache
+
+    def __init__(
+        self,
+        orderable_dao: OrderableDAO,
+        item_dao: ItemDAO,
+        bundle_dao: BundleDAO,
+        menu_cache: Optional[TTLCache] = None,
+    ):
+        """
+        The menu is kept in `menu_cache`: it must be shared with the ItemService,
+        BundleService and OrderService so they can invalidate it when they edit the
+        orderables or their stock. A private cache is created if none is given.
+        """
         self.orderable_dao = orderable_dao
         self.item_dao = item_dao
         self.bundle_dao = bundle_dao
+        self.menu_cache = menu_cache if menu_cache is not None else TTLCache()
 
     @log
     def get_all_orderables(self, in_menu=True) -> List[Union[Item, Bundle]]:
@@ -34,20 +63,33 @@ class MenuService:
         List[Union[Item, Bundle]]
             A list of Item and Bundle object
         """
-        orderables = self.orderable_dao.get_all_orderables()
+        return [
+            orderable
+            for orderable in self._get_menu_snapshot().values()
+            if (in_menu and orderable.is_in_menu) or in_menu is False
+        ]
 
-        Orderables_in_menu = []
-        for orderable in orderables:
-            if orderable["orderable_type"] == "item":
-                item = self.item_dao.get_item_by_orderable_id(orderable["orderable_id"])
-                if (in_menu and item.is_in_menu) or in_menu is False:
-                    Orderables_in_menu.append(item)
-            if orderable["orderable_type"] == "bundle":
-                bundle = self.bundle_dao.get_bundle_by_orderable_id(orderable["orderable_id"])
-                if (in_menu and bundle.is_in_menu) or in_menu is False:
-                    Orderables_in_menu.append(bundle)
+    @log
+    async def get_all_orderables_async(self, in_menu=True) -> List[Union[Item, Bundle]]:
+        """
+        Same as `get_all_orderables`, the menu is loaded without blocking the event loop
+        when it isn't in the cache
+        """
+        snapshot = self.menu_cache.get(MENU_CACHE_KEY)
+        if snapshot is None:
+            version = self.menu_cache.version
+            snapshot = self._assemble_menu_snapshot(
+                await self.orderable_dao.get_all_orderables_async(),
+                await self.item_dao.get_all_items_async(),
+                await self.bundle_dao.get_all_bundle_async(),
+            )
+            self.menu_cache.set(MENU_CACHE_KEY, snapshot, version)
 
-        return Orderables_in_menu
+        return [
+            orderable
+            for orderable in snapshot.values()
+            if (in_menu and orderable.is_in_menu) or in_menu is False
+        ]
 
     @log
     def get_orderable_from_menu(self, orderable_id: int) -> Optional[Union[Item, Bundle]]:
@@ -69,18 +111,12 @@ class MenuService:
         ValueError
             If the orderable id is invalid
         """
-        orderable = self.orderable_dao.get_orderable_by_id(orderable_id)
+        orderable = self._get_menu_snapshot().get(orderable_id)
         if orderable is None:
             raise ValueError(
                 f"[MenuService] Cannot get orderable: Orderable with ID {orderable_id} not found."
             )
-        if orderable["orderable_type"] == "item":
-            item = self.item_dao.get_item_by_orderable_id(orderable["orderable_id"])
-            return item if item.is_in_menu else None
-
-        if orderable["orderable_type"] == "bundle":
-            bundle = self.bundle_dao.get_bundle_by_orderable_id(orderable["orderable_id"])
-            return bundle if bundle.is_in_menu else None
+        return orderable if orderable.is_in_menu else None
 
     @log
     def remove_orderable_from_menu(self, orderable_id: int) -> Union[Item, Bundle]:
@@ -125,6 +161,7 @@ class MenuService:
             )
 
         self.orderable_dao.update_orderable_state(orderable_id, False)
+        self.menu_cache.invalidate()
         orderable_instance.is_in_menu = False
 
         return orderable_instance
@@ -188,6 +225,7 @@ class MenuService:
                 )
 
         self.orderable_dao.update_orderable_state(orderable_id, True)
+        self.menu_cache.invalidate()
         orderable_instance.is_in_menu = True
         return orderable_instance
 
@@ -211,3 +249,42 @@ class MenuService:
     @log
     def get_number_orderables(self) -> int:
         return self.orderable_dao.get_number_orderables()
+
+    @log
+    def get_menu_cache_stats(self) -> Dict[str, Union[int, float]]:
+        """
+        Get the usage statistics of the menu cache
+
+        Returns
+        -------
+        Dict[str, Union[int, float]]
+            The hits, misses, invalidations... of the cache
+        """
+        return self.menu_cache.stats()
+
+    def _get_menu_snapshot(self) -> Dict[int, Union[Item, Bundle]]:
+        """
+        Get every orderable by orderable id, from the cache if the snapshot is still valid
+        """
+        return self.menu_cache.get_or_set(MENU_CACHE_KEY, self._load_menu_snapshot)
+
+    def _load_menu_snapshot(self) -> Dict[int, Union[Item, Bundle]]:
+        return self._assemble_menu_snapshot(
+            self.orderable_dao.get_all_orderables(),
+            self.item_dao.get_all_items(),
+            self.bundle_dao.get_all_bundle(),
+        )
+
+    @staticmethod
+    def _assemble_menu_snapshot(
+        orderables: List[Dict], items: List[Item], bundles: List[Bundle]
+    ) -> Dict[int, Union[Item, Bundle]]:
+        """
+        Index the items and bundles by orderable id, in the order of the orderables
+        """
+        instances = {instance.orderable_id: instance for instance in [*items, *bundles]}
+        return {
+            orderable["orderable_id"]: instances[orderable["orderable_id"]]
+            for orderable in orderables
+            if orderable["orderable_id"] in instances
+        }
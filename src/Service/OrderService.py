@@ -1,11 +1,22 @@
-from typing import Dict, List, Literal
+from datetime import datetime
+from typing import Dict, List, Literal, Optional, Union
 
 from src.DAO.BundleDAO import BundleDAO
 from src.DAO.ItemDAO import ItemDAO
 from src.DAO.OrderableDAO import OrderableDAO
 from src.DAO.OrderDAO import OrderDAO
+from src.Model.Bundle import Bundle
+from src.Model.Item import Item
 from src.Model.Order import Order, OrderState
+from src.Service.MenuService import invalidate_menu
+from src.utils.cache import TTLCache
 from src.utils.log_decorator import log
+from src.utils.pagination import decode_cursor, next_cursor
+from src.utils.query_stats import query_budget
+
+# Queries made to read orders, whatever their number and content: the orders, their
+# orderables and the items of their bundles
+ORDERS_QUERY_BUDGET = 3
 
 
 class OrderService:
@@ -13,6 +24,8 @@ class OrderService:
     orderable_dao: OrderableDAO
     item_dao: ItemDAO
     bundle_dao: BundleDAO
+    menu_cache: Optional[TTLCache]
+    current_order_cache: Optional[TTLCache]
 
     def __init__(
         self,
@@ -20,11 +33,15 @@ class OrderService:
         orderable_dao: OrderableDAO,
         item_dao: ItemDAO,
         bundle_dao: BundleDAO,
+        menu_cache: Optional[TTLCache] = None,
+        current_order_cache: Optional[TTLCache] = None,
     ):
         self.order_dao = order_dao
         self.orderable_dao = orderable_dao
         self.item_dao = item_dao
         self.bundle_dao = bundle_dao
+        self.menu_cache = menu_cache
+        self.current_order_cache = current_order_cache
         self.valid_transition = {
             OrderState.PENDING: [OrderState.PAID, OrderState.CANCELLED],
             OrderState.PAID: [OrderState.PREPARED, OrderState.CANCELLED],
@@ -34,6 +51,7 @@ class OrderService:
             OrderState.CANCELLED: [],
         }
 
+    @query_budget(ORDERS_QUERY_BUDGET, "OrderService.get_order_by_id")
     @log
     def get_order_by_id(self, order_id: int) -> Order:
         """
@@ -59,8 +77,9 @@ class OrderService:
             raise ValueError(f"[Order Service] Cannot find: order with ID {order_id} not found.")
         return order
 
+    @query_budget(ORDERS_QUERY_BUDGET, "OrderService.get_all_orders")
     @log
-    def get_all_orders(self, limit: int) -> List[Order]:
+    def get_all_orders(self, limit: int, cursor: Optional[str] = None) -> List[Order]:
         """
         Fetch a certain number of orders. The firsts orders are the latests.
 
@@ -68,31 +87,71 @@ class OrderService:
         ----------
         limit : int
             The number of order you want
+        cursor : Optional[str]
+            The cursor of the page, as given by `orders_cursor`, None for the first page
 
         Returns
         -------
         List[Order]
             The retrived orders
+
+        Raises
+        ------
+        ValueError
+            If the cursor is malformed
         """
-        return self.order_dao.get_all_orders(limit)
+        return self.order_dao.get_all_orders(limit, decode_cursor(cursor, (datetime, int)))
 
+    @query_budget(ORDERS_QUERY_BUDGET, "OrderService.get_all_orders_by_customer")
     @log
-    def get_all_orders_by_customer(self, customer_id: int) -> List[Order]:
+    def get_all_orders_by_customer(
+        self, customer_id: int, limit: Optional[int] = None, cursor: Optional[str] = None
+    ) -> List[Order]:
         """
-        Get all the past and current orders of a given customer. Orders are ordered by date
+        Get the past and current orders of a given customer. Orders are ordered by date
         (latests orders first)
 
         Parameters
         ----------
         customer_id : int
             The id of the customer whose history you want
+        limit : Optional[int]
+            The number of orders you want, by default the whole history
+        cursor : Optional[str]
+            The cursor of the page, as given by `orders_cursor`, None for the first page
 
         Returns
         -------
         List[Order]
             The list of orders associated with this user
+
+        Raises
+        ------
+        ValueError
+            If the cursor is malformed
         """
-        return self.order_dao.get_all_orders_by_customer(customer_id)
+        return self.order_dao.get_all_orders_by_customer(
+            customer_id, limit, decode_cursor(cursor, (datetime, int))
+        )
+
+    @staticmethod
+    def orders_cursor(orders: List[Order], limit: int) -> Optional[str]:
+        """
+        Cursor of the page of orders following `orders`
+
+        Parameters
+        ----------
+        orders : List[Order]
+            A page of orders, as returned by `get_all_orders` or `get_all_orders_by_customer`
+        limit : int
+            The size of the page
+
+        Returns
+        -------
+        Optional[str]
+            The cursor of the next page, None if `orders` is the last page
+        """
+        return next_cursor(orders, limit, lambda order: (order.order_created_at, order.order_id))
 
     @log
     def get_customer_current_order(self, customer_id: int) -> Order:
@@ -112,6 +171,30 @@ class OrderService:
         """
         return self.order_dao.get_customer_current_order(customer_id)
 
+    @log
+    def get_customer_current_order_id(self, customer_id: int) -> Optional[int]:
+        """
+        Fetch the id of the current order of a customer, without loading its content.
+        The id is cached by customer until an order of the customer is created, paid,
+        cancelled, delivered or deleted
+
+        Parameters
+        ----------
+        customer_id : int
+            The id of the customer
+
+        Returns
+        -------
+        Optional[int]
+            The id of his current order, None if he has none
+        """
+        if self.current_order_cache is None:
+            return self.order_dao.get_customer_current_order_id(customer_id)
+        return self.current_order_cache.get_or_set(
+            customer_id, lambda: self.order_dao.get_customer_current_order_id(customer_id)
+        )
+
+    @query_budget(ORDERS_QUERY_BUDGET, "OrderService.get_orders_by_state")
     @log
     def get_orders_by_state(
         self, state: OrderState, order_by: Literal["DESC", "ASC"] = "DESC"
@@ -137,6 +220,7 @@ class OrderService:
         """
         return self.order_dao.get_orders_by_state(state.value)
 
+    @query_budget(ORDERS_QUERY_BUDGET, "OrderService.get_available_orders_for_drivers")
     @log
     def get_available_orders_for_drivers(self) -> List[Order]:
         """
@@ -149,6 +233,7 @@ class OrderService:
         """
         return self.order_dao.get_orders_by_state(OrderState.PREPARED.value, order_by="ASC")
 
+    @query_budget(ORDERS_QUERY_BUDGET, "OrderService.get_actives_orders")
     @log
     def get_actives_orders(self) -> List[Order]:
         """
@@ -183,6 +268,7 @@ class OrderService:
             return self.get_customer_current_order(customer_id)
 
         new_order = self.order_dao.create_order(customer_id=customer_id)
+        self.invalidate_current_order(customer_id)
         return new_order
 
     @log
@@ -213,6 +299,8 @@ class OrderService:
         ValueError
             If you try to skip a step in the order process
             (example: mark an order as prepared but it wasn't paid yet)
+        ValueError
+            If the state of the order changed concurrently
         """
         order = self.get_order_by_id(order_id)
 
@@ -222,7 +310,16 @@ class OrderService:
                 f"{order.order_state} to {new_state}."
             )
 
-        updated_order = self.order_dao.update_order_state(order_id, new_state.value)
+        # the transition was checked against this state: a concurrent change voids it
+        updated_order = self.order_dao.update_order_state(
+            order_id, new_state.value, expected_state=order.order_state.value
+        )
+        if updated_order is None:
+            raise ValueError(
+                "[OrderService] Cannot change state: The order is no longer "
+                f"{order.order_state}, it changed while going to {new_state}."
+            )
+        self.invalidate_current_order(order.order_customer_id)
         return updated_order
 
     @log
@@ -269,13 +366,16 @@ class OrderService:
         order_id : int
             Unique identifier of the order
         """
-        self.get_order_by_id(order_id)
+        order = self.get_order_by_id(order_id)
         self.order_dao.delete_order(order_id)
+        self.invalidate_current_order(order.order_customer_id)
 
     @log
-    def add_orderable_to_order(self, orderable_id: int, order_id: int, quantity: int = 1) -> Order:
+    def add_orderable_to_order(self, orderable_id: int, order_id: int, quantity: int = 1) -> None:
         """
         Add an orderable to a given order if enough stock is available.
+        The orderable is checked and added by a single statement, it's only read to explain
+        a refusal.
 
         Parameters
         ----------
@@ -286,11 +386,6 @@ class OrderService:
         quantity : int
             Number of units to add (default is 1)
 
-        Returns
-        -------
-        Order
-            The updated order object
-
         Raises
         ------
         ValueError
@@ -303,44 +398,36 @@ class OrderService:
             If the bundle isn't in the menu
         ValueError
             If the bundle doesn't have enough stock
+        ValueError
+            If the order isn't pending (it's being or has been paid)
         """
-        raw_orderable = self.orderable_dao.get_orderable_by_id(orderable_id)
+        if quantity < 1:
+            raise ValueError("[OrderService] The quantity to add must be positive.")
 
-        if raw_orderable is None:
-            raise ValueError(f"[OrderService] Orderable with ID {orderable_id} not found.")
+        # the menu and the stock are checked, and the stock taken, by the database in the
+        # same statement as the update of the order, so concurrent orders can't oversell
+        if self.order_dao.reserve_orderable(order_id, orderable_id, quantity):
+            invalidate_menu(self.menu_cache)
+            return
 
-        if raw_orderable["orderable_type"] == "item":
-            orderable = self.item_dao.get_item_by_orderable_id(orderable_id)
-            if not orderable.is_in_menu:
-                raise ValueError("[OrderService] The item isn't available.")
-            if not orderable.check_stock(quantity):
-                raise ValueError(
-                    f"[OrderService] Not enough stock for {orderable.item_name}"
-                    f" (available: {orderable.item_stock})."
-                )
-            update_data = {"item_stock": orderable.item_stock - quantity}
-            self.item_dao.update_item(orderable.item_id, update_data)
-
-        if raw_orderable["orderable_type"] == "bundle":
-            orderable = self.bundle_dao.get_bundle_by_orderable_id(orderable_id)
-            if not orderable.is_in_menu:
-                raise ValueError("[OrderService] The item isn't available.")
-
-            if not orderable.check_stock(quantity):
-                raise ValueError(
-                    f"[OrderService] Not enough stock for {orderable.bundle_name}"
-                    f" (available: {orderable.get_stock()})."
-                )
-            for item, nb in orderable.bundle_items.items():
-                update_data = {"item_stock": item.item_stock - nb * quantity}
-                self.item_dao.update_item(item.item_id, update_data)
-
-        return self.order_dao.add_orderable_to_order(order_id, orderable.orderable_id, quantity)
+        orderable = self._get_orderable(orderable_id)
+        if not orderable.is_in_menu:
+            raise ValueError("[OrderService] The item isn't available.")
+        order = self.order_dao.get_order_by_id(order_id)
+        if order is None or order.order_state != OrderState.PENDING:
+            raise ValueError(
+                f"[OrderService] Cannot add to order {order_id}: it isn't pending anymore."
+            )
+        if isinstance(orderable, Item):
+            name, available = orderable.item_name, orderable.item_stock
+        else:
+            name, available = orderable.bundle_name, orderable.get_stock()
+        raise ValueError(f"[OrderService] Not enough stock for {name} (available: {available}).")
 
     @log
     def remove_orderable_from_order(
         self, orderable_id: int, order_id: int, quantity: int = 1
-    ) -> Order:
+    ) -> None:
         """
         Remove an orderable to a given order
 
@@ -353,11 +440,6 @@ class OrderService:
         quantity : int
             Number of units to remove (default is 1)
 
-        Returns
-        -------
-        Order
-            The updated order object
-
         Raises
         ------
         ValueError
@@ -366,30 +448,19 @@ class OrderService:
             If you try to remove more orderable than there is in the order
 
         """
-        raw_orderable = self.orderable_dao.get_orderable_by_id(orderable_id)
-        if raw_orderable is None:
-            raise ValueError(f"[OrderService] Orderable with ID {orderable_id} not found.")
-        quantity_in_order = self.order_dao.get_quantity_of_orderables(order_id, orderable_id)
-        if quantity_in_order < quantity:
-            raise ValueError(
-                f"[OrderService] Trying to remove {quantity} of orderable {orderable_id} when "
-                f"there is only {quantity_in_order} of it in the order !"
-            )
-        if raw_orderable["orderable_type"] == "item":
-            orderable = self.item_dao.get_item_by_orderable_id(orderable_id)
-
-            update_data = {"item_stock": orderable.item_stock + quantity}
-            self.item_dao.update_item(orderable.item_id, update_data)
-
-        if raw_orderable["orderable_type"] == "bundle":
-            orderable = self.bundle_dao.get_bundle_by_orderable_id(orderable_id)
+        if quantity < 1:
+            raise ValueError("[OrderService] The quantity to remove must be positive.")
 
-            for item, nb in orderable.bundle_items.items():
-                update_data = {"item_stock": item.item_stock + nb * quantity}
-                self.item_dao.update_item(item.item_id, update_data)
+        if self.order_dao.release_orderable(order_id, orderable_id, quantity):
+            invalidate_menu(self.menu_cache)
+            return
 
-        return self.order_dao.remove_orderable_from_order(
-            order_id, orderable.orderable_id, quantity
+        if self.orderable_dao.get_orderable_by_id(orderable_id) is None:
+            raise ValueError(f"[OrderService] Orderable with ID {orderable_id} not found.")
+        quantity_in_order = self.order_dao.get_quantity_of_orderables(order_id, orderable_id)
+        raise ValueError(
+            f"[OrderService] Trying to remove {quantity} of orderable {orderable_id} when "
+            f"there is only {quantity_in_order} of it in the order !"
         )
 
     @log
@@ -412,6 +483,46 @@ class OrderService:
         except Exception as e:
             raise Exception(f"An error occured while calculating profits: {str(e)}") from e
 
+    @log
+    def get_revenue(
+        self,
+        bucket: Literal["day", "week"] = "day",
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> Dict:
+        """
+        Calculate the earnings of Ub'EJR over a period, detailed by day or by week
+
+        Parameters
+        ----------
+        bucket : Literal["day", "week"]
+            Granularity of the detail, by default "day"
+        start : Optional[datetime]
+            Beginning of the period (included), by default None (no lower bound)
+        end : Optional[datetime]
+            End of the period (excluded), by default None (no upper bound)
+
+        Returns
+        -------
+        Dict
+            The total earnings of the period and the earnings for each day/week
+
+        Raises
+        ------
+        ValueError
+            If the bucket is unknown or if the period ends before it starts
+        """
+        if bucket not in ("day", "week"):
+            raise ValueError(f"[OrderService] Unknown bucket {bucket}, use 'day' or 'week'.")
+        if start is not None and end is not None and start >= end:
+            raise ValueError("[OrderService] The start of the period must be before its end.")
+
+        revenues = self.order_dao.get_revenue_by_period(bucket, start, end)
+        return {
+            "total": round(sum(revenue["revenue"] for revenue in revenues), 2),
+            "revenues": revenues,
+        }
+
     @log
     def get_number_orders_by_state(self) -> Dict[str, int]:
         """
@@ -431,3 +542,21 @@ class OrderService:
             return self.order_dao.get_number_orders_by_state()
         except Exception as e:
             raise Exception(f"An error occured while fetchin orders: {str(e)}") from e
+
+    def _get_orderable(self, orderable_id: int) -> Union[Item, Bundle]:
+        raw_orderable = self.orderable_dao.get_orderable_by_id(orderable_id)
+        if raw_orderable is None:
+            raise ValueError(f"[OrderService] Orderable with ID {orderable_id} not found.")
+
+        if raw_orderable["orderable_type"] == "item":
+            return self.item_dao.get_item_by_orderable_id(orderable_id)
+        return self.bundle_dao.get_bundle_by_orderable_id(orderable_id)
+
+    def invalidate_current_order(self, customer_id: int) -> None:
+        """
+        Drop the cached current order id of a customer, after any change of his orders.
+        A caller grouping changes in a transaction calls it again once it's committed, so a
+        reader can't cache the id read before the commit.
+        """
+        if self.current_order_cache is not None:
+            self.current_order_cache.invalidate(customer_id)
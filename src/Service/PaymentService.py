@@ -0,0 +1,76 @@
+import logging
+from typing import Dict
+
+from src.DAO.StripeEventDAO import StripeEventDAO
+from src.Model.Order import OrderState
+from src.Service.OrderService import OrderService
+from src.utils.log_decorator import log
+
+# Events telling that a checkout session is paid (the second one for the delayed payment
+# methods, whose session is completed before being paid)
+PAYMENT_EVENTS = {"checkout.session.completed", "checkout.session.async_payment_succeeded"}
+
+
+class PaymentService:
+    stripe_event_dao: StripeEventDAO
+    order_service: OrderService
+
+    def __init__(self, stripe_event_dao: StripeEventDAO, order_service: OrderService):
+        self.stripe_event_dao = stripe_event_dao
+        self.order_service = order_service
+
+    @log
+    def handle_event(self, event: Dict) -> bool:
+        """
+        Apply an event sent by Stripe to the webhook: a paid checkout session marks its
+        order as paid and opens the next order of the customer.
+
+        Stripe may send an event several times: an event is applied once, together with
+        the record of its id, so a retry of an event already applied does nothing.
+
+        Parameters
+        ----------
+        event : Dict
+            The event, whose signature was checked by `StripeService.construct_event`
+
+        Returns
+        -------
+        bool
+            True if the event was applied, False if it was ignored or already applied
+
+        Raises
+        ------
+        ValueError
+            If the session of the event isn't linked to an order
+        """
+        if event["type"] not in PAYMENT_EVENTS:
+            return False
+
+        session = event["data"]["object"]
+        if session.get("payment_status") != "paid":
+            return False
+
+        try:
+            order_id = int(session["metadata"]["order_id"])
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(
+                f"[PaymentService] Cannot handle event {event['id']}: no order in its session."
+            ) from e
+
+        with self.stripe_event_dao.db_connector.transaction():
+            if not self.stripe_event_dao.record_event(event["id"], event["type"], order_id):
+                return False
+
+            order = self.order_service.get_order_by_id(order_id)
+            if order.order_state != OrderState.PENDING:
+                logging.warning(
+                    f"[PaymentService] Order {order_id} of event {event['id']} is already "
+                    f"{order.order_state.name}"
+                )
+                return False
+
+            self.order_service.mark_as_paid(order_id)
+            self.order_service.create_order(order.order_customer_id)
+        # the paid order was the current order of the customer until the commit
+        self.order_service.invalidate_current_order(order.order_customer_id)
+        return True
@@ -1,31 +1,53 @@
+import json
+import logging
 import os
-from typing import Dict
+from typing import Dict, List
 
 import stripe
-from stripe._error import StripeError
+from stripe._error import SignatureVerificationError, StripeError
 from stripe.checkout import Session
 
-from src.Model.Order import Order
+from src.DAO.StripePriceDAO import StripePriceDAO
+from src.Model.Order import OrderState
 from src.utils.log_decorator import log
 
+CURRENCY = "eur"
+
 
 class StripeService:
-    def __init__(self):
+    stripe_price_dao: StripePriceDAO
+
+    def __init__(self, stripe_price_dao: StripePriceDAO):
+        """
+        The Stripe Price of each version of the orderables is kept in the database by
+        `stripe_price_dao`, so the checkout sessions only send price ids.
+        `STRIPE_API_BASE` points the client at another server than Stripe (tests).
+        """
+        self.stripe_price_dao = stripe_price_dao
         stripe.api_key = os.environ["STRIPE_SECRET_KEY"]
+        if os.environ.get("STRIPE_API_BASE"):
+            stripe.api_base = os.environ["STRIPE_API_BASE"]
         self.base_url = os.environ["BASE_URL"]
         self.success_url = f"{self.base_url}payment/success"
         self.cancel_url = f"{self.base_url}menu"
+        # the webhook is the only confirmation of the payments: no secret, no start
+        self.webhook_secret = os.environ["STRIPE_WEBHOOK_SECRET"]
 
     @log
-    def create_checkout_session(self, order: Order, customer_mail: str) -> Dict:
+    def create_checkout_session(self, order_id: int, customer_id: int, customer_mail: str) -> Dict:
         """
         Create a checkout session with the order infos
         that will redirect the user to the payment page.
 
+        Each line of the session is the Stripe Price of the orderable at the price it's
+        sold and a quantity; the prices missing from the catalog are created first.
+
         Parameters
         ----------
-        order : Order
-            The order that will be paid
+        order_id : int
+            The id of the order that will be paid
+        customer_id : int
+            The id of the customer
         customer_mail : str
             The unique mail of the customer
 
@@ -37,52 +59,36 @@ class StripeService:
         Raises
         ------
         ValueError
-            If the shopping cart is empty
+            If the shopping cart is empty or the order already paid
         ValueError
             If an error occured during the creation of the session
         """
-        if len(order.order_orderables) == 0:
+        lines = self.stripe_price_dao.get_checkout_lines(order_id)
+        if len(lines) == 0:
             raise ValueError("Your order is empty.")
-
-        line_items = []
-
-        for orderable, quantity in order.order_orderables.items():
-            if orderable.orderable_type == "item":
-                orderable_name = orderable.item_name
-                orderable_description = orderable.item_description
-
-            if orderable.orderable_type == "bundle":
-                orderable_name = orderable.bundle_name
-                orderable_description = orderable.bundle_description
-
-            price = int(orderable.price * 100)
-
-            data = {
-                "price_data": {
-                    "currency": "eur",
-                    "unit_amount": price,
-                    "product_data": {"name": orderable_name, "description": orderable_description},
-                },
-                "quantity": quantity,
-            }
-            line_items.append(data)
+        if lines[0]["order_state"] != OrderState.PENDING.value:
+            raise ValueError("Order is already paid.")
 
         try:
+            line_items = [
+                {"price": self._get_price_id(line), "quantity": line["orderable_quantity"]}
+                for line in lines
+            ]
             session = Session.create(
                 payment_method_types=["card"],
                 line_items=line_items,
                 mode="payment",
                 success_url=f"{self.success_url}?session_id={{CHECKOUT_SESSION_ID}}"
-                f"&order_id={order.order_id}",
+                f"&order_id={order_id}",
                 cancel_url=self.cancel_url,
                 customer_email=customer_mail,
                 metadata={
-                    "order_id": str(order.order_id),
-                    "customer_id": str(order.order_customer_id),
+                    "order_id": str(order_id),
+                    "customer_id": str(customer_id),
                 },
                 payment_intent_data={
                     "metadata": {
-                        "order_id": str(order.order_id),
+                        "order_id": str(order_id),
                     }
                 },
             )
@@ -92,36 +98,161 @@ class StripeService:
             raise ValueError(f"Error while creating Stripe checkout session: {str(e)}") from e
 
     @log
-    def verify_payment(self, session_id: int) -> Dict:
+    def sync_prices(self, orderable_ids: List[int]) -> Dict[int, str]:
         """
-        Retrieve a checkout session to check that it was correctly paid
+        Create the Stripe Price of the current version of some orderables and of the
+        bundles containing them, if they don't exist yet. Called when they are created or
+        repriced, so the next checkouts find their price in the catalog.
 
         Parameters
         ----------
-        session_id : int
-            The unique id of the checkout session
+        orderable_ids : List[int]
+            Unique identifiers of the orderables
 
         Returns
         -------
-        Dict
-            A dictionnary :
-                - paid: bool
-                    True if the order was correctly paid else False
-                -payment_status: str
-                    The payment status
+        Dict[int, str]
+            The Stripe price id of each orderable, by orderable id
 
         Raises
         ------
         ValueError
-            If an error occured while retrieving the checkout session
+            If Stripe couldn't create a price
         """
         try:
-            session = Session.retrieve(session_id)
-
             return {
-                "paid": session.payment_status == "paid",
-                "payment_status": session.payment_status,
+                version["orderable_id"]: self._get_price_id(version)
+                for version in self.stripe_price_dao.get_current_versions(orderable_ids)
             }
+        except StripeError as e:
+            raise ValueError(f"Error while synchronizing Stripe prices: {str(e)}") from e
+
+    @log
+    def sync_products(self, orderable_ids: List[int]) -> None:
+        """
+        Update the name and description of the Stripe Product of some orderables, shown
+        on the checkout page. Called when they are renamed; the orderables without a
+        product yet get theirs with their first price.
+
+        Parameters
+        ----------
+        orderable_ids : List[int]
+            Unique identifiers of the orderables
 
+        Raises
+        ------
+        ValueError
+            If Stripe couldn't update a product
+        """
+        try:
+            for version in self.stripe_price_dao.get_current_versions(orderable_ids):
+                # the bundles containing the orderables keep their own name
+                if version["orderable_id"] in orderable_ids and version["stripe_product_id"]:
+                    self._update_product(version["stripe_product_id"], version)
         except StripeError as e:
-            raise ValueError(f"Error while retrieving payment status: {str(e)}") from e
+            raise ValueError(f"Error while synchronizing Stripe products: {str(e)}") from e
+
+    def sync_orderable(
+        self, orderable_id: int, prices: bool = True, products: bool = False
+    ) -> None:
+        """
+        Synchronize the Stripe catalog with a created or updated orderable, so the next
+        checkouts don't wait for it. Stripe errors are logged, not raised: if Stripe can't be
+        reached, the price is created by the next checkout and the product is updated with
+        the next price of the orderable.
+
+        Parameters
+        ----------
+        orderable_id : int
+            Unique identifier of the orderable
+        prices : bool, optional
+            Create the Stripe price of the orderable, and of the bundles containing it,
+            when it is created or repriced, by default True
+        products : bool, optional
+            Update the name and description of its Stripe Product, when it is renamed,
+            by default False
+        """
+        if prices:
+            try:
+                self.sync_prices([orderable_id])
+            except ValueError as e:
+                logging.warning(f"[StripeService] Cannot synchronize the Stripe prices: {e}")
+        if products:
+            try:
+                self.sync_products([orderable_id])
+            except ValueError as e:
+                logging.warning(f"[StripeService] Cannot synchronize the Stripe products: {e}")
+
+    def _update_product(self, product_id: str, version: Dict) -> None:
+        """Set the name and description of a Stripe Product to those of a version"""
+        # an empty description unsets the one of the product
+        stripe.Product.modify(
+            product_id,
+            name=version["orderable_name"],
+            description=version["orderable_description"] or "",
+        )
+
+    def _get_price_id(self, version: Dict) -> str:
+        """
+        Stripe Price id of a version of an orderable (as given by `StripePriceDAO`),
+        created with its Stripe Product if it doesn't exist yet
+        """
+        if version["stripe_price_id"] is not None:
+            return version["stripe_price_id"]
+
+        product_id = version["stripe_product_id"]
+        if product_id is None:
+            product_data = {
+                "name": version["orderable_name"],
+                "metadata": {"orderable_id": str(version["orderable_id"])},
+            }
+            # Stripe refuses empty descriptions
+            if version["orderable_description"]:
+                product_data["description"] = version["orderable_description"]
+            product_id = stripe.Product.create(**product_data).id
+        else:
+            # catches up with a renaming whose synchronization failed
+            self._update_product(product_id, version)
+
+        price = stripe.Price.create(
+            product=product_id,
+            unit_amount=version["unit_amount"],
+            currency=CURRENCY,
+            metadata={"orderable_id": str(version["orderable_id"])},
+        )
+        self.stripe_price_dao.save_price(
+            version["orderable_id"], version["unit_amount"], product_id, price.id
+        )
+        return price.id
+
+    @log
+    def construct_event(self, payload: bytes, signature: str) -> Dict:
+        """
+        Check the signature of an event sent to the webhook and parse it
+
+        Parameters
+        ----------
+        payload : bytes
+            The raw body of the request, as signed by Stripe
+        signature : str
+            The `Stripe-Signature` header of the request
+
+        Returns
+        -------
+        Dict
+            The event
+
+        Raises
+        ------
+        ValueError
+            If the signature is invalid or too old, or if the payload isn't an event
+        """
+        try:
+            stripe.WebhookSignature.verify_header(
+                payload, signature, self.webhook_secret, tolerance=stripe.Webhook.DEFAULT_TOLERANCE
+            )
+            return json.loads(payload)
+        except SignatureVerificationError as e:
+            raise ValueError(f"Invalid Stripe signature: {str(e)}") from e
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid Stripe event: {str(e)}") from e
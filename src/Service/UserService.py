@@ -1,8 +1,12 @@
 import logging
+import os
+from functools import lru_cache
 from typing import Literal, Optional, Union
 
+import dns.resolver
 import phonenumbers as pn
-from email_validator import EmailNotValidError, validate_email
+from email_validator import EmailNotValidError, EmailUndeliverableError, validate_email
+from email_validator.deliverability import validate_email_deliverability
 
 from src.DAO.AdminDAO import AdminDAO
 from src.DAO.CustomerDAO import CustomerDAO
@@ -15,14 +19,54 @@ from src.Service.PasswordService import (
     hash_password,
     validate_password,
 )
+from src.utils.cache import TTLCache
 from src.utils.log_decorator import log
 
 
+@lru_cache(maxsize=4096)
+def parse_phone(identifier: str) -> Optional[str]:
+    """
+    Parse a phone number, as a french number first then as an international one.
+    Results are memoized: `phonenumbers` loads and runs the metadata of the region
+    on every parse.
+
+    Parameters
+    ----------
+    identifier : str
+        A phone number, in any format
+
+    Returns
+    -------
+    Optional[str]
+        The phone number in the E164 format, None if it is not valid
+    """
+    for region in ("FR", None):
+        try:
+            phone_number = pn.parse(identifier, region)
+        except pn.NumberParseException:
+            continue
+        if pn.is_valid_number(phone_number) and pn.is_possible_number(phone_number):
+            return pn.format_number(phone_number, pn.PhoneNumberFormat.E164)
+    return None
+
+
 class UserService:
-    def __init__(self, customer_dao: CustomerDAO, driver_dao: DriverDAO, admin_dao: AdminDAO):
+    def __init__(
+        self,
+        customer_dao: CustomerDAO,
+        driver_dao: DriverDAO,
+        admin_dao: AdminDAO,
+        domain_cache: Optional[TTLCache] = None,
+    ):
         self.customer_dao = customer_dao
         self.driver_dao = driver_dao
         self.admin_dao = admin_dao
+        # Deliverability of the email domains, a DNS lookup takes up to a few seconds
+        if domain_cache is None:
+            domain_cache = TTLCache(
+                ttl=float(os.environ.get("EMAIL_DOMAIN_CACHE_TTL") or 3600), maxsize=1024
+            )
+        self.domain_cache = domain_cache
 
     @log
     def login(
@@ -59,7 +103,8 @@ class UserService:
             if user is None:
                 raise ValueError("[UserService] Invalid admin username")
         else:
-            validated_identifier = self.identifier_validator(identifier)
+            # Accounts were validated at signup: no DNS lookup on the login path
+            validated_identifier = self.identifier_validator(identifier, check_deliverability=False)
             if not validated_identifier:
                 logging.error(
                     f"[UserService] Login failed for user of type {user_type}:"
@@ -154,7 +199,9 @@ class UserService:
             return self.admin_dao.get_admin_by_id(user_id)
 
     @log
-    def identifier_validator(self, identifier: str) -> Optional[dict]:
+    def identifier_validator(
+        self, identifier: str, check_deliverability: bool = True
+    ) -> Optional[dict]:
         """
         Atttempts to validate (check if real, and properly format) an identfier
         which is either a phone number (for both drivers and customers)
@@ -169,6 +216,9 @@ class UserService:
         ----------
         identifier : str
             either an email or a phone number
+        check_deliverability : bool
+            Check that the domain of an email accepts mails (DNS lookup, cached by domain),
+            by default True. Only the syntax is checked otherwise
 
         Returns
         -------
@@ -179,29 +229,42 @@ class UserService:
         """
         logging.info("[UserService] Parsing identifier as email...")
         try:
-            emailinfo = validate_email(identifier, check_deliverability=True)
+            emailinfo = validate_email(identifier, check_deliverability=False)
+            if check_deliverability and not self._is_deliverable(emailinfo):
+                return None
             return {"type": "email", "identifier": emailinfo.normalized}
         except EmailNotValidError:
             pass
-        logging.info("[UserService] Parsing identifier as french phone...")
-        try:
-            phone_number = pn.parse(identifier, "FR")
-            if pn.is_valid_number(phone_number) and pn.is_possible_number(phone_number):
-                return {
-                    "type": "phone",
-                    "identifier": pn.format_number(phone_number, pn.PhoneNumberFormat.E164),
-                }
-        except pn.NumberParseException:
-            pass
-        logging.info("[UserService] Parsing identifier as international phone...")
-        try:
-            phone_number = pn.parse(identifier)
-            if pn.is_valid_number(phone_number) and pn.is_possible_number(phone_number):
-                return {
-                    "type": "phone",
-                    "identifier": pn.format_number(phone_number, pn.PhoneNumberFormat.E164),
-                }
-        except pn.NumberParseException:
-            pass
+        logging.info("[UserService] Parsing identifier as phone...")
+        phone_number = parse_phone(identifier)
+        if phone_number is not None:
+            return {"type": "phone", "identifier": phone_number}
         logging.warning("[UserService] Identifier could not be parsed. Register/Login will fail.")
         return None
+
+    def _is_deliverable(self, emailinfo) -> bool:
+        """
+        Whether the domain of an email accepts email. Only the answers of the DNS are
+        cached: a failed lookup (timeout, network error) is retried with the next email.
+        """
+        missing = object()
+        deliverable = self.domain_cache.get(emailinfo.ascii_domain, missing)
+        if deliverable is not missing:
+            return deliverable
+
+        try:
+            info = validate_email_deliverability(emailinfo.ascii_domain, emailinfo.domain)
+        except EmailUndeliverableError as e:
+            # the domain doesn't exist (NXDOMAIN) or has no mail server (NoAnswer, null MX)
+            if e.__cause__ is not None and not isinstance(
+                e.__cause__, (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer)
+            ):
+                logging.warning(f"[UserService] Cannot check the domain of an email: {e}")
+                return False
+            self.domain_cache.set(emailinfo.ascii_domain, False)
+            return False
+
+        # no nameserver answered in time: the email is accepted, but checked again next time
+        if "unknown-deliverability" not in info:
+            self.domain_cache.set(emailinfo.ascii_domain, True)
+        return True
@@ -0,0 +1,456 @@
+import io
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from random import Random
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from faker import Faker
+
+from src.DAO.DBConnector import DBConnector
+
+Row = Tuple[Any, ...]
+
+# Rows of a chunk by table, as their number and their text for COPY
+Chunk = Dict[str, Tuple[int, str]]
+
+COLUMNS = {
+    "Addresses": (
+        "address_id",
+        "address_number",
+        "address_street",
+        "address_city",
+        "address_postal_code",
+        "address_country",
+    ),
+    "Customers": (
+        "customer_id",
+        "customer_first_name",
+        "customer_last_name",
+        "customer_created_at",
+        "customer_phone",
+        "customer_mail",
+        "customer_password_hash",
+        "customer_salt",
+        "customer_address_id",
+    ),
+    "Drivers": (
+        "driver_id",
+        "driver_first_name",
+        "driver_last_name",
+        "driver_created_at",
+        "driver_password_hash",
+        "driver_salt",
+        "driver_is_delivering",
+        "driver_phone",
+    ),
+    "Orders": ("order_id", "order_customer_id", "order_state", "order_created_at", "order_paid_at"),
+    "Order_contents": ("order_id", "orderable_id", "orderable_quantity"),
+    "Deliveries": (
+        "delivery_order_id",
+        "delivery_driver_id",
+        "delivery_created_at",
+        "delivery_state",
+    ),
+}
+
+# Tables of the order lines: their foreign keys and secondary indexes are dropped during
+# the load and created again after, checking and indexing every row at once is much
+# faster than doing it row by row
+ORDER_TABLES = ("Orders", "Order_contents", "Deliveries")
+
+SELECT_FOREIGN_KEYS = """
+SELECT conname AS name, pg_get_constraintdef(oid) AS definition
+FROM pg_constraint
+WHERE conrelid = %s::regclass AND contype = 'f'
+"""
+
+# Indexes which don't back a constraint (primary key, unique)
+SELECT_SECONDARY_INDEXES = """
+SELECT indexrelid::regclass::text AS name, pg_get_indexdef(indexrelid) AS definition
+FROM pg_index
+WHERE indrelid = %s::regclass
+AND NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conindid = indexrelid)
+"""
+
+# Serial key of the tables loaded with explicit ids, the sequences are moved past them
+SERIAL_KEYS = {
+    "Addresses": "address_id",
+    "Customers": "customer_id",
+    "Drivers": "driver_id",
+    "Orders": "order_id",
+}
+
+# Weights of the order states, from PENDING to CANCELLED: most orders of a real
+# dataset are delivered
+ORDER_STATE_WEIGHTS = (3, 2, 1, 1, 88, 5)
+
+# Delivery state of the orders delivering and delivered
+DELIVERY_STATES = {3: 1, 4: 2}
+
+# Size of the pools of fake values rows are drawn from: Faker and the password hash
+# are far too slow to be called for each of millions of rows
+POOL_SIZE = 1000
+PASSWORD_POOL_SIZE = 50
+
+
+def _copy_value(value: Any) -> str:
+    """Format a value for the text format of COPY"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, str):
+        return (
+            value.replace("\\", "\\\\")
+            .replace("\t", "\\t")
+            .replace("\n", "\\n")
+            .replace("\r", "\\r")
+        )
+    return str(value)
+
+
+def _copy_chunk(rows_by_table: Dict[str, List[Row]]) -> Chunk:
+    """Format rows in the text format of COPY"""
+    return {
+        table: (len(rows), "".join("\t".join(map(_copy_value, row)) + "\n" for row in rows))
+        for table, rows in rows_by_table.items()
+    }
+
+
+def _chunks(rows: Iterable[Row], size: int) -> Iterator[List[Row]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class BulkUsurper:
+    """
+    Seed the database with a dataset of any size, for load tests.
+
+    Unlike `Usurper`, rows are generated lazily and written with `COPY ... FROM STDIN`
+    by chunks of `chunk_size` rows, each chunk in its own transaction: memory stays flat
+    whatever the size of the dataset. Rows get explicit ids, following the rows already
+    in the database, so orders, their contents and their deliveries reference existing
+    rows. The orders are made of the orderables already in the database.
+
+    Parameters
+    ----------
+    fake : Faker
+        Generator of the names, streets and cities, with the providers of `Populate.Faker`
+    db_connector : DBConnector
+        Connector to the database to seed
+    n_customers : int
+        Number of customers (and addresses) to create
+    n_drivers : int
+        Number of drivers to create
+    n_orders : int
+        Number of orders to create
+    lines_per_order : Tuple[int, int]
+        Minimum and maximum number of distinct orderables in an order, by default (1, 5)
+    chunk_size : int
+        Number of rows sent by COPY statement, by default 50 000
+    seed : int
+        Seed of the random generator, the same seed gives the same dataset
+    drop_constraints : bool
+        Drop the foreign keys and secondary indexes of the order tables during the load,
+        and create them again after, by default True
+    now : Optional[datetime]
+        The dates are drawn before this date, by default the current date
+    """
+
+    def __init__(
+        self,
+        fake: Faker,
+        db_connector: DBConnector,
+        n_customers: int = 100_000,
+        n_drivers: int = 500,
+        n_orders: int = 1_000_000,
+        lines_per_order: Tuple[int, int] = (1, 5),
+        chunk_size: int = 50_000,
+        seed: int = 0,
+        drop_constraints: bool = True,
+        now: Optional[datetime] = None,
+    ):
+        self.fake = fake
+        self.db_connector = db_connector
+        self.n_customers = n_customers
+        self.n_drivers = n_drivers
+        self.n_orders = n_orders
+        self.lines_per_order = lines_per_order
+        self.chunk_size = chunk_size
+        self.drop_constraints = drop_constraints
+        self.seed = seed
+        self.random = Random(seed)
+        self.fake.seed_instance(seed)
+        self.now = (now or datetime.now()).replace(microsecond=0)
+        self.report: Dict[str, int] = {}
+
+    def populate_database(self) -> Dict[str, float]:
+        """
+        Create the customers, drivers, orders, order contents and deliveries
+
+        Returns
+        -------
+        Dict[str, float]
+            The number of rows created by table, the total and the rows per second
+
+        Raises
+        ------
+        ValueError
+            If there is no orderable in the database to order
+        """
+        orderable_ids = [
+            row["orderable_id"]
+            for row in self.db_connector.sql_query(
+                "SELECT orderable_id FROM Orderables ORDER BY orderable_id", return_type="all"
+            )
+        ]
+        if not orderable_ids:
+            raise ValueError("[BulkUsurper] Cannot create orders: there is no orderable.")
+
+        self._make_pools()
+        self.report = dict.fromkeys(COLUMNS, 0)
+        start = time.perf_counter()
+
+        first_address = self._next_id("Addresses")
+        first_customer = self._next_id("Customers")
+        first_driver = self._next_id("Drivers")
+        self._load(
+            ("Addresses", "Customers"),
+            self._customer_chunks(first_customer, first_address),
+            self.n_customers,
+        )
+        self._load(("Drivers",), self._driver_chunks(first_driver), self.n_drivers)
+        with self._without_constraints(ORDER_TABLES if self.drop_constraints else ()):
+            self._load(
+                ORDER_TABLES,
+                self._order_chunks(
+                    self._next_id("Orders"),
+                    range(first_customer, first_customer + self.n_customers),
+                    range(first_driver, first_driver + self.n_drivers),
+                    orderable_ids,
+                ),
+                self.n_orders,
+            )
+        self._reset_sequences()
+        for table in COLUMNS:
+            self.db_connector.sql_query(f"ANALYZE {table}", return_type="none")
+
+        elapsed = time.perf_counter() - start
+        total = sum(self.report.values())
+        print(f"Database seeded: {total:,} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)")
+        return {**self.report, "total": total, "rows_per_second": total / elapsed}
+
+    def _make_pools(self) -> None:
+        self._make_name_pools()
+        self.passwords = [
+            self.fake.create_hash_password(self.first_names[i]) for i in range(PASSWORD_POOL_SIZE)
+        ]
+
+    def _make_name_pools(self) -> None:
+        """Sample the names, streets and cities given to the users"""
+        pool = range(POOL_SIZE)
+        self.first_names = [self.fake.first_name() for _ in pool]
+        self.last_names = [self.fake.last_name() for _ in pool]
+        self.streets = [self.fake.street_name() for _ in pool]
+        self.cities = [(self.fake.city(), self.fake.postcode()) for _ in pool]
+
+    def _next_id(self, table: str) -> int:
+        key = SERIAL_KEYS[table]
+        row = self.db_connector.sql_query(
+            f"SELECT COALESCE(MAX({key}), 0) + 1 AS next_id FROM {table}", return_type="one"
+        )
+        return row["next_id"]
+
+    def _date(self, days: int) -> datetime:
+        """A random date in the last `days` days"""
+        return self.now - timedelta(seconds=self.random.randrange(days * 86400))
+
+    def _addresses(self, first_id: int) -> Iterator[Row]:
+        for address_id in range(first_id, first_id + self.n_customers):
+            city, postal_code = self.random.choice(self.cities)
+            yield (
+                address_id,
+                self.random.randint(1, 50),
+                self.random.choice(self.streets),
+                city,
+                postal_code,
+                "France",
+            )
+
+    def _customers(self, first_id: int, first_address: int) -> Iterator[Row]:
+        for i in range(self.n_customers):
+            customer_id = first_id + i
+            salt, password_hash = self.random.choice(self.passwords)
+            # phones and mails are unique in the database: they are derived from the id
+            yield (
+                customer_id,
+                self.random.choice(self.first_names),
+                self.random.choice(self.last_names),
+                self._date(730),
+                f"+339{customer_id:08d}",
+                f"customer.{customer_id}@example.com",
+                password_hash,
+                salt,
+                first_address + i,
+            )
+
+    def _drivers(self, first_id: int) -> Iterator[Row]:
+        for driver_id in range(first_id, first_id + self.n_drivers):
+            salt, password_hash = self.random.choice(self.passwords)
+            yield (
+                driver_id,
+                self.random.choice(self.first_names),
+                self.random.choice(self.last_names),
+                self._date(365),
+                password_hash,
+                salt,
+                False,
+                f"+338{driver_id:08d}",
+            )
+
+    def _orders(
+        self,
+        first_id: int,
+        customer_ids: Sequence[int],
+        driver_ids: Sequence[int],
+        orderable_ids: List[int],
+    ) -> Iterator[Tuple[Row, List[Row], List[Row]]]:
+        """An order, with its contents and its delivery if it has one"""
+        states = range(len(ORDER_STATE_WEIGHTS))
+        min_lines, max_lines = self.lines_per_order
+        max_lines = min(max_lines, len(orderable_ids))
+        min_lines = min(min_lines, max_lines)
+
+        for order_id in range(first_id, first_id + self.n_orders):
+            state = self.random.choices(states, ORDER_STATE_WEIGHTS)[0]
+            created_at = self._date(180)
+            paid_at = (
+                created_at + timedelta(minutes=self.random.randint(1, 30))
+                if 0 < state < 5
+                else None
+            )
+            order = (order_id, self.random.choice(customer_ids), state, created_at, paid_at)
+            contents = [
+                (order_id, orderable_id, self.random.randint(1, 4))
+                for orderable_id in self.random.sample(
+                    orderable_ids, self.random.randint(min_lines, max_lines)
+                )
+            ]
+            deliveries = (
+                [
+                    (
+                        order_id,
+                        self.random.choice(driver_ids),
+                        paid_at + timedelta(minutes=self.random.randint(10, 40)),
+                        DELIVERY_STATES[state],
+                    )
+                ]
+                if state in DELIVERY_STATES and driver_ids
+                else []
+            )
+            yield order, contents, deliveries
+
+    @property
+    def orders_per_chunk(self) -> int:
+        """Number of orders whose lines make about `chunk_size` rows"""
+        return max(1, self.chunk_size * 2 // sum(self.lines_per_order))
+
+    def _customer_chunks(self, first_id: int, first_address: int) -> Iterator[Chunk]:
+        """Customers along with their addresses"""
+        rows = zip(
+            self._addresses(first_address), self._customers(first_id, first_address), strict=True
+        )
+        for chunk in _chunks(rows, self.chunk_size):
+            yield _copy_chunk(
+                {
+                    "Addresses": [address for address, _ in chunk],
+                    "Customers": [customer for _, customer in chunk],
+                }
+            )
+
+    def _driver_chunks(self, first_id: int) -> Iterator[Chunk]:
+        for chunk in _chunks(self._drivers(first_id), self.chunk_size):
+            yield _copy_chunk({"Drivers": chunk})
+
+    def _order_chunks(
+        self,
+        first_id: int,
+        customer_ids: Sequence[int],
+        driver_ids: Sequence[int],
+        orderable_ids: List[int],
+    ) -> Iterator[Chunk]:
+        """Orders along with their contents and deliveries, orders first"""
+        orders = self._orders(first_id, customer_ids, driver_ids, orderable_ids)
+        for chunk in _chunks(orders, self.orders_per_chunk):
+            yield _copy_chunk(
+                {
+                    "Orders": [order for order, _, _ in chunk],
+                    "Order_contents": [line for _, lines, _ in chunk for line in lines],
+                    "Deliveries": [row for _, _, deliveries in chunk for row in deliveries],
+                }
+            )
+
+    @contextmanager
+    def _without_constraints(self, tables: Sequence[str]) -> Iterator[None]:
+        """Drop the foreign keys and secondary indexes of `tables`, restored when leaving"""
+        dropped = []
+        with self.db_connector.transaction() as cursor:
+            for table in tables:
+                cursor.execute(SELECT_FOREIGN_KEYS, [table])
+                for foreign_key in cursor.fetchall():
+                    cursor.execute(f"ALTER TABLE {table} DROP CONSTRAINT {foreign_key['name']}")
+                    dropped.append(
+                        f"ALTER TABLE {table} ADD CONSTRAINT {foreign_key['name']} "
+                        f"{foreign_key['definition']}"
+                    )
+                cursor.execute(SELECT_SECONDARY_INDEXES, [table])
+                for index in cursor.fetchall():
+                    cursor.execute(f"DROP INDEX {index['name']}")
+                    dropped.append(index["definition"])
+
+        try:
+            yield
+        finally:
+            if dropped:
+                print("Restoring the foreign keys and indexes...")
+                start = time.perf_counter()
+                with self.db_connector.transaction() as cursor:
+                    for statement in dropped:
+                        cursor.execute(statement)
+                print(f"  restored in {time.perf_counter() - start:.1f}s")
+
+    def _load(self, tables: Sequence[str], chunks: Iterable[Chunk], n: int) -> None:
+        """COPY each chunk in its own transaction, its tables in order"""
+        print(f"Creating {', '.join(tables)} ({n:,} {tables[0].lower()})...")
+        start = time.perf_counter()
+        for chunk in chunks:
+            with self.db_connector.transaction() as cursor:
+                for table, (n_rows, text) in chunk.items():
+                    if n_rows:
+                        cursor.copy_expert(
+                            f"COPY {table} ({', '.join(COLUMNS[table])}) FROM STDIN",
+                            io.StringIO(text),
+                        )
+                        self.report[table] += n_rows
+        self._print_rate(tables, start)
+
+    def _print_rate(self, tables: Sequence[str], start: float) -> None:
+        elapsed = time.perf_counter() - start
+        rows = sum(self.report[table] for table in tables)
+        print(f"  {rows:,} rows in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s)")
+
+    def _reset_sequences(self) -> None:
+        """Move the sequences past the explicit ids, for the rows created by the app"""
+        for table, key in SERIAL_KEYS.items():
+            self.db_connector.sql_query(
+                f"SELECT setval(pg_get_serial_sequence('{table}', '{key}'), MAX({key})) "
+                f"FROM {table}",
+                return_type="one",
+            )
@@ -1,6 +1,6 @@
 from datetime import timedelta
 from random import randint
-from typing import Dict, List
+from typing import Callable, Dict, List
 
 from faker import Faker
 
@@ -53,8 +53,12 @@ class Usurper:
         data["customer_created_at"] = [
             f"'{self.fake.date_time_between(start_date='-2y', end_date='now')}'" for _ in n
         ]
-        data["customer_phone"] = [f"'{self.fake.phone_number().strip()[0:15]}'" for _ in n]
-        data["customer_mail"] = [f"'{self.fake.email()}'" for _ in n]
+        # phones and mails are unique in the database
+        phones = self._unique_values(lambda: self.fake.phone_number().strip()[0:15], len(n))
+        data["customer_phone"] = [f"'{phone}'" for phone in phones]
+        data["customer_mail"] = [
+            f"'{mail}'" for mail in self._unique_values(self.fake.email, len(n))
+        ]
         salts, pws = zip(
             *[self.fake.create_hash_password(name) for name in first_names], strict=False
         )
@@ -156,7 +160,8 @@ class Usurper:
         data["driver_password_hash"] = [f"'{pw}'" for pw in pws]
         data["driver_salt"] = [f"'{salt}'" for salt in salts]
         data["driver_is_delivering"] = [f"'{self.fake.boolean()}'" for _ in n]
-        data["driver_phone"] = [f"'{self.fake.phone_number().strip()[0:15]}'" for _ in n]
+        phones = self._unique_values(lambda: self.fake.phone_number().strip()[0:15], len(n))
+        data["driver_phone"] = [f"'{phone}'" for phone in phones]
 
         return data
 
@@ -219,6 +224,14 @@ class Usurper:
 
         return data
 
+    @staticmethod
+    def _unique_values(generate: Callable[[], str], n: int) -> List[str]:
+        """Call `generate` until it gave `n` distinct values"""
+        values = {}
+        while len(values) < n:
+            values[generate()] = None
+        return list(values)
+
     def dict_to_query(self, dict_table: Dict[str, List[str]], table_name: str) -> str:
         varnames = ", ".join(list(dict_table.keys()))
         query = f"INSERT INTO {self.schema}.{table_name} ({varnames})\nVALUES\n"
@@ -0,0 +1,399 @@
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from src.Service.PasswordService import hash_password
+
+from .BulkUsurper import (
+    DELIVERY_STATES,
+    ORDER_STATE_WEIGHTS,
+    PASSWORD_POOL_SIZE,
+    BulkUsurper,
+    Chunk,
+    _copy_value,
+)
+
+try:
+    import numpy as np
+except ImportError as e:  # optional dependency
+    raise ImportError(
+        "[VectorizedUsurper] NumPy is required, install it with `pdm install -G seed`."
+    ) from e
+
+# Hours of the orders: a lunch peak, a dinner peak, and a few orders along the day
+ORDER_HOURS = (
+    # (weight, mean hour, standard deviation in hours)
+    (0.45, 12.5, 0.75),
+    (0.40, 19.75, 1.0),
+)
+OPENING_HOURS = (10, 23)
+
+# Streams of the random generator, the shards of each table get their own seeds
+CUSTOMERS_STREAM = 1
+DRIVERS_STREAM = 2
+ORDERS_STREAM = 3
+
+
+class Vocabulary(NamedTuple):
+    """Values sampled from Faker once, escaped for COPY, the rows draw from them"""
+
+    first_names: List[str]
+    last_names: List[str]
+    streets: List[str]
+    cities: List[str]
+    postal_codes: List[str]
+    salts: List[str]
+    password_hashes: List[str]
+
+
+# Vocabulary of the worker process, set once by `_init_worker`
+_vocabulary: Optional[Dict[str, "np.ndarray"]] = None
+
+
+def _init_worker(vocabulary: Vocabulary) -> None:
+    global _vocabulary
+    _vocabulary = {field: np.asarray(values) for field, values in vocabulary._asdict().items()}
+
+
+def _rng(seed: int, stream: int, shard: int) -> "np.random.Generator":
+    """Random generator of a shard, the same whatever the number of workers"""
+    return np.random.default_rng([seed, stream, shard])
+
+
+def _pick(rng: "np.random.Generator", field: str, n: int) -> "np.ndarray":
+    values = _vocabulary[field]
+    return values[rng.integers(0, len(values), n)]
+
+
+def _dates(rng: "np.random.Generator", n: int, now: int, days: int) -> "np.ndarray":
+    """Random dates in the last `days` days, as seconds since the epoch"""
+    return now - rng.integers(0, days * 86400, n)
+
+
+def order_times(rng: "np.random.Generator", n: int, now: int, days: int) -> "np.ndarray":
+    """
+    Random order dates in the last `days` days, with peaks at lunch and dinner time
+
+    Parameters
+    ----------
+    rng : np.random.Generator
+        The random generator
+    n : int
+        Number of dates
+    now : int
+        The dates are before this date, in seconds since the epoch
+    days : int
+        Number of days covered by the dates
+
+    Returns
+    -------
+    np.ndarray
+        The dates, in seconds since the epoch
+    """
+    weights = [weight for weight, _, _ in ORDER_HOURS]
+    peaks = rng.choice(len(ORDER_HOURS) + 1, n, p=[*weights, 1 - sum(weights)])
+    means = np.array([mean for _, mean, _ in ORDER_HOURS] + [0.0])[peaks]
+    deviations = np.array([deviation for _, _, deviation in ORDER_HOURS] + [0.0])[peaks]
+    hours = np.where(
+        peaks < len(ORDER_HOURS),
+        rng.normal(means, np.maximum(deviations, 1e-9)),
+        rng.uniform(*OPENING_HOURS, n),
+    )
+    seconds = (np.clip(hours, *OPENING_HOURS) * 3600).astype(np.int64)
+
+    today = now - now % 86400
+    day = today - rng.integers(1, days + 1, n) * 86400
+    return day + seconds
+
+
+def _distinct(rng: "np.random.Generator", n: int, population: int, k: int) -> "np.ndarray":
+    """
+    `n` rows of `k` distinct indices below `population`, in random order. Floyd's
+    algorithm draws them column by column, so memory grows with `n * k`, not with
+    `n * population` like a permutation of each row.
+    """
+    picked = np.empty((n, k), dtype=np.int64)
+    for column, upper in enumerate(range(population - k, population)):
+        drawn = rng.integers(0, upper + 1, n)
+        # an index already picked by the row is replaced by `upper`, never picked before
+        seen = (picked[:, :column] == drawn[:, None]).any(axis=1)
+        picked[:, column] = np.where(seen, upper, drawn)
+    # Floyd's sample is uniform as a set, not in its order: shuffle it so its prefixes are too
+    return rng.permuted(picked, axis=1)
+
+
+def _strings(values: "np.ndarray") -> "np.ndarray":
+    return values.astype(str)
+
+
+def _timestamps(seconds: "np.ndarray") -> "np.ndarray":
+    return np.datetime_as_string(seconds.astype("datetime64[s]"))
+
+
+def _copy_text(columns: Sequence["np.ndarray"]) -> Tuple[int, str]:
+    """Columns of strings in the text format of COPY"""
+    n_rows = len(columns[0])
+    if n_rows == 0:
+        return 0, ""
+    rows = map("\t".join, zip(*(column.tolist() for column in columns), strict=True))
+    return n_rows, "\n".join(rows) + "\n"
+
+
+def _customers_shard(shard: Tuple[int, int, int, int, int, int]) -> Chunk:
+    seed, index, first_id, first_address, n, now = shard
+    rng = _rng(seed, CUSTOMERS_STREAM, index)
+    ids = np.arange(first_id, first_id + n)
+    address_ids = np.arange(first_address, first_address + n)
+    cities = rng.integers(0, len(_vocabulary["cities"]), n)
+    passwords = rng.integers(0, len(_vocabulary["salts"]), n)
+    id_strings = _strings(ids)
+
+    return {
+        "Addresses": _copy_text(
+            (
+                _strings(address_ids),
+                _strings(rng.integers(1, 51, n)),
+                _pick(rng, "streets", n),
+                _vocabulary["cities"][cities],
+                _vocabulary["postal_codes"][cities],
+                np.full(n, "France"),
+            )
+        ),
+        # phones and mails are unique in the database: they are derived from the id
+        "Customers": _copy_text(
+            (
+                id_strings,
+                _pick(rng, "first_names", n),
+                _pick(rng, "last_names", n),
+                _timestamps(_dates(rng, n, now, 730)),
+                np.char.add("+339", np.char.zfill(id_strings, 8)),
+                np.char.add(np.char.add("customer.", id_strings), "@example.com"),
+                _vocabulary["password_hashes"][passwords],
+                _vocabulary["salts"][passwords],
+                _strings(address_ids),
+            )
+        ),
+    }
+
+
+def _drivers_shard(shard: Tuple[int, int, int, int, int]) -> Chunk:
+    seed, index, first_id, n, now = shard
+    rng = _rng(seed, DRIVERS_STREAM, index)
+    id_strings = _strings(np.arange(first_id, first_id + n))
+    passwords = rng.integers(0, len(_vocabulary["salts"]), n)
+
+    return {
+        "Drivers": _copy_text(
+            (
+                id_strings,
+                _pick(rng, "first_names", n),
+                _pick(rng, "last_names", n),
+                _timestamps(_dates(rng, n, now, 365)),
+                _vocabulary["password_hashes"][passwords],
+                _vocabulary["salts"][passwords],
+                np.full(n, "f"),
+                np.char.add("+338", np.char.zfill(id_strings, 8)),
+            )
+        )
+    }
+
+
+def _orders_shard(shard: tuple) -> Chunk:
+    (
+        seed,
+        index,
+        first_id,
+        n,
+        now,
+        (first_customer, last_customer),
+        (first_driver, last_driver),
+        orderable_ids,
+        (min_lines, max_lines),
+    ) = shard
+    rng = _rng(seed, ORDERS_STREAM, index)
+    ids = np.arange(first_id, first_id + n)
+    weights = np.array(ORDER_STATE_WEIGHTS, dtype=float)
+    states = rng.choice(len(weights), n, p=weights / weights.sum())
+    created_at = order_times(rng, n, now, 180)
+    paid_at = created_at + rng.integers(60, 1801, n)
+    is_paid = (states > 0) & (states < 5)
+
+    # Distinct orderables of each order: the first columns of a random sample
+    orderable_ids = np.asarray(orderable_ids)
+    max_lines = min(max_lines, len(orderable_ids))
+    min_lines = min(min_lines, max_lines)
+    lines = rng.integers(min_lines, max_lines + 1, n)
+    picked = _distinct(rng, n, len(orderable_ids), max_lines)
+    in_order = np.arange(max_lines) < lines[:, None]
+    line_order_ids = np.broadcast_to(ids[:, None], picked.shape)[in_order]
+
+    n_drivers = last_driver - first_driver
+    delivered = np.isin(states, list(DELIVERY_STATES)) & (n_drivers > 0)
+    n_deliveries = int(delivered.sum())
+    delivery_states = np.zeros(len(ORDER_STATE_WEIGHTS), dtype=np.int64)
+    for order_state, delivery_state in DELIVERY_STATES.items():
+        delivery_states[order_state] = delivery_state
+
+    return {
+        "Orders": _copy_text(
+            (
+                _strings(ids),
+                _strings(rng.integers(first_customer, last_customer, n)),
+                _strings(states),
+                _timestamps(created_at),
+                np.where(is_paid, _timestamps(paid_at), "\\N"),
+            )
+        ),
+        "Order_contents": _copy_text(
+            (
+                _strings(line_order_ids),
+                _strings(orderable_ids[picked[in_order]]),
+                _strings(rng.integers(1, 5, len(line_order_ids))),
+            )
+        ),
+        "Deliveries": _copy_text(
+            (
+                _strings(ids[delivered]),
+                _strings(first_driver + rng.integers(0, max(n_drivers, 1), n_deliveries)),
+                _timestamps(paid_at[delivered] + rng.integers(600, 2401, n_deliveries)),
+                _strings(delivery_states[states[delivered]]),
+            )
+        ),
+    }
+
+
+def _imap(
+    executor: Optional[Executor],
+    function: Callable[[tuple], Chunk],
+    shards: Iterable[tuple],
+    window: int,
+) -> Iterator[Chunk]:
+    """Map the shards in order, with at most `window` of them generated in advance"""
+    if executor is None:
+        yield from map(function, shards)
+        return
+
+    pending = deque()
+    for shard in shards:
+        pending.append(executor.submit(function, shard))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+class VectorizedUsurper(BulkUsurper):
+    """
+    `BulkUsurper` whose rows are generated by columns with NumPy.
+
+    Names, streets and cities are drawn from vocabularies sampled from Faker once.
+    Orders peak at lunch and dinner time. The dataset is split in shards of about
+    `chunk_size` rows, each one with its own random generator seeded from `seed` and
+    its index: the dataset only depends on `seed` and `now`, whatever the number of
+    `workers` generating the shards. Requires the optional `seed` dependency group.
+
+    Parameters
+    ----------
+    *args
+        The parameters of `BulkUsurper`
+    workers : int
+        Number of processes generating the shards, by default 1 (no process pool)
+    **kwargs
+        The parameters of `BulkUsurper`
+    """
+
+    def __init__(self, *args, workers: int = 1, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.workers = workers
+        self.rng = np.random.default_rng(self.seed)
+        self._vocabulary: Optional[Vocabulary] = None
+
+    def populate_database(self) -> Dict[str, float]:
+        if self.workers > 1:
+            with ProcessPoolExecutor(
+                self.workers, initializer=_init_worker, initargs=(self.vocabulary(),)
+            ) as executor:
+                self.executor = executor
+                return super().populate_database()
+
+        _init_worker(self.vocabulary())
+        self.executor = None
+        return super().populate_database()
+
+    def vocabulary(self) -> Vocabulary:
+        """Sample the vocabularies from Faker, the password salts from the seed, once"""
+        if self._vocabulary is not None:
+            return self._vocabulary
+
+        self._make_name_pools()
+        # Hashing is slow: a few salted passwords are shared by every user
+        salts = [self.rng.bytes(128).hex() for _ in range(PASSWORD_POOL_SIZE)]
+        self._vocabulary = Vocabulary(
+            first_names=[_copy_value(name) for name in self.first_names],
+            last_names=[_copy_value(name) for name in self.last_names],
+            streets=[_copy_value(street) for street in self.streets],
+            cities=[_copy_value(city) for city, _ in self.cities],
+            postal_codes=[_copy_value(postal_code) for _, postal_code in self.cities],
+            salts=salts,
+            password_hashes=[
+                hash_password(name + str(len(name)), salt)
+                for name, salt in zip(self.first_names, salts, strict=False)
+            ],
+        )
+        return self._vocabulary
+
+    def _make_pools(self) -> None:
+        # the pools are sampled by `vocabulary`, before the worker processes start
+        self.vocabulary()
+
+    @property
+    def _now(self) -> int:
+        """`now` in seconds since the epoch, the dates are naive like the ones of the app"""
+        return int((self.now - datetime(1970, 1, 1)).total_seconds())
+
+    def _map(self, function: Callable[[tuple], Chunk], shards: Iterable[tuple]) -> Iterator[Chunk]:
+        return _imap(self.executor, function, shards, 2 * self.workers)
+
+    def _customer_chunks(self, first_id: int, first_address: int) -> Iterator[Chunk]:
+        shards = (
+            (self.seed, index, first_id + start, first_address + start, n, self._now)
+            for index, (start, n) in enumerate(_split(self.n_customers, self.chunk_size))
+        )
+        return self._map(_customers_shard, shards)
+
+    def _driver_chunks(self, first_id: int) -> Iterator[Chunk]:
+        shards = (
+            (self.seed, index, first_id + start, n, self._now)
+            for index, (start, n) in enumerate(_split(self.n_drivers, self.chunk_size))
+        )
+        return self._map(_drivers_shard, shards)
+
+    def _order_chunks(
+        self,
+        first_id: int,
+        customer_ids: Sequence[int],
+        driver_ids: Sequence[int],
+        orderable_ids: List[int],
+    ) -> Iterator[Chunk]:
+        shards = (
+            (
+                self.seed,
+                index,
+                first_id + start,
+                n,
+                self._now,
+                (customer_ids.start, customer_ids.stop),
+                (driver_ids.start, driver_ids.stop),
+                tuple(orderable_ids),
+                self.lines_per_order,
+            )
+            for index, (start, n) in enumerate(_split(self.n_orders, self.orders_per_chunk))
+        )
+        return self._map(_orders_shard, shards)
+
+
+def _split(n: int, size: int) -> Iterator[Tuple[int, int]]:
+    """Start and length of the shards of `n` rows"""
+    for start in range(0, n, size):
+        yield start, min(size, n - start)
@@ -0,0 +1,87 @@
+import sys
+from typing import Dict
+
+from dotenv import load_dotenv
+
+from src.DAO.AddressDAO import AddressDAO
+from src.DAO.DBConnector import DBConnector
+from src.DAO.GeocodeDAO import GeocodeDAO
+from src.Service.GoogleMapService import GoogleMapService
+
+from .geocoding import geohash
+
+
+class CoordinatesBackfill:
+    """
+    Geocode the addresses created before their coordinates were stored.
+
+    Addresses are read by batches of `batch_size`, geocoded through the caches of
+    `GoogleMapService` and updated with a single query per batch. An address which
+    can't be geocoded is skipped, the job can be run again safely.
+
+    Parameters
+    ----------
+    address_dao : AddressDAO
+        DAO of the addresses to backfill
+    gm_service : GoogleMapService
+        Service used to geocode the addresses
+    batch_size : int
+        Number of addresses geocoded and updated at once, by default 100
+    """
+
+    def __init__(
+        self, address_dao: AddressDAO, gm_service: GoogleMapService, batch_size: int = 100
+    ) -> None:
+        self.address_dao = address_dao
+        self.gm_service = gm_service
+        self.batch_size = batch_size
+
+    def run(self) -> Dict[str, int]:
+        """
+        Backfill every address without coordinates
+
+        Returns
+        -------
+        Dict[str, int]
+            The number of addresses geocoded, not found, and found outside the delivery zone
+        """
+        report = {"geocoded": 0, "not_found": 0, "outside_zone": 0}
+        last_id = 0
+
+        while True:
+            addresses = self.address_dao.get_addresses_without_coordinates(self.batch_size, last_id)
+            if not addresses:
+                return report
+
+            coordinates = []
+            for address in addresses:
+                result = self.gm_service.geocode(str(address))
+                if not result:
+                    report["not_found"] += 1
+                    continue
+
+                location = result[0]["geometry"]["location"]
+                coordinates.append(
+                    (
+                        address.address_id,
+                        location["lat"],
+                        location["lng"],
+                        geohash(location["lat"], location["lng"]),
+                    )
+                )
+                if not self.gm_service.is_in_delivery_zone(location["lat"], location["lng"]):
+                    report["outside_zone"] += 1
+
+            self.address_dao.set_coordinates(coordinates)
+            report["geocoded"] += len(coordinates)
+            last_id = addresses[-1].address_id
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    schemas = sys.argv[1:] or ["project"]
+    for schema in schemas:
+        db_connector = DBConnector(test=schema == "test")
+        gm_service = GoogleMapService(GeocodeDAO(db_connector))
+        report = CoordinatesBackfill(AddressDAO(db_connector), gm_service).run()
+        print(f"Coordinates backfilled in {db_connector.schema}: {report}")
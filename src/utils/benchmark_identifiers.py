@@ -0,0 +1,77 @@
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List
+
+from src.Service.UserService import UserService, parse_phone
+
+EMAILS = ["jean.dupont@gmail.com", "marie.martin@outlook.fr", "paul@ensai.fr"]
+PHONES = ["0612345678", "+33 7 81 23 45 67", "+44 7911 123456"]
+
+
+class IdentifierBenchmark:
+    """
+    Time `UserService.identifier_validator` in each of its modes.
+
+    - syntax: emails checked without DNS lookup (login)
+    - deliverability cold: emails checked with an empty domain cache (first signup of a domain)
+    - deliverability warm: emails checked with the domain cache filled (signup)
+    - phone cold / warm: phone numbers parsed without / with the memoized results
+
+    Parameters
+    ----------
+    repeat : int
+        Number of validations of each identifier, the median time is reported, by default 50
+    """
+
+    def __init__(self, repeat: int = 50):
+        self.repeat = repeat
+        # The DAOs are not used to validate an identifier
+        self.user_service = UserService(None, None, None)
+
+    def run(self) -> List[Dict]:
+        """
+        Run the benchmark
+
+        Returns
+        -------
+        List[Dict]
+            For each mode, its name and the median time of a validation (in ms)
+        """
+        validate = self.user_service.identifier_validator
+        return [
+            self._time("syntax", EMAILS, lambda email: validate(email, False)),
+            self._time(
+                "deliverability cold",
+                EMAILS,
+                lambda email: validate(email, True),
+                before=self.user_service.domain_cache.invalidate,
+                repeat=1,
+            ),
+            self._time("deliverability warm", EMAILS, lambda email: validate(email, True)),
+            self._time("phone cold", PHONES, validate, before=parse_phone.cache_clear),
+            self._time("phone warm", PHONES, validate),
+        ]
+
+    def _time(
+        self,
+        mode: str,
+        identifiers: List[str],
+        validate: Callable,
+        before: Callable = lambda: None,
+        repeat: int = None,
+    ) -> Dict:
+        times = []
+        for _ in range(repeat or self.repeat):
+            for identifier in identifiers:
+                before()
+                start = time.perf_counter()
+                validate(identifier)
+                times.append((time.perf_counter() - start) * 1000)
+        return {"mode": mode, "median_ms": round(statistics.median(times), 4)}
+
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    for row in IdentifierBenchmark(repeat).run():
+        print(f"{row['mode']}: {row['median_ms']} ms")
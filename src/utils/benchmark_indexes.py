@@ -0,0 +1,196 @@
+import os
+import re
+import statistics
+import sys
+from typing import Dict, List, Tuple
+
+from dotenv import load_dotenv
+
+from src.DAO.BundleDAO import SELECT_BUNDLES
+from src.DAO.DBConnector import DBConnector
+from src.DAO.DeliveryDAO import SELECT_CURRENT_DELIVERY_OF_DRIVER, SELECT_DELIVERIES_OF_DRIVER
+from src.DAO.ItemDAO import SELECT_ITEMS
+from src.DAO.OrderDAO import SELECT_CURRENT_ORDER, SELECT_ORDERS_BY_STATE, SELECT_ORDERS_OF_CUSTOMER
+
+from .migrate import Migrator
+
+BENCHMARK_SCHEMA = "bench_indexes"
+
+# Hot queries of the DAOs, with the parameters used to run them
+HOT_QUERIES: List[Tuple[str, str, list]] = [
+    ("customer by mail", "SELECT * FROM Customers WHERE customer_mail=%s", ["user777@mail.fr"]),
+    ("customer by phone", "SELECT * FROM Customers WHERE customer_phone=%s", ["+33600000777"]),
+    ("driver by phone", "SELECT * FROM Drivers WHERE driver_phone=%s", ["+33700000077"]),
+    ("item by orderable", f"{SELECT_ITEMS} WHERE i.orderable_id=%s", [777]),
+    ("bundle by orderable", f"{SELECT_BUNDLES} WHERE b.orderable_id = %s", [1777]),
+    ("orders of customer", SELECT_ORDERS_OF_CUSTOMER, [777]),
+    ("current order", SELECT_CURRENT_ORDER, [777]),
+    ("prepared orders", SELECT_ORDERS_BY_STATE["ASC"], [2]),
+    ("deliveries of driver", SELECT_DELIVERIES_OF_DRIVER, [77]),
+    ("current delivery", SELECT_CURRENT_DELIVERY_OF_DRIVER, [77]),
+]
+
+# Synthetic data: most of the orders are delivered, like in a real history
+# (`%%` is the modulo operator, escaped from the query parameters)
+POPULATE = """
+INSERT INTO Addresses (address_number, address_street, address_city,
+                       address_postal_code, address_country)
+SELECT n %% 200, 'Rue ' || n, 'Rennes', '35000', 'France'
+FROM generate_series(1, %(customers)s) AS n;
+
+INSERT INTO Customers (customer_first_name, customer_last_name, customer_phone,
+                       customer_mail, customer_password_hash, customer_salt,
+                       customer_address_id)
+SELECT 'First' || n, 'Last' || n, '+336' || lpad(n::text, 8, '0'), 'user' || n || '@mail.fr',
+       md5(n::text), md5(n::text), n
+FROM generate_series(1, %(customers)s) AS n;
+
+INSERT INTO Drivers (driver_first_name, driver_last_name, driver_password_hash,
+                     driver_salt, driver_is_delivering, driver_phone)
+SELECT 'First' || n, 'Last' || n, md5(n::text), md5(n::text), false,
+       '+337' || lpad(n::text, 8, '0')
+FROM generate_series(1, %(drivers)s) AS n;
+
+INSERT INTO Orderables (orderable_type, is_in_menu)
+SELECT CASE WHEN n <= %(items)s THEN 'item' ELSE 'bundle' END, true
+FROM generate_series(1, %(items)s + %(bundles)s) AS n;
+
+INSERT INTO Items (orderable_id, item_name, item_price, item_type, item_description, item_stock)
+SELECT n, 'Item ' || n, 1 + n %% 10, 'Main course', 'Item ' || n, 1000
+FROM generate_series(1, %(items)s) AS n;
+
+INSERT INTO Bundles (orderable_id, bundle_name, bundle_reduction, bundle_description,
+                     bundle_availability_start_date, bundle_availability_end_date)
+SELECT %(items)s + n, 'Bundle ' || n, 10, 'Bundle ' || n, now(), now() + interval '1 year'
+FROM generate_series(1, %(bundles)s) AS n;
+
+INSERT INTO Bundle_Items (bundle_id, item_id, item_quantity)
+SELECT b, 1 + (b * 3 + k) %% %(items)s, 1
+FROM generate_series(1, %(bundles)s) AS b, generate_series(0, 2) AS k;
+
+INSERT INTO Orders (order_customer_id, order_state, order_created_at, order_paid_at)
+SELECT 1 + n %% %(customers)s,
+       CASE WHEN n %% 50 = 0 THEN n %% 4 WHEN n %% 20 = 0 THEN 5 ELSE 4 END,
+       now() - (n || ' minutes')::interval,
+       now() - (n || ' minutes')::interval
+FROM generate_series(1, %(orders)s) AS n;
+
+INSERT INTO Order_contents (order_id, orderable_id, orderable_quantity)
+SELECT o, 1 + (o * 7 + k) %% (%(items)s + %(bundles)s), 1
+FROM generate_series(1, %(orders)s) AS o, generate_series(0, 1) AS k;
+
+INSERT INTO Deliveries (delivery_order_id, delivery_driver_id, delivery_created_at,
+                        delivery_state)
+SELECT order_id, 1 + order_id %% %(drivers)s, order_paid_at,
+       CASE WHEN order_state = 3 THEN 1 ELSE 2 END
+FROM Orders
+WHERE order_state IN (3, 4);
+
+ANALYZE;
+"""
+
+
+class IndexBenchmark:
+    """
+    Compare the query plans of the hot queries before and after the migrations.
+
+    A throwaway schema is created with `init_db.sql` and filled with synthetic data,
+    each hot query is run with EXPLAIN ANALYZE, then the migrations are applied and the
+    queries are run again. The schema is dropped at the end.
+
+    Parameters
+    ----------
+    scale : float
+        Multiplier of the volume of synthetic data, by default 1 (20 000 customers,
+        100 000 orders)
+    repeat : int
+        Number of runs of each query, the median execution time is reported, by default 5
+    """
+
+    def __init__(self, scale: float = 1.0, repeat: int = 5):
+        self.volumes = {
+            "customers": int(20_000 * scale),
+            "drivers": max(int(200 * scale), 100),
+            "items": 1500,
+            "bundles": 500,
+            "orders": int(100_000 * scale),
+        }
+        self.repeat = repeat
+        self.db_connector = DBConnector(
+            config={
+                "host": os.environ["POSTGRES_HOST"],
+                "post": os.environ["POSTGRES_PORT"],
+                "database": os.environ["POSTGRES_DATABASE"],
+                "user": os.environ["POSTGRES_USER"],
+                "password": os.environ["POSTGRES_PASSWORD"],
+                "schema": BENCHMARK_SCHEMA,
+            }
+        )
+
+    def run(self) -> List[Dict]:
+        """
+        Run the benchmark
+
+        Returns
+        -------
+        List[Dict]
+            For each hot query, its name and the plan summary and median execution time
+            (in ms) before and after the migrations
+        """
+        try:
+            self._create_schema()
+            before = {name: self._explain(query, params) for name, query, params in HOT_QUERIES}
+            Migrator(self.db_connector).migrate()
+            self.db_connector.sql_query("ANALYZE;", return_type="none")
+            after = {name: self._explain(query, params) for name, query, params in HOT_QUERIES}
+        finally:
+            self.db_connector.sql_query(
+                f"DROP SCHEMA IF EXISTS {BENCHMARK_SCHEMA} CASCADE;", return_type="none"
+            )
+            self.db_connector.close()
+
+        return [
+            {
+                "query": name,
+                "plan_before": before[name][0],
+                "ms_before": before[name][1],
+                "plan_after": after[name][0],
+                "ms_after": after[name][1],
+            }
+            for name, _, _ in HOT_QUERIES
+        ]
+
+    def _create_schema(self) -> None:
+        with open("database_scripts/init_db.sql", encoding="utf-8") as init_db:
+            init_db_as_string = re.sub(r"\bproject\b", BENCHMARK_SCHEMA, init_db.read())
+        self.db_connector.sql_query(init_db_as_string, return_type="none")
+        self.db_connector.sql_query(POPULATE, self.volumes, "none")
+
+    def _explain(self, query: str, params: list) -> Tuple[str, float]:
+        times = []
+        for _ in range(self.repeat):
+            result = self.db_connector.sql_query(
+                f"EXPLAIN (ANALYZE, FORMAT JSON) {query}", params, "one"
+            )
+            plan = result["QUERY PLAN"][0]
+            times.append(plan["Execution Time"])
+        return self._summarize(plan["Plan"]), round(statistics.median(times), 3)
+
+    @classmethod
+    def _summarize(cls, node: Dict) -> str:
+        """Scans of a plan, e.g. 'Seq Scan on orders + Index Scan on items_orderable_id_key'"""
+        scans = []
+        if "Scan" in node["Node Type"]:
+            target = node.get("Index Name") or node.get("Relation Name", "")
+            scans.append(f"{node['Node Type']} on {target}")
+        scans.extend(cls._summarize(child) for child in node.get("Plans", []))
+        return " + ".join(scan for scan in scans if scan)
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    scale = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    for row in IndexBenchmark(scale).run():
+        print(f"{row['query']}: {row['ms_before']} ms -> {row['ms_after']} ms")
+        print(f"    before: {row['plan_before']}")
+        print(f"    after:  {row['plan_after']}")
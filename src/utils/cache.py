@@ -0,0 +1,139 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Union
+
+
+class TTLCache:
+    """
+    Thread-safe in-memory cache whose entries expire after `ttl` seconds.
+
+    The cache holds at most `maxsize` entries, the least recently used one is evicted first.
+    Every invalidation bumps a version number: a value computed before an invalidation is
+    never stored afterwards, so a slow reader can't put a stale value back in the cache.
+
+    Parameters
+    ----------
+    ttl : float
+        Time to live (in seconds) of an entry, by default 300
+    maxsize : int
+        Maximum number of entries, by default 128
+    """
+
+    def __init__(self, ttl: float = 300.0, maxsize: int = 128) -> None:
+        if ttl <= 0 or maxsize < 1:
+            raise ValueError("[TTLCache] ttl must be > 0 and maxsize >= 1.")
+
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: OrderedDict[Hashable, tuple] = OrderedDict()
+        self._lock = threading.RLock()
+        self._version = 0
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get the value of a key, or `default` if it is missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self._misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any, version: Optional[int] = None) -> bool:
+        """
+        Store a value
+
+        Parameters
+        ----------
+        key : Hashable
+            Key of the entry
+        value : Any
+            Value to store
+        version : Optional[int]
+            Version of the cache when the value was computed, the value is dropped
+            if the cache has been invalidated since. By default None (always stored)
+
+        Returns
+        -------
+        bool
+            True if the value has been stored
+        """
+        with self._lock:
+            if version is not None and version != self._version:
+                return False
+
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            return True
+
+    def get_or_set(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Get the value of a key, computing it with `loader` on a miss
+
+        Parameters
+        ----------
+        key : Hashable
+            Key of the entry
+        loader : Callable[[], Any]
+            Function computing the value, called without holding the lock
+
+        Returns
+        -------
+        Any
+            The cached or freshly computed value
+        """
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            return value
+
+        version = self._version
+        value = loader()
+        self.set(key, value, version)
+        return value
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Remove an entry, or every entry if no key is given, and bump the version"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+            self._version += 1
+            self._invalidations += 1
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """
+        Snapshot of the cache usage
+
+        Returns
+        -------
+        Dict[str, Union[int, float]]
+            The number of entries, hits, misses, invalidations, the hit ratio and the version
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self._invalidations,
+                "version": self._version,
+            }
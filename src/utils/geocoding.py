@@ -0,0 +1,159 @@
+import copy
+import math
+import re
+import threading
+import time
+import unicodedata
+from typing import Dict, List, Optional
+
+
+def normalize_address(address: str) -> str:
+    """
+    Key of an address in the geocoding caches: the spelling variants of a same address
+    ("51 rue Blaise Pascal ,35170  Bruz" and "51 Rue Blaise Pascal, 35170 Bruz") share a key.
+
+    Parameters
+    ----------
+    address : str
+        An address as typed by a user
+
+    Returns
+    -------
+    str
+        The address in lower case, with single spaces and ", " between its parts
+    """
+    address = unicodedata.normalize("NFKC", address).casefold()
+    address = re.sub(r"\s*,\s*", ", ", address)
+    address = re.sub(r"\s+", " ", address)
+    return address.strip(" ,")
+
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def geohash(latitude: float, longitude: float, precision: int = 9) -> str:
+    """
+    Geohash of a point: nearby points share a prefix (9 characters is about 5 meters)
+
+    Parameters
+    ----------
+    latitude : float
+        Latitude of the point, in degrees
+    longitude : float
+        Longitude of the point, in degrees
+    precision : int
+        Number of characters, by default 9
+
+    Returns
+    -------
+    str
+        The geohash of the point
+    """
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    characters = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(characters) < precision:
+        value, interval = (longitude, lng_range) if even else (latitude, lat_range)
+        middle = (interval[0] + interval[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+
+        bit_count += 1
+        if bit_count == 5:
+            characters.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(characters)
+
+
+def distance_km(lat_a: float, lng_a: float, lat_b: float, lng_b: float) -> float:
+    """Great-circle distance between two points (haversine formula), in kilometers"""
+    phi_a, phi_b = math.radians(lat_a), math.radians(lat_b)
+    d_phi = phi_b - phi_a
+    d_lambda = math.radians(lng_b - lng_a)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi_a) * math.cos(phi_b) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def place(
+    number: int, street: str, postal_code: str, city: str, country: str, lat: float, lng: float
+) -> dict:
+    """Geocoding result of an address, in the format of the Google Maps API"""
+    return {
+        "formatted_address": f"{number} {street}, {postal_code} {city}, {country}",
+        "address_components": [
+            {"long_name": str(number), "types": ["street_number"]},
+            {"long_name": street, "types": ["route"]},
+            {"long_name": city, "types": ["locality", "political"]},
+            {"long_name": postal_code, "types": ["postal_code"]},
+            {"long_name": country, "types": ["country", "political"]},
+        ],
+        "geometry": {"location": {"lat": lat, "lng": lng}},
+    }
+
+
+DEFAULT_PLACES = {
+    "51 Rue Blaise Pascal, 35170 Bruz, France": place(
+        51, "Rue Blaise Pascal", "35170", "Bruz", "France", 48.0511, -1.7418
+    ),
+    "Place de la Mairie, 35000 Rennes, France": place(
+        1, "Place de la Mairie", "35000", "Rennes", "France", 48.1113, -1.6800
+    ),
+    "44 Rue Pierre Maître, 51100 Reims, France": place(
+        44, "Rue Pierre Maître", "51100", "Reims", "France", 49.2433, 4.0317
+    ),
+}
+
+
+class LocalMapsClient:
+    """
+    Offline stand-in for `googlemaps.Client`, answering from a fixed set of places.
+    It can be given to `GoogleMapService` to run it without network nor API key.
+
+    Parameters
+    ----------
+    places : Optional[Dict[str, dict]]
+        Geocoding result of each known address (see `place`), by default a few addresses
+        around Rennes and Reims
+    latency : float
+        Seconds waited by every call, to simulate the API, by default 0
+    """
+
+    def __init__(self, places: Optional[Dict[str, dict]] = None, latency: float = 0.0) -> None:
+        self.places = {
+            normalize_address(address): result
+            for address, result in (places if places is not None else DEFAULT_PLACES).items()
+        }
+        self.latency = latency
+        self.geocode_calls = 0
+        self.directions_calls = 0
+        self._lock = threading.Lock()
+
+    def geocode(self, address: str) -> List[dict]:
+        with self._lock:
+            self.geocode_calls += 1
+        time.sleep(self.latency)
+
+        result = self.places.get(normalize_address(address))
+        return [copy.deepcopy(result)] if result is not None else []
+
+    def directions(self, origin: str, destination: str, **kwargs) -> List[dict]:
+        with self._lock:
+            self.directions_calls += 1
+        time.sleep(self.latency)
+
+        if normalize_address(destination) not in self.places:
+            return []
+        return [{"summary": f"{origin} -> {destination}", "legs": []}]
@@ -0,0 +1,178 @@
+import hashlib
+import hmac
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+
+class LocalStripeEmitter:
+    """
+    Offline stand-in for Stripe sending events to the webhook. The events are signed
+    like Stripe does, so they go through `StripeService.construct_event`.
+
+    Parameters
+    ----------
+    secret : str
+        The signing secret of the webhook (`STRIPE_WEBHOOK_SECRET`)
+    """
+
+    def __init__(self, secret: str) -> None:
+        self.secret = secret
+
+    def checkout_completed(
+        self,
+        order_id: int,
+        customer_id: int,
+        payment_status: str = "paid",
+        event_id: Optional[str] = None,
+    ) -> Dict:
+        """
+        A `checkout.session.completed` event, as sent once the customer paid
+
+        Parameters
+        ----------
+        order_id : int
+            The id of the order paid in the session
+        customer_id : int
+            The id of the customer
+        payment_status : str
+            The status of the payment of the session, by default "paid"
+        event_id : Optional[str]
+            The id of the event, by default a new one (an id already sent simulates a retry)
+
+        Returns
+        -------
+        Dict
+            The event
+        """
+        return {
+            "id": event_id or f"evt_{uuid.uuid4().hex}",
+            "object": "event",
+            "type": "checkout.session.completed",
+            "created": int(time.time()),
+            "data": {
+                "object": {
+                    "id": f"cs_test_{uuid.uuid4().hex}",
+                    "object": "checkout.session",
+                    "mode": "payment",
+                    "payment_status": payment_status,
+                    "metadata": {"order_id": str(order_id), "customer_id": str(customer_id)},
+                }
+            },
+        }
+
+    def sign(self, payload: bytes, timestamp: Optional[int] = None) -> str:
+        """The `Stripe-Signature` header of a payload"""
+        timestamp = int(time.time()) if timestamp is None else timestamp
+        signature = hmac.new(
+            self.secret.encode("utf-8"), f"{timestamp}.".encode() + payload, hashlib.sha256
+        ).hexdigest()
+        return f"t={timestamp},v1={signature}"
+
+    def request(self, event: Dict, timestamp: Optional[int] = None) -> Tuple[bytes, Dict]:
+        """
+        The body and the headers of the request sending an event to the webhook
+
+        Returns
+        -------
+        Tuple[bytes, Dict]
+            The body and the headers, to post to `/stripe/webhook`
+        """
+        payload = json.dumps(event).encode("utf-8")
+        headers = {
+            "Content-Type": "application/json",
+            "Stripe-Signature": self.sign(payload, timestamp),
+        }
+        return payload, headers
+
+
+class LocalStripeServer:
+    """
+    Offline stand-in for the API of Stripe, answering the calls made by `StripeService`
+    (products, prices and checkout sessions, and updates of the products). Point the
+    client at it with the `STRIPE_API_BASE` environment variable.
+
+    Every call is kept in `requests`, as its path and its (flattened) form parameters,
+    e.g. `("/v1/checkout/sessions", {"line_items[0][price]": "price_1", ...})`. The
+    server runs while the `with LocalStripeServer() as server:` block does.
+    """
+
+    OBJECTS = {
+        "/v1/products": ("prod", "product"),
+        "/v1/prices": ("price", "price"),
+        "/v1/checkout/sessions": ("cs_test", "checkout.session"),
+    }
+
+    def __init__(self) -> None:
+        self.requests: List[Tuple[str, Dict[str, str]]] = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def calls(self, path: str) -> List[Dict[str, str]]:
+        """The parameters of the calls made to a path"""
+        with self._lock:
+            return [params for called, params in self.requests if called == path]
+
+    def __enter__(self) -> "LocalStripeServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _create(self, path: str, params: Dict[str, str]) -> Optional[Dict]:
+        collection, _, object_id = path.rpartition("/")
+        if collection in self.OBJECTS:
+            return self._update(path, collection, object_id, params)
+        if path not in self.OBJECTS:
+            return None
+        prefix, object_name = self.OBJECTS[path]
+        with self._lock:
+            self.requests.append((path, params))
+            object_id = f"{prefix}_{len(self.requests)}"
+        created = {"id": object_id, "object": object_name, **params}
+        if object_name == "checkout.session":
+            created["url"] = f"{self.url}/pay/{object_id}"
+        return created
+
+    def _update(self, path: str, collection: str, object_id: str, params: Dict[str, str]) -> Dict:
+        with self._lock:
+            self.requests.append((path, params))
+        return {"id": object_id, "object": self.OBJECTS[collection][1], **params}
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:  # noqa: N802
+                length = int(self.headers.get("Content-Length", 0))
+                # blank values unset the fields of an updated object
+                body = self.rfile.read(length).decode("utf-8")
+                params = dict(parse_qsl(body, keep_blank_values=True))
+                created = server._create(self.path, params)
+                if created is None:
+                    status, body = 404, {"error": {"type": "invalid_request_error"}}
+                else:
+                    status, body = 200, created
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        return Handler
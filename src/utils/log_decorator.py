@@ -1,24 +1,71 @@
-import logging.config
+import inspect
+import logging
 import numbers
+import os
+import random
+from contextvars import ContextVar
 from functools import wraps
+from typing import Optional
 
+logger = logging.getLogger(__name__)
 
-class LogIndetation:
-    """Indent logs when we enter a new function"""
+# Fraction of the top-level calls which are traced, the calls they make are traced with them.
+# Read from the environment on the first call, once the `.env` file is loaded
+LOG_SAMPLE_RATE: Optional[float] = None
 
-    current_indentation = 0
+SECRET_PARAMETERS = {"password", "passwd", "pwd", "pass", "mot_de_passe", "mdp"}
 
-    @classmethod
-    def increase_indentation(cls):
-        cls.current_indentation += 1
+INDENTATION = "    "
 
-    @classmethod
-    def decrease_indentation(cls):
-        cls.current_indentation -= 1
+# Depth of the traced calls and sampling decision of the current request (thread or task)
+_depth: ContextVar[int] = ContextVar("log_depth", default=0)
+_traced: ContextVar[bool] = ContextVar("log_traced", default=False)
 
-    @classmethod
-    def get_indentation(cls):
-        return "    " * cls.current_indentation
+
+class _Call:
+    """Description of a call, only built if a log record is actually emitted"""
+
+    def __init__(self, func, args, kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self._formatted = None
+
+    def __str__(self) -> str:
+        if self._formatted is None:
+            class_name = self.args[0].__class__.__name__ if self.args else ""
+            code = self.func.__code__
+            param_names = code.co_varnames[1 : code.co_argcount]  # noqa
+            args_list = [
+                _format_arg(name, arg)
+                for name, arg in zip(param_names, self.args[1:], strict=False)
+            ] + [_format_arg(name, arg) for name, arg in self.kwargs.items()]
+            self._formatted = f"{class_name}.{self.func.__name__}{tuple(args_list)}"
+        return self._formatted
+
+
+class _Output:
+    """Short description of a returned value, only built if the record is emitted"""
+
+    def __init__(self, result):
+        self.result = result
+
+    def __str__(self) -> str:
+        result = self.result
+        if isinstance(result, list):
+            return f"{[str(item) for item in result[:3]]} ... ({len(result)} elements)"
+        if isinstance(result, dict):
+            items = [(str(k), str(v)) for k, v in list(result.items())[:3]]
+            return f"{items} ... ({len(result)} elements)"
+        if isinstance(result, str) and len(result) > 50:
+            return f"{result[:50]} ... ({len(result)} caracteres)"
+        return str(result)
+
+
+def _format_arg(name, arg):
+    if name in SECRET_PARAMETERS:
+        return "*****"
+    return arg if isinstance(arg, numbers.Number) else str(arg)
 
 
 def log(func):
@@ -26,49 +73,77 @@ def log(func):
     When this decorator is applied to a method, it will display in the logs :
     - the input
     - the output
+    Coroutine functions are supported, the output is logged once awaited.
+
+    Nothing is formatted when the INFO level is disabled. Only a `LOG_SAMPLE_RATE` fraction
+    of the top-level calls are traced (with all the calls they make), and the indentation
+    is kept per request thread or asyncio task.
     """
 
+    if inspect.iscoroutinefunction(func):
+
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            if not logger.isEnabledFor(logging.INFO):
+                return await func(*args, **kwargs)
+
+            tokens, call, indentation = _log_start(func, args, kwargs)
+            try:
+                result = await func(*args, **kwargs)
+                _log_end(call, indentation, result)
+                return result
+            finally:
+                _reset(tokens)
+
+        return async_wrapper
+
     @wraps(func)
     def wrapper(*args, **kwargs):
-        logger = logging.getLogger(__name__)
+        if not logger.isEnabledFor(logging.INFO):
+            return func(*args, **kwargs)
+
+        tokens, call, indentation = _log_start(func, args, kwargs)
+        try:
+            result = func(*args, **kwargs)
+            _log_end(call, indentation, result)
+            return result
+        finally:
+            _reset(tokens)
 
-        LogIndetation.increase_indentation()
-        indentation = LogIndetation.get_indentation()
+    return wrapper
 
-        class_name = args[0].__class__.__name__ if args else ""
-        method_name = func.__name__
-        args_list = list(
-            [str(arg) if not isinstance(arg, numbers.Number) else arg for arg in args[1:]]
-            + list(kwargs.values())
-        )
 
-        param_names = func.__code__.co_varnames[1 : func.__code__.co_argcount]  # noqa
-        for i, v in enumerate(param_names):
-            if v in ["password", "passwd", "pwd", "pass", "mot_de_passe", "mdp"]:
-                args_list[i] = "*****"
+def _sample_rate() -> float:
+    global LOG_SAMPLE_RATE
+    if LOG_SAMPLE_RATE is None:
+        LOG_SAMPLE_RATE = float(os.environ.get("LOG_SAMPLE_RATE") or 1)
+    return LOG_SAMPLE_RATE
 
-        args_list = tuple(args_list)
 
-        logger.info(f"{indentation}{class_name}.{method_name}{args_list} - DEBUT")
-        result = func(*args, **kwargs)
-        logger.info(f"{indentation}{class_name}.{method_name}{args_list} - FIN")
+def _log_start(func, args, kwargs):
+    depth = _depth.get() + 1
+    # the sampling decision is taken by the top-level call and inherited by the nested ones
+    traced = _traced.get() if depth > 1 else random.random() < _sample_rate()
+    tokens = (_depth.set(depth), _traced.set(traced))
 
-        if isinstance(result, list):
-            result_str = str([str(item) for item in result[:3]])
-            result_str += " ... (" + str(len(result)) + " elements)"
-        elif isinstance(result, dict):
-            result_str = [(str(k), str(v)) for k, v in result.items()][:3]
-            result_str += " ... (" + str(len(result)) + " elements)"
-        elif isinstance(result, str) and len(result) > 50:
-            result_str = result[:50]
-            result_str += " ... (" + str(len(result)) + " caracteres)"
-        else:
-            result_str = str(result)
+    if not traced:
+        return tokens, None, None
 
-        logger.info(f"{indentation}   └─> Sortie : {result_str}")
+    call = _Call(func, args, kwargs)
+    indentation = INDENTATION * depth
+    logger.info("%s%s - DEBUT", indentation, call)
+    return tokens, call, indentation
 
-        LogIndetation.decrease_indentation()
 
-        return result
+def _log_end(call, indentation, result):
+    if call is None:
+        return
 
-    return wrapper
+    logger.info("%s%s - FIN", indentation, call)
+    logger.info("%s   └─> Sortie : %s", indentation, _Output(result))
+
+
+def _reset(tokens):
+    depth_token, traced_token = tokens
+    _traced.reset(traced_token)
+    _depth.reset(depth_token)
@@ -1,3 +1,4 @@
+import atexit
 import logging
 import logging.config
 import os
@@ -6,13 +7,18 @@ import yaml
 
 
 def initialiser_logs(nom):
-    """Init logs from the config file"""
+    """Init logs from the config file, the records are written by a background thread"""
     os.makedirs("logs", exist_ok=True)
 
     stream = open("logging_config.yml", encoding="utf-8")
     config = yaml.load(stream, Loader=yaml.FullLoader)
     logging.config.dictConfig(config)
 
+    queue_handler = logging.getHandlerByName("queue")
+    if queue_handler is not None and queue_handler.listener is not None:
+        queue_handler.listener.start()
+        atexit.register(queue_handler.listener.stop)
+
     logging.info("-" * 50)
     logging.info(f"Lancement {nom}                           ")
     logging.info("-" * 50)
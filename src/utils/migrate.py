@@ -0,0 +1,111 @@
+import os
+import re
+import sys
+from typing import List, Tuple
+
+from dotenv import load_dotenv
+
+from src.DAO.DBConnector import DBConnector
+
+MIGRATIONS_DIR = "database_scripts/migrations"
+
+# 0001_hot_path_indexes.sql -> version "0001", name "hot_path_indexes"
+MIGRATION_FILE = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+
+class Migrator:
+    """
+    Apply the versioned migrations of `database_scripts/migrations` to a schema.
+
+    A migration is a SQL file named `<version>_<name>.sql`. Migrations are applied by
+    increasing version, each one in its own transaction, and recorded in the
+    `schema_migrations` table so they are never applied twice.
+
+    Parameters
+    ----------
+    db_connector : DBConnector
+        Connector to the schema to migrate
+    migrations_dir : str
+        Directory of the migration files, by default database_scripts/migrations
+    """
+
+    def __init__(self, db_connector: DBConnector, migrations_dir: str = MIGRATIONS_DIR):
+        self.db_connector = db_connector
+        self.migrations_dir = migrations_dir
+
+    def available_migrations(self) -> List[Tuple[str, str, str]]:
+        """
+        List the migration files
+
+        Returns
+        -------
+        List[Tuple[str, str, str]]
+            The version, name and path of every migration, sorted by version
+        """
+        migrations = []
+        for file_name in os.listdir(self.migrations_dir):
+            match = MIGRATION_FILE.match(file_name)
+            if match:
+                version, name = match.groups()
+                migrations.append((version, name, os.path.join(self.migrations_dir, file_name)))
+        return sorted(migrations, key=lambda migration: int(migration[0]))
+
+    def applied_versions(self) -> List[str]:
+        """Versions of the migrations already applied to the schema"""
+        self._create_migrations_table()
+        rows = self.db_connector.sql_query(
+            "SELECT version FROM schema_migrations ORDER BY version", return_type="all"
+        )
+        return [row["version"] for row in rows or []]
+
+    def pending_migrations(self) -> List[Tuple[str, str, str]]:
+        """Migrations not applied yet, in the order they will be applied"""
+        applied = set(self.applied_versions())
+        return [
+            migration for migration in self.available_migrations() if migration[0] not in applied
+        ]
+
+    def migrate(self) -> List[str]:
+        """
+        Apply the pending migrations. A failing migration is rolled back and stops
+        the process, the migrations applied before it are kept.
+
+        Returns
+        -------
+        List[str]
+            The versions of the migrations applied
+        """
+        applied = []
+        for version, name, path in self.pending_migrations():
+            with open(path, encoding="utf-8") as migration_file:
+                migration = migration_file.read()
+
+            with self.db_connector.transaction():
+                self.db_connector.sql_query(migration, return_type="none")
+                self.db_connector.sql_query(
+                    "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                    [version, name],
+                    "none",
+                )
+            print(f"Migration {version}_{name} applied to {self.db_connector.schema}")
+            applied.append(version)
+        return applied
+
+    def _create_migrations_table(self) -> None:
+        self.db_connector.sql_query(
+            """
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version VARCHAR(16) PRIMARY KEY,
+                name VARCHAR(128) NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            """,
+            return_type="none",
+        )
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    schemas = sys.argv[1:] or ["project", "test"]
+    for schema in schemas:
+        Migrator(DBConnector(test=schema == "test")).migrate()
@@ -0,0 +1,237 @@
+import asyncio
+import contextvars
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+
+# Channel of the order events, suffixed by the schema since the channels are shared by the
+# whole database
+ORDER_EVENTS_CHANNEL = "order_events"
+
+# Put in the queue of a stream when events may have been missed (reconnection of the
+# listener, stream too slow to keep up): the stream sends its whole state again
+RESYNC: Dict = {"resync": True}
+
+# Seconds between two keepalive comments of an idle stream, so that proxies don't close it
+KEEPALIVE_INTERVAL = 15.0
+KEEPALIVE_COMMENT = ": keepalive\n\n"
+
+# Headers of a stream, which mustn't be cached nor buffered by a proxy
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+# A message of a stream: the name of the event and its data
+SSEMessage = Tuple[str, Any]
+
+
+def order_events_channel(schema: str) -> str:
+    """The channel of the order events of a schema"""
+    return f"{ORDER_EVENTS_CHANNEL}_{schema}"
+
+
+def format_sse(event: str, data: Any) -> str:
+    """
+    Format a server-sent event
+
+    Parameters
+    ----------
+    event : str
+        Name of the event, the `addEventListener` type of the client
+    data : Any
+        Data of the event, sent as JSON
+
+    Returns
+    -------
+    str
+        The event, as written to a `text/event-stream` response
+    """
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class OrderEventHub:
+    """
+    Fan-out of the order events to the event streams of a worker.
+
+    `OrderDAO.update_order_state` notifies every state transition on the channel of the
+    schema (`pg_notify`), when its transaction commits. The hub listens to that channel on
+    a single connection per worker, whichever worker made the transition, and hands each
+    event to its listeners, then to the queue of every subscribed stream. A listener runs
+    once per event and per worker, e.g. to refresh a cache shared by the streams.
+
+    The hub starts with its first subscriber and runs on the event loop of that subscriber.
+    Once it listens, and again whenever it reconnects, it sends `RESYNC` to the streams.
+
+    Parameters
+    ----------
+    db_connector : AsyncDBConnector
+        The connector of the database, whose schema names the channel
+    queue_size : int
+        Number of events a stream may lag behind before being resynchronized, by default 100
+    retry_delay : float
+        Seconds before the first reconnection, doubled up to 30 seconds, by default 1
+    """
+
+    def __init__(self, db_connector, queue_size: int = 100, retry_delay: float = 1.0) -> None:
+        self.db_connector = db_connector
+        self.channel = order_events_channel(db_connector.schema)
+        self.queue_size = queue_size
+        self.retry_delay = retry_delay
+        self._listeners: List[Callable[[Dict], None]] = []
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._listening: Optional[asyncio.Event] = None
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def add_listener(self, listener: Callable[[Dict], None]) -> None:
+        """
+        Call a function with every event, before it is sent to the streams
+
+        Parameters
+        ----------
+        listener : Callable[[Dict], None]
+            Function called in a thread (it may query the database) with the event
+        """
+        self._listeners.append(listener)
+
+    @asynccontextmanager
+    async def subscribe(self) -> AsyncIterator[asyncio.Queue]:
+        """
+        Subscribe to the order events, for the duration of the block
+
+        The first message of the queue is `RESYNC`, once the hub listens: a state read
+        after it is never older than the next events. Until then, the queue stays empty.
+
+        Yields
+        ------
+        asyncio.Queue
+            The queue of the events (dictionaries with the `order_id`, `order_customer_id`,
+            `order_state` and `previous_state` of the order), or `RESYNC`
+        """
+        self._start()
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        if self._listening.is_set():
+            queue.put_nowait(RESYNC)
+        self._subscribers.add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers.discard(queue)
+
+    async def close(self) -> None:
+        """Stop listening, the subscribed streams stay open"""
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def _start(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._task is not None and self._loop is loop and not self._task.done():
+            return
+        if self._loop is not loop:
+            # the queues of a closed loop are gone, the hub starts over on the current one
+            self._loop = loop
+            self._subscribers = set()
+            self._listening = asyncio.Event()
+        # the task outlives the request which starts it, it mustn't inherit its context
+        # (transaction of the request, statistics of its queries)
+        self._task = loop.create_task(self._listen(), context=contextvars.Context())
+
+    async def _listen(self) -> None:
+        delay = self.retry_delay
+        while True:
+            try:
+                connection = await self.db_connector.listen(self.channel)
+                async with connection:
+                    delay = self.retry_delay
+                    self._listening.set()
+                    self._broadcast(RESYNC)
+                    async for notify in connection.notifies():
+                        await self._dispatch(notify.payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.warning(
+                    f"[OrderEventHub] Lost the channel {self.channel}: {e}, retrying in {delay}s"
+                )
+            finally:
+                self._listening.clear()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+
+    async def _dispatch(self, payload: str) -> None:
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logging.warning(f"[OrderEventHub] Ignored a malformed event: {payload!r}")
+            return
+
+        for listener in self._listeners:
+            try:
+                await asyncio.to_thread(listener, event)
+            except Exception as e:
+                logging.error(f"[OrderEventHub] Listener failed on {event}: {e}")
+        self._broadcast(event)
+
+    def _broadcast(self, event: Dict) -> None:
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # the stream can't keep up: its pending events are replaced by a resync
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESYNC)
+
+
+async def event_stream(
+    hub: OrderEventHub,
+    snapshot: Callable[[], Optional[SSEMessage]],
+    delta: Callable[[Dict], Optional[SSEMessage]],
+    keepalive: float = KEEPALIVE_INTERVAL,
+) -> AsyncIterator[str]:
+    """
+    A `text/event-stream` of the order events, as seen by a client
+
+    The stream starts with the `snapshot` of the state of the client, once the hub listens,
+    then sends the `delta` of each event. Both run in a thread (they may query the database)
+    and return None when there is nothing to send. The snapshot is sent again after a
+    `RESYNC`. Keepalives are sent while the hub (re)connects too.
+
+    Parameters
+    ----------
+    hub : OrderEventHub
+        The hub of the order events
+    snapshot : Callable[[], Optional[SSEMessage]]
+        The whole state of the client
+    delta : Callable[[Dict], Optional[SSEMessage]]
+        The change of the state of the client made by an event
+    keepalive : float
+        Seconds between two keepalive comments of an idle stream, by default 15
+
+    Yields
+    ------
+    str
+        The server-sent events
+    """
+    async with hub.subscribe() as queue:
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), keepalive)
+            except asyncio.TimeoutError:
+                yield KEEPALIVE_COMMENT
+                continue
+
+            if event is RESYNC:
+                message = await asyncio.to_thread(snapshot)
+            else:
+                message = await asyncio.to_thread(delta, event)
+            if message is not None:
+                yield format_sse(*message)
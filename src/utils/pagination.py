@@ -0,0 +1,90 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+DEFAULT_PAGE_SIZE = 15
+MAX_PAGE_SIZE = 100
+
+# Response header carrying the cursor of the next page, absent on the last page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Encode the sort key of the last row of a page as an opaque cursor
+
+    Parameters
+    ----------
+    *values : Any
+        The values of the sort key (int, str or datetime)
+
+    Returns
+    -------
+    str
+        A url-safe cursor
+    """
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], types: Sequence[type]) -> Optional[Tuple]:
+    """
+    Decode a cursor created by `encode_cursor`
+
+    Parameters
+    ----------
+    cursor : Optional[str]
+        The cursor given by the client, None for the first page
+    types : Sequence[type]
+        The type of each value of the sort key (int, str or datetime)
+
+    Returns
+    -------
+    Optional[Tuple]
+        The values of the sort key, None for the first page
+
+    Raises
+    ------
+    ValueError
+        If the cursor is malformed
+    """
+    if cursor is None:
+        return None
+
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, list) or len(payload) != len(types):
+            raise ValueError
+        return tuple(
+            datetime.fromisoformat(value) if value_type is datetime else value_type(value)
+            for value, value_type in zip(payload, types, strict=True)
+        )
+    except (ValueError, TypeError, binascii.Error) as e:
+        raise ValueError("[Pagination] Invalid cursor.") from e
+
+
+def next_cursor(rows: List, limit: int, key: Callable[[Any], Tuple]) -> Optional[str]:
+    """
+    Cursor of the page following `rows`
+
+    Parameters
+    ----------
+    rows : List
+        The rows of the current page
+    limit : int
+        The size of the page
+    key : Callable[[Any], Tuple]
+        The sort key of a row
+
+    Returns
+    -------
+    Optional[str]
+        The cursor of the next page, None if the current page is the last one
+    """
+    if len(rows) < limit:
+        return None
+    return encode_cursor(*key(rows[-1]))
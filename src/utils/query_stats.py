@@ -0,0 +1,290 @@
+import bisect
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the buckets of the histograms, the last bucket has no upper bound
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+DB_TIME_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+# Length of the slowest statement kept in the logs
+STATEMENT_MAX_LENGTH = 200
+
+# What a block exceeding its query budget does: "raise", "warn" (staging) or "off"
+QUERY_BUDGET_MODE = "QUERY_BUDGET_MODE"
+
+_WHITESPACES = re.compile(r"\s+")
+
+
+class QueryStats:
+    """
+    Queries made while handling a request: their number, the time spent in the database,
+    the number of rows they returned and the slowest one.
+
+    Parameters
+    ----------
+    parent : Optional[QueryStats]
+        The stats of the enclosing block, which records the same queries
+    """
+
+    def __init__(self, parent: Optional["QueryStats"] = None) -> None:
+        self.parent = parent
+        self.count = 0
+        self.duration = 0.0
+        self.rows = 0
+        self.slowest_duration = 0.0
+        self.slowest_statement: Optional[str] = None
+
+    def record(self, statement: str, duration: float, rows: int) -> None:
+        self.count += 1
+        self.duration += duration
+        self.rows += rows
+        if duration >= self.slowest_duration:
+            self.slowest_duration = duration
+            self.slowest_statement = statement
+
+    def server_timing(self) -> str:
+        """Value of the `Server-Timing` header"""
+        return (
+            f'db;dur={self.duration * 1000:.2f};desc="{self.count} queries, {self.rows} rows", '
+            f"db-slowest;dur={self.slowest_duration * 1000:.2f}"
+        )
+
+    def to_dict(self) -> Dict:
+        statement = self.slowest_statement
+        if statement is not None:
+            statement = _WHITESPACES.sub(" ", statement).strip()[:STATEMENT_MAX_LENGTH]
+        return {
+            "queries": self.count,
+            "db_ms": round(self.duration * 1000, 2),
+            "rows": self.rows,
+            "slowest_ms": round(self.slowest_duration * 1000, 2),
+            "slowest_statement": statement,
+        }
+
+
+# Stats of the request handled by the current thread or task, None outside of a request
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+def record_query(statement: str, duration: float, rows: int) -> None:
+    """Record a query in the stats of the current request, if any"""
+    stats = _current.get()
+    while stats is not None:
+        stats.record(statement, duration, rows)
+        stats = stats.parent
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """
+    Record the queries made in the `with` block, by this thread or task and the threads
+    and tasks it starts. The queries are still recorded by the enclosing blocks.
+
+    Yields
+    ------
+    QueryStats
+        The stats of the block, updated as the queries are made
+    """
+    stats = QueryStats(parent=_current.get())
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a block makes more queries than its budget"""
+
+
+@contextmanager
+def query_budget(
+    max_queries: int, name: str = "block", mode: Optional[str] = None
+) -> Iterator[QueryStats]:
+    """
+    Check that the `with` block (or the decorated function) makes at most `max_queries`
+    round trips to the database, to catch a return to one query per row (N+1 queries)
+
+    Parameters
+    ----------
+    max_queries : int
+        The maximum number of queries of the block
+    name : str
+        The name of the block in the error or warning
+    mode : Optional[str]
+        "raise" to raise an error, "warn" to log a warning, "off" to do nothing, by default
+        the `QUERY_BUDGET_MODE` environment variable ("off" if not set)
+
+    Yields
+    ------
+    QueryStats
+        The stats of the block
+
+    Raises
+    ------
+    QueryBudgetExceeded
+        If the block makes more than `max_queries` queries in "raise" mode
+    """
+    with track_queries() as stats:
+        yield stats
+
+    if stats.count <= max_queries:
+        return
+    mode = mode or os.environ.get(QUERY_BUDGET_MODE) or "off"
+    message = (
+        f"[QueryBudget] {name} made {stats.count} queries, its budget is {max_queries} "
+        f"(slowest: {stats.to_dict()['slowest_statement']})"
+    )
+    if mode == "raise":
+        raise QueryBudgetExceeded(message)
+    if mode == "warn":
+        logger.warning(message)
+
+
+class _Histogram:
+    def __init__(self, bounds: Tuple[float, ...]) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def to_dict(self) -> Dict:
+        labels = [f"<={bound}" for bound in self.bounds] + [f">{self.bounds[-1]}"]
+        return {
+            "buckets": dict(zip(labels, self.counts, strict=True)),
+            "total": round(self.total, 2),
+            "max": round(self.max, 2),
+        }
+
+
+class QueryMetrics:
+    """
+    Thread-safe histograms of the number of queries and of the database time of the
+    requests, by route.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._routes: Dict[str, Dict[str, _Histogram]] = {}
+
+    def observe(self, route: str, stats: QueryStats) -> None:
+        with self._lock:
+            histograms = self._routes.get(route)
+            if histograms is None:
+                histograms = {
+                    "queries": _Histogram(QUERY_COUNT_BUCKETS),
+                    "db_ms": _Histogram(DB_TIME_BUCKETS_MS),
+                }
+                self._routes[route] = histograms
+            histograms["queries"].observe(stats.count)
+            histograms["db_ms"].observe(stats.duration * 1000)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """
+        The histograms of every route, the most expensive routes (in database time) first
+
+        Returns
+        -------
+        Dict[str, Dict]
+            For each route, its number of requests and the histograms of their number of
+            queries and of their database time (in milliseconds)
+        """
+        with self._lock:
+            routes: List[Tuple[str, Dict[str, _Histogram]]] = sorted(
+                self._routes.items(), key=lambda item: item[1]["db_ms"].total, reverse=True
+            )
+            return {
+                route: {
+                    "requests": sum(histograms["queries"].counts),
+                    "queries": histograms["queries"].to_dict(),
+                    "db_ms": histograms["db_ms"].to_dict(),
+                }
+                for route, histograms in routes
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+class QueryStatsMiddleware:
+    """
+    ASGI middleware recording the queries of each HTTP request.
+
+    The stats are sent in the `Server-Timing` header of the response, logged as a JSON
+    line once the response is sent, and added to the histograms of the route.
+
+    Parameters
+    ----------
+    app
+        The ASGI application
+    metrics : QueryMetrics
+        The histograms the requests are added to
+    """
+
+    def __init__(self, app, metrics: QueryMetrics) -> None:
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_timing(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", stats.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        with track_queries() as stats:
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                route = _route_of(scope)
+                self.metrics.observe(route, stats)
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info(
+                        json.dumps(
+                            {
+                                "method": scope["method"],
+                                "route": route,
+                                "status": status,
+                                "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+                                **stats.to_dict(),
+                            }
+                        )
+                    )
+
+
+def _route_of(scope) -> str:
+    """Path template of the route of a request (`/orders/{order_id}`), to group requests"""
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    if path is None:
+        return "unmatched"
+    return f"{scope.get('root_path', '')}{path}"
@@ -1,10 +1,14 @@
+import os
 import sys
+from importlib.util import find_spec
 from typing import Literal
 
 from dotenv import load_dotenv
 
 from src.DAO.DBConnector import DBConnector
 
+from .migrate import Migrator
+from .Populate.BulkUsurper import BulkUsurper
 from .Populate.Faker import fake
 from .Populate.Usurper import Usurper
 from .singleton import Singleton
@@ -17,17 +21,34 @@ class ResetDatabase(metaclass=Singleton):
     Resetting the DB
     """
 
-    def startreset(self, schema: str = ("project, test"), prod: Literal["True", "False"] = "False"):
+    def startreset(
+        self,
+        schema: str = ("project, test"),
+        prod: Literal["True", "False"] = "False",
+        n_orders: int = 0,
+    ):
         if "project" in schema:
             print(prod)
-            self.reset_project(prod)
+            self.reset_project(prod, n_orders)
         if "test" in schema:
             self.reset_test()
 
         print("DB reset completed")
         return True
 
-    def reset_project(self, prod: Literal["True", "False"]):
+    def reset_project(self, prod: Literal["True", "False"], n_orders: int = 0):
+        """
+        Recreate the project schema and fill it
+
+        Parameters
+        ----------
+        prod : Literal["True", "False"]
+            "True" for the real menu only, "False" for a fake dataset
+        n_orders : int
+            Number of orders of a load test dataset, seeded with `COPY` on top of the
+            fake dataset, by default 0 (none). It is generated with NumPy on every core
+            when the `seed` dependency group is installed
+        """
         print("Initiating project DB reset...")
         dbconnector = DBConnector()
 
@@ -38,11 +59,28 @@ class ResetDatabase(metaclass=Singleton):
 
         try:
             dbconnector.sql_query(query=init_db_as_string, return_type="none")
+            Migrator(dbconnector).migrate()
             dbconnector.sql_query(query=populate_users_as_string, return_type="none")
             print(prod)
             if prod == "False":
                 usurper = Usurper(fake, dbconnector)
                 usurper.populate_database()
+                if n_orders > 0:
+                    sizes = {
+                        "n_customers": max(1, n_orders // 10),
+                        "n_drivers": max(1, n_orders // 2000),
+                        "n_orders": n_orders,
+                    }
+                    # NumPy is an optional dependency: pdm install -G seed
+                    if find_spec("numpy") is not None:
+                        from .Populate.VectorizedUsurper import VectorizedUsurper
+
+                        loader = VectorizedUsurper(
+                            fake, dbconnector, workers=os.cpu_count() or 1, **sizes
+                        )
+                    else:
+                        loader = BulkUsurper(fake, dbconnector, **sizes)
+                    loader.populate_database()
             else:
                 populate_orderables = open(
                     "database_scripts/populate_orderables.sql", encoding="utf-8"
@@ -68,6 +106,7 @@ class ResetDatabase(metaclass=Singleton):
 
         try:
             dbconnector.sql_query(query=init_db_as_string, return_type="none")
+            Migrator(dbconnector).migrate()
         except Exception as e:
             print(e)
             raise
@@ -80,4 +119,6 @@ if __name__ == "__main__":
     if len(sys.argv) == 1 or len(sys.argv) == 3:
         ResetDatabase().startreset()
     else:
-        ResetDatabase().startreset(schema=sys.argv[1:2], prod=sys.argv[3])
+        # An optional 4th argument is the number of orders of a load test dataset
+        n_orders = int(sys.argv[4]) if len(sys.argv) > 4 else 0
+        ResetDatabase().startreset(schema=sys.argv[1:2], prod=sys.argv[3], n_orders=n_orders)
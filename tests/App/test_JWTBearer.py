@@ -0,0 +1,54 @@
+from typing import Annotated
+from unittest.mock import patch
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.security import HTTPAuthorizationCredentials
+from fastapi.testclient import TestClient
+
+from src.App.JWTBearer import CustomerBearer, JWTBearer, get_jwt_claims
+from src.Service.JWTService import JwtService
+
+
+@pytest.fixture
+def jwt_service():
+    return JwtService("a_test_secret_of_at_least_32_bytes")
+
+
+@pytest.fixture
+def client(jwt_service):
+    app = FastAPI(dependencies=[Depends(JWTBearer(jwt_service))])
+
+    @app.get("/me", dependencies=[Depends(CustomerBearer(jwt_service))])
+    def me(
+        credentials: Annotated[HTTPAuthorizationCredentials, Depends(CustomerBearer(jwt_service))],
+        claims: Annotated[dict, Depends(get_jwt_claims)],
+    ):
+        return {"token": credentials.credentials, "user_id": claims["user_id"]}
+
+    return TestClient(app)
+
+
+def test_stacked_bearers_decode_the_token_once(client, jwt_service):
+    token = jwt_service.encode_jwt(3, "customer").access_token
+
+    with patch.object(
+        jwt_service, "validate_user_jwt", wraps=jwt_service.validate_user_jwt
+    ) as validate:
+        response = client.get("/me", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 200
+    assert response.json() == {"token": token, "user_id": 3}
+    assert validate.call_count == 1
+
+
+def test_stacked_bearers_check_the_role(client, jwt_service):
+    token = jwt_service.encode_jwt(3, "driver").access_token
+
+    client.cookies.set("access_token", token)
+
+    assert client.get("/me").status_code == 403
+
+
+def test_missing_token(client):
+    assert client.get("/me").status_code == 400
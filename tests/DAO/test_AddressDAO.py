@@ -14,6 +14,34 @@ class TestAddressDAO:
         assert address.address_postal_code == 35170
         assert address.address_country == "France"
 
+    def test_create_address_with_coordinates(self, address_dao, clean_database):
+        address = address_dao.create_address(
+            51, "Rue Blaise Pascal", "Bruz", 35170, "France", 48.0511, -1.7418, "gbwc277tv"
+        )
+
+        assert address.has_coordinates
+        assert address_dao.get_address_by_customer_id(address.address_id) == address
+
+    def test_set_coordinates(self, address_dao, clean_database):
+        """Only the addresses without coordinates are returned, by increasing id"""
+        addresses = [
+            address_dao.create_address(n, "Rue Blaise Pascal", "Bruz", 35170, "France")
+            for n in range(1, 4)
+        ]
+
+        address_dao.set_coordinates([(addresses[0].address_id, 48.0511, -1.7418, "gbwc277tv")])
+        missing = address_dao.get_addresses_without_coordinates(10)
+        after_second = address_dao.get_addresses_without_coordinates(10, addresses[1].address_id)
+
+        updated = address_dao.get_address_by_customer_id(addresses[0].address_id)
+        assert (updated.address_latitude, updated.address_longitude) == (48.0511, -1.7418)
+        assert updated.address_geohash == "gbwc277tv"
+        assert [address.address_id for address in missing] == [
+            addresses[1].address_id,
+            addresses[2].address_id,
+        ]
+        assert [address.address_id for address in after_second] == [addresses[2].address_id]
+
     def test_get_address_by_customer_id(self, address_dao, customer_dao, clean_database):
         """Test getting address by customer id"""
         address = address_dao.create_address(51, "Rue Blaise Pascal", "Bruz", 35170, "France")
@@ -0,0 +1,130 @@
+import asyncio
+
+import pytest
+from psycopg.errors import UndefinedTable
+
+
+@pytest.fixture
+def run_async(db_connector_test):
+    """Run a coroutine in a fresh event loop, closing the async pool of that loop afterwards"""
+
+    def run(coroutine):
+        async def main():
+            try:
+                return await coroutine
+            finally:
+                await db_connector_test.close_async()
+
+        return asyncio.run(main())
+
+    return run
+
+
+@pytest.fixture
+def sample_order_with_content(order_dao, sample_order, sample_item, sample_bundle):
+    order_dao.add_orderable_to_order(sample_order.order_id, sample_item.orderable_id, 2)
+    order_dao.add_orderable_to_order(sample_order.order_id, sample_bundle.orderable_id, 1)
+    return order_dao.get_order_by_id(sample_order.order_id)
+
+
+class TestAsyncDBConnector:
+    def test_async_sql_query(self, db_connector_test, run_async):
+        """Rows are returned as dictionnaries, like the synchronous connector"""
+        row = run_async(db_connector_test.async_sql_query("SELECT %s::int AS one", [1], "one"))
+        rows = run_async(
+            db_connector_test.async_sql_query("SELECT generate_series(1, 3) AS n", None, "all")
+        )
+
+        assert row == {"one": 1}
+        assert [r["n"] for r in rows] == [1, 2, 3]
+
+    def test_async_sql_query_uses_schema(self, db_connector_test, run_async):
+        row = run_async(db_connector_test.async_sql_query("SHOW search_path"))
+
+        assert row["search_path"] == db_connector_test.schema
+
+    def test_async_sql_query_error(self, db_connector_test, run_async):
+        """A failing query raises and the connection goes back to the pool"""
+
+        async def failing_then_working():
+            with pytest.raises(UndefinedTable):
+                await db_connector_test.async_sql_query("SELECT * FROM table_that_does_not_exist")
+            row = await db_connector_test.async_sql_query("SELECT 1 AS one")
+            stats = await db_connector_test.async_pool_stats()
+            return row, stats
+
+        row, stats = run_async(failing_then_working())
+
+        assert row["one"] == 1
+        assert stats["pool_size"] - stats["pool_available"] == 0
+
+    def test_concurrent_queries(self, db_connector_test, run_async):
+        """Concurrent queries share a single pool and run on several connections"""
+
+        async def concurrent():
+            return await asyncio.gather(
+                *[
+                    db_connector_test.async_sql_query(
+                        "SELECT pg_backend_pid() AS pid, pg_sleep(0.2)"
+                    )
+                    for _ in range(3)
+                ]
+            )
+
+        rows = run_async(concurrent())
+
+        assert len({row["pid"] for row in rows}) == 3
+
+    def test_sync_api_still_works(self, db_connector_test, run_async):
+        run_async(db_connector_test.async_sql_query("SELECT 1"))
+
+        assert db_connector_test.sql_query("SELECT 1 AS one")["one"] == 1
+
+
+class TestAsyncDAOReads:
+    def test_items(self, item_dao, multiple_items, run_async):
+        item = multiple_items[0]
+
+        assert run_async(item_dao.get_item_by_id_async(item.item_id)) == item
+        assert run_async(item_dao.get_item_by_orderable_id_async(item.orderable_id)) == item
+        assert run_async(item_dao.get_all_items_async()) == item_dao.get_all_items()
+        assert run_async(item_dao.get_item_by_id_async(9999)) is None
+
+    def test_bundles(self, bundle_dao, sample_bundle, run_async):
+        bundle = run_async(bundle_dao.get_bundle_by_id_async(sample_bundle.bundle_id))
+
+        assert bundle == bundle_dao.get_bundle_by_id(sample_bundle.bundle_id)
+        assert bundle.bundle_items == sample_bundle.bundle_items
+        assert run_async(bundle_dao.get_all_bundle_async()) == bundle_dao.get_all_bundle()
+        assert run_async(bundle_dao.get_bundle_by_orderable_id_async(9999)) is None
+
+    def test_orders(self, order_dao, sample_customer, sample_order_with_content, run_async):
+        order_id = sample_order_with_content.order_id
+
+        order = run_async(order_dao.get_order_by_id_async(order_id))
+        orders = run_async(order_dao.get_all_orders_by_customer_async(sample_customer.id))
+        current = run_async(order_dao.get_customer_current_order_async(sample_customer.id))
+        pending = run_async(order_dao.get_orders_by_state_async(0))
+
+        assert order == sample_order_with_content
+        assert order.order_orderables == sample_order_with_content.order_orderables
+        assert orders == [sample_order_with_content]
+        assert current == sample_order_with_content
+        assert pending == order_dao.get_orders_by_state(0)
+        assert run_async(order_dao.get_order_by_id_async(9999)) is None
+
+    def test_customer(self, customer_dao, sample_customer, run_async):
+        customer = run_async(customer_dao.get_customer_by_id_async(sample_customer.id))
+
+        assert customer == customer_dao.get_customer_by_id(sample_customer.id)
+        assert customer.customer_address == sample_customer.customer_address
+        assert run_async(customer_dao.get_customer_by_id_async(9999)) is None
+
+    def test_deliveries(self, delivery_dao, sample_driver, sample_order, run_async):
+        delivery = delivery_dao.create_delivery(sample_order.order_id, sample_driver.id)
+
+        deliveries = run_async(delivery_dao.get_deliveries_by_driver_async(sample_driver.id))
+        current = run_async(delivery_dao.get_driver_current_delivery_async(sample_driver.id))
+
+        assert deliveries == [delivery]
+        assert current == delivery_dao.get_driver_current_delivery(sample_driver.id)
@@ -84,6 +84,15 @@ class TestCustomerDAO:
 
         assert customers == []
 
+    def test_get_all_customers_pages(self, customer_dao, sample_customer, clean_database):
+        """Test that the pages of get_all_customers come with their address"""
+        first_page = customer_dao.get_all_customers(limit=1)
+        second_page = customer_dao.get_all_customers(limit=1, after=(first_page[-1].id,))
+
+        assert [customer.id for customer in first_page] == [sample_customer.id]
+        assert first_page[0].customer_address == sample_customer.customer_address
+        assert second_page == []
+
     def test_update_customer_multiple_fields(self, customer_dao, sample_customer, clean_database):
         """Test updating multiple fields"""
         updated_customer = customer_dao.update_customer(
@@ -0,0 +1,202 @@
+import threading
+
+import pytest
+from psycopg2.errors import UndefinedTable
+
+from src.DAO.ConnectionPool import ConnectionPool, PoolTimeout
+from src.DAO.DBConnector import DBConnector
+
+
+@pytest.fixture
+def small_pool(db_connector_test):
+    pool = ConnectionPool(db_connector_test._connect, min_size=1, max_size=1, timeout=0.2)
+    pool.open()
+    yield pool
+    pool.close()
+
+
+def backend_pid(connection) -> int:
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_backend_pid() AS pid")
+        return cursor.fetchone()["pid"]
+
+
+class TestDBConnector:
+    def test_sql_query_reuses_connection(self, db_connector_test):
+        """Two consecutive queries are executed on the same pooled connection"""
+        first = db_connector_test.sql_query("SELECT pg_backend_pid() AS pid")
+        second = db_connector_test.sql_query("SELECT pg_backend_pid() AS pid")
+
+        assert first["pid"] == second["pid"]
+
+    def test_pool_stats(self, db_connector_test):
+        """Stats are exposed and no connection stays checked out after a query"""
+        db_connector_test.sql_query("SELECT 1", return_type="none")
+
+        stats = db_connector_test.pool_stats()
+
+        assert stats["in_use"] == 0
+        assert stats["idle"] >= 1
+        assert stats["checkouts"] >= 1
+        assert {"total_wait_time", "max_wait_time", "waits"} <= set(stats)
+
+    def test_sql_query_error_rolls_back(self, db_connector_test):
+        """A failing query does not leave the connection in an aborted transaction"""
+        with pytest.raises(UndefinedTable):
+            db_connector_test.sql_query("SELECT * FROM table_that_does_not_exist")
+
+        assert db_connector_test.sql_query("SELECT 1 AS one")["one"] == 1
+        assert db_connector_test.pool_stats()["in_use"] == 0
+
+    def test_transaction_commits_once(self, db_connector_test):
+        """The statements of a transaction run on one connection and are committed together"""
+        with db_connector_test.transaction() as cursor:
+            cursor.execute("CREATE TEMPORARY TABLE tx_test (n INT) ON COMMIT DROP")
+            cursor.execute("INSERT INTO tx_test VALUES (1), (2)")
+            cursor.execute("SELECT COUNT(*) AS nb FROM tx_test")
+            assert cursor.fetchone()["nb"] == 2
+
+        assert db_connector_test.pool_stats()["in_use"] == 0
+
+    def test_transaction_rolls_back_on_error(self, db_connector_test):
+        """Nothing is kept from a transaction interrupted by an exception"""
+        db_connector_test.sql_query(
+            "CREATE TABLE IF NOT EXISTS tx_test (n INT)", return_type="none"
+        )
+        try:
+            with pytest.raises(RuntimeError):
+                with db_connector_test.transaction() as cursor:
+                    cursor.execute("INSERT INTO tx_test VALUES (1)")
+                    raise RuntimeError("interrupted")
+
+            assert db_connector_test.sql_query("SELECT COUNT(*) AS nb FROM tx_test")["nb"] == 0
+        finally:
+            db_connector_test.sql_query("DROP TABLE tx_test", return_type="none")
+
+    def test_transaction_is_joined_by_sql_query(self, db_connector_test):
+        """Queries made inside a transaction, even nested, share its connection"""
+        with db_connector_test.transaction() as cursor:
+            cursor.execute("SELECT pg_backend_pid() AS pid")
+            pid = cursor.fetchone()["pid"]
+            assert db_connector_test.in_transaction()
+            assert db_connector_test.sql_query("SELECT pg_backend_pid() AS pid")["pid"] == pid
+            with db_connector_test.transaction():
+                assert db_connector_test.sql_query("SELECT pg_backend_pid() AS pid")["pid"] == pid
+
+        assert not db_connector_test.in_transaction()
+        assert db_connector_test.pool_stats()["in_use"] == 0
+
+    def test_transaction_rolls_back_dao_calls(
+        self, db_connector_test, item_dao, sample_item, clean_database
+    ):
+        """DAO calls made in a transaction are rolled back together"""
+        with pytest.raises(RuntimeError):
+            with db_connector_test.transaction():
+                item_dao.update_item(sample_item.item_id, {"item_stock": 0})
+                item_dao.create_item("Crêpe", 3.0, "Dessert", "Crêpe au sucre", 10)
+                raise RuntimeError("interrupted")
+
+        assert item_dao.get_item_by_id(sample_item.item_id).item_stock == sample_item.item_stock
+        assert len(item_dao.get_all_items()) == 1
+
+    def test_pool_config(self):
+        """The pool can be configured through the config dictionnary"""
+        config = {
+            "host": "localhost",
+            "post": 5432,
+            "database": "db",
+            "user": "user",
+            "password": "password",
+            "schema": "test",
+            "pool": {"min_size": 2, "max_size": 4, "recycle": 60},
+        }
+        connector = DBConnector(config=config)
+
+        assert connector.pool_min_size == 2
+        assert connector.pool_max_size == 4
+        assert connector.pool_recycle == 60
+
+    def test_pool_config_blank_environment(self, monkeypatch):
+        """Blank pool variables, as in `.env.sample`, fall back to the defaults"""
+        for variable in ("MIN_SIZE", "MAX_SIZE", "TIMEOUT", "RECYCLE", "HEALTH_CHECK_AFTER"):
+            monkeypatch.setenv(f"POSTGRES_POOL_{variable}", "")
+
+        connector = DBConnector(test=True)
+
+        assert connector.pool_min_size == 1
+        assert connector.pool_max_size == 10
+        assert connector.pool_timeout == 30
+        assert connector.pool_recycle == 1800
+        assert connector.pool_health_check_after == 30
+
+
+class TestConnectionPool:
+    def test_invalid_sizes(self, db_connector_test):
+        with pytest.raises(ValueError, match="Invalid pool size"):
+            ConnectionPool(db_connector_test._connect, min_size=3, max_size=2)
+
+    def test_timeout_when_exhausted(self, small_pool):
+        """A checkout waits then fails when every connection is in use"""
+        pooled = small_pool.getconn()
+
+        with pytest.raises(PoolTimeout):
+            small_pool.getconn()
+
+        small_pool.putconn(pooled)
+        stats = small_pool.stats()
+        assert stats["waits"] == 1
+        assert stats["max_wait_time"] >= 0.2
+
+    def test_waiter_gets_released_connection(self, small_pool):
+        """A waiting checkout is served as soon as a connection is given back"""
+        pooled = small_pool.getconn()
+        small_pool.timeout = 5
+        got = []
+
+        def worker():
+            with small_pool.connection() as connection:
+                got.append(backend_pid(connection))
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        pid = backend_pid(pooled.connection)
+        small_pool.putconn(pooled)
+        thread.join(timeout=5)
+
+        assert got == [pid]
+        assert small_pool.stats()["in_use"] == 0
+
+    def test_recycle(self, small_pool):
+        """Connections older than the recycle age are replaced"""
+        with small_pool.connection() as connection:
+            first_pid = backend_pid(connection)
+        small_pool.recycle = 0
+        with small_pool.connection() as connection:
+            second_pid = backend_pid(connection)
+
+        assert first_pid != second_pid
+        assert small_pool.stats()["recycled"] >= 1
+
+    def test_health_check_replaces_broken_connection(self, small_pool):
+        """A closed connection is detected on checkout and replaced"""
+        with small_pool.connection() as connection:
+            first_pid = backend_pid(connection)
+            connection.close()
+
+        with small_pool.connection() as connection:
+            assert not connection.closed
+            assert backend_pid(connection) != first_pid
+
+    def test_health_check_ping(self, small_pool, db_connector_test):
+        """An idle connection killed server-side fails the ping and is replaced"""
+        small_pool.health_check_after = 0
+        with small_pool.connection() as connection:
+            first_pid = backend_pid(connection)
+
+        db_connector_test.sql_query(
+            "SELECT pg_terminate_backend(%s)", [first_pid], return_type="none"
+        )
+
+        with small_pool.connection() as connection:
+            assert backend_pid(connection) != first_pid
+        assert small_pool.stats()["discarded"] >= 1
@@ -57,6 +57,19 @@ class TestDriverDAO:
         assert drivers is not None
         assert len(drivers) == 3
 
+    def test_get_all_drivers_pages(self, driver_dao, clean_database):
+        """Test that the pages of get_all_drivers are ordered by id and don't overlap"""
+        created = [
+            driver_dao.create_driver(name, name, phone, "hash", "salt").id
+            for name, phone in (("A", "0701"), ("B", "0702"), ("C", "0703"))
+        ]
+
+        first_page = driver_dao.get_all_drivers(limit=2)
+        second_page = driver_dao.get_all_drivers(limit=2, after=(first_page[-1].id,))
+
+        assert [driver.id for driver in first_page] == created[:2]
+        assert [driver.id for driver in second_page] == created[2:]
+
     def test_update_driver_multiple_fields(self, driver_dao, sample_driver, clean_database):
         """Test updating multiple fields"""
         updated_driver = driver_dao.update_driver(
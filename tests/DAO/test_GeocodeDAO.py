@@ -0,0 +1,32 @@
+from src.utils.geocoding import DEFAULT_PLACES
+
+ENSAI = "51 rue blaise pascal, 35170 bruz, france"
+
+
+class TestGeocodeDAO:
+    def test_save_and_get_geocode(self, geocode_dao):
+        result = [DEFAULT_PLACES["51 Rue Blaise Pascal, 35170 Bruz, France"]]
+
+        geocode_dao.save_geocode(ENSAI, result)
+
+        assert geocode_dao.get_geocode(ENSAI, 3600) == result
+        assert geocode_dao.get_geocode("unknown address", 3600) is None
+
+    def test_save_geocode_overwrites(self, geocode_dao):
+        geocode_dao.save_geocode(ENSAI, [])
+        geocode_dao.save_geocode(ENSAI, [{"geometry": {"location": {"lat": 1, "lng": 2}}}])
+
+        assert geocode_dao.get_geocode(ENSAI, 3600) == [
+            {"geometry": {"location": {"lat": 1, "lng": 2}}}
+        ]
+
+    def test_expired_geocode(self, geocode_dao, db_connector_test):
+        geocode_dao.save_geocode(ENSAI, [])
+        db_connector_test.sql_query(
+            "UPDATE Geocode_cache SET geocoded_at = geocoded_at - interval '2 hours'",
+            return_type="none",
+        )
+
+        assert geocode_dao.get_geocode(ENSAI, 3600) is None
+        assert geocode_dao.delete_expired_geocodes(3600) == 1
+        assert geocode_dao.get_geocode(ENSAI, 3 * 3600) is None
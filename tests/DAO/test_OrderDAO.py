@@ -1,5 +1,8 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
+import pytest
+
 from src.Model.Order import OrderState
 
 
@@ -49,6 +52,40 @@ class TestOrderDAO:
         assert len(orders) == 3
         assert all(order.order_customer_id == sample_customer.id for order in orders)
 
+    def test_get_all_orders_pages(self, order_dao, sample_customer, clean_database):
+        """Test that the pages of get_all_orders cover every order once, newest first"""
+        created = [order_dao.create_order(sample_customer.id).order_id for _ in range(5)]
+        # Orders created at the same time are ordered by id
+        order_dao.db_connector.sql_query(
+            "UPDATE Orders SET order_created_at = %s WHERE order_id IN (%s, %s)",
+            [datetime(2025, 1, 1), created[1], created[2]],
+            "none",
+        )
+
+        first_page = order_dao.get_all_orders(limit=3)
+        last = first_page[-1]
+        second_page = order_dao.get_all_orders(
+            limit=3, after=(last.order_created_at, last.order_id)
+        )
+
+        ids = [order.order_id for order in first_page + second_page]
+        assert len(first_page) == 3
+        assert len(second_page) == 2
+        assert ids == [created[4], created[3], created[0], created[2], created[1]]
+
+    def test_get_all_orders_by_customer_pages(self, order_dao, sample_customer, clean_database):
+        """Test paginating the history of a customer"""
+        created = [order_dao.create_order(sample_customer.id).order_id for _ in range(3)]
+
+        first_page = order_dao.get_all_orders_by_customer(sample_customer.id, limit=2)
+        last = first_page[-1]
+        second_page = order_dao.get_all_orders_by_customer(
+            sample_customer.id, limit=2, after=(last.order_created_at, last.order_id)
+        )
+
+        assert [order.order_id for order in first_page] == [created[2], created[1]]
+        assert [order.order_id for order in second_page] == [created[0]]
+
     def test_get_all_orders_by_customer_exists(self, order_dao, sample_customer, clean_database):
         """Test fetching all orders of an existing customer"""
         order_dao.create_order(sample_customer.id)
@@ -234,3 +271,265 @@ class TestOrderDAO:
 
         quantity = order_dao.get_quantity_of_orderables(order.order_id, item.orderable_id)
         assert quantity == 0
+
+    def test_get_all_orders_content(
+        self, order_dao, sample_order_full, sample_bundle, multiple_items, clean_database
+    ):
+        """Test that items and bundles of the orders are fully loaded"""
+        orders = order_dao.get_all_orders(limit=10)
+
+        assert len(orders) == 1
+        orderables = orders[0].order_orderables
+        assert orderables == {sample_bundle: 1, multiple_items[2]: 1}
+
+        bundle = next(o for o in orderables if o.orderable_type == "bundle")
+        assert bundle.bundle_items == sample_bundle.bundle_items
+        assert orders[0].order_price == sample_order_full.order_price
+
+    def test_get_all_orders_fixed_number_of_queries(
+        self,
+        order_dao,
+        sample_customer,
+        sample_bundle,
+        multiple_items,
+        db_connector_test,
+        monkeypatch,
+        clean_database,
+    ):
+        """Test that the number of queries doesn't depend on the number of orders"""
+        for _ in range(5):
+            order = order_dao.create_order(sample_customer.id)
+            order_dao.add_orderable_to_order(order.order_id, sample_bundle.orderable_id)
+            order_dao.add_orderable_to_order(order.order_id, multiple_items[2].orderable_id)
+
+        queries = []
+        sql_query = db_connector_test.sql_query
+
+        def counting_sql_query(*args, **kwargs):
+            queries.append(args[0])
+            return sql_query(*args, **kwargs)
+
+        monkeypatch.setattr(db_connector_test, "sql_query", counting_sql_query)
+        orders = order_dao.get_all_orders(limit=10)
+
+        assert len(orders) == 5
+        assert all(len(order.order_orderables) == 2 for order in orders)
+        assert len(queries) == 3
+
+    def test_get_benef_no_paid_orders(self, order_dao, sample_order_full, clean_database):
+        """Test that unpaid orders are not counted in the earnings"""
+        assert order_dao.get_benef() == 0
+
+    def test_get_benef(self, order_dao, sample_order_full, sample_customer, clean_database):
+        """Test that the earnings match the price of the paid orders, bundle reduction included"""
+        order_dao.update_order_state(sample_order_full.order_id, OrderState.PAID.value)
+        order_dao.create_order(sample_customer.id)
+
+        assert order_dao.get_benef() == round(sample_order_full.order_price, 2)
+        assert order_dao.get_benef() == 6.25
+
+    def test_get_revenue_by_period(
+        self, order_dao, sample_order_full, multiple_items, db_connector_test, clean_database
+    ):
+        """Test revenue bucketing by day and by week, and the date range"""
+        order_dao.update_order_state(sample_order_full.order_id, OrderState.PAID.value)
+        other_order = order_dao.create_order(sample_order_full.order_customer_id)
+        order_dao.add_orderable_to_order(other_order.order_id, multiple_items[2].orderable_id, 2)
+        order_dao.update_order_state(other_order.order_id, OrderState.PAID.value)
+        db_connector_test.sql_query(
+            "UPDATE Orders SET order_paid_at = %s WHERE order_id = %s",
+            [datetime(2025, 3, 5, 12), sample_order_full.order_id],
+            "none",
+        )
+        db_connector_test.sql_query(
+            "UPDATE Orders SET order_paid_at = %s WHERE order_id = %s",
+            [datetime(2025, 3, 7, 20), other_order.order_id],
+            "none",
+        )
+
+        by_day = order_dao.get_revenue_by_period("day")
+        by_week = order_dao.get_revenue_by_period("week")
+        in_range = order_dao.get_revenue_by_period(
+            "day", start=datetime(2025, 3, 6), end=datetime(2025, 3, 8)
+        )
+
+        assert [(r["period"].isoformat(), r["revenue"], r["nb_orders"]) for r in by_day] == [
+            ("2025-03-05", 6.25, 1),
+            ("2025-03-07", 4.0, 1),
+        ]
+        assert [(r["period"].isoformat(), r["revenue"], r["nb_orders"]) for r in by_week] == [
+            ("2025-03-03", 10.25, 2)
+        ]
+        assert len(in_range) == 1
+        assert order_dao.get_benef(start=datetime(2025, 3, 6)) == 4.0
+
+    def test_paid_order_unit_prices_are_frozen(
+        self, order_dao, item_dao, sample_order_full, multiple_items, clean_database
+    ):
+        """Test that repricing the menu doesn't change the price of a paid order"""
+        paid_order = order_dao.update_order_state(sample_order_full.order_id, OrderState.PAID.value)
+        item_dao.update_item(multiple_items[0].item_id, {"item_price": 10.0})
+        item_dao.update_item(multiple_items[2].item_id, {"item_price": 3.0})
+
+        retrieved_order = order_dao.get_order_by_id(paid_order.order_id)
+
+        assert len(paid_order.order_unit_prices) == 2
+        assert retrieved_order.order_price == sample_order_full.order_price
+        assert order_dao.get_benef() == 6.25
+
+    def test_pending_order_uses_current_prices(
+        self, order_dao, item_dao, sample_order_full, multiple_items, clean_database
+    ):
+        """Test that the price of an unpaid order follows the menu"""
+        item_dao.update_item(multiple_items[2].item_id, {"item_price": 3.0})
+
+        retrieved_order = order_dao.get_order_by_id(sample_order_full.order_id)
+
+        assert retrieved_order.order_unit_prices == {}
+        assert retrieved_order.order_price == sample_order_full.order_price + 1.0
+
+    def test_update_order_state_paid(
+        self, order_dao, db_connector_test, sample_order_full, monkeypatch, clean_database
+    ):
+        """Test that paying an order sets its state and payment date in one UPDATE"""
+        queries = []
+        sql_query = db_connector_test.sql_query
+
+        def counting_sql_query(query, *args, **kwargs):
+            queries.append(query)
+            return sql_query(query, *args, **kwargs)
+
+        monkeypatch.setattr(db_connector_test, "sql_query", counting_sql_query)
+        paid_order = order_dao.update_order_state(sample_order_full.order_id, OrderState.PAID.value)
+
+        assert paid_order.order_state == OrderState.PAID
+        assert datetime.now() - timedelta(seconds=1) < paid_order.order_paid_at < datetime.now()
+        assert sum("UPDATE Orders" in query for query in queries) == 1
+
+    def test_update_order_state_expected(self, order_dao, sample_order):
+        """Test that an order is only moved from the expected state"""
+        order_id = sample_order.order_id
+        prepared = OrderState.PREPARED.value
+
+        assert order_dao.update_order_state(order_id, 3, expected_state=prepared) is None
+        assert order_dao.get_order_by_id(order_id).order_state == OrderState.PENDING
+        paid_order = order_dao.update_order_state(
+            order_id, OrderState.PAID.value, expected_state=OrderState.PENDING.value
+        )
+        assert paid_order.order_state == OrderState.PAID
+
+    def test_claim_next_order(self, order_dao, sample_order, sample_empty_order):
+        """Test that the oldest order of a state is claimed first"""
+        for order in (sample_order, sample_empty_order):
+            order_dao.update_order_state(order.order_id, OrderState.PAID.value)
+
+        claimed = [
+            order_dao.claim_next_order(OrderState.PAID.value, OrderState.PREPARED.value)
+            for _ in range(3)
+        ]
+
+        assert [order.order_id for order in claimed[:2]] == [
+            sample_order.order_id,
+            sample_empty_order.order_id,
+        ]
+        assert claimed[1].order_state == OrderState.PREPARED
+        assert claimed[2] is None
+
+    def test_claim_next_order_skips_locked(
+        self, order_dao, db_connector_test, sample_order, sample_empty_order
+    ):
+        """Test that an order being claimed is skipped by a concurrent claim, not waited for"""
+        for order in (sample_order, sample_empty_order):
+            order_dao.update_order_state(order.order_id, OrderState.PAID.value)
+        paid, prepared = OrderState.PAID.value, OrderState.PREPARED.value
+
+        with db_connector_test.transaction(), ThreadPoolExecutor(1) as executor:
+            first = order_dao.claim_next_order(paid, prepared)
+            second = executor.submit(order_dao.claim_next_order, paid, prepared).result(5)
+
+        assert (first.order_id, second.order_id) == (
+            sample_order.order_id,
+            sample_empty_order.order_id,
+        )
+
+    def test_reserve_orderable(
+        self, order_dao, item_dao, sample_order, sample_item, clean_database
+    ):
+        """Test that reserving an item takes its stock and adds it to the order"""
+        assert order_dao.reserve_orderable(sample_order.order_id, sample_item.orderable_id, 2)
+        assert order_dao.reserve_orderable(sample_order.order_id, sample_item.orderable_id, 3)
+
+        assert (
+            order_dao.get_quantity_of_orderables(sample_order.order_id, sample_item.orderable_id)
+            == 5
+        )
+        assert item_dao.get_item_by_id(sample_item.item_id).item_stock == sample_item.item_stock - 5
+
+    def test_reserve_orderable_paid_order(self, order_dao, item_dao, sample_order, sample_item):
+        """Test that nothing is reserved in an order which isn't pending"""
+        order_dao.update_order_state(sample_order.order_id, OrderState.PAID.value)
+
+        assert not order_dao.reserve_orderable(sample_order.order_id, sample_item.orderable_id, 1)
+        assert (
+            order_dao.get_quantity_of_orderables(sample_order.order_id, sample_item.orderable_id)
+            == 0
+        )
+        assert item_dao.get_item_by_id(sample_item.item_id).item_stock == sample_item.item_stock
+
+    def test_reserve_bundle_not_enough_stock(
+        self, order_dao, item_dao, sample_order, sample_bundle, multiple_items, clean_database
+    ):
+        """Test that nothing changes when one of the items of a bundle lacks stock"""
+        item_dao.update_item(multiple_items[0].item_id, {"item_stock": 1})
+
+        assert not order_dao.reserve_orderable(sample_order.order_id, sample_bundle.orderable_id, 2)
+
+        assert (
+            order_dao.get_quantity_of_orderables(sample_order.order_id, sample_bundle.orderable_id)
+            == 0
+        )
+        assert item_dao.get_item_by_id(multiple_items[0].item_id).item_stock == 1
+        assert item_dao.get_item_by_id(multiple_items[1].item_id).item_stock == 100
+
+    def test_release_orderable(
+        self, order_dao, item_dao, sample_order, sample_bundle, multiple_items, clean_database
+    ):
+        """Test that releasing a bundle gives its items back and removes empty lines"""
+        order_dao.reserve_orderable(sample_order.order_id, sample_bundle.orderable_id, 3)
+
+        assert not order_dao.release_orderable(sample_order.order_id, sample_bundle.orderable_id, 4)
+        assert order_dao.release_orderable(sample_order.order_id, sample_bundle.orderable_id, 1)
+        assert (
+            order_dao.get_quantity_of_orderables(sample_order.order_id, sample_bundle.orderable_id)
+            == 2
+        )
+
+        assert order_dao.release_orderable(sample_order.order_id, sample_bundle.orderable_id, 2)
+        assert order_dao.get_order_by_id(sample_order.order_id).order_orderables == {}
+        assert [item_dao.get_item_by_id(item.item_id).item_stock for item in multiple_items] == [
+            50,
+            100,
+            30,
+        ]
+
+    def test_get_customer_current_order_id(
+        self, order_dao, sample_order, sample_customer, clean_database
+    ):
+        """Test that the id only lookup matches the current order"""
+        assert order_dao.get_customer_current_order_id(sample_customer.id) == (
+            order_dao.get_customer_current_order(sample_customer.id).order_id
+        )
+        assert order_dao.get_customer_current_order_id(9999) is None
+
+    def test_get_driver_feed(self, order_dao, sample_order_full, sample_empty_order):
+        """Test the feed of the orders of a state, with their lines and address"""
+        order_dao.update_order_state(sample_order_full.order_id, OrderState.PAID.value)
+
+        (raw_order,) = order_dao.get_driver_feed(OrderState.PAID.value)
+
+        assert raw_order["order_id"] == sample_order_full.order_id
+        assert raw_order["order_price"] == pytest.approx(6.25)
+        assert [line["name"] for line in raw_order["order_lines"]] == ["Tiramisu", "Menu"]
+        assert raw_order["address_city"] == "Bruz"
+        (empty_order,) = order_dao.get_driver_feed(OrderState.PENDING.value)
+        assert (empty_order["order_price"], empty_order["order_lines"]) == (0, [])
@@ -0,0 +1,11 @@
+class TestStripeEventDAO:
+    def test_record_event(self, stripe_event_dao, clean_database):
+        assert stripe_event_dao.record_event("evt_1", "checkout.session.completed", 1)
+
+        assert stripe_event_dao.is_event_recorded("evt_1")
+        assert not stripe_event_dao.is_event_recorded("evt_2")
+
+    def test_record_event_twice(self, stripe_event_dao, clean_database):
+        stripe_event_dao.record_event("evt_1", "checkout.session.completed", 1)
+
+        assert not stripe_event_dao.record_event("evt_1", "checkout.session.completed", 1)
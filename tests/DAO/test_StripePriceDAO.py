@@ -0,0 +1,51 @@
+class TestStripePriceDAO:
+    def test_get_checkout_lines(self, stripe_price_dao, sample_order_full, sample_bundle):
+        lines = stripe_price_dao.get_checkout_lines(sample_order_full.order_id)
+
+        assert [(line["orderable_name"], line["unit_amount"]) for line in lines] == [
+            ("Tiramisu", 200),
+            ("Menu", 425),
+        ]
+        assert all(line["stripe_price_id"] is None for line in lines)
+        assert all(line["orderable_quantity"] == 1 for line in lines)
+
+    def test_get_checkout_lines_with_catalog(
+        self, stripe_price_dao, sample_order_full, sample_bundle
+    ):
+        stripe_price_dao.save_price(sample_bundle.orderable_id, 425, "prod_1", "price_1")
+        stripe_price_dao.save_price(sample_bundle.orderable_id, 500, "prod_1", "price_0")
+
+        lines = stripe_price_dao.get_checkout_lines(sample_order_full.order_id)
+
+        bundle_line = next(line for line in lines if line["orderable_name"] == "Menu")
+        assert bundle_line["stripe_price_id"] == "price_1"
+        assert bundle_line["stripe_product_id"] == "prod_1"
+
+    def test_get_checkout_lines_frozen_price(
+        self, stripe_price_dao, sample_order_full, db_connector_test
+    ):
+        db_connector_test.sql_query(
+            "UPDATE Order_contents SET orderable_unit_price = 3.335", return_type="none"
+        )
+
+        lines = stripe_price_dao.get_checkout_lines(sample_order_full.order_id)
+
+        assert [line["unit_amount"] for line in lines] == [334, 334]
+
+    def test_get_current_versions(self, stripe_price_dao, sample_bundle, multiple_items):
+        versions = stripe_price_dao.get_current_versions([multiple_items[0].orderable_id])
+
+        assert [(version["orderable_id"], version["unit_amount"]) for version in versions] == [
+            (multiple_items[0].orderable_id, 450),
+            (sample_bundle.orderable_id, 425),
+        ]
+        assert stripe_price_dao.get_current_versions([multiple_items[2].orderable_id]) == [
+            {
+                "orderable_id": multiple_items[2].orderable_id,
+                "orderable_name": "Tiramisu",
+                "orderable_description": "Tiramisu-holic",
+                "unit_amount": 200,
+                "stripe_price_id": None,
+                "stripe_product_id": None,
+            }
+        ]
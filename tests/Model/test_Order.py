@@ -75,3 +75,15 @@ def test_order_state_properties(order_state, expected_paid, expected_prepared, e
     assert order.is_paid == expected_paid
     assert order.is_prepared == expected_prepared
     assert order.is_delivered == expected_delivered
+
+
+def test_order_price_uses_frozen_unit_prices(sample_order_full):
+    orderables = {o.orderable_type: o for o in sample_order_full.order_orderables}
+    bundle, item = orderables["bundle"], orderables["item"]
+    frozen_order = sample_order_full.model_copy(
+        update={"order_unit_prices": {item.orderable_id: 1.0}}
+    )
+
+    assert frozen_order.unit_price(item) == 1.0
+    assert frozen_order.unit_price(bundle) == bundle.price
+    assert frozen_order.order_price == 0.85 * (0.5 + 4.5) + 1.0
@@ -1,7 +1,31 @@
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 import pytest
 
+from src.Model.Order import OrderState
+from src.Service.DriverService import DriverService
+from src.Service.GoogleMapService import GoogleMapService
+from src.utils.cache import TTLCache
+
+
+@pytest.fixture
+def feed_driver_service(delivery_dao, driver_dao, order_dao, user_service, local_maps_client):
+    return DriverService(
+        delivery_dao,
+        driver_dao,
+        order_dao,
+        user_service,
+        driver_feed_cache=TTLCache(ttl=60),
+        gm_service=GoogleMapService(client=local_maps_client),
+    )
+
+
+def prepare(order_dao, order_id):
+    order_dao.update_order_state(order_id, OrderState.PAID.value)
+    order_dao.update_order_state(order_id, OrderState.PREPARED.value)
+
 
 class TestDriverService:
     def test_get_driver_by_id_exists(self, driver_service, sample_driver, clean_database):
@@ -99,6 +123,182 @@ class TestDriverService:
         updated_driver = driver_service.get_driver_by_id(sample_driver.id)
         assert updated_driver.driver_is_delivering is True
 
+    def test_delivery_start_is_atomic(
+        self,
+        driver_service,
+        sample_order,
+        sample_driver,
+        clean_database,
+        delivery_dao,
+        order_service,
+        monkeypatch,
+    ):
+        """Test that nothing is kept from a delivery start interrupted by an error"""
+        order_service.mark_as_paid(sample_order.order_id)
+        order_service.mark_as_prepared(sample_order.order_id)
+
+        def failing_update(delivery_id, state):
+            raise RuntimeError("connection lost")
+
+        monkeypatch.setattr(delivery_dao, "update_delivery_state", failing_update)
+        with pytest.raises(RuntimeError):
+            driver_service.start_delivery(sample_order.order_id, sample_driver.id)
+
+        assert driver_service.get_driver_by_id(sample_driver.id).driver_is_delivering is False
+        assert delivery_dao.get_delivery_by_order_id(sample_order.order_id) is None
+        assert order_service.get_order_by_id(sample_order.order_id).order_state.name == "PREPARED"
+
+    def test_available_orders_feed(
+        self, feed_driver_service, order_dao, sample_order_full, db_connector_test
+    ):
+        """Test the orders available to the drivers"""
+        prepare(order_dao, sample_order_full.order_id)
+        db_connector_test.sql_query(
+            "UPDATE Addresses SET address_latitude = 48.05, address_longitude = -1.74",
+            return_type="none",
+        )
+
+        (order,) = feed_driver_service.get_available_orders_feed()
+
+        assert order["order_id"] == sample_order_full.order_id
+        assert order["order_price"] == 6.25
+        assert order["address"] == "7 Contour Antoine de Saint-Exupéry, 35170 Bruz, France"
+        assert 0 < order["distance_km"] < 5
+        assert order["items"] == [
+            {
+                "item_name": "Tiramisu",
+                "item_price": 2.0,
+                "item_type": "Dessert",
+                "image_url": None,
+                "quantity": 1,
+                "type": "item",
+            },
+            {
+                "bundle_name": "Menu",
+                "bundle_price": 4.25,
+                "image_url": None,
+                "quantity": 1,
+                "type": "bundle",
+            },
+        ]
+
+    def test_available_orders_feed_query_budget(
+        self, driver_service, order_dao, sample_customer, multiple_items, max_queries
+    ):
+        """Test the feed is read in one query whatever the number of orders"""
+        for item in multiple_items:
+            order = order_dao.create_order(sample_customer.id)
+            order_dao.add_orderable_to_order(order.order_id, item.orderable_id, 2)
+            prepare(order_dao, order.order_id)
+        order_dao.create_order(sample_customer.id)
+
+        with max_queries(1):
+            feed = driver_service.get_available_orders_feed()
+
+        assert [order["order_price"] for order in feed] == [9.0, 1.0, 4.0]
+        assert feed[0]["distance_km"] is None
+
+    def test_available_orders_feed_is_shared(
+        self, feed_driver_service, order_dao, sample_order, sample_driver, max_queries
+    ):
+        """Test the feed is cached until an order is taken"""
+        prepare(order_dao, sample_order.order_id)
+        assert len(feed_driver_service.get_available_orders_feed()) == 1
+
+        with max_queries(0):
+            assert len(feed_driver_service.get_available_orders_feed(sort_by_distance=True)) == 1
+
+        feed_driver_service.start_delivery(sample_order.order_id, sample_driver.id)
+        assert feed_driver_service.get_available_orders_feed() == []
+
+    def test_refresh_driver_feed(self, feed_driver_service, order_dao, sample_order, max_queries):
+        """Test an event of another worker refreshes the cached feed once"""
+        assert feed_driver_service.get_available_orders_feed() == []
+        prepare(order_dao, sample_order.order_id)
+        event = {
+            "order_id": sample_order.order_id,
+            "order_state": "PREPARED",
+            "previous_state": "PAID",
+        }
+
+        feed_driver_service.refresh_driver_feed(event)
+
+        with max_queries(0):
+            assert feed_driver_service.get_feed_delta(event)[0] == "added"
+            assert len(feed_driver_service.get_available_orders_feed()) == 1
+
+    def test_get_feed_delta(self, feed_driver_service, order_dao, sample_order, sample_driver):
+        """Test the deltas of the feed: added once prepared, removed once taken"""
+        prepare(order_dao, sample_order.order_id)
+        order_id = sample_order.order_id
+
+        kind, order = feed_driver_service.get_feed_delta(
+            {"order_id": order_id, "order_state": "PREPARED", "previous_state": "PAID"}
+        )
+        assert kind == "added"
+        assert order == feed_driver_service.get_available_orders_feed()[0]
+
+        feed_driver_service.start_delivery(order_id, sample_driver.id)
+        assert feed_driver_service.get_feed_delta(
+            {"order_id": order_id, "order_state": "DELIVERING", "previous_state": "PREPARED"}
+        ) == ("removed", {"order_id": order_id})
+        assert (
+            feed_driver_service.get_feed_delta(
+                {"order_id": order_id, "order_state": "DELIVERED", "previous_state": "DELIVERING"}
+            )
+            is None
+        )
+
+    def test_delivery_start_race(
+        self, driver_service, driver_dao, order_dao, sample_order, sample_driver
+    ):
+        """Test that of two drivers starting the same order at once, only one gets it"""
+        prepare(order_dao, sample_order.order_id)
+        other_driver = driver_dao.create_driver("Max", "Verstappen", "0708", "hash", "salt")
+        barrier = threading.Barrier(2)
+
+        def start(driver_id):
+            barrier.wait()
+            try:
+                return driver_service.start_delivery(sample_order.order_id, driver_id)
+            except ValueError as e:
+                return e
+
+        with ThreadPoolExecutor(2) as executor:
+            results = list(executor.map(start, [sample_driver.id, other_driver.id]))
+
+        errors = [result for result in results if isinstance(result, ValueError)]
+        assert len(errors) == 1
+        assert "current state: DELIVERING" in str(errors[0])
+        drivers = [driver_service.get_driver_by_id(d.id) for d in (sample_driver, other_driver)]
+        assert sorted(driver.driver_is_delivering for driver in drivers) == [False, True]
+
+    def test_claim_next_available(
+        self, driver_service, driver_dao, order_dao, sample_order, sample_empty_order, sample_driver
+    ):
+        """Test that drivers claim the oldest prepared orders, one at a time"""
+        for order in (sample_order, sample_empty_order):
+            prepare(order_dao, order.order_id)
+        drivers = [
+            sample_driver,
+            driver_dao.create_driver("Max", "Verstappen", "0708", "hash", "salt"),
+            driver_dao.create_driver("Charles", "Leclerc", "0709", "hash", "salt"),
+        ]
+
+        first = driver_service.claim_next_available(drivers[0].id)
+        with pytest.raises(ValueError, match="already has an active delivery"):
+            driver_service.claim_next_available(drivers[0].id)
+        second = driver_service.claim_next_available(drivers[1].id)
+
+        assert (first.delivery_order_id, second.delivery_order_id) == (
+            sample_order.order_id,
+            sample_empty_order.order_id,
+        )
+        assert first.delivery_state == 1
+        assert driver_service.get_driver_by_id(drivers[1].id).driver_is_delivering is True
+        assert driver_service.claim_next_available(drivers[2].id) is None
+        assert driver_service.get_driver_by_id(drivers[2].id).driver_is_delivering is False
+
     def test_delivery_start_driver_not_exists(self, driver_service, sample_order, clean_database):
         """Test starting delivery with non-existing driver raises error"""
         with pytest.raises(ValueError, match="Driver with ID 9999 not found"):
@@ -125,6 +325,33 @@ class TestDriverService:
         updated_driver = driver_service.get_driver_by_id(sample_driver.id)
         assert updated_driver.driver_is_delivering is False
 
+    def test_get_driver_stats(
+        self,
+        driver_service,
+        sample_order_full,
+        sample_driver,
+        clean_database,
+        order_service,
+        item_service,
+        multiple_items,
+    ):
+        """Test that the earnings of a driver use the prices paid by the customers"""
+        order_service.mark_as_paid(sample_order_full.order_id)
+        order_service.mark_as_prepared(sample_order_full.order_id)
+        driver_service.start_delivery(sample_order_full.order_id, sample_driver.id)
+        item_service.update_item(multiple_items[2].item_id, {"item_price": 3.0})
+
+        stats = driver_service.get_driver_stats(sample_driver.id)
+
+        assert stats == {"nb_orders": 1, "earnings": 6.25}
+
+    def test_get_driver_stats_no_deliveries(self, driver_service, sample_driver, clean_database):
+        """Test the statistics of a driver without deliveries"""
+        assert driver_service.get_driver_stats(sample_driver.id) == {
+            "nb_orders": 0,
+            "earnings": 0,
+        }
+
     def test_delivery_end_driver_not_exists(self, driver_service, sample_order, clean_database):
         """Test ending delivery with non-existing driver raises error"""
         with pytest.raises(ValueError, match="Driver with ID 9999 not found"):
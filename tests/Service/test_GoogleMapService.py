@@ -1,7 +1,11 @@
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import Mock, patch
 
 import pytest
 
+from src.Model.Address import Address
+from src.Service.GoogleMapService import GoogleMapService
+
 
 class TestGoogleMapService:
     def test_validate_address_ok(self, google_map_service):
@@ -111,3 +115,111 @@ class TestGoogleMapService:
 
             with pytest.raises(Exception, match="Error while computing path: No route found"):
                 google_map_service.get_path(destination)
+
+
+class TestGeocodeCache:
+    @pytest.fixture
+    def service(self, local_maps_client):
+        return GoogleMapService(client=local_maps_client)
+
+    def test_repeated_lookups_use_the_cache(self, service, local_maps_client):
+        """Test: Une adresse déjà géocodée (même mal écrite) n'appelle plus l'API"""
+        calls = local_maps_client.geocode_calls
+
+        service.validate_address("51 Rue Blaise Pascal, 35170 Bruz, France")
+        service.extract_components("51 rue blaise pascal ,35170   BRUZ, France")
+        service.get_path("51 Rue Blaise Pascal, 35170 Bruz, France")
+
+        # The address of ENSAI is geocoded once, when the service is created
+        assert local_maps_client.geocode_calls == calls
+        assert service.geocode_cache.stats()["hits"] >= 3
+
+    def test_unknown_address_cached(self, service, local_maps_client):
+        for _ in range(2):
+            with pytest.raises(ValueError, match="Invalid address"):
+                service.validate_address("Whisky vert : jugez cinq fox d'aplomb")
+
+        assert local_maps_client.geocode_calls == 2
+
+    def test_concurrent_lookups_coalesced(self, local_maps_client):
+        """Test: Des recherches simultanées d'une même adresse n'appellent l'API qu'une fois"""
+        service = GoogleMapService(client=local_maps_client)
+        local_maps_client.latency = 0.2
+        address = "Place de la Mairie, 35000 Rennes, France"
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: service.geocode(address), range(8)))
+
+        assert local_maps_client.geocode_calls == 2
+        assert all(result == results[0] for result in results)
+        assert results[0][0]["geometry"]["location"]["lat"] == 48.1113
+
+    def test_failed_lookup_not_cached(self, service, local_maps_client):
+        address = "Place de la Mairie, 35000 Rennes, France"
+
+        with patch.object(local_maps_client, "geocode", side_effect=TimeoutError("timeout")):
+            with pytest.raises(TimeoutError):
+                service.geocode(address)
+
+        assert service.geocode(address)[0]["geometry"]["location"]["lng"] == -1.68
+
+    def test_persistent_cache(self, geocode_dao, local_maps_client):
+        """Test: Le cache en base est partagé par les instances du service"""
+        address = "Place de la Mairie, 35000 Rennes, France"
+        GoogleMapService(geocode_dao, client=local_maps_client).geocode(address)
+        calls = local_maps_client.geocode_calls
+
+        other_worker = GoogleMapService(geocode_dao, client=local_maps_client)
+        other_worker.geocode(address)
+
+        assert local_maps_client.geocode_calls == calls
+        assert geocode_dao.get_geocode("place de la mairie, 35000 rennes, france", 60)
+
+
+class TestStoredCoordinates:
+    @pytest.fixture
+    def service(self, local_maps_client):
+        return GoogleMapService(client=local_maps_client)
+
+    def test_extract_components_coordinates(self, service):
+        components = service.extract_components("Place de la Mairie, 35000 Rennes, France")
+
+        assert components["address_latitude"] == 48.1113
+        assert components["address_longitude"] == -1.68
+        assert components["address_geohash"] == "gbwc9y2st"
+
+    def test_read_path_without_api_calls(self, service, local_maps_client):
+        """Test: Zone, itinéraire et distance sont calculés sans appel à l'API"""
+        address = Address(
+            address_id=1,
+            address_number=1,
+            address_street="Place de la Mairie",
+            address_city="Rennes",
+            address_postal_code=35000,
+            address_country="France",
+            address_latitude=48.1113,
+            address_longitude=-1.68,
+        )
+        calls = local_maps_client.geocode_calls, local_maps_client.directions_calls
+
+        in_zone = service.is_in_delivery_zone(address.address_latitude, address.address_longitude)
+        distance = service.distance_from_restaurant(address)
+        url = service.get_route_url(address.address_latitude, address.address_longitude)
+
+        assert in_zone is True
+        assert service.is_in_delivery_zone(49.2433, 4.0317) is False
+        assert 7 < distance < 9
+        assert "&destination=48.1113, -1.68&" in url
+        assert (local_maps_client.geocode_calls, local_maps_client.directions_calls) == calls
+
+    def test_distance_unknown_coordinates(self, service):
+        address = Address(
+            address_id=1,
+            address_number=51,
+            address_street="Rue Blaise Pascal",
+            address_city="Bruz",
+            address_postal_code=35170,
+            address_country="France",
+        )
+
+        assert service.distance_from_restaurant(address) is None
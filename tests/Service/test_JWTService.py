@@ -1,6 +1,9 @@
 import datetime
+from unittest.mock import patch
 
+import pytest
 from freezegun import freeze_time
+from jwt import DecodeError, ExpiredSignatureError
 
 from src.Service.JWTService import JwtService
 
@@ -27,3 +30,36 @@ def test_decode_jwt():
     assert datetime.datetime.fromtimestamp(
         decoded_jwt.get("expiry_timestamp")
     ) == datetime.datetime.fromisoformat("2024-08-26 12:10:00")
+
+
+def test_validate_user_jwt_verifies_once():
+    service = JwtService(secret="secret")
+    token = service.encode_jwt(user_id=1, user_role="driver").access_token
+
+    with patch.object(service, "decode_jwt", wraps=service.decode_jwt) as decode:
+        claims = [service.validate_user_jwt(token) for _ in range(3)]
+
+    assert claims == [{"user_id": 1, "user_role": "driver"}] * 3
+    assert decode.call_count == 1
+
+
+def test_validate_user_jwt_cached_token_expires():
+    service = JwtService(secret="secret")
+    with freeze_time("2024-08-26 12:00:00"):
+        token = service.encode_jwt(user_id=1, user_role="customer").access_token
+        assert service.validate_user_jwt(token)["user_role"] == "customer"
+
+    with freeze_time("2024-08-26 13:00:01"):
+        with pytest.raises(ExpiredSignatureError):
+            service.validate_user_jwt(token)
+
+
+def test_validate_user_jwt_invalid_token_not_cached():
+    service = JwtService(secret="secret")
+    forged = JwtService(secret="other").encode_jwt(user_id=1, user_role="admin").access_token
+
+    for _ in range(2):
+        with pytest.raises(DecodeError):
+            service.validate_user_jwt(forged)
+
+    assert service.verified_tokens.stats()["size"] == 0
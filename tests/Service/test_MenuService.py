@@ -1,3 +1,4 @@
+import asyncio
 from datetime import datetime
 
 import pytest
@@ -270,3 +271,54 @@ class TestMenuService:
         orderable_ids = [o.orderable_id for o in orderables]
         assert unavailable_item.orderable_id not in orderable_ids
         assert expired_bundle.orderable_id not in orderable_ids
+
+    def test_get_all_orderables_uses_cache(self, menu_service, sample_item, clean_database):
+        """Test that the menu is only loaded from the database once"""
+        menu_service.get_all_orderables()
+        orderables = menu_service.get_all_orderables()
+        menu_service.get_orderable_from_menu(sample_item.orderable_id)
+
+        stats = menu_service.get_menu_cache_stats()
+        assert orderables == [sample_item]
+        assert stats["misses"] == 1
+        assert stats["hits"] == 2
+
+    def test_menu_cache_invalidated_by_services(
+        self,
+        menu_service,
+        item_service,
+        order_service,
+        sample_item,
+        sample_order,
+        clean_database,
+    ):
+        """Test that the edits made by the other services are visible in the menu"""
+        menu_service.get_all_orderables()
+        item_service.update_item(sample_item.item_id, {"item_price": 6.0})
+
+        assert menu_service.get_all_orderables()[0].item_price == 6.0
+
+        order_service.add_orderable_to_order(sample_item.orderable_id, sample_order.order_id, 2)
+
+        assert menu_service.get_all_orderables()[0].item_stock == sample_item.item_stock - 2
+
+        menu_service.remove_orderable_from_menu(sample_item.orderable_id)
+
+        assert menu_service.get_all_orderables() == []
+        assert menu_service.get_menu_cache_stats()["misses"] == 4
+
+    def test_get_all_orderables_async(
+        self, menu_service, db_connector_test, sample_bundle, clean_database
+    ):
+        """Test that the async menu is the same as the sync one and shares its cache"""
+
+        async def get_menu():
+            try:
+                return await menu_service.get_all_orderables_async(in_menu=False)
+            finally:
+                await db_connector_test.close_async()
+
+        orderables = asyncio.run(get_menu())
+
+        assert orderables == menu_service.get_all_orderables(in_menu=False)
+        assert menu_service.get_menu_cache_stats()["hits"] == 1
@@ -1,4 +1,5 @@
 import re
+import threading
 from datetime import datetime
 
 import pytest
@@ -20,6 +21,33 @@ class TestOrderService:
         with pytest.raises(ValueError, match="Cannot find: order with ID 9999 not found"):
             order_service.get_order_by_id(9999)
 
+    @pytest.mark.parametrize("n_bundles", [1, 4])
+    def test_get_order_query_budget(
+        self, order_service, sample_order, multiple_items, bundle_dao, max_queries, n_bundles
+    ):
+        """Test the number of queries made to get an order doesn't depend on its content"""
+        for i in range(n_bundles):
+            bundle = bundle_dao.create_bundle(
+                f"Menu {i}",
+                10,
+                "Plat + Boisson",
+                datetime(2025, 1, 1),
+                datetime(2027, 1, 1),
+                {item: i + 1 for item in multiple_items},
+                is_in_menu=True,
+            )
+            order_service.order_dao.add_orderable_to_order(
+                sample_order.order_id, bundle.orderable_id
+            )
+        order_service.order_dao.add_orderable_to_order(
+            sample_order.order_id, multiple_items[0].orderable_id
+        )
+
+        with max_queries(3):
+            order = order_service.get_order_by_id(sample_order.order_id)
+
+        assert len(order.order_orderables) == n_bundles + 1
+
     def test_get_all_orders_empty(self, order_service, clean_database):
         """Test getting all orders when there are none"""
         orders = order_service.get_all_orders(limit=10)
@@ -35,6 +63,25 @@ class TestOrderService:
         assert orders != []
         assert len(orders) == 1
 
+    def test_get_all_orders_cursor(self, order_service, sample_customer, clean_database):
+        """Test following the cursors of get_all_orders up to the last page"""
+        for _ in range(3):
+            order_service.order_dao.create_order(sample_customer.id)
+
+        first_page = order_service.get_all_orders(limit=2)
+        cursor = order_service.orders_cursor(first_page, 2)
+        second_page = order_service.get_all_orders(limit=2, cursor=cursor)
+
+        assert len(first_page) == 2
+        assert len(second_page) == 1
+        assert order_service.orders_cursor(second_page, 2) is None
+        assert {o.order_id for o in first_page}.isdisjoint(o.order_id for o in second_page)
+
+    def test_get_all_orders_invalid_cursor(self, order_service, clean_database):
+        """Test that a malformed cursor is rejected"""
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            order_service.get_all_orders(limit=2, cursor="not-a-cursor")
+
     def test_get_all_orders_by_customer(self, order_service, sample_customer, clean_database):
         """Test getting all orders by customer"""
         order_service.create_order(sample_customer.id)
@@ -85,6 +132,35 @@ class TestOrderService:
         with pytest.raises(ValueError, match="Cannot find: order with ID 9999 not found"):
             order_service.delete_order(9999)
 
+    def test_get_customer_current_order_id_cached(
+        self, order_service, current_order_cache, sample_order, clean_database
+    ):
+        """Test that the id of the current order is read once, without loading the order"""
+        customer_id = sample_order.order_customer_id
+
+        first = order_service.get_customer_current_order_id(customer_id)
+        second = order_service.get_customer_current_order_id(customer_id)
+
+        assert first == second == sample_order.order_id
+        assert current_order_cache.stats()["hits"] == 1
+
+    def test_current_order_id_follows_order_changes(
+        self, order_service, sample_order, clean_database
+    ):
+        """Test that creating, paying and cancelling an order updates the cached id"""
+        customer_id = sample_order.order_customer_id
+        assert order_service.get_customer_current_order_id(customer_id) == sample_order.order_id
+
+        order_service.mark_as_paid(sample_order.order_id)
+        new_order = order_service.create_order(customer_id)
+        assert order_service.get_customer_current_order_id(customer_id) == new_order.order_id
+
+        order_service.update_order_state(new_order.order_id, OrderState.CANCELLED)
+        assert order_service.get_customer_current_order_id(customer_id) == sample_order.order_id
+
+        order_service.update_order_state(sample_order.order_id, OrderState.CANCELLED)
+        assert order_service.get_customer_current_order_id(customer_id) is None
+
     def test_add_item_to_order_success(
         self, order_service, sample_order, sample_item, clean_database, orderable_dao, item_service
     ):
@@ -92,7 +168,8 @@ class TestOrderService:
         initial_stock = sample_item.item_stock
         orderable_id = sample_item.orderable_id
 
-        updated_order = order_service.add_orderable_to_order(orderable_id, sample_order.order_id, 2)
+        order_service.add_orderable_to_order(orderable_id, sample_order.order_id, 2)
+        updated_order = order_service.get_order_by_id(sample_order.order_id)
 
         assert updated_order is not None
         assert len(updated_order.order_orderables) == 1
@@ -100,6 +177,28 @@ class TestOrderService:
         updated_item = item_service.get_item_by_id(sample_item.item_id)
         assert updated_item.item_stock == initial_stock - 2
 
+    def test_add_item_to_order_single_query(
+        self, order_service, sample_order, sample_item, clean_database, max_queries
+    ):
+        """Test that adding an available item to an order is a single statement"""
+        with max_queries(1):
+            order_service.add_orderable_to_order(sample_item.orderable_id, sample_order.order_id)
+
+    def test_add_item_off_menu(
+        self, order_service, order_dao, item_dao, orderable_dao, sample_order, sample_item
+    ):
+        """Test that an item taken off the menu is refused, and its stock left untouched"""
+        orderable_dao.update_orderable_state(sample_item.orderable_id, False)
+
+        with pytest.raises(ValueError, match="The item isn't available"):
+            order_service.add_orderable_to_order(sample_item.orderable_id, sample_order.order_id)
+
+        assert (
+            order_dao.get_quantity_of_orderables(sample_order.order_id, sample_item.orderable_id)
+            == 0
+        )
+        assert item_dao.get_item_by_id(sample_item.item_id).item_stock == sample_item.item_stock
+
     def test_add_item_to_order_insufficient_stock(
         self, order_service, sample_order, sample_item, clean_database, orderable_dao
     ):
@@ -114,6 +213,71 @@ class TestOrderService:
         ):
             order_service.add_orderable_to_order(orderable_id, sample_order.order_id, 100)
 
+    def test_add_item_to_order_concurrently(
+        self, order_service, order_dao, item_dao, sample_order, sample_item, clean_database
+    ):
+        """Test that concurrent orders can't take more than the stock of an item"""
+        item_dao.update_item(sample_item.item_id, {"item_stock": 5})
+        errors = []
+
+        def add_two():
+            try:
+                order_service.add_orderable_to_order(
+                    sample_item.orderable_id, sample_order.order_id, 2
+                )
+            except ValueError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=add_two) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        quantity = order_dao.get_quantity_of_orderables(
+            sample_order.order_id, sample_item.orderable_id
+        )
+        assert quantity == 4
+        assert len(errors) == 2
+        assert item_dao.get_item_by_id(sample_item.item_id).item_stock == 1
+
+    def test_update_order_state_concurrently(
+        self, order_service, order_dao, sample_order, clean_database
+    ):
+        """Test that two transitions checked against the same state can't both apply"""
+        order_service.mark_as_paid(sample_order.order_id)
+        # both requests read the paid order before either updates it
+        both_read = threading.Barrier(2)
+        get_order_by_id = order_service.get_order_by_id
+
+        def read_then_wait(order_id):
+            order = get_order_by_id(order_id)
+            both_read.wait(timeout=5)
+            return order
+
+        order_service.get_order_by_id = read_then_wait
+        errors = []
+
+        def move_to(state):
+            try:
+                order_service.update_order_state(sample_order.order_id, state)
+            except ValueError as e:
+                errors.append(e)
+
+        threads = [
+            threading.Thread(target=move_to, args=(state,))
+            for state in (OrderState.PREPARED, OrderState.CANCELLED)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(errors) == 1
+        assert "Cannot change state" in str(errors[0])
+        final_state = order_dao.get_order_by_id(sample_order.order_id).order_state
+        assert final_state in (OrderState.PREPARED, OrderState.CANCELLED)
+
     def test_add_orderable_to_order_item_not_found(
         self, order_service, sample_order, clean_database, orderable_dao, sample_item
     ):
@@ -123,6 +287,17 @@ class TestOrderService:
         ):
             order_service.add_orderable_to_order(9999, sample_order.order_id, 1)
 
+    def test_add_orderable_to_paid_order(
+        self, order_service, item_dao, sample_order, sample_item, clean_database
+    ):
+        """Test that a paid order can't be added to, and its stock is left untouched"""
+        order_service.mark_as_paid(sample_order.order_id)
+
+        with pytest.raises(ValueError, match="isn't pending anymore"):
+            order_service.add_orderable_to_order(sample_item.orderable_id, sample_order.order_id)
+
+        assert item_dao.get_item_by_id(sample_item.item_id).item_stock == sample_item.item_stock
+
     def test_add_item_to_order_multiple_times(
         self, order_service, sample_order, sample_item, clean_database, orderable_dao, item_service
     ):
@@ -130,9 +305,11 @@ class TestOrderService:
         initial_stock = sample_item.item_stock
         orderable_id = sample_item.orderable_id
 
-        updated_order = order_service.add_orderable_to_order(orderable_id, sample_order.order_id, 1)
+        order_service.add_orderable_to_order(orderable_id, sample_order.order_id, 1)
+        updated_order = order_service.get_order_by_id(sample_order.order_id)
 
-        updated_order = order_service.add_orderable_to_order(orderable_id, sample_order.order_id, 2)
+        order_service.add_orderable_to_order(orderable_id, sample_order.order_id, 2)
+        updated_order = order_service.get_order_by_id(sample_order.order_id)
 
         assert updated_order is not None
 
@@ -154,7 +331,8 @@ class TestOrderService:
 
         initial_stocks = {item.item_id: item.item_stock for item in multiple_items[:2]}
 
-        updated_order = order_service.add_orderable_to_order(orderable_id, sample_order.order_id, 1)
+        order_service.add_orderable_to_order(orderable_id, sample_order.order_id, 1)
+        updated_order = order_service.get_order_by_id(sample_order.order_id)
 
         assert updated_order is not None
         assert len(updated_order.order_orderables) == 1
@@ -201,7 +379,8 @@ class TestOrderService:
         initial_stocks = {item.item_id: item.item_stock for item in multiple_items[:2]}
 
         order_service.add_orderable_to_order(orderable_id, sample_order.order_id, 1)
-        updated_order = order_service.add_orderable_to_order(orderable_id, sample_order.order_id, 2)
+        order_service.add_orderable_to_order(orderable_id, sample_order.order_id, 2)
+        updated_order = order_service.get_order_by_id(sample_order.order_id)
 
         assert updated_order is not None
 
@@ -219,9 +398,8 @@ class TestOrderService:
         initial_stock = sample_item.item_stock
         order_service.add_orderable_to_order(orderable_id, sample_order.order_id, 3)
 
-        updated_order = order_service.remove_orderable_from_order(
-            orderable_id, sample_order.order_id, 2
-        )
+        order_service.remove_orderable_from_order(orderable_id, sample_order.order_id, 2)
+        updated_order = order_service.get_order_by_id(sample_order.order_id)
 
         assert updated_order is not None
 
@@ -237,9 +415,8 @@ class TestOrderService:
         initial_stock = sample_item.item_stock
         order_service.add_orderable_to_order(orderable_id, sample_order.order_id, 3)
 
-        updated_order = order_service.remove_orderable_from_order(
-            orderable_id, sample_order.order_id, 3
-        )
+        order_service.remove_orderable_from_order(orderable_id, sample_order.order_id, 3)
+        updated_order = order_service.get_order_by_id(sample_order.order_id)
 
         assert updated_order is not None
         assert len(updated_order.order_orderables) == 0
@@ -273,9 +450,8 @@ class TestOrderService:
 
         order_service.add_orderable_to_order(orderable_id, sample_order.order_id, 2)
 
-        updated_order = order_service.remove_orderable_from_order(
-            orderable_id, sample_order.order_id, 1
-        )
+        order_service.remove_orderable_from_order(orderable_id, sample_order.order_id, 1)
+        updated_order = order_service.get_order_by_id(sample_order.order_id)
 
         assert updated_order is not None
 
@@ -301,9 +477,8 @@ class TestOrderService:
 
         order_service.add_orderable_to_order(orderable_id, sample_order.order_id, 2)
 
-        updated_order = order_service.remove_orderable_from_order(
-            orderable_id, sample_order.order_id, 2
-        )
+        order_service.remove_orderable_from_order(orderable_id, sample_order.order_id, 2)
+        updated_order = order_service.get_order_by_id(sample_order.order_id)
 
         assert updated_order is not None
         assert len(updated_order.order_orderables) == 0
@@ -311,3 +486,23 @@ class TestOrderService:
         for item in sample_bundle.bundle_items.keys():
             updated_item = item_service.get_item_by_id(item.item_id)
             assert updated_item.item_stock == initial_stocks[item.item_id]
+
+    def test_get_revenue(self, order_service, sample_order_full, clean_database):
+        """Test getting the revenue detailed by day"""
+        order_service.mark_as_paid(sample_order_full.order_id)
+
+        revenue = order_service.get_revenue("day")
+
+        assert revenue["total"] == 6.25
+        assert len(revenue["revenues"]) == 1
+        assert revenue["revenues"][0]["nb_orders"] == 1
+
+    def test_get_revenue_invalid_period(self, order_service, clean_database):
+        """Test that a period ending before it starts is refused"""
+        with pytest.raises(ValueError, match="The start of the period must be before its end"):
+            order_service.get_revenue("day", datetime(2025, 3, 8), datetime(2025, 3, 6))
+
+    def test_get_revenue_invalid_bucket(self, order_service, clean_database):
+        """Test that an unknown bucket is refused"""
+        with pytest.raises(ValueError, match="Unknown bucket month"):
+            order_service.get_revenue("month")
@@ -0,0 +1,89 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.Model.Order import OrderState
+from src.utils.local_stripe import LocalStripeEmitter
+
+emitter = LocalStripeEmitter("whsec_test")
+
+
+class TestPaymentService:
+    def test_checkout_completed(self, payment_service, order_service, sample_order):
+        event = emitter.checkout_completed(sample_order.order_id, sample_order.order_customer_id)
+
+        assert payment_service.handle_event(event)
+
+        assert order_service.get_order_by_id(sample_order.order_id).order_state == (OrderState.PAID)
+        current_order = order_service.get_customer_current_order(sample_order.order_customer_id)
+        assert current_order.order_id != sample_order.order_id
+
+    def test_current_order_read_during_payment(
+        self, payment_service, order_service, sample_order, monkeypatch
+    ):
+        """A current order id read before the payment commits isn't kept in the cache"""
+        customer_id = sample_order.order_customer_id
+        create_order = order_service.create_order
+
+        def create_order_then_concurrent_read(customer_id):
+            new_order = create_order(customer_id)
+            # another request, outside of the transaction, still sees the unpaid order
+            with ThreadPoolExecutor(1) as executor:
+                executor.submit(order_service.get_customer_current_order_id, customer_id).result()
+            return new_order
+
+        monkeypatch.setattr(order_service, "create_order", create_order_then_concurrent_read)
+        payment_service.handle_event(emitter.checkout_completed(sample_order.order_id, customer_id))
+
+        assert order_service.get_customer_current_order_id(customer_id) != sample_order.order_id
+
+    def test_event_sent_twice(self, payment_service, order_service, sample_order):
+        event = emitter.checkout_completed(sample_order.order_id, sample_order.order_customer_id)
+
+        assert payment_service.handle_event(event)
+        assert not payment_service.handle_event(event)
+
+        orders = order_service.get_all_orders_by_customer(sample_order.order_customer_id)
+        assert len(orders) == 2
+
+    def test_order_already_paid(self, payment_service, order_service, sample_order):
+        payment_service.handle_event(
+            emitter.checkout_completed(sample_order.order_id, sample_order.order_customer_id)
+        )
+
+        assert not payment_service.handle_event(
+            emitter.checkout_completed(sample_order.order_id, sample_order.order_customer_id)
+        )
+        orders = order_service.get_all_orders_by_customer(sample_order.order_customer_id)
+        assert len(orders) == 2
+
+    def test_unpaid_session(self, payment_service, order_service, sample_order):
+        event = emitter.checkout_completed(
+            sample_order.order_id, sample_order.order_customer_id, payment_status="unpaid"
+        )
+
+        assert not payment_service.handle_event(event)
+        assert order_service.get_order_by_id(sample_order.order_id).order_state == (
+            OrderState.PENDING
+        )
+
+    def test_other_event(self, payment_service, stripe_event_dao, sample_order):
+        event = emitter.checkout_completed(sample_order.order_id, sample_order.order_customer_id)
+        event["type"] = "checkout.session.expired"
+
+        assert not payment_service.handle_event(event)
+        assert not stripe_event_dao.is_event_recorded(event["id"])
+
+    def test_event_without_order(self, payment_service, clean_database):
+        event = emitter.checkout_completed(1, 1)
+        del event["data"]["object"]["metadata"]["order_id"]
+
+        with pytest.raises(ValueError, match="no order in its session"):
+            payment_service.handle_event(event)
+
+    def test_failure_rolls_back(self, payment_service, stripe_event_dao, clean_database):
+        event = emitter.checkout_completed(order_id=9999, customer_id=1)
+
+        with pytest.raises(ValueError, match="Cannot find"):
+            payment_service.handle_event(event)
+        assert not stripe_event_dao.is_event_recorded(event["id"])
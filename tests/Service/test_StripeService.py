@@ -0,0 +1,196 @@
+import json
+import logging
+from datetime import datetime
+
+import pytest
+
+from src.Model.Order import OrderState
+from src.Service.BundleService import BundleService
+from src.Service.ItemService import ItemService
+from src.Service.StripeService import StripeService
+from src.utils.local_stripe import LocalStripeEmitter
+
+SECRET = "whsec_test"
+
+
+class TestStripeService:
+    def test_construct_event(self, stripe_service):
+        event = LocalStripeEmitter(SECRET).checkout_completed(order_id=3, customer_id=1)
+        payload, headers = LocalStripeEmitter(SECRET).request(event)
+
+        assert stripe_service.construct_event(payload, headers["Stripe-Signature"]) == event
+
+    def test_webhook_secret_required(self, stripe_price_dao, local_stripe_server, monkeypatch):
+        """Without a signing secret no payment could be confirmed: the service can't start"""
+        monkeypatch.delenv("STRIPE_WEBHOOK_SECRET")
+
+        with pytest.raises(KeyError, match="STRIPE_WEBHOOK_SECRET"):
+            StripeService(stripe_price_dao)
+
+    def test_construct_event_wrong_secret(self, stripe_service):
+        event = LocalStripeEmitter("whsec_other").checkout_completed(order_id=3, customer_id=1)
+        payload, headers = LocalStripeEmitter("whsec_other").request(event)
+
+        with pytest.raises(ValueError, match="Invalid Stripe signature"):
+            stripe_service.construct_event(payload, headers["Stripe-Signature"])
+
+    def test_construct_event_tampered(self, stripe_service):
+        emitter = LocalStripeEmitter(SECRET)
+        event = emitter.checkout_completed(order_id=3, customer_id=1)
+        payload, headers = emitter.request(event)
+        event["data"]["object"]["metadata"]["order_id"] = "4"
+
+        with pytest.raises(ValueError, match="Invalid Stripe signature"):
+            stripe_service.construct_event(json.dumps(event).encode(), headers["Stripe-Signature"])
+
+    def test_construct_event_replayed(self, stripe_service):
+        emitter = LocalStripeEmitter(SECRET)
+        payload, headers = emitter.request(
+            emitter.checkout_completed(order_id=3, customer_id=1), timestamp=1_000_000
+        )
+
+        with pytest.raises(ValueError, match="Invalid Stripe signature"):
+            stripe_service.construct_event(payload, headers["Stripe-Signature"])
+
+    def test_checkout_sends_price_ids(
+        self, stripe_service, local_stripe_server, sample_order_full, sample_bundle, multiple_items
+    ):
+        session = stripe_service.create_checkout_session(
+            sample_order_full.order_id, sample_order_full.order_customer_id, "a@b.fr"
+        )
+
+        prices = local_stripe_server.calls("/v1/prices")
+        assert sorted(int(price["unit_amount"]) for price in prices) == [200, 425]
+        assert len(local_stripe_server.calls("/v1/products")) == 2
+        (checkout,) = local_stripe_server.calls("/v1/checkout/sessions")
+        assert session["id"].startswith("cs_test")
+        assert set(checkout) >= {"line_items[0][price]", "line_items[1][price]"}
+        assert not any("price_data" in key for key in checkout)
+        catalog = stripe_service.sync_prices(
+            [multiple_items[2].orderable_id, sample_bundle.orderable_id]
+        )
+        assert {checkout["line_items[0][price]"], checkout["line_items[1][price]"]} == set(
+            catalog.values()
+        )
+        assert checkout["metadata[order_id]"] == str(sample_order_full.order_id)
+
+    def test_checkout_reuses_the_catalog(
+        self, stripe_service, local_stripe_server, sample_order_full
+    ):
+        for _ in range(2):
+            stripe_service.create_checkout_session(
+                sample_order_full.order_id, sample_order_full.order_customer_id, "a@b.fr"
+            )
+
+        assert len(local_stripe_server.calls("/v1/prices")) == 2
+        first, second = local_stripe_server.calls("/v1/checkout/sessions")
+        assert first["line_items[0][price]"] == second["line_items[0][price]"]
+
+    def test_checkout_empty_order(self, stripe_service, sample_order):
+        with pytest.raises(ValueError, match="Your order is empty"):
+            stripe_service.create_checkout_session(sample_order.order_id, 1, "a@b.fr")
+
+    def test_checkout_paid_order(self, stripe_service, sample_order_full, order_dao):
+        order_dao.update_order_state(sample_order_full.order_id, OrderState.PAID.value)
+
+        with pytest.raises(ValueError, match="already paid"):
+            stripe_service.create_checkout_session(sample_order_full.order_id, 1, "a@b.fr")
+
+    def test_repricing_an_item_syncs_its_bundles(
+        self,
+        stripe_service,
+        local_stripe_server,
+        item_dao,
+        order_dao,
+        sample_bundle,
+        multiple_items,
+    ):
+        item_service = ItemService(item_dao, order_dao, stripe_service=stripe_service)
+        item = multiple_items[0]
+
+        item_service.update_item(item.item_id, {"item_price": 5.5})
+
+        prices = local_stripe_server.calls("/v1/prices")
+        assert sorted(int(price["unit_amount"]) for price in prices) == [510, 550]
+        assert set(stripe_service.sync_prices([item.orderable_id])) == {
+            item.orderable_id,
+            sample_bundle.orderable_id,
+        }
+        assert len(local_stripe_server.calls("/v1/prices")) == 2
+
+    def test_new_bundle_is_synced(
+        self, stripe_service, local_stripe_server, bundle_dao, multiple_items
+    ):
+        bundle_service = BundleService(bundle_dao, stripe_service=stripe_service)
+
+        bundle = bundle_service.create_bundle(
+            "Menu",
+            50,
+            "Plat + Boisson",
+            datetime(2025, 1, 1),
+            datetime(2099, 1, 1),
+            {multiple_items[0]: 2},
+        )
+
+        (price,) = local_stripe_server.calls("/v1/prices")
+        assert price["unit_amount"] == "450"
+        assert price["metadata[orderable_id]"] == str(bundle.orderable_id)
+
+    def test_sync_failure_is_logged(
+        self, stripe_service, monkeypatch, item_dao, order_dao, sample_item, caplog
+    ):
+        monkeypatch.setattr("stripe.api_base", "http://127.0.0.1:9")
+        item_service = ItemService(item_dao, order_dao, stripe_service=stripe_service)
+
+        with caplog.at_level(logging.WARNING):
+            item = item_service.update_item(sample_item.item_id, {"item_price": 6.0})
+
+        assert item.item_price == 6.0
+        assert "Cannot synchronize the Stripe prices" in caplog.text
+
+    def test_renaming_an_item_updates_its_product(
+        self,
+        stripe_service,
+        local_stripe_server,
+        item_dao,
+        order_dao,
+        sample_bundle,
+        multiple_items,
+    ):
+        item_service = ItemService(item_dao, order_dao, stripe_service=stripe_service)
+        item = multiple_items[0]
+        stripe_service.sync_prices([item.orderable_id])
+        (price,) = [
+            price
+            for price in local_stripe_server.calls("/v1/prices")
+            if price["metadata[orderable_id]"] == str(item.orderable_id)
+        ]
+
+        item_service.update_item(item.item_id, {"item_name": "Galette", "item_description": ""})
+
+        assert local_stripe_server.calls(f"/v1/products/{price['product']}") == [
+            {"name": "Galette", "description": ""}
+        ]
+        assert len(local_stripe_server.calls("/v1/prices")) == 2
+
+    def test_renaming_a_bundle_updates_its_product(
+        self, stripe_service, local_stripe_server, bundle_dao, multiple_items
+    ):
+        bundle_service = BundleService(bundle_dao, stripe_service=stripe_service)
+        bundle = bundle_service.create_bundle(
+            "Menu",
+            50,
+            "Plat + Boisson",
+            datetime(2025, 1, 1),
+            datetime(2099, 1, 1),
+            {multiple_items[0]: 2},
+        )
+        (price,) = local_stripe_server.calls("/v1/prices")
+
+        bundle_service.update_bundle(
+            bundle.bundle_id, {"bundle_name": "Formule", "bundle_description": "Midi"}
+        )
+
+        assert local_stripe_server.calls(f"/v1/products/{price['product']}") == [
+            {"name": "Formule", "description": "Midi"}
+        ]
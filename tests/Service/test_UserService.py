@@ -1,8 +1,11 @@
 import re
+from unittest.mock import patch
 
 import pytest
+from email_validator import EmailUndeliverableError
 
 from src.Service.PasswordService import create_salt, hash_password
+from src.Service.UserService import parse_phone
 
 
 class TestUserService:
@@ -295,3 +298,86 @@ class TestUserService:
         assert retrieved_user is not None
         assert retrieved_user.id == admin.id
         assert retrieved_user.user_role == "admin"
+
+
+class TestIdentifierValidator:
+    def test_login_skips_deliverability(
+        self, user_service, customer_dao, sample_address, clean_database
+    ):
+        """The login path checks the syntax of the email only, without DNS lookup"""
+        salt = create_salt()
+        customer_dao.create_customer(
+            first_name="John",
+            last_name="Doe",
+            phone="+33612345678",
+            mail="john.doe@email.com",
+            password_hash=hash_password("V4lidP@ssword", salt),
+            salt=salt,
+            address_id=sample_address.address_id,
+        )
+
+        with patch(
+            "src.Service.UserService.validate_email_deliverability",
+            side_effect=AssertionError("DNS lookup on the login path"),
+        ):
+            user = user_service.login("john.doe@email.com", "V4lidP@ssword", "customer")
+
+        assert user.customer_mail == "john.doe@email.com"
+
+    def test_deliverability_cached_by_domain(self, user_service):
+        with patch("src.Service.UserService.validate_email_deliverability") as lookup:
+            first = user_service.identifier_validator("john.doe@email.com")
+            second = user_service.identifier_validator("Jane.Doe@EMAIL.com")
+
+        assert first == {"type": "email", "identifier": "john.doe@email.com"}
+        assert second == {"type": "email", "identifier": "Jane.Doe@email.com"}
+        assert lookup.call_count == 1
+
+    def test_undeliverable_domain_cached(self, user_service):
+        with patch(
+            "src.Service.UserService.validate_email_deliverability",
+            side_effect=EmailUndeliverableError("The domain name does not exist."),
+        ) as lookup:
+            first = user_service.identifier_validator("john@no-mx-domain.fr")
+            second = user_service.identifier_validator("jane@no-mx-domain.fr")
+
+        assert first is None and second is None
+        assert lookup.call_count == 1
+        assert user_service.identifier_validator("john@no-mx-domain.fr", False) is not None
+
+    def test_failed_lookup_not_cached(self, user_service):
+        """A lookup failing on the network rejects the email, without caching the domain"""
+        failure = EmailUndeliverableError("There was an error while checking the domain")
+        failure.__cause__ = OSError("Network is unreachable")
+        with patch(
+            "src.Service.UserService.validate_email_deliverability", side_effect=failure
+        ) as lookup:
+            first = user_service.identifier_validator("john@email.com")
+            second = user_service.identifier_validator("jane@email.com")
+
+        assert first is None and second is None
+        assert lookup.call_count == 2
+
+    def test_lookup_timeout_not_cached(self, user_service):
+        with patch(
+            "src.Service.UserService.validate_email_deliverability",
+            return_value={"unknown-deliverability": "timeout"},
+        ) as lookup:
+            first = user_service.identifier_validator("john@email.com")
+            second = user_service.identifier_validator("jane@email.com")
+
+        assert first is not None and second is not None
+        assert lookup.call_count == 2
+
+    def test_phone_parsing_memoized(self, user_service):
+        parse_phone.cache_clear()
+
+        first = user_service.identifier_validator("06 12 34 56 78")
+        second = user_service.identifier_validator("06 12 34 56 78")
+
+        assert first == second == {"type": "phone", "identifier": "+33612345678"}
+        assert parse_phone.cache_info().hits == 1
+        assert user_service.identifier_validator("+44 7911 123456")["identifier"] == (
+            "+447911123456"
+        )
+        assert user_service.identifier_validator("not an identifier") is None
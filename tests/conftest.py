@@ -1,18 +1,24 @@
+import os
 from datetime import datetime
+from functools import partial
 
 import pytest
+import stripe
 from dotenv import load_dotenv
 
 from src.DAO.AddressDAO import AddressDAO
 from src.DAO.AdminDAO import AdminDAO
+from src.DAO.AsyncDBConnector import AsyncDBConnector
 from src.DAO.BundleDAO import BundleDAO
 from src.DAO.CustomerDAO import CustomerDAO
-from src.DAO.DBConnector import DBConnector
 from src.DAO.DeliveryDAO import DeliveryDAO
 from src.DAO.DriverDAO import DriverDAO
+from src.DAO.GeocodeDAO import GeocodeDAO
 from src.DAO.ItemDAO import ItemDAO
 from src.DAO.OrderableDAO import OrderableDAO
 from src.DAO.OrderDAO import OrderDAO
+from src.DAO.StripeEventDAO import StripeEventDAO
+from src.DAO.StripePriceDAO import StripePriceDAO
 from src.Service.AddressService import AddressService
 from src.Service.BundleService import BundleService
 from src.Service.CustomerService import CustomerService
@@ -21,14 +27,25 @@ from src.Service.GoogleMapService import GoogleMapService
 from src.Service.ItemService import ItemService
 from src.Service.MenuService import MenuService
 from src.Service.OrderService import OrderService
+from src.Service.PaymentService import PaymentService
+from src.Service.StripeService import StripeService
 from src.Service.UserService import UserService
+from src.utils.cache import TTLCache
+from src.utils.geocoding import LocalMapsClient
+from src.utils.local_stripe import LocalStripeServer
+from src.utils.migrate import Migrator
+from src.utils.query_stats import QUERY_BUDGET_MODE, query_budget
 
 load_dotenv()
+# The query budgets of the services fail the tests which exceed them
+os.environ.setdefault(QUERY_BUDGET_MODE, "raise")
 
 
 @pytest.fixture(scope="session")
 def db_connector_test():
-    return DBConnector(test=True)
+    db_connector = AsyncDBConnector(test=True)
+    Migrator(db_connector).migrate()
+    return db_connector
 
 
 @pytest.fixture(scope="function")
@@ -45,6 +62,7 @@ def clean_database(db_connector_test):
         "Drivers",
         "Admins",
         "Addresses",
+        "Stripe_events",
     ]
 
     for table in tables:
@@ -55,6 +73,12 @@ def clean_database(db_connector_test):
     yield db_connector_test
 
 
+@pytest.fixture
+def max_queries():
+    """`with max_queries(n):` fails the test if the block makes more than n queries"""
+    return partial(query_budget, mode="raise")
+
+
 @pytest.fixture
 def orderable_dao(db_connector_test):
     return OrderableDAO(db_connector_test)
@@ -100,29 +124,73 @@ def delivery_dao(db_connector_test):
     return DeliveryDAO(db_connector_test)
 
 
+@pytest.fixture
+def stripe_event_dao(db_connector_test):
+    return StripeEventDAO(db_connector_test)
+
+
+@pytest.fixture
+def stripe_price_dao(db_connector_test):
+    return StripePriceDAO(db_connector_test)
+
+
 @pytest.fixture
 def user_service(customer_dao, driver_dao, admin_dao):
     return UserService(customer_dao, driver_dao, admin_dao)
 
 
 @pytest.fixture
-def item_service(item_dao, order_dao):
-    return ItemService(item_dao, order_dao)
+def menu_cache():
+    return TTLCache(ttl=60)
+
+
+@pytest.fixture
+def item_service(item_dao, order_dao, menu_cache):
+    return ItemService(item_dao, order_dao, menu_cache)
 
 
 @pytest.fixture
-def bundle_service(bundle_dao):
-    return BundleService(bundle_dao)
+def bundle_service(bundle_dao, menu_cache):
+    return BundleService(bundle_dao, menu_cache)
 
 
 @pytest.fixture
-def order_service(order_dao, orderable_dao, item_dao, bundle_dao):
-    return OrderService(order_dao, orderable_dao, item_dao, bundle_dao)
+def current_order_cache():
+    return TTLCache(ttl=60)
+
+
+@pytest.fixture
+def order_service(order_dao, orderable_dao, item_dao, bundle_dao, menu_cache, current_order_cache):
+    return OrderService(
+        order_dao, orderable_dao, item_dao, bundle_dao, menu_cache, current_order_cache
+    )
 
 
 @pytest.fixture
-def driver_service(delivery_dao, driver_dao, user_service, order_dao):
-    return DriverService(delivery_dao, driver_dao, order_dao, user_service)
+def local_stripe_server(monkeypatch):
+    with LocalStripeServer() as server:
+        monkeypatch.setenv("STRIPE_SECRET_KEY", "sk_test")
+        monkeypatch.setenv("STRIPE_WEBHOOK_SECRET", "whsec_test")
+        monkeypatch.setenv("BASE_URL", "http://localhost:8000/")
+        monkeypatch.setenv("STRIPE_API_BASE", server.url)
+        # restored after the test, the StripeService changes it
+        monkeypatch.setattr(stripe, "api_base", stripe.api_base)
+        yield server
+
+
+@pytest.fixture
+def stripe_service(stripe_price_dao, local_stripe_server):
+    return StripeService(stripe_price_dao)
+
+
+@pytest.fixture
+def payment_service(stripe_event_dao, order_service):
+    return PaymentService(stripe_event_dao, order_service)
+
+
+@pytest.fixture
+def driver_service(delivery_dao, driver_dao, user_service, order_dao, current_order_cache):
+    return DriverService(delivery_dao, driver_dao, order_dao, user_service, current_order_cache)
 
 
 @pytest.fixture
@@ -130,14 +198,25 @@ def google_map_service():
     return GoogleMapService()
 
 
+@pytest.fixture
+def geocode_dao(db_connector_test):
+    db_connector_test.sql_query("TRUNCATE TABLE Geocode_cache", return_type="none")
+    return GeocodeDAO(db_connector_test)
+
+
+@pytest.fixture
+def local_maps_client():
+    return LocalMapsClient()
+
+
 @pytest.fixture
 def address_service(address_dao, google_map_service):
     return AddressService(address_dao, google_map_service)
 
 
 @pytest.fixture
-def menu_service(orderable_dao, item_dao, bundle_dao):
-    return MenuService(orderable_dao, item_dao, bundle_dao)
+def menu_service(orderable_dao, item_dao, bundle_dao, menu_cache):
+    return MenuService(orderable_dao, item_dao, bundle_dao, menu_cache)
 
 
 @pytest.fixture
@@ -244,7 +323,7 @@ def sample_bundle(multiple_items, bundle_dao, clean_database):
         15,
         "Plat + Boisson",
         datetime(2024, 10, 9, 12, 30, 0),
-        datetime(2026, 10, 9, 12, 30, 0),
+        datetime(2099, 10, 9, 12, 30, 0),
         bundle_items,
         is_in_menu=True,
     )
@@ -0,0 +1,22 @@
+from src.Service.GoogleMapService import GoogleMapService
+from src.utils.backfill_coordinates import CoordinatesBackfill
+
+
+def test_backfill_coordinates(address_dao, local_maps_client, clean_database):
+    ensai = address_dao.create_address(51, "Rue Blaise Pascal", "Bruz", 35170, "France")
+    reims = address_dao.create_address(44, "Rue Pierre Maître", "Reims", 51100, "France")
+    unknown = address_dao.create_address(1, "Rue Inconnue", "Nulle Part", 99999, "France")
+    gm_service = GoogleMapService(client=local_maps_client)
+
+    report = CoordinatesBackfill(address_dao, gm_service, batch_size=2).run()
+
+    assert report == {"geocoded": 2, "not_found": 1, "outside_zone": 1}
+    assert address_dao.get_address_by_customer_id(ensai.address_id).has_coordinates
+    assert address_dao.get_address_by_customer_id(reims.address_id).address_geohash
+    assert [
+        address.address_id for address in address_dao.get_addresses_without_coordinates(10)
+    ] == [unknown.address_id]
+    # The job can be run again, only the address not found is geocoded again
+    calls = local_maps_client.geocode_calls
+    assert CoordinatesBackfill(address_dao, gm_service).run()["geocoded"] == 0
+    assert local_maps_client.geocode_calls == calls
@@ -0,0 +1,54 @@
+import pytest
+
+from src.utils.Populate.BulkUsurper import BulkUsurper, _copy_value
+from src.utils.Populate.Faker import fake
+
+
+def count(db_connector, query):
+    return db_connector.sql_query(f"SELECT COUNT(*) AS n FROM {query}", return_type="one")["n"]
+
+
+def test_populate_database(
+    db_connector_test, order_dao, customer_dao, multiple_items, sample_customer
+):
+    constraints = count(
+        db_connector_test, "pg_constraint WHERE conrelid = 'order_contents'::regclass"
+    )
+    indexes = count(db_connector_test, "pg_index WHERE indrelid = 'orders'::regclass")
+
+    report = BulkUsurper(
+        fake, db_connector_test, n_customers=50, n_drivers=3, n_orders=200, chunk_size=64
+    ).populate_database()
+
+    assert report["Customers"] == 50
+    assert report["Drivers"] == 3
+    assert report["Orders"] == 200
+    assert report["Order_contents"] == count(db_connector_test, "Order_contents")
+    assert report["rows_per_second"] > 0
+    # The foreign keys and indexes dropped during the load are back
+    assert (
+        count(db_connector_test, "pg_constraint WHERE conrelid = 'order_contents'::regclass")
+        == constraints
+    )
+    assert count(db_connector_test, "pg_index WHERE indrelid = 'orders'::regclass") == indexes
+    assert count(db_connector_test, "Customers") == 51
+    # Every order line and delivery belongs to a generated order
+    assert count(db_connector_test, "Orders WHERE order_customer_id IS NULL") == 0
+    assert report["Deliveries"] == count(db_connector_test, "Orders WHERE order_state IN (3, 4)")
+    # The rows created by the app follow the generated ones
+    order = order_dao.create_order(sample_customer.id)
+    assert order.order_id == 201
+    assert customer_dao.get_customer_by_id(sample_customer.id + 50).customer_address is not None
+    assert len(order_dao.get_all_orders(limit=10)) == 10
+
+
+def test_populate_database_needs_orderables(db_connector_test, clean_database):
+    with pytest.raises(ValueError, match="there is no orderable"):
+        BulkUsurper(fake, db_connector_test, n_orders=10).populate_database()
+
+
+def test_copy_value():
+    assert _copy_value(None) == "\\N"
+    assert _copy_value(True) == "t"
+    assert _copy_value(12.5) == "12.5"
+    assert _copy_value("Rue de l'Église\t\\\n") == "Rue de l'Église\\t\\\\\\n"
@@ -0,0 +1,71 @@
+import time
+
+import pytest
+
+from src.utils.cache import TTLCache
+
+
+def test_cache_hit_and_miss():
+    cache = TTLCache(ttl=60)
+
+    assert cache.get("menu") is None
+    cache.set("menu", [1, 2])
+
+    assert cache.get("menu") == [1, 2]
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["hit_ratio"] == 0.5
+
+
+def test_cache_entry_expires():
+    cache = TTLCache(ttl=0.05)
+    cache.set("menu", [1, 2])
+
+    time.sleep(0.06)
+
+    assert cache.get("menu") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_cache_evicts_least_recently_used():
+    cache = TTLCache(ttl=60, maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_cache_get_or_set_loads_once():
+    cache = TTLCache(ttl=60)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return "value"
+
+    assert cache.get_or_set("key", loader) == "value"
+    assert cache.get_or_set("key", loader) == "value"
+    assert len(calls) == 1
+
+
+def test_cache_invalidate_drops_stale_value():
+    """A value loaded before an invalidation must not be stored"""
+    cache = TTLCache(ttl=60)
+
+    def loader():
+        cache.invalidate()
+        return "stale"
+
+    assert cache.get_or_set("key", loader) == "stale"
+    assert cache.get("key") is None
+    assert cache.stats()["version"] == 1
+
+
+def test_cache_invalid_parameters():
+    with pytest.raises(ValueError, match="ttl must be > 0"):
+        TTLCache(ttl=0)
@@ -0,0 +1,31 @@
+import pytest
+
+from src.utils.geocoding import LocalMapsClient, distance_km, geohash, normalize_address
+
+
+def test_normalize_address():
+    assert (
+        normalize_address("  51 rue Blaise Pascal ,35170   BRUZ,France ")
+        == normalize_address("51 Rue Blaise Pascal, 35170 Bruz, France")
+        == "51 rue blaise pascal, 35170 bruz, france"
+    )
+
+
+def test_geohash():
+    assert geohash(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    assert geohash(48.0511, -1.7418).startswith(geohash(48.0512, -1.7419, 6))
+
+
+def test_distance_km():
+    # Paris - Rennes
+    assert distance_km(48.8566, 2.3522, 48.1173, -1.6778) == pytest.approx(308, abs=2)
+    assert distance_km(48.0, -1.0, 48.0, -1.0) == 0
+
+
+def test_local_maps_client():
+    client = LocalMapsClient(latency=0)
+
+    assert client.geocode("51 rue blaise pascal, 35170 bruz, france")[0]["geometry"]
+    assert client.geocode("Nowhere") == []
+    assert client.directions("ENSAI", "Nowhere") == []
+    assert client.geocode_calls == 2
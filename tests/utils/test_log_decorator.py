@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import threading
+
+import pytest
+
+from src.utils import log_decorator
+from src.utils.log_decorator import log
+
+LOGGER = "src.utils.log_decorator"
+
+
+class Expensive:
+    """Argument counting how many times it is converted to a string"""
+
+    def __init__(self):
+        self.conversions = 0
+
+    def __str__(self):
+        self.conversions += 1
+        return "expensive"
+
+
+class Service:
+    @log
+    def outer(self, value, password=None):
+        return self.inner(value)
+
+    @log
+    def inner(self, value):
+        return [value] * 5
+
+    @log
+    async def outer_async(self, value):
+        await asyncio.sleep(0)
+        return self.inner(value)
+
+    @log
+    def failing(self):
+        raise ValueError("[Service] failure")
+
+
+def messages(caplog):
+    return [record.getMessage() for record in caplog.records if record.name == LOGGER]
+
+
+def test_log_input_and_output(caplog):
+    caplog.set_level(logging.INFO, logger=LOGGER)
+
+    Service().outer(1, password="secret")
+
+    assert messages(caplog) == [
+        "    Service.outer(1, '*****') - DEBUT",
+        "        Service.inner(1,) - DEBUT",
+        "        Service.inner(1,) - FIN",
+        "           └─> Sortie : ['1', '1', '1'] ... (5 elements)",
+        "    Service.outer(1, '*****') - FIN",
+        "       └─> Sortie : ['1', '1', '1'] ... (5 elements)",
+    ]
+
+
+def test_disabled_level_formats_nothing(caplog):
+    caplog.set_level(logging.WARNING, logger=LOGGER)
+    argument = Expensive()
+
+    assert Service().inner(argument) == [argument] * 5
+    assert argument.conversions == 0
+    assert messages(caplog) == []
+
+
+def test_sampled_out_calls_not_logged(caplog, monkeypatch):
+    caplog.set_level(logging.INFO, logger=LOGGER)
+    monkeypatch.setattr(log_decorator, "LOG_SAMPLE_RATE", 0)
+    argument = Expensive()
+
+    Service().outer(argument)
+
+    assert argument.conversions == 0
+    assert messages(caplog) == []
+
+
+def test_sample_rate_read_on_first_call(caplog, monkeypatch):
+    """The rate set by the `.env` file, loaded after the imports, is the one applied"""
+    caplog.set_level(logging.INFO, logger=LOGGER)
+    monkeypatch.setattr(log_decorator, "LOG_SAMPLE_RATE", None)
+    monkeypatch.setenv("LOG_SAMPLE_RATE", "0")
+
+    Service().outer(Expensive())
+
+    assert log_decorator.LOG_SAMPLE_RATE == 0
+    assert messages(caplog) == []
+
+
+def test_indentation_reset_after_exception(caplog):
+    caplog.set_level(logging.INFO, logger=LOGGER)
+
+    with pytest.raises(ValueError):
+        Service().failing()
+    caplog.clear()
+    Service().inner(1)
+
+    assert messages(caplog)[0] == "    Service.inner(1,) - DEBUT"
+
+
+def test_indentation_per_thread(caplog):
+    """Concurrent requests do not shift the indentation of each other"""
+    caplog.set_level(logging.INFO, logger=LOGGER)
+    barrier = threading.Barrier(4)
+
+    class Slow:
+        @log
+        def call(self):
+            barrier.wait(timeout=5)
+            return None
+
+    threads = [threading.Thread(target=Slow().call) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(messages(caplog)) == 12
+    assert all(message.startswith("    ") for message in messages(caplog))
+    assert not any(message.startswith("        ") for message in messages(caplog))
+
+
+def test_async_function(caplog):
+    caplog.set_level(logging.INFO, logger=LOGGER)
+
+    async def concurrent():
+        return await asyncio.gather(*[Service().outer_async(i) for i in range(3)])
+
+    results = asyncio.run(concurrent())
+
+    assert results == [[i] * 5 for i in range(3)]
+    inner_starts = [m for m in messages(caplog) if "Service.inner" in m and "DEBUT" in m]
+    assert len(inner_starts) == 3
+    assert all(m.startswith("        Service.inner") for m in inner_starts)
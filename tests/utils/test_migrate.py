@@ -0,0 +1,102 @@
+import pytest
+from psycopg2.errors import UniqueViolation
+
+from src.utils.migrate import Migrator
+
+
+@pytest.fixture
+def migrator(db_connector_test):
+    migrator = Migrator(db_connector_test)
+    migrator.migrate()
+    return migrator
+
+
+@pytest.fixture
+def scratch_migrations(tmp_path):
+    (tmp_path / "0002_second.sql").write_text("CREATE TABLE migration_test_b (n INT);")
+    (tmp_path / "0001_first.sql").write_text("CREATE TABLE migration_test_a (n INT);")
+    (tmp_path / "README.md").write_text("not a migration")
+    return tmp_path
+
+
+class TestMigrator:
+    def test_available_migrations_sorted(self, db_connector_test, scratch_migrations):
+        migrator = Migrator(db_connector_test, str(scratch_migrations))
+
+        assert [(v, n) for v, n, _ in migrator.available_migrations()] == [
+            ("0001", "first"),
+            ("0002", "second"),
+        ]
+
+    def test_migrations_applied_once(self, migrator):
+        """Every migration is recorded and nothing is left to apply"""
+        assert "0001" in migrator.applied_versions()
+        assert migrator.pending_migrations() == []
+        assert migrator.migrate() == []
+
+    def test_failing_migration_rolled_back(self, db_connector_test, tmp_path):
+        """A failing migration leaves neither its changes nor its version"""
+        (tmp_path / "9001_broken.sql").write_text(
+            "CREATE TABLE migration_test_broken (n INT); SELECT * FROM missing_table;"
+        )
+        migrator = Migrator(db_connector_test, str(tmp_path))
+
+        with pytest.raises(Exception, match="missing_table"):
+            migrator.migrate()
+
+        assert "9001" not in migrator.applied_versions()
+        exists = db_connector_test.sql_query(
+            "SELECT to_regclass('migration_test_broken') IS NOT NULL AS exists"
+        )
+        assert exists["exists"] is False
+
+    def test_hot_path_indexes(self, migrator, db_connector_test):
+        indexes = db_connector_test.sql_query(
+            "SELECT indexname FROM pg_indexes WHERE schemaname = %s",
+            [db_connector_test.schema],
+            "all",
+        )
+        names = {index["indexname"] for index in indexes}
+
+        assert {
+            "customers_mail_key",
+            "customers_phone_key",
+            "drivers_phone_key",
+            "items_orderable_id_key",
+            "bundles_orderable_id_key",
+            "orders_customer_active_idx",
+            "orders_active_state_idx",
+            "deliveries_driver_created_at_idx",
+        } <= names
+
+    def test_unique_customer_mail(self, migrator, customer_dao, sample_customer):
+        with pytest.raises(UniqueViolation):
+            customer_dao.create_customer(
+                "Other",
+                "Customer",
+                "+33700000000",
+                sample_customer.customer_mail,
+                "hash",
+                "salt",
+                sample_customer.customer_address.address_id,
+            )
+
+    def test_order_unit_prices_added_to_baseline_schema(self, migrator, db_connector_test):
+        """A database created before the prices were frozen gets the column"""
+        migrations = migrator.available_migrations()
+        (path,) = [path for version, _, path in migrations if version == "0007"]
+        with open(path, encoding="utf-8") as migration:
+            add_column = migration.read()
+
+        with pytest.raises(RuntimeError, match="rolled back"):
+            with db_connector_test.transaction() as cursor:
+                cursor.execute("ALTER TABLE Order_contents DROP COLUMN orderable_unit_price")
+                cursor.execute(add_column)
+                cursor.execute(
+                    "SELECT data_type FROM information_schema.columns "
+                    "WHERE table_schema = %s AND table_name = 'order_contents' "
+                    "AND column_name = 'orderable_unit_price'",
+                    [db_connector_test.schema],
+                )
+                assert cursor.fetchone()["data_type"] == "double precision"
+                raise RuntimeError("rolled back")
@@ -0,0 +1,184 @@
+import asyncio
+import contextvars
+import json
+
+import pytest
+
+from src.Model.Order import OrderState
+from src.utils.order_events import (
+    KEEPALIVE_COMMENT,
+    RESYNC,
+    OrderEventHub,
+    event_stream,
+    format_sse,
+    order_events_channel,
+)
+
+
+@pytest.fixture
+def hub(db_connector_test):
+    return OrderEventHub(db_connector_test)
+
+
+@pytest.fixture
+def run_async(db_connector_test, hub):
+    """Run a coroutine in a fresh event loop, stopping the hub of that loop afterwards"""
+
+    def run(coroutine):
+        async def main():
+            try:
+                return await asyncio.wait_for(coroutine, 10)
+            finally:
+                await hub.close()
+
+        return asyncio.run(main())
+
+    return run
+
+
+def test_format_sse():
+    assert format_sse("removed", {"order_id": 1}) == 'event: removed\ndata: {"order_id": 1}\n\n'
+
+
+def test_transition_is_notified_on_commit(db_connector_test, order_dao, sample_order, run_async):
+    """Test a state transition is notified with its previous state, once committed"""
+    channel = order_events_channel(db_connector_test.schema)
+
+    async def listen():
+        connection = await db_connector_test.listen(channel)
+        async with connection:
+            with pytest.raises(RuntimeError):
+                with db_connector_test.transaction():
+                    order_dao.update_order_state(sample_order.order_id, OrderState.CANCELLED.value)
+                    raise RuntimeError("rolled back")
+            order_dao.update_order_state(sample_order.order_id, OrderState.PAID.value)
+            return [
+                json.loads(notify.payload)
+                async for notify in connection.notifies(timeout=2, stop_after=2)
+            ]
+
+    events = run_async(listen())
+
+    assert events == [
+        {
+            "order_id": sample_order.order_id,
+            "order_customer_id": sample_order.order_customer_id,
+            "order_state": "PAID",
+            "previous_state": "PENDING",
+        }
+    ]
+
+
+def test_hub_fans_out(hub, order_dao, sample_order, run_async):
+    """Test every subscriber receives the event, after the listeners"""
+    heard = []
+    hub.add_listener(heard.append)
+
+    async def subscribe_twice():
+        async with hub.subscribe() as first, hub.subscribe() as second:
+            assert await first.get() is RESYNC and await second.get() is RESYNC
+            await asyncio.to_thread(
+                order_dao.update_order_state, sample_order.order_id, OrderState.PAID.value
+            )
+            return await first.get(), await second.get()
+
+    first, second = run_async(subscribe_twice())
+
+    assert first == second == heard[0]
+    assert first["order_state"] == "PAID"
+    assert hub.subscribers == 0
+
+
+def test_hub_resyncs_slow_subscriber(db_connector_test, order_dao, sample_order):
+    """Test a subscriber which can't keep up is sent a resync instead of its events"""
+    hub = OrderEventHub(db_connector_test, queue_size=1)
+    heard = []
+    hub.add_listener(heard.append)
+
+    async def lag_behind():
+        try:
+            async with hub.subscribe() as queue:
+                assert await queue.get() is RESYNC
+                for state in (OrderState.PAID, OrderState.CANCELLED):
+                    await asyncio.to_thread(
+                        order_dao.update_order_state, sample_order.order_id, state.value
+                    )
+                while len(heard) < 2:
+                    await asyncio.sleep(0.05)
+                return [queue.get_nowait() for _ in range(queue.qsize())]
+        finally:
+            await hub.close()
+
+    assert asyncio.run(asyncio.wait_for(lag_behind(), 10)) == [RESYNC]
+
+
+def test_event_stream(hub, order_dao, sample_order, run_async):
+    """Test a stream sends its snapshot, then the deltas of the events"""
+
+    async def stream():
+        messages = event_stream(
+            hub,
+            lambda: ("snapshot", []),
+            lambda event: ("updated", {"order_state": event["order_state"]}),
+            keepalive=0.1,
+        )
+        received = [await anext(messages)]
+        while not received[-1].startswith("event: snapshot"):
+            received.append(await anext(messages))
+        await asyncio.to_thread(
+            order_dao.update_order_state, sample_order.order_id, OrderState.PAID.value
+        )
+        async for message in messages:
+            received.append(message)
+            if message.startswith("event: updated"):
+                break
+        await messages.aclose()
+        return received
+
+    received = run_async(stream())
+
+    snapshot = received.index(format_sse("snapshot", []))
+    assert received[-1] == format_sse("updated", {"order_state": "PAID"})
+    assert set(received[:snapshot] + received[snapshot + 1 : -1]) <= {KEEPALIVE_COMMENT}
+
+
+def test_listener_runs_outside_the_subscriber_context(hub, order_dao, sample_order, run_async):
+    """Test the listeners don't see the context (e.g. transaction) of the first subscriber"""
+    request_id = contextvars.ContextVar("request_id", default=None)
+    heard = []
+    hub.add_listener(lambda event: heard.append(request_id.get()))
+
+    async def subscribe():
+        request_id.set(1)
+        async with hub.subscribe() as queue:
+            assert await queue.get() is RESYNC
+            await asyncio.to_thread(
+                order_dao.update_order_state, sample_order.order_id, OrderState.PAID.value
+            )
+            await queue.get()
+
+    run_async(subscribe())
+
+    assert heard == [None]
+
+
+class UnreachableDatabase:
+    schema = "unreachable"
+
+    async def listen(self, channel):
+        await asyncio.Event().wait()
+
+
+def test_event_stream_keepalive_while_connecting():
+    """Test a stream is kept alive, without snapshot, until the hub listens"""
+    hub = OrderEventHub(UnreachableDatabase())
+
+    async def stream():
+        messages = event_stream(hub, lambda: ("snapshot", []), lambda event: None, keepalive=0.05)
+        try:
+            return [await anext(messages), await anext(messages)]
+        finally:
+            await messages.aclose()
+            await hub.close()
+
+    assert asyncio.run(asyncio.wait_for(stream(), 10)) == [KEEPALIVE_COMMENT] * 2
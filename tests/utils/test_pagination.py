@@ -0,0 +1,46 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from src.utils.pagination import decode_cursor, encode_cursor, next_cursor
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2025, 3, 14, 12, 30, 15, 123456)
+
+    cursor = encode_cursor(created_at, 42)
+
+    assert decode_cursor(cursor, (datetime, int)) == (created_at, 42)
+
+
+def test_cursor_keeps_timezone():
+    created_at = datetime(2025, 3, 14, 12, 30, tzinfo=timezone.utc)
+
+    assert decode_cursor(encode_cursor(created_at, 1), (datetime, int))[0] == created_at
+
+
+def test_cursor_is_url_safe():
+    cursor = encode_cursor("?&/+=", 10**12)
+
+    assert all(char.isalnum() or char in "-_" for char in cursor)
+
+
+def test_no_cursor_is_first_page():
+    assert decode_cursor(None, (int,)) is None
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    ["not-a-cursor", "", "%%%", encode_cursor(1, 2), encode_cursor("abc"), encode_cursor()],
+)
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError, match=r"\[Pagination\] Invalid cursor."):
+        decode_cursor(cursor, (int,))
+
+
+def test_next_cursor_only_on_full_page():
+    rows = [{"id": 1}, {"id": 2}, {"id": 3}]
+
+    assert next_cursor(rows, 3, lambda row: (row["id"],)) == encode_cursor(3)
+    assert next_cursor(rows, 4, lambda row: (row["id"],)) is None
+    assert next_cursor([], 3, lambda row: (row["id"],)) is None
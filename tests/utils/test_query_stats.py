@@ -0,0 +1,136 @@
+import json
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.utils.query_stats import (
+    QueryBudgetExceeded,
+    QueryMetrics,
+    QueryStats,
+    QueryStatsMiddleware,
+    current_query_stats,
+    query_budget,
+    record_query,
+    track_queries,
+)
+
+
+def test_queries_are_recorded_in_the_current_block(db_connector_test):
+    record_query("SELECT 1", 0.5, 1)
+
+    with track_queries() as stats:
+        db_connector_test.sql_query("SELECT * FROM generate_series(1, 3)", return_type="all")
+        with db_connector_test.transaction() as cursor:
+            cursor.execute("SELECT pg_sleep(0.01)")
+
+    assert current_query_stats() is None
+    assert stats.count == 2
+    assert stats.rows == 4
+    assert stats.duration >= stats.slowest_duration >= 0.01
+    assert "pg_sleep" in stats.slowest_statement
+
+
+def test_nested_blocks_record_the_same_queries():
+    with track_queries() as request:
+        record_query("SELECT 1", 0.001, 1)
+        with track_queries() as block:
+            record_query("SELECT 2", 0.001, 2)
+
+    assert (request.count, request.rows) == (2, 3)
+    assert (block.count, block.rows) == (1, 2)
+
+
+def test_query_budget(max_queries):
+    with max_queries(2) as stats:
+        record_query("SELECT 1", 0.001, 1)
+        record_query("SELECT 2", 0.001, 1)
+
+    assert stats.count == 2
+    with pytest.raises(QueryBudgetExceeded, match=r"listing made 3 queries, its budget is 2"):
+        with max_queries(2, "listing"):
+            for _ in range(3):
+                record_query("SELECT 1", 0.001, 1)
+
+
+def test_query_budget_warns_in_staging(monkeypatch, caplog):
+    monkeypatch.setenv("QUERY_BUDGET_MODE", "warn")
+
+    @query_budget(1, "listing")
+    def listing():
+        record_query("SELECT 1", 0.001, 1)
+        record_query("SELECT 2", 0.002, 1)
+        return "items"
+
+    with caplog.at_level(logging.WARNING, logger="src.utils.query_stats"):
+        assert listing() == "items"
+
+    assert "[QueryBudget] listing made 2 queries, its budget is 1 (slowest: SELECT 2)" in (
+        caplog.text
+    )
+
+
+def test_server_timing():
+    stats = QueryStats()
+    stats.record("SELECT 1", 0.002, 1)
+    stats.record("SELECT\n   2", 0.004, 3)
+
+    assert stats.server_timing() == 'db;dur=6.00;desc="2 queries, 4 rows", db-slowest;dur=4.00'
+    assert stats.to_dict()["slowest_statement"] == "SELECT 2"
+
+
+def test_metrics_histograms():
+    metrics = QueryMetrics()
+    for count in (1, 4, 4, 150):
+        stats = QueryStats()
+        for _ in range(count):
+            stats.record("SELECT 1", 0.001, 1)
+        metrics.observe("/menu", stats)
+
+    snapshot = metrics.snapshot()["/menu"]
+
+    assert snapshot["requests"] == 4
+    assert snapshot["queries"]["buckets"]["<=1"] == 1
+    assert snapshot["queries"]["buckets"]["<=5"] == 2
+    assert snapshot["queries"]["buckets"][">100"] == 1
+    assert snapshot["queries"]["max"] == 150
+
+
+def test_middleware(db_connector_test, caplog):
+    metrics = QueryMetrics()
+    app = FastAPI()
+    admin_app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    def get_item(item_id: int):
+        db_connector_test.sql_query("SELECT %s AS id", [item_id])
+        db_connector_test.sql_query("SELECT 1")
+        return {"id": item_id}
+
+    @admin_app.get("/orders")
+    async def get_orders():
+        return []
+
+    app.mount("/admin", admin_app)
+    app.add_middleware(QueryStatsMiddleware, metrics=metrics)
+    client = TestClient(app)
+
+    with caplog.at_level(logging.INFO, logger="src.utils.query_stats"):
+        response = client.get("/items/3")
+        client.get("/items/4")
+        client.get("/admin/orders")
+        client.get("/unknown")
+
+    assert response.json() == {"id": 3}
+    assert response.headers["server-timing"].startswith("db;dur=")
+    assert 'desc="2 queries, 2 rows"' in response.headers["server-timing"]
+    snapshot = metrics.snapshot()
+    assert snapshot["/items/{item_id}"]["requests"] == 2
+    assert snapshot["/items/{item_id}"]["queries"]["buckets"]["<=2"] == 2
+    assert snapshot["/admin/orders"]["queries"]["total"] == 0
+    assert snapshot["unmatched"]["requests"] == 1
+    line = json.loads(caplog.records[0].getMessage())
+    assert line["route"] == "/items/{item_id}"
+    assert line["status"] == 200
+    assert line["queries"] == 2
@@ -0,0 +1,102 @@
+from datetime import datetime
+
+import pytest
+
+from src.utils.Populate.Faker import fake
+
+np = pytest.importorskip("numpy")
+
+from src.utils.Populate.VectorizedUsurper import (  # noqa: E402
+    VectorizedUsurper,
+    _distinct,
+    _init_worker,
+    order_times,
+)
+
+NOW = datetime(2026, 1, 1, 9, 30)
+
+
+def generate_orders(seed):
+    usurper = VectorizedUsurper(fake, None, n_orders=500, chunk_size=300, seed=seed, now=NOW)
+    _init_worker(usurper.vocabulary())
+    usurper.executor = None
+    return list(usurper._order_chunks(1, range(1, 51), range(1, 4), [1, 2, 3, 4, 5, 6]))
+
+
+def test_orders_are_reproducible():
+    chunks = generate_orders(seed=7)
+
+    assert chunks == generate_orders(seed=7)
+    assert chunks != generate_orders(seed=8)
+    assert sum(chunk["Orders"][0] for chunk in chunks) == 500
+
+
+def test_order_lines_are_distinct_orderables():
+    lines = "".join(chunk["Order_contents"][1] for chunk in generate_orders(seed=7))
+    keys = [tuple(line.split("\t")[:2]) for line in lines.splitlines()]
+
+    assert len(keys) == len(set(keys))
+    assert {int(orderable_id) for _, orderable_id in keys} <= {1, 2, 3, 4, 5, 6}
+
+
+def test_vocabulary_does_not_hash_faker_passwords(monkeypatch):
+    monkeypatch.setattr(fake, "create_hash_password", lambda _: pytest.fail("password hashed"))
+    usurper = VectorizedUsurper(fake, None, seed=7, now=NOW)
+
+    vocabulary = usurper.vocabulary()
+
+    assert len(vocabulary.password_hashes) == len(vocabulary.salts)
+
+
+def test_distinct_memory_does_not_grow_with_population():
+    picked = _distinct(np.random.default_rng(0), 1000, 10**12, 3)
+
+    assert picked.shape == (1000, 3)
+    assert (picked < 10**12).all()
+    assert all(len(set(row)) == 3 for row in picked.tolist())
+
+
+def test_order_times_peak_at_lunch_and_dinner():
+    now = int((NOW - datetime(1970, 1, 1)).total_seconds())
+
+    times = order_times(np.random.default_rng(0), 10_000, now, 30)
+
+    hours = times % 86400 / 3600
+    assert times.max() < now - now % 86400
+    assert times.min() >= now - 31 * 86400
+    assert ((hours >= 10) & (hours <= 23)).all()
+    assert ((hours >= 11) & (hours < 14) | (hours >= 18) & (hours < 22)).mean() > 0.8
+
+
+def test_populate_database(db_connector_test, multiple_items, sample_driver):
+    report = VectorizedUsurper(
+        fake, db_connector_test, n_customers=40, n_drivers=2, n_orders=300, chunk_size=100, now=NOW
+    ).populate_database()
+
+    assert report["Customers"] == 40
+    assert report["Orders"] == 300
+    deliveries = db_connector_test.sql_query(
+        "SELECT COUNT(*) AS n FROM Deliveries WHERE delivery_driver_id > %s",
+        [sample_driver.id],
+        "one",
+    )
+    assert deliveries["n"] == report["Deliveries"] > 0
+
+
+def test_populate_database_samples_vocabulary_once(db_connector_test, multiple_items, monkeypatch):
+    usurper = VectorizedUsurper(
+        fake, db_connector_test, n_customers=10, n_drivers=1, n_orders=20, now=NOW
+    )
+    vocabulary = usurper.vocabulary()
+    monkeypatch.setattr(fake, "first_name", lambda: pytest.fail("vocabulary sampled again"))
+
+    usurper.populate_database()
+
+    assert usurper.vocabulary() is vocabulary
+    first_names = db_connector_test.sql_query(
+        "SELECT DISTINCT customer_first_name AS name FROM Customers "
+        "WHERE customer_mail LIKE 'customer.%@example.com'",
+        return_type="all",
+    )
+    assert first_names
+    assert {row["name"] for row in first_names} <= set(vocabulary.first_names)